@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.db_router.ReplicaPinMiddleware',  # Read-your-writes con réplicas de lectura
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,9 +62,21 @@ TEMPLATES = [
 WSGI_APPLICATION = 'DloubApp.wsgi.application'
 
 # Base de datos
+# Conexiones persistentes (DLOUB_DB_CONN_MAX_AGE segundos; 0 = cerrar al acabar cada petición)
+# con comprobación de salud antes de reutilizarlas, iguales para todos los perfiles.
+# DLOUB_DB_POOL=1 activa el pool de conexiones (ODBC en SQL Server, nativo en PostgreSQL).
+# Métricas de conexión: api/db_pool.py y GET /api/system/db-pool/.
+DB_CONN_MAX_AGE = int(os.environ.get('DLOUB_DB_CONN_MAX_AGE', '60'))
+DB_POOL = os.environ.get('DLOUB_DB_POOL', '1') == '1'
+DB_ODBC_POOLING = DB_POOL
+DB_CONNECTION = {
+    'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+    'CONN_HEALTH_CHECKS': True,
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'mssql',
+        'ENGINE': 'api.db_backends.mssql',  # mssql-django + métricas y pool ODBC
         'NAME': 'prueba_dloub_api2',
         'HOST': r'DORUAIN-SDO\DORUAIN',  # Usa una cadena cruda (r"")
         'PORT': '1433',
@@ -71,9 +84,80 @@ DATABASES = {
             'driver': 'ODBC Driver 17 for SQL Server',
             'Trusted_Connection': 'yes',
         },
+        **DB_CONNECTION,
+    }
+}
+
+# Perfil local para tests y benchmarks (DLOUB_DB_PROFILE=sqlite)
+if os.environ.get('DLOUB_DB_PROFILE') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api.db_backends.sqlite3',
+            'NAME': os.environ.get('DLOUB_SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')),
+            **DB_CONNECTION,
+        }
+    }
+
+# Perfil local PostgreSQL (DLOUB_DB_PROFILE=postgres, requiere psycopg[pool] para el pool)
+# El pool nativo de Django no admite conexiones persistentes: con él CONN_MAX_AGE es 0.
+if os.environ.get('DLOUB_DB_PROFILE') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api.db_backends.postgresql',
+            'NAME': os.environ.get('DLOUB_PG_NAME', 'dloub'),
+            'USER': os.environ.get('DLOUB_PG_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DLOUB_PG_PASSWORD', ''),
+            'HOST': os.environ.get('DLOUB_PG_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DLOUB_PG_PORT', '5432'),
+            **DB_CONNECTION,
+        }
+    }
+    if DB_POOL:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {'min_size': 2, 'max_size': int(os.environ.get('DLOUB_DB_POOL_SIZE', '10')), 'timeout': 10},
+        }
+
+# Réplicas de lectura (DLOUB_DB_REPLICAS=host1,host2; en el perfil sqlite, rutas de archivo)
+# Listados, exportaciones, dashboard e informes leen de ellas (api/db_router.py); en tests
+# son espejos de 'default'.
+REPLICA_DATABASES = []
+for _index, _location in enumerate(filter(None, os.environ.get('DLOUB_DB_REPLICAS', '').split(','))):
+    _alias = f'replica_{_index + 1}'
+    DATABASES[_alias] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    DATABASES[_alias]['NAME' if 'sqlite' in DATABASES['default']['ENGINE'] else 'HOST'] = _location.strip()
+    REPLICA_DATABASES.append(_alias)
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+REPLICA_MAX_LAG_SECONDS = 10  # Réplicas más retrasadas no se usan
+REPLICA_HEALTH_INTERVAL = 30  # Cada cuánto se vuelve a medir el retraso (por proceso)
+REPLICA_PIN_SECONDS = 15  # Lecturas del usuario al primario tras una escritura
+
+# Caché compartida (DLOUB_CACHE_BACKEND=locmem|file|redis, ubicación en DLOUB_CACHE_LOCATION)
+# locmem es por proceso: con varios workers usar file o redis para que las invalidaciones
+# por señales lleguen a todos (ver api/model_cache.py).
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'dloub-default'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),  # Requiere redis-py
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('DLOUB_CACHE_BACKEND', 'locmem')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('DLOUB_CACHE_LOCATION', _cache_location),
+        'TIMEOUT': 300,
+        'KEY_PREFIX': 'dloub',
     }
 }
 
+# Caché de tablas pequeñas (roles, categorías, métodos de pago...): segundos de vida máxima
+# aunque no llegue ninguna invalidación (cambios con update()/bulk_create no disparan señales)
+MODEL_CACHE_TIMEOUT = 60 * 60
+
+# Principal de sesión (usuario, roles y puesto) de /users/me/ y /auth/check/: segundos de vida
+# máxima de cada entrada; los cambios de usuario, perfil o roles la invalidan antes
+PRINCIPAL_CACHE_TIMEOUT = 15 * 60
+
 # Validadores de contraseña
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registra las señales del catálogo publicado, del índice de búsqueda, de vistas previas,
+        # de los contadores de carga de trabajo, del motor de SLA, de la máquina de estados
+        # de la caché de tablas pequeñas y del principal de sesión
+        from . import (  # noqa: F401
+            catalog_snapshot, form_analytics, model_cache, previews, principal, search, sla, state_machine, workload,
+        )
@@ -0,0 +1,471 @@
+# api/catalog_import.py
+"""
+Motor de importación masiva del catálogo (categorías, campañas, servicios,
+precios y características) a partir de DataFrames de pandas.
+
+- Limpieza de columnas vectorizada (sin iterrows()).
+- Una query por tabla para precargar las claves existentes.
+- Separación en conjuntos bulk_create / bulk_update (solo filas con cambios).
+- Informe de diferencias por tabla y por campo.
+- Modo incremental (CatalogSync): checksum de archivo/hoja y hash por fila
+  de origen; solo se procesan las filas cuyo contenido cambió.
+"""
+import hashlib
+import logging
+from collections import Counter
+from decimal import Decimal
+
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from .catalog_snapshot import invalidate_catalog_snapshot
+from .search import reindex_on_commit
+from .models import (
+    AuditLog, Campaign, CatalogSyncState, Price, Service, ServiceCategory, ServiceFeature, build_audit_log,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+PRICE_CURRENCIES = ['USD', 'CLP', 'COP']
+DATETIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%d-%m-%Y %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y')
+NULL_TOKENS = {'', 'nan', 'none', '<na>'}
+
+
+class CatalogImportError(Exception):
+    """Error de datos que impide completar la importación del catálogo."""
+
+
+# --- Limpieza vectorizada de columnas ---
+
+def column(df, name):
+    """ Devuelve la columna como Series de texto (vacía si la hoja no la tiene). """
+    if name in df.columns:
+        return df[name].astype('string')
+    return pd.Series(pd.NA, index=df.index, dtype='string')
+
+def clean_string_series(series):
+    """ strip(), '12.0' -> '12' y tokens nulos ('nan', 'None', '') -> None. """
+    s = series.astype('string').str.strip().str.replace(r'^(-?\d+)\.0$', r'\1', regex=True)
+    s = s.mask(s.isna() | s.str.lower().isin(NULL_TOKENS))
+    return s.astype(object).where(s.notna(), None)
+
+def clean_bool_series(series, true_values=('1', 'enable', 'y')):
+    s = series.astype('string').str.strip()
+    true_values = list(true_values)
+    return (s.isin(true_values) | s.str.lower().isin(true_values)).fillna(False).astype(bool)
+
+def clean_decimal_series(series, default=Decimal('0.00')):
+    s = clean_string_series(series)
+    valid = pd.to_numeric(s, errors='coerce').notna()
+    return pd.Series(
+        [Decimal(v) if ok else default for v, ok in zip(s, valid)], index=series.index, dtype=object
+    )
+
+def clean_datetime_series(series):
+    s = clean_string_series(series)
+    parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    for fmt in DATETIME_FORMATS:
+        parsed = parsed.fillna(pd.to_datetime(s, format=fmt, errors='coerce'))
+    tz = timezone.get_current_timezone()
+    return pd.Series(
+        [timezone.make_aware(v.to_pydatetime(), tz) if not pd.isna(v) else None for v in parsed],
+        index=series.index, dtype=object
+    )
+
+
+class CatalogImporter:
+    """
+    Aplica los DataFrames de un libro de catálogo sobre la base de datos.
+
+    `report` queda con, por tabla: created (claves), updated ({clave: {campo: [antes, después]}}),
+    deleted (claves), unchanged (conteo) y skipped (conteo).
+    """
+    def __init__(self, log=None):
+        self.log = log or (lambda message, level='info': logger.info(message) if level == 'info' else logger.warning(message))
+        self.report = {}
+        self.audit_entries = []
+
+    def _table_report(self, table):
+        return self.report.setdefault(table, {'created': [], 'updated': {}, 'deleted': [], 'unchanged': 0, 'skipped': 0})
+
+    @transaction.atomic
+    def run(self, dfs):
+        """ dfs: dict con las claves categories, campaigns, services, details, prices, features. """
+        self.import_categories(dfs['categories'])
+        self.import_campaigns(dfs['campaigns'])
+        loaded_services = self.import_services(dfs['services'], dfs['details'])
+        self.import_prices(dfs['prices'], loaded_services)
+        self.import_features(dfs['features'], loaded_services)
+        if self.audit_entries:
+            AuditLog.objects.bulk_create(self.audit_entries, batch_size=BATCH_SIZE)
+        # bulk_create/bulk_update no emiten señales: invalidar el catálogo publicado y reindexar explícitamente
+        invalidate_catalog_snapshot()
+        self.reindex_search()
+        return self.report
+
+    def reindex_search(self):
+        """ Reindexa (al confirmar) los servicios creados/actualizados y los de categorías renombradas. """
+        services = self._table_report('services')
+        touched = set(services['created']) | set(services['updated'])
+        renamed = [code for code, diff in self._table_report('categories')['updated'].items() if 'name' in diff]
+        if renamed:
+            touched.update(Service.objects.filter(category_id__in=renamed).values_list('code', flat=True))
+        reindex_on_commit('service', sorted(touched))
+
+    # --- Upsert genérico ---
+
+    def upsert(self, table, model, rows, audited=False):
+        """
+        rows: {pk: {campo: valor}} ya limpios. Una query de precarga (in_bulk),
+        bulk_create para las claves nuevas y bulk_update solo de las filas que cambian.
+        """
+        report = self._table_report(table)
+        existing = model.objects.in_bulk(list(rows)) if rows else {}
+        pk_name = model._meta.pk.attname
+        to_create, to_update, update_fields = [], [], set()
+
+        for key, values in rows.items():
+            obj = existing.get(key)
+            if obj is None:
+                to_create.append(model(**{pk_name: key}, **values))
+                report['created'].append(key)
+                continue
+            diff = {f: [getattr(obj, f), v] for f, v in values.items() if getattr(obj, f) != v}
+            if not diff:
+                report['unchanged'] += 1
+                continue
+            for f, (_, new) in diff.items():
+                setattr(obj, f, new)
+            update_fields.update(diff)
+            to_update.append(obj)
+            report['updated'][key] = diff
+
+        if to_create:
+            model.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            model.objects.bulk_update(to_update, sorted(update_fields), batch_size=BATCH_SIZE)
+        if audited:
+            self.audit_entries.extend(build_audit_log(obj, "Creado") for obj in to_create)
+            self.audit_entries.extend(
+                build_audit_log(obj, "Actualizado", {'changes': {f: [str(a), str(b)] for f, (a, b) in report['updated'][obj.pk].items()}})
+                for obj in to_update
+            )
+        return {obj.pk: obj for obj in to_create + to_update}
+
+    # --- Tablas ---
+
+    def import_categories(self, df):
+        data = pd.DataFrame({'code': clean_string_series(column(df, 'code')), 'name': clean_string_series(column(df, 'nombre'))})
+        valid = data['code'].notna() & data['name'].notna()
+        self._table_report('categories')['skipped'] += int((~valid).sum())
+        rows = {r.code: {'name': r.name} for r in data[valid].drop_duplicates('code', keep='last').itertuples(index=False)}
+        self.upsert('categories', ServiceCategory, rows)
+
+    def import_campaigns(self, df):
+        data = pd.DataFrame({
+            'code': clean_string_series(column(df, 'campaign_code')),
+            'campaign_name': clean_string_series(column(df, 'campaign_name')),
+            'start_date': clean_datetime_series(column(df, 'start_date')),
+            'end_date': clean_datetime_series(column(df, 'end_date')),
+            'description': clean_string_series(column(df, 'description')),
+            'budget': clean_decimal_series(column(df, 'budget')),
+            'is_active': clean_bool_series(column(df, 'is_active'), true_values=('1', 'TRUE', 'True')),
+        })
+        valid = data['code'].notna() & data['campaign_name'].notna()
+        missing_start = valid & data['start_date'].isna()
+        for idx in data.index[missing_start]:
+            self.log(f" Campaña Fila {idx + 2}: Fecha inicio inválida para {data.at[idx, 'code']}. Saltando.", 'error')
+        valid &= ~missing_start
+        self._table_report('campaigns')['skipped'] += int((~valid).sum())
+        records = data[valid].drop_duplicates('code', keep='last').set_index('code').to_dict('index')
+        self.upsert('campaigns', Campaign, records, audited=True)
+
+    def import_services(self, df, df_details):
+        details = pd.DataFrame({
+            'code': clean_string_series(column(df_details, 'code')),
+            'audience': clean_string_series(column(df_details, 'audience')),
+            'detailed_description': clean_string_series(column(df_details, 'description')),
+            'problem_solved': clean_string_series(column(df_details, 'resuelve')),
+        }).dropna(subset=['code']).drop_duplicates('code', keep='first')
+        data = pd.DataFrame({
+            'code': clean_string_series(column(df, 'code')),
+            'category_id': clean_string_series(column(df, 'service_')),
+            'campaign_id': clean_string_series(column(df, 'campaign_code')),
+            'name': clean_string_series(column(df, 'name')),
+            'is_active': clean_bool_series(column(df, 'is_active'), true_values=('1',)),
+            'ventulab': clean_bool_series(column(df, 'ventulab'), true_values=('enable',)),
+            'is_package': clean_bool_series(column(df, 'is_package'), true_values=('Y', 'y')),
+            'is_subscription': clean_bool_series(column(df, 'is_subscription')),
+        })
+        data = data.merge(details, on='code', how='left')
+        data[['audience', 'detailed_description', 'problem_solved']] = (
+            data[['audience', 'detailed_description', 'problem_solved']].astype(object).where(data[['audience', 'detailed_description', 'problem_solved']].notna(), None)
+        )
+
+        report = self._table_report('services')
+        valid = data['code'].notna() & data['category_id'].notna() & data['name'].notna()
+        report['skipped'] += int((~valid).sum())
+        data = data[valid]
+
+        category_codes = set(ServiceCategory.objects.filter(code__in=data['category_id'].unique().tolist()).values_list('code', flat=True))
+        unknown_category = ~data['category_id'].isin(category_codes)
+        for idx, row in data[unknown_category].iterrows():
+            self.log(f" Serv Fila {idx + 2}: Cat '{row['category_id']}' no encontrada para {row['code']}. Saltando.", 'error')
+        report['skipped'] += int(unknown_category.sum())
+        data = data[~unknown_category]
+
+        campaign_codes = set(Campaign.objects.filter(campaign_code__in=data['campaign_id'].dropna().unique().tolist()).values_list('campaign_code', flat=True))
+        unknown_campaign = data['campaign_id'].notna() & ~data['campaign_id'].isin(campaign_codes)
+        for idx, row in data[unknown_campaign].iterrows():
+            self.log(f" Serv Fila {idx + 2}: Campaña '{row['campaign_id']}' no encontrada para {row['code']}.", 'warning')
+        data.loc[unknown_campaign, 'campaign_id'] = None
+
+        records = data.drop_duplicates('code', keep='last').set_index('code').to_dict('index')
+        self.upsert('services', Service, records, audited=True)
+        return set(records)
+
+    def import_prices(self, df, loaded_services):
+        """ Precios del día: crea/actualiza los positivos y elimina los de hoy que ya no vienen (o vienen a 0). """
+        report = self._table_report('prices')
+        effective_date = timezone.localdate()
+        codes = clean_string_series(column(df, 'dloub_id'))
+        report['skipped'] += int(codes.isna().sum())
+
+        missing = sorted(set(codes.dropna()) - loaded_services)
+        if missing:
+            raise CatalogImportError(f"Servicio(s) {', '.join(missing)} no encontrado(s) en la carga de servicios. Verifica la hoja 'service'.")
+
+        long = pd.concat([
+            pd.DataFrame({'service_id': codes, 'currency': currency, 'amount': clean_decimal_series(column(df, currency))})
+            for currency in PRICE_CURRENCIES
+        ], ignore_index=True).dropna(subset=['service_id'])
+        positive = long['amount'].map(lambda d: d > 0)
+        report['skipped'] += int((~positive).sum())
+        incoming = {(r.service_id, r.currency): r.amount for r in long[positive].itertuples(index=False)}
+
+        sheet_services = set(codes.dropna())
+        existing = {
+            (p.service_id, p.currency): p
+            for p in Price.objects.filter(service_id__in=list(sheet_services), effective_date=effective_date)
+        }
+        to_create, to_update = [], []
+        for key, amount in incoming.items():
+            price = existing.get(key)
+            if price is None:
+                to_create.append(Price(service_id=key[0], currency=key[1], amount=amount, effective_date=effective_date))
+                report['created'].append(key)
+            elif price.amount != amount:
+                report['updated']['/'.join(key)] = {'amount': [price.amount, amount]}
+                price.amount = amount
+                to_update.append(price)
+            else:
+                report['unchanged'] += 1
+        stale = [p.pk for key, p in existing.items() if key not in incoming]
+        report['deleted'].extend(key for key in existing if key not in incoming)
+
+        if stale:
+            Price.objects.filter(pk__in=stale).delete()
+        if to_create:
+            Price.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            Price.objects.bulk_update(to_update, ['amount'], batch_size=BATCH_SIZE)
+
+    def import_features(self, df, loaded_services):
+        """ Sincroniza características por servicio como multiconjunto (tipo, descripción). """
+        report = self._table_report('features')
+        data = pd.DataFrame({
+            'service_id': clean_string_series(column(df, 'serviceid')),
+            'feature_type': clean_string_series(column(df, 'featuretype')),
+            'description': clean_string_series(column(df, 'description')),
+        })
+        valid = data.notna().all(axis=1)
+        report['skipped'] += int((~valid).sum())
+        data = data[valid]
+
+        missing = sorted(set(data['service_id']) - loaded_services)
+        if missing:
+            raise CatalogImportError(f"Servicio(s) {', '.join(missing)} no encontrado(s) en la carga de servicios. Verifica la hoja 'service'.")
+
+        valid_types = {choice[0] for choice in ServiceFeature.FEATURE_TYPES}
+        invalid_type = ~data['feature_type'].isin(valid_types)
+        for idx, row in data[invalid_type].iterrows():
+            self.log(f" Feat Fila {idx + 2}: Tipo '{row['feature_type']}' inválido para {row['service_id']}. Saltando.", 'warning')
+        report['skipped'] += int(invalid_type.sum())
+        data = data[~invalid_type]
+
+        incoming = Counter(data[['service_id', 'feature_type', 'description']].itertuples(index=False, name=None))
+        sheet_services = set(column(df, 'serviceid').dropna().str.strip())
+        existing = {}
+        for pk, *key in ServiceFeature.objects.filter(service_id__in=list(sheet_services)).values_list('pk', 'service_id', 'feature_type', 'description'):
+            existing.setdefault(tuple(key), []).append(pk)
+
+        stale = []
+        for key, pks in existing.items():
+            keep = min(len(pks), incoming.get(key, 0))
+            report['unchanged'] += keep
+            stale.extend(pks[keep:])
+            report['deleted'].extend([key] * (len(pks) - keep))
+        to_create = []
+        for key, count in incoming.items():
+            for _ in range(count - len(existing.get(key, []))):
+                to_create.append(ServiceFeature(service_id=key[0], feature_type=key[1], description=key[2]))
+                report['created'].append(key)
+
+        if stale:
+            ServiceFeature.objects.filter(pk__in=stale).delete()
+        if to_create:
+            ServiceFeature.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+
+
+    # --- Filas retiradas de la hoja (modo incremental) ---
+
+    def remove_prices(self, service_ids):
+        """ Elimina los precios del día de servicios que ya no aparecen en la hoja de precios. """
+        stale = Price.objects.filter(service_id__in=list(service_ids), effective_date=timezone.localdate())
+        self._table_report('prices')['deleted'].extend(stale.values_list('service_id', 'currency'))
+        stale.delete()
+
+    def remove_features(self, service_ids):
+        """ Elimina las características de servicios que ya no aparecen en la hoja de características. """
+        stale = ServiceFeature.objects.filter(service_id__in=list(service_ids))
+        self._table_report('features')['deleted'].extend(stale.values_list('service_id', 'feature_type', 'description'))
+        stale.delete()
+
+
+# --- Sincronización incremental ---
+
+# Hoja lógica -> columna clave en el origen
+SYNC_KEYS = {
+    'categories': 'code',
+    'campaigns': 'campaign_code',
+    'services': 'code',
+    'details': 'code',
+    'prices': 'dloub_id',
+    'features': 'serviceid',
+}
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def frame_checksum(df):
+    return hashlib.sha256(df.to_csv(index=False).encode('utf-8')).hexdigest()
+
+def keyed_row_hashes(df, key_column):
+    """
+    {clave: hash} del contenido crudo de las filas de cada clave (vectorizado con
+    hash_pandas_object). Varias filas por clave (características) se combinan
+    como multiconjunto, así que el orden de las filas no afecta al hash.
+    """
+    if df.empty:
+        return {}
+    keys = clean_string_series(column(df, key_column))
+    header = '|'.join(map(str, df.columns))
+    rows = pd.util.hash_pandas_object(df.astype('string').fillna(''), index=False).astype(str)
+    frame = pd.DataFrame({'key': keys, 'hash': rows}).dropna(subset=['key'])
+    return frame.groupby('key')['hash'].agg(
+        lambda hashes: hashlib.sha1('|'.join([header, *sorted(hashes)]).encode('utf-8')).hexdigest()
+    ).to_dict()
+
+
+class CatalogSync:
+    """
+    Sincronización incremental sobre CatalogImporter.
+
+    - Si el checksum del archivo coincide con el de la última sincronización, no se procesa nada.
+    - Si el checksum de una hoja no cambió, la hoja se salta completa.
+    - En las hojas modificadas solo se aplican las claves cuyo hash de origen cambió.
+    - Las claves retiradas de precios/características se eliminan (precios del día y
+      características del servicio); un servicio sin fila de detalle se reprocesa.
+      Categorías, campañas y servicios retirados se conservan, como en la carga completa.
+    El estado (checksums y hashes) se guarda en CatalogSyncState dentro de la misma transacción.
+    `changeset` resume, por hoja: skipped (hoja sin cambios), changed, new y removed (claves).
+    """
+    def __init__(self, log=None, force=False):
+        self.importer = CatalogImporter(log=log)
+        self.force = force
+        self.changeset = {}
+
+    @property
+    def report(self):
+        return self.importer.report
+
+    def is_up_to_date(self, checksum):
+        """ True si todas las hojas conocidas se sincronizaron desde este mismo archivo. """
+        if self.force:
+            return False
+        states = list(CatalogSyncState.objects.values_list('file_checksum', flat=True))
+        return len(states) == len(SYNC_KEYS) and all(value == checksum for value in states)
+
+    @transaction.atomic
+    def run(self, dfs, checksum):
+        states = {state.sheet: state for state in CatalogSyncState.objects.all()}
+        pending, new_states = {}, {}
+
+        for sheet, key_column in SYNC_KEYS.items():
+            df = dfs[sheet]
+            state = states.get(sheet) or CatalogSyncState(sheet=sheet)
+            sheet_checksum = frame_checksum(df)
+            if not self.force and state.pk and state.sheet_checksum == sheet_checksum:
+                self.changeset[sheet] = {'skipped': True, 'changed': [], 'new': [], 'removed': []}
+                state.file_checksum = checksum
+                new_states[sheet] = state
+                pending[sheet] = set()
+                continue
+
+            hashes = keyed_row_hashes(df, key_column)
+            previous = {} if self.force else state.row_hashes
+            self.changeset[sheet] = {
+                'skipped': False,
+                'changed': sorted(k for k, h in hashes.items() if k in previous and previous[k] != h),
+                'new': sorted(k for k in hashes if k not in previous),
+                'removed': sorted(k for k in previous if k not in hashes),
+            }
+            pending[sheet] = set(self.changeset[sheet]['changed']) | set(self.changeset[sheet]['new'])
+            state.file_checksum, state.sheet_checksum, state.row_hashes = checksum, sheet_checksum, hashes
+            new_states[sheet] = state
+
+        removed = {sheet: set(changes['removed']) for sheet, changes in self.changeset.items()}
+        # Un servicio se reprocesa si cambió (o desapareció) su fila en 'serviceDetails'
+        pending['services'] |= (pending.pop('details') | removed['details']) & set(keyed_row_hashes(dfs['services'], SYNC_KEYS['services']))
+
+        def only_pending(sheet, key_sheet=None):
+            df = dfs[sheet]
+            keys = clean_string_series(column(df, SYNC_KEYS[sheet]))
+            return df[keys.isin(pending[key_sheet or sheet])]
+
+        importer = self.importer
+        if pending['categories']:
+            importer.import_categories(only_pending('categories'))
+        if pending['campaigns']:
+            importer.import_campaigns(only_pending('campaigns'))
+        if pending['services']:
+            importer.import_services(only_pending('services'), only_pending('details', 'services'))
+
+        if pending['prices'] or pending['features']:
+            # Las claves válidas son las del catálogo completo, no solo las filas reprocesadas
+            known_services = set(Service.objects.values_list('code', flat=True))
+            if pending['prices']:
+                importer.import_prices(only_pending('prices'), known_services)
+            if pending['features']:
+                importer.import_features(only_pending('features'), known_services)
+
+        if removed['prices']:
+            importer.remove_prices(removed['prices'])
+        if removed['features']:
+            importer.remove_features(removed['features'])
+
+        if importer.audit_entries:
+            AuditLog.objects.bulk_create(importer.audit_entries, batch_size=BATCH_SIZE)
+        if any(pending.values()) or removed['prices'] or removed['features']:
+            invalidate_catalog_snapshot()
+            importer.reindex_search()
+
+        for state in new_states.values():
+            state.save()
+        return self.changeset
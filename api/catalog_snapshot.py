@@ -0,0 +1,113 @@
+# api/catalog_snapshot.py
+"""
+Catálogo público publicado: snapshot JSON precalculado de categorías, servicios,
+características y precios vigentes, guardado en la caché compartida.
+
+El snapshot se construye con cuatro queries, se sirve tal cual (bytes) con
+ETag/Last-Modified y se invalida al confirmar cualquier cambio del catálogo
+(señales) o tras una importación masiva (CatalogImporter / CatalogSync).
+Los precios vigentes dependen de la fecha: el snapshot caduca a la medianoche
+siguiente al día con el que se construyó, y un precio futuro entra ese día.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Campaign, Price, Service, ServiceCategory, ServiceFeature
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SNAPSHOT_CACHE_KEY = 'catalog:snapshot:v1'
+CATALOG_MODELS = (ServiceCategory, Service, ServiceFeature, Price, Campaign)
+
+
+def build_catalog_snapshot(today=None):
+    """ Construye el snapshot (dict) del catálogo activo con los precios vigentes en `today`. """
+    today = today or timezone.localdate()
+
+    features_by_service = {}
+    for service_id, feature_type, description in (
+        ServiceFeature.objects.filter(service__is_active=True)
+        .order_by('service_id', 'feature_type', 'id')
+        .values_list('service_id', 'feature_type', 'description')
+    ):
+        features_by_service.setdefault(service_id, []).append({'feature_type': feature_type, 'description': description})
+
+    # Precio vigente por moneda: el de fecha efectiva más reciente que no sea futura
+    prices_by_service = {}
+    for service_id, currency, amount, effective_date in (
+        Price.objects.filter(service__is_active=True, effective_date__lte=today)
+        .order_by('service_id', 'currency', '-effective_date')
+        .values_list('service_id', 'currency', 'amount', 'effective_date')
+    ):
+        prices_by_service.setdefault(service_id, {}).setdefault(
+            currency, {'amount': amount, 'effective_date': effective_date}
+        )
+
+    services_by_category = {}
+    for service in (
+        Service.objects.filter(is_active=True)
+        .order_by('category_id', 'name')
+        .values('code', 'category_id', 'name', 'campaign_id', 'ventulab', 'is_package', 'is_subscription',
+                'audience', 'detailed_description', 'problem_solved')
+    ):
+        service['features'] = features_by_service.get(service['code'], [])
+        service['current_prices'] = prices_by_service.get(service['code'], {})
+        services_by_category.setdefault(service.pop('category_id'), []).append(service)
+
+    return {
+        'generated_at': timezone.now(),
+        'categories': [
+            {'code': code, 'name': name, 'services': services_by_category.get(code, [])}
+            for code, name in ServiceCategory.objects.order_by('name').values_list('code', 'name')
+        ],
+    }
+
+
+def catalog_snapshot_timeout(today):
+    """ Segundos hasta la medianoche (hora local) que sigue a `today`. """
+    midnight = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+    return max(1, int((midnight - timezone.now()).total_seconds()))
+
+
+def refresh_catalog_snapshot():
+    """ Reconstruye y publica el snapshot; devuelve la entrada de caché. """
+    today = timezone.localdate()
+    snapshot = build_catalog_snapshot(today)
+    body = json.dumps(snapshot, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+    entry = {
+        'body': body,
+        'etag': f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        'last_modified': snapshot['generated_at'].timestamp(),
+    }
+    cache.set(CATALOG_SNAPSHOT_CACHE_KEY, entry, catalog_snapshot_timeout(today))
+    return entry
+
+
+def get_catalog_snapshot():
+    """ Read-through: devuelve el snapshot publicado, construyéndolo si no existe. """
+    entry = cache.get(CATALOG_SNAPSHOT_CACHE_KEY)
+    if entry is None:
+        entry = refresh_catalog_snapshot()
+    return entry
+
+
+def invalidate_catalog_snapshot():
+    """ Descarta el snapshot al confirmar la transacción en curso. """
+    transaction.on_commit(lambda: cache.delete(CATALOG_SNAPSHOT_CACHE_KEY))
+
+
+# --- Señales: cualquier cambio del catálogo invalida el snapshot ---
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_catalog_snapshot_signal(sender, **kwargs):
+    if sender in CATALOG_MODELS:
+        invalidate_catalog_snapshot()
@@ -0,0 +1,5 @@
+# api/db_backends/__init__.py
+"""
+Backends de base de datos: los de Django (o mssql-django) con métricas de conexión
+(api/db_pool.py). Se seleccionan con ENGINE en DATABASES, p. ej. 'api.db_backends.mssql'.
+"""
@@ -0,0 +1,19 @@
+# api/db_backends/mssql/base.py
+"""
+mssql-django con métricas de conexión y pool ODBC.
+
+pyodbc.pooling activa el pool del gestor de controladores ODBC: al cerrar, la conexión
+vuelve al pool y la siguiente reutiliza la sesión autenticada (Trusted_Connection) sin
+repetir el handshake. Debe fijarse antes de abrir la primera conexión (DB_ODBC_POOLING).
+"""
+import pyodbc
+from django.conf import settings
+from mssql import base
+
+from ...db_pool import PoolMetricsMixin
+
+pyodbc.pooling = getattr(settings, 'DB_ODBC_POOLING', True)
+
+
+class DatabaseWrapper(PoolMetricsMixin, base.DatabaseWrapper):
+    pass
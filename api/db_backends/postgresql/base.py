@@ -0,0 +1,9 @@
+# api/db_backends/postgresql/base.py
+""" PostgreSQL (perfil local) con métricas de conexión; el pool es el nativo de Django (OPTIONS['pool']). """
+from django.db.backends.postgresql import base
+
+from ...db_pool import PoolMetricsMixin
+
+
+class DatabaseWrapper(PoolMetricsMixin, base.DatabaseWrapper):
+    pass
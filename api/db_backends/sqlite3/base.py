@@ -0,0 +1,9 @@
+# api/db_backends/sqlite3/base.py
+""" SQLite (perfil local de tests y benchmarks) con métricas de conexión. """
+from django.db.backends.sqlite3 import base
+
+from ...db_pool import PoolMetricsMixin
+
+
+class DatabaseWrapper(PoolMetricsMixin, base.DatabaseWrapper):
+    pass
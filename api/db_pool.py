@@ -0,0 +1,134 @@
+# api/db_pool.py
+"""
+Métricas de las conexiones a la base de datos del proceso.
+
+Los backends de api/db_backends/ envuelven los de Django (mssql, sqlite3, postgresql)
+para medir cada conexión nueva: cuánto tarda en obtenerse (handshake ODBC o espera al
+pool) y cuándo se cierra o se devuelve al pool. Con las señales de petición se cuentan
+las conexiones persistentes reutilizadas (CONN_MAX_AGE) y las ocupadas en este momento.
+
+- open: conexiones abiertas (o prestadas por el pool) en el proceso.
+- active / idle: abiertas sirviendo una petición / esperando la siguiente.
+- wait: tiempo hasta obtener una conexión nueva (count, avg_ms, max_ms, total_ms).
+
+Las métricas son por proceso; GET /api/system/db-pool/ muestra las del worker que atiende.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._open = set()
+            self._busy = set()
+            self.opened = 0
+            self.closed = 0
+            self.reused = 0
+            self.wait_count = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def in_request(self):
+        return getattr(self._local, 'in_request', False)
+
+    # --- Llamadas desde los backends ---
+    def connection_opened(self, wrapper, seconds):
+        with self._lock:
+            self._open.add(id(wrapper))
+            if self.in_request():
+                self._busy.add(id(wrapper))
+            self.opened += 1
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def connection_closed(self, wrapper):
+        with self._lock:
+            if id(wrapper) in self._open:
+                self._open.discard(id(wrapper))
+                self._busy.discard(id(wrapper))
+                self.closed += 1
+
+    # --- Ciclo de petición ---
+    def request_started(self):
+        self._local.in_request = True
+        with self._lock:
+            for wrapper in connections.all(initialized_only=True):
+                if id(wrapper) in self._open and wrapper.connection is not None:
+                    self._busy.add(id(wrapper))
+                    self.reused += 1
+
+    def request_finished(self):
+        self._local.in_request = False
+        with self._lock:
+            for wrapper in connections.all(initialized_only=True):
+                self._busy.discard(id(wrapper))
+
+    def snapshot(self, alias='default'):
+        wrapper = connections[alias]
+        with self._lock:
+            open_count = len(self._open)
+            active = len(self._busy & self._open)
+            data = {
+                'vendor': wrapper.vendor,
+                'conn_max_age': wrapper.settings_dict.get('CONN_MAX_AGE'),
+                'health_checks': wrapper.settings_dict.get('CONN_HEALTH_CHECKS'),
+                'odbc_pooling': getattr(settings, 'DB_ODBC_POOLING', None) if wrapper.vendor == 'microsoft' else None,
+                'open': open_count,
+                'active': active,
+                'idle': open_count - active,
+                'opened_total': self.opened,
+                'closed_total': self.closed,
+                'reused_total': self.reused,
+                'wait': {
+                    'count': self.wait_count,
+                    'avg_ms': round(self.wait_total * 1000 / self.wait_count, 2) if self.wait_count else 0.0,
+                    'max_ms': round(self.wait_max * 1000, 2),
+                    'total_ms': round(self.wait_total * 1000, 2),
+                },
+            }
+        pool = getattr(wrapper, 'pool', None)  # Pool nativo de Django para PostgreSQL (psycopg_pool)
+        if pool is not None and hasattr(pool, 'get_stats'):
+            data['pool'] = pool.get_stats()
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class PoolMetricsMixin:
+    """ Mixin para DatabaseWrapper: mide la obtención y el cierre de cada conexión. """
+
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        pool_metrics.connection_opened(self, time.perf_counter() - started)
+        return connection
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            pool_metrics.connection_closed(self)
+
+
+def pool_request_started(sender, **kwargs):
+    pool_metrics.request_started()
+
+def pool_request_finished(sender, **kwargs):
+    pool_metrics.request_finished()
+
+# Después de close_old_connections (conectada al importar django.db): ya se han cerrado
+# las conexiones caducadas o inutilizables cuando se cuentan las reutilizadas
+request_started.connect(pool_request_started, dispatch_uid='db_pool_request_started')
+request_finished.connect(pool_request_finished, dispatch_uid='db_pool_request_finished')
@@ -0,0 +1,219 @@
+# api/db_router.py
+"""
+Enrutado de lecturas a réplicas (DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']).
+
+- Solo se leen de una réplica las peticiones marcadas: acciones de solo lectura de los
+  ViewSets con `ReplicaReadMixin` (list, retrieve, export), el dashboard y los informes
+  del worker (`replica_reads()`). Todo lo demás, y cualquier escritura, va a 'default'.
+- La réplica se elige una vez por petición (la cuenta y la página del listado salen de la
+  misma) entre las de REPLICA_DATABASES con retraso menor que REPLICA_MAX_LAG_SECONDS.
+- Read-your-writes: una escritura dentro de la petición fija el resto de sus lecturas al
+  primario, y `ReplicaPinMiddleware` fija al usuario REPLICA_PIN_SECONDS tras cualquier
+  petición de escritura con éxito (marca en la caché compartida).
+- El retraso de cada réplica se consulta como mucho cada REPLICA_HEALTH_INTERVAL segundos
+  (por proceso); si la consulta falla la réplica se descarta hasta la siguiente.
+"""
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_PIN_KEY = 'dbrouter:pin:{user_id}'
+
+# Segundos de retraso de la réplica según el motor; sin consulta se asume 0.
+# Un resultado NULL (p. ej. la base no es secundaria) es un retraso desconocido: réplica no sana.
+LAG_QUERIES = {
+    'microsoft': (
+        "SELECT MAX(secondary_lag_seconds) FROM sys.dm_hadr_database_replica_states "
+        "WHERE is_local = 1 AND database_id = DB_ID()"
+    ),
+    # Todo lo recibido ya está aplicado: al día aunque la última transacción sea antigua
+    'postgresql': (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+# Estado de la petición en curso: None (primario), 'pending' (réplica aún sin elegir) o el alias elegido
+_read_target = contextvars.ContextVar('dloub_replica_read_target', default=None)
+_wrote = contextvars.ContextVar('dloub_replica_wrote', default=False)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+class ReplicaHealth:
+    """ Retraso conocido de cada réplica (por proceso), refrescado cada REPLICA_HEALTH_INTERVAL. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}  # alias -> (momento, retraso en segundos o None si falló)
+
+    def record(self, alias, lag):
+        with self._lock:
+            self._checked[alias] = (time.monotonic(), lag)
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+    def measure(self, alias):
+        """ Retraso en segundos, o None si el motor no lo sabe. """
+        query = LAG_QUERIES.get(connections[alias].vendor)
+        if not query:
+            return 0.0
+        with connections[alias].cursor() as cursor:
+            cursor.execute(query)
+            row = cursor.fetchone()
+        return float(row[0]) if row and row[0] is not None else None
+
+    def lag(self, alias):
+        interval = getattr(settings, 'REPLICA_HEALTH_INTERVAL', 30)
+        with self._lock:
+            checked = self._checked.get(alias)
+        if checked is None or time.monotonic() - checked[0] > interval:
+            try:
+                lag = self.measure(alias)
+                if lag is None:
+                    logger.warning(f"[DBRouter] Réplica {alias}: retraso desconocido, se lee del primario.")
+            except Exception as e:
+                logger.warning(f"[DBRouter] Réplica {alias} no disponible: {e}")
+                lag = None
+            self.record(alias, lag)
+            return lag
+        return checked[1]
+
+    def healthy(self, alias):
+        lag = self.lag(alias)
+        return lag is not None and lag <= getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10)
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica():
+    """ Una réplica sana al azar, o None (se lee del primario). """
+    candidates = [alias for alias in replica_aliases() if replica_health.healthy(alias)]
+    return random.choice(candidates) if candidates else None
+
+
+def current_read_alias():
+    """ Alias del que se leerá en el contexto actual ('default' si no hay réplica). """
+    target = _read_target.get()
+    if target is None or _wrote.get():
+        return 'default'
+    if target == 'pending':
+        target = choose_replica() or 'default'
+        _read_target.set(target)
+    return target
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """ Las lecturas dentro del bloque pueden ir a una réplica (las escrituras siguen en 'default'). """
+    if not replica_aliases():
+        yield
+        return
+    target_token = _read_target.set('pending')
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _read_target.reset(target_token)
+        _wrote.reset(wrote_token)
+
+
+# --- Read-your-writes por usuario ---
+def pin_to_primary(user):
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+    if seconds and getattr(user, 'is_authenticated', False):
+        cache.set(REPLICA_PIN_KEY.format(user_id=user.pk), True, seconds)
+
+def is_pinned(user):
+    return bool(getattr(user, 'is_authenticated', False) and cache.get(REPLICA_PIN_KEY.format(user_id=user.pk)))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _read_target.get() is None:
+            return None
+        return current_read_alias()
+
+    def db_for_write(self, model, **hints):
+        if _read_target.get() is not None:
+            _wrote.set(True)  # El resto de lecturas de la petición, al primario
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Réplicas y primario contienen los mismos datos
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
+
+
+class ReplicaPinMiddleware:
+    """
+    Tras una petición de escritura con éxito, el usuario lee del primario un rato.
+    Admite ASGI sin pasar por un hilo: las lecturas no tocan la caché ni el usuario.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def should_pin(self, request, response):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400 and replica_aliases()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.should_pin(request, response):
+            pin_to_primary(getattr(request, 'user', None))  # DRF deja el usuario autenticado en la petición
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.should_pin(request, response):
+            # request.user puede ser perezoso (sesión): se resuelve fuera del bucle de eventos
+            await sync_to_async(pin_to_primary)(getattr(request, 'user', None))
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Para vistas DRF: las acciones en `replica_actions` (o todo GET si la vista no tiene
+    acciones, p. ej. un APIView) leen de una réplica, salvo usuarios recién fijados al primario.
+    """
+    replica_actions = ('list', 'retrieve', 'export')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        action = getattr(self, 'action', None)
+        if (
+            request.method in ('GET', 'HEAD') and replica_aliases()
+            and (action is None or action in self.replica_actions)
+            and not is_pinned(request.user)
+        ):
+            self._replica_tokens = (_read_target.set('pending'), _wrote.set(False))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        tokens = getattr(self, '_replica_tokens', None)
+        if tokens:
+            _read_target.reset(tokens[0])
+            _wrote.reset(tokens[1])
+            self._replica_tokens = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,124 @@
+# api/exports.py
+"""
+Exportación en streaming (CSV / XLSX) de los listados de los ViewSets.
+
+`ExportMixin` añade la acción `GET <listado>/export/?output=csv|xlsx` a un ViewSet:
+reutiliza su `get_queryset()` (alcance por permisos) y su filterset, y recorre el
+resultado con `values_list().iterator(chunk_size=...)`, sin instanciar modelos ni
+serializers, de modo que la memoria no crece con el número de filas.
+
+- CSV: StreamingHttpResponse, una línea por fila según se leen de la base de datos.
+- XLSX: openpyxl en modo write_only (escribe cada fila a un temporal en disco) y se
+  sirve con FileResponse por bloques. openpyxl es opcional; sin él solo hay CSV.
+
+Columnas: tuplas (cabecera, lookup) o (cabecera, lookup, transformación).
+"""
+import csv
+import datetime
+import json
+import logging
+import tempfile
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+    logger.warning("openpyxl no está instalado. Las exportaciones XLSX no estarán disponibles.")
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def as_json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False) if value not in (None, '') else ''
+
+
+def iter_export_rows(queryset, columns):
+    """ Filas (listas) del queryset: sin prefetch ni instancias, por bloques. """
+    lookups = [column[1] for column in columns]
+    transforms = [(index, column[2]) for index, column in enumerate(columns) if len(column) > 2]
+    rows = queryset.prefetch_related(None).values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        row = list(row)
+        for index, transform in transforms:
+            row[index] = transform(row[index])
+        yield row
+
+
+class Echo:
+    """ Buffer mínimo para que csv.writer devuelva cada línea en lugar de escribirla. """
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, columns):
+    writer = csv.writer(Echo())
+    yield '\ufeff'  # BOM: Excel detecta UTF-8
+    yield writer.writerow([column[0] for column in columns])
+    for row in iter_export_rows(queryset, columns):
+        yield writer.writerow(row)
+
+
+def xlsx_cell(value):
+    """ Excel no admite zonas horarias: fechas a hora local sin tzinfo. """
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def write_xlsx(queryset, columns, title):
+    """ Escribe el libro en un temporal (write_only: memoria constante) y lo devuelve abierto al inicio. """
+    if Workbook is None:
+        raise ValidationError({'output': _("La exportación XLSX requiere openpyxl.")})
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31])
+    sheet.append([column[0] for column in columns])
+    for row in iter_export_rows(queryset, columns):
+        sheet.append([xlsx_cell(value) for value in row])
+    fh = tempfile.TemporaryFile()
+    workbook.save(fh)
+    fh.seek(0)
+    return fh
+
+
+def export_response(queryset, columns, basename, output='csv'):
+    filename = f"{basename}-{timezone.localdate():%Y%m%d}.{output}"
+    if output == 'xlsx':
+        return FileResponse(
+            write_xlsx(queryset, columns, basename), as_attachment=True, filename=filename,
+            content_type=XLSX_CONTENT_TYPE,
+        )
+    response = StreamingHttpResponse(iter_csv(queryset, columns), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class ExportMixin:
+    """
+    Acción `export` para ViewSets con `export_columns` y `export_basename`.
+    ?output=csv (por defecto) o ?output=xlsx; admite los mismos filtros que el listado.
+    """
+    export_columns = ()
+    export_basename = 'export'
+    EXPORT_OUTPUTS = ('csv', 'xlsx')
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'csv')
+        if output not in self.EXPORT_OUTPUTS:
+            raise ValidationError({'output': _("Formato no soportado. Opciones: csv, xlsx.")})
+        # Fijar ya la base de datos (réplica si aplica): el CSV se lee después de finalize_response
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.using(queryset.db)
+        logger.info(f"[Export] {request.user} exporta {self.export_basename} ({output}).")
+        return export_response(queryset, self.export_columns, self.export_basename, output)
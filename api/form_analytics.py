@@ -0,0 +1,136 @@
+# api/form_analytics.py
+"""
+Analítica de respuestas de formularios, precalculada por formulario y guardada en la
+caché compartida.
+
+- Resumen: por pregunta, número de respuestas, vacías, respuestas distintas y las más
+  frecuentes (agrupadas sin distinguir mayúsculas ni espacios). Son agregaciones en SQL,
+  sin recorrer las filas en Python.
+- Matriz cliente × pregunta: una sola query ordenada por cliente (.iterator()) que se
+  pivota en una pasada; las vistas la sirven en streaming como CSV o JSON, sin
+  cargarla entera ni cachearla.
+
+En caché solo se guardan el resumen y las columnas de la matriz. La entrada se invalida al confirmar cualquier cambio de respuestas o preguntas
+del formulario (señales) y tras el envío masivo (FormResponseService, que no dispara
+señales).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Lower, Trim
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import FormQuestion, FormResponse
+
+logger = logging.getLogger(__name__)
+
+FORM_ANALYTICS_CACHE_KEY = 'forms:analytics:{form_id}:v2'
+FORM_ANALYTICS_TIMEOUT = getattr(settings, 'FORM_ANALYTICS_CACHE_TIMEOUT', 60 * 60)  # Además de la invalidación explícita
+TOP_ANSWERS = getattr(settings, 'FORM_ANALYTICS_TOP_ANSWERS', 10)
+MATRIX_CHUNK_SIZE = 2000
+
+
+def customer_display(company_name, first_name, last_name, username):
+    """ Mismo criterio que Customer.__str__ sin cargar la instancia. """
+    return company_name or f"{first_name} {last_name}".strip() or username
+
+
+def build_form_summary(form, questions):
+    answered = FormResponse.objects.filter(form=form).order_by()
+    stats = {
+        row['question_id']: row for row in answered.values('question_id').annotate(
+            responses=Count('id'), blank=Count('id', filter=Q(text='')),
+        )
+    }
+    frequencies = {}
+    for row in (
+        answered.exclude(text='').annotate(answer=Lower(Trim('text')))
+        .values('question_id', 'answer').annotate(count=Count('id'))
+        .order_by('question_id', '-count', 'answer')
+    ):
+        frequencies.setdefault(row['question_id'], []).append({'answer': row['answer'], 'count': row['count']})
+
+    summary = []
+    for question in questions:
+        question_stats = stats.get(question['id'], {})
+        answers = frequencies.get(question['id'], [])
+        summary.append({
+            **question,
+            'responses': question_stats.get('responses', 0),
+            'blank': question_stats.get('blank', 0),
+            'distinct_answers': len(answers),
+            'top_answers': answers[:TOP_ANSWERS],
+        })
+    return {
+        'form': {'id': form.pk, 'name': form.name},
+        'generated_at': timezone.now(),
+        'respondents': answered.values('customer_id').distinct().count(),
+        'questions': summary,
+    }
+
+
+def iter_form_matrix(form, question_ids):
+    """ Filas [customer_id, cliente, respuesta por pregunta...] en el orden de `question_ids`. """
+    position = {question_id: index for index, question_id in enumerate(question_ids)}
+    rows = (
+        FormResponse.objects.filter(form=form).order_by('customer_id')
+        .values_list(
+            'customer_id', 'customer__company_name', 'customer__user__first_name',
+            'customer__user__last_name', 'customer__user__username', 'question_id', 'text',
+        )
+        .iterator(chunk_size=MATRIX_CHUNK_SIZE)
+    )
+    current, row = None, None
+    for customer_id, company, first_name, last_name, username, question_id, text in rows:
+        if customer_id != current:
+            if row is not None:
+                yield row
+            current = customer_id
+            row = [customer_id, customer_display(company, first_name, last_name, username)] + [''] * len(question_ids)
+        if question_id in position:
+            row[2 + position[question_id]] = text
+    if row is not None:
+        yield row
+
+
+def build_form_analytics(form):
+    questions = list(
+        FormQuestion.objects.filter(form=form).order_by('order', 'id')
+        .values('id', 'order', 'question_text', 'required')
+    )
+    return {
+        'summary': build_form_summary(form, questions),
+        'columns': ['customer_id', 'customer'] + [question['question_text'] for question in questions],
+        'question_ids': [question['id'] for question in questions],  # Orden de las columnas de la matriz
+    }
+
+
+def get_form_analytics(form):
+    """ Read-through: resumen y columnas de la matriz, construidos si no están en caché. """
+    key = FORM_ANALYTICS_CACHE_KEY.format(form_id=form.pk)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_form_analytics(form)
+        cache.set(key, entry, FORM_ANALYTICS_TIMEOUT)
+        logger.debug(f"[FormAnalytics] Formulario {form.pk}: resumen de {len(entry['question_ids'])} preguntas precalculado.")
+    return entry
+
+
+def invalidate_form_analytics(form_id):
+    """ Descarta la analítica del formulario al confirmar la transacción en curso. """
+    if form_id:
+        transaction.on_commit(lambda: cache.delete(FORM_ANALYTICS_CACHE_KEY.format(form_id=form_id)))
+
+
+# --- Señales: nuevas respuestas o cambios de preguntas invalidan el formulario ---
+@receiver(post_save, sender=FormResponse)
+@receiver(post_delete, sender=FormResponse)
+@receiver(post_save, sender=FormQuestion)
+@receiver(post_delete, sender=FormQuestion)
+def invalidate_form_analytics_signal(sender, instance, **kwargs):
+    invalidate_form_analytics(instance.form_id)
@@ -0,0 +1,35 @@
+# api/management/commands/assign_deliverables.py
+from django.core.management.base import BaseCommand
+
+from api.services import DeliverableAssignmentService
+
+
+class Command(BaseCommand):
+    help = (
+        'Asigna automáticamente los entregables abiertos sin asignar a empleados o proveedores '
+        'según carga de trabajo, fecha límite, rol y servicios ofrecidos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Muestra el plan sin guardar cambios.')
+        parser.add_argument('--limit', type=int, default=None, help='Máximo de entregables a asignar.')
+        parser.add_argument('--max-open-tasks', type=int, default=None, help='Tareas abiertas máximas por asignado.')
+        parser.add_argument('--order', type=int, default=None, help='Solo entregables de este pedido.')
+
+    def handle(self, *args, **options):
+        result = DeliverableAssignmentService(
+            max_open_tasks=options['max_open_tasks'], limit=options['limit'], order_id=options['order'],
+        ).run(dry_run=options['dry_run'])
+
+        for item in result['assigned']:
+            self.stdout.write(
+                f"  Entregable #{item['deliverable_id']} (pedido #{item['order_id']}, vence {item['due_date']}) -> "
+                f"{item['assignee_type']} {item['assignee_name']} [{item['reason']}, {item['assignee_open_tasks']} abiertas]"
+            )
+        for item in result['unassigned']:
+            self.stdout.write(self.style.WARNING(f"  Entregable #{item['deliverable_id']}: {item['reason']}"))
+
+        action = "Se asignarían" if options['dry_run'] else "Asignados"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {len(result['assigned'])} entregables; {len(result['unassigned'])} quedan sin asignar."
+        ))
@@ -0,0 +1,184 @@
+# api/management/commands/bench_async_reads.py
+import asyncio
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+# Endpoint -> (ruta DRF síncrona, ruta asíncrona), relativas a /api/
+ENDPOINTS = {
+    'me': ('users/me/', 'async/users/me/'),
+    'auth-check': ('auth/check/', 'async/auth/check/'),
+    'notifications': ('notifications/', 'async/notifications/'),
+    'unread-count': ('notifications/unread-count/', 'async/notifications/unread-count/'),
+    'dashboard': ('dashboard/', 'async/dashboard/'),
+    'catalog': ('catalog/', 'async/catalog/'),
+}
+
+
+async def read_response(reader):
+    """ Lee una respuesta HTTP/1.1 (Content-Length o chunked) y devuelve el código de estado. """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {k.strip().lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() == 'close'
+
+
+async def run_load(url, token, total, concurrency, host=None):
+    """ `concurrency` conexiones keep-alive repartiéndose `total` peticiones GET. """
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: {host or parts.netloc}\r\nAuthorization: Bearer {token}\r\n'
+        f'Accept: application/json\r\nConnection: keep-alive\r\n\r\n'
+    ).encode()
+    latencies, errors = [], 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        reader = writer = None
+        while remaining > 0:
+            remaining -= 1
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+            started = time.perf_counter()
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, close = await read_response(reader)
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                writer.close()
+                writer = None
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+            if close:
+                writer.close()
+                writer = None
+        if writer is not None:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95': statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) >= 2 else 0.0,
+        'errors': errors,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara rendimiento (req/s, p50, p95) de los endpoints de lectura: DRF bajo WSGI, DRF bajo '
+        'ASGI y sus variantes asíncronas (/api/async/) bajo uvicorn. Arranca un proceso de cada '
+        'servidor salvo que se indiquen --asgi-url/--wsgi-url. Requiere uvicorn.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Peticiones por endpoint y servidor.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Conexiones simultáneas.')
+        parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument('--user', help='Usuario para el token JWT (por defecto, el primer superusuario activo).')
+        parser.add_argument('--asgi-url', help='Servidor ASGI ya arrancado (p. ej. http://127.0.0.1:8010).')
+        parser.add_argument('--wsgi-url', help='Servidor WSGI ya arrancado (p. ej. gunicorn en http://127.0.0.1:8011).')
+        parser.add_argument('--asgi-port', type=int, default=8010)
+        parser.add_argument('--wsgi-port', type=int, default=8011)
+        parser.add_argument('--host-header', default='localhost', help='Cabecera Host (debe estar en ALLOWED_HOSTS).')
+        parser.add_argument('--threads', type=int, default=8, help='Hilos del servidor WSGI arrancado (gunicorn).')
+
+    def handle(self, *args, **options):
+        token = self.get_token(options['user'])
+        processes = []
+        try:
+            asgi_url = options['asgi_url'] or self.start_asgi(options['asgi_port'], processes)
+            wsgi_url = options['wsgi_url'] or self.start_wsgi(options['wsgi_port'], options['threads'], processes)
+            targets = [('wsgi (DRF)', wsgi_url, 0), ('asgi (DRF)', asgi_url, 0), ('asgi (async)', asgi_url, 1)]
+
+            self.stdout.write(
+                f"{options['requests']} peticiones por caso, {options['concurrency']} conexiones.\n"
+                f"{'endpoint':<15}{'servidor':<15}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errores':>9}"
+            )
+            for name in options['endpoints']:
+                for label, base_url, variant in targets:
+                    url = f"{base_url.rstrip('/')}/api/{ENDPOINTS[name][variant]}"
+                    asyncio.run(run_load(url, token, min(50, options['requests']), options['concurrency'], options['host_header']))  # Calentamiento
+                    result = asyncio.run(run_load(url, token, options['requests'], options['concurrency'], options['host_header']))
+                    self.stdout.write(
+                        f"{name:<15}{label:<15}{result['rps']:>10.1f}{result['p50']:>10.2f}{result['p95']:>10.2f}{result['errors']:>9}"
+                    )
+        finally:
+            for process in processes:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    def get_token(self, username):
+        users = User.objects.filter(is_active=True)
+        user = users.filter(username=username).first() if username else users.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError("No hay usuario activo para el token (usa --user).")
+        return str(RefreshToken.for_user(user).access_token)
+
+    def start_asgi(self, port, processes):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError("uvicorn no está instalado (pip install uvicorn) o indica --asgi-url.")
+        return self.start_server(processes, port, [
+            sys.executable, '-m', 'uvicorn', 'DloubApp.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', '1', '--log-level', 'warning',
+        ])
+
+    def start_wsgi(self, port, threads, processes):
+        if importlib.util.find_spec('gunicorn') is not None:
+            command = [
+                sys.executable, '-m', 'gunicorn', 'DloubApp.wsgi:application',
+                '--bind', f'127.0.0.1:{port}', '--workers', '1', '--threads', str(threads), '--log-level', 'warning',
+            ]
+        else:
+            # Sin gunicorn: servidor de desarrollo (un hilo por petición)
+            command = [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload']
+        return self.start_server(processes, port, command)
+
+    def start_server(self, processes, port, command):
+        self.stdout.write(f"Arrancando: {' '.join(command[1:4])} en el puerto {port}...")
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=os.environ.copy(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        processes.append(process)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"El servidor del puerto {port} terminó al arrancar ({' '.join(command)}).")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+                return f'http://127.0.0.1:{port}'
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"El servidor del puerto {port} no respondió en 30 s.")
@@ -0,0 +1,144 @@
+# api/management/commands/bench_login.py
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+BENCH_USERNAME_PREFIX = 'benchlogin_'
+
+
+@contextmanager
+def counted_hashes():
+    """ Cuenta los hashes de contraseña (encode del hasher por defecto) dentro del bloque. """
+    hasher_class = type(get_hasher())
+    original = hasher_class.encode
+    counter = {'hashes': 0}
+
+    def encode(self, *args, **kwargs):
+        counter['hashes'] += 1
+        return original(self, *args, **kwargs)
+
+    hasher_class.encode = encode
+    try:
+        yield counter
+    finally:
+        hasher_class.encode = original
+
+
+class Command(BaseCommand):
+    help = (
+        'Tormenta de logins concurrentes contra POST /api/token/: logins/s, p50 y p95, además de '
+        'queries y hashes de contraseña por login. Por defecto en el propio proceso (cliente de test '
+        'de Django en hilos); con --url contra un servidor arrancado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help=f'Usuarios de prueba ({BENCH_USERNAME_PREFIX}N).')
+        parser.add_argument('--requests', type=int, default=200, help='Logins en total.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Logins simultáneos (hilos).')
+        parser.add_argument('--password', default='bench-login-1234')
+        parser.add_argument('--url', help='Endpoint de token de un servidor arrancado (p. ej. http://localhost:8000/api/token/).')
+        parser.add_argument('--keep-users', action='store_true', help='No borra los usuarios de prueba al terminar.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--users, --requests y --concurrency deben ser mayores que 0.")
+        usernames = self.ensure_users(options['users'], options['password'])
+        try:
+            if not options['url']:
+                self.report_single_login(usernames[0], options['password'])
+            self.run_storm(usernames, options)
+        finally:
+            if not options['keep_users']:
+                User.objects.filter(username__startswith=BENCH_USERNAME_PREFIX).delete()
+
+    def ensure_users(self, count, password):
+        usernames = [f'{BENCH_USERNAME_PREFIX}{i}' for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        encoded = make_password(password)  # Un solo hash para todos
+        for username in usernames:
+            if username not in existing:
+                User.objects.create(username=username, password=encoded)  # create() para disparar las señales de perfil
+        User.objects.filter(username__in=usernames).update(password=encoded, is_active=True)
+        return usernames
+
+    def client(self):
+        host = next((h for h in settings.ALLOWED_HOSTS if '*' not in h and not h.startswith('.')), 'localhost')
+        return Client(HTTP_HOST=host)
+
+    def login(self, client, url, username, password):
+        """ Devuelve el código de estado de un login. """
+        payload = {'username': username, 'password': password}
+        if client is not None:
+            return client.post(url, payload, content_type='application/json').status_code
+        request = urllib.request.Request(
+            url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def report_single_login(self, username, password):
+        client = self.client()
+        url = reverse('token_obtain_pair')
+        self.login(client, url, username, password)  # Calienta cachés (roles, puestos)
+        with counted_hashes() as counter, CaptureQueriesContext(connection) as queries:
+            status = self.login(client, url, username, password)
+        if status != 200:
+            raise CommandError(f"El login de prueba devolvió {status}.")
+        self.stdout.write(f"Un login: {len(queries)} queries, {counter['hashes']} hash(es) de contraseña.")
+
+    def run_storm(self, usernames, options):
+        url = options['url'] or reverse('token_obtain_pair')
+        total, concurrency, password = options['requests'], options['concurrency'], options['password']
+        latencies, errors = [], []
+        lock = threading.Lock()
+        next_index = iter(range(total))
+
+        def worker():
+            client = None if options['url'] else self.client()
+            try:
+                while True:
+                    with lock:
+                        index = next(next_index, None)
+                    if index is None:
+                        return
+                    started = time.perf_counter()
+                    status = self.login(client, url, usernames[index % len(usernames)], password)
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                        if status != 200:
+                            errors.append(status)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 2 else latencies[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} logins, {concurrency} simultáneos: {total / elapsed:.1f} logins/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, errores {len(errors)}."
+        ))
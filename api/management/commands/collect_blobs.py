@@ -0,0 +1,33 @@
+# api/management/commands/collect_blobs.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import StoredBlob
+from api.storage import collect_blob
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina del almacenamiento por contenido (CAS) los blobs sin referencias '
+        '(p. ej. subidas completadas que luego fueron reemplazadas o rechazadas).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age-hours', type=int, default=24, help='Solo blobs sin referencias creados hace al menos N horas.')
+        parser.add_argument('--dry-run', action='store_true', help='Lista los blobs sin borrarlos.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        orphans = StoredBlob.objects.filter(ref_count__lte=0, created_at__lte=cutoff)
+        total, freed = 0, 0
+        for blob in orphans.iterator():
+            total += 1
+            freed += blob.size
+            if options['dry_run']:
+                self.stdout.write(f"  {blob.name} ({blob.size} bytes)")
+            else:
+                collect_blob(blob.sha256)
+        action = "Se liberarían" if options['dry_run'] else "Liberados"
+        self.stdout.write(self.style.SUCCESS(f"{action} {freed} bytes en {total} blobs sin referencias."))
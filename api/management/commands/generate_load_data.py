@@ -0,0 +1,346 @@
+# api/management/commands/generate_load_data.py
+import datetime
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When, CharField
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from api.models import (
+    Customer, Deliverable, Employee, Invoice, Order, OrderService, Payment,
+    PaymentMethod, Price, Provider, Service, TransactionType, UserProfile,
+)
+from api.search import rebuild_index
+from api.sla import refresh_sla_statuses
+from api.workload import rebuild_workload
+
+# Prefixes used to identify (and clear) load-test rows
+LOAD_CUSTOMER_USERNAME_PREFIX = "loadcust_"
+LOAD_EMPLOYEE_USERNAME_PREFIX = "loademp_"
+LOAD_PROVIDER_NAME_PREFIX = "Load Provider"
+LOAD_INVOICE_NUMBER_PREFIX = "LOAD"
+LOAD_PAYMENT_METHOD_NAME = "Load Method Transfer"
+LOAD_TRANSACTION_TYPE_NAME = "Load Type Pago"
+
+INVOICE_RATIO = 0.85
+PAYMENT_RATIO = 0.75
+MAX_LINES_PER_ORDER = 4
+MAX_DELIVERABLES_PER_ORDER = 3
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+User = get_user_model()
+
+
+@contextmanager
+def muted_signals(*signals):
+    """
+    Temporarily disconnects every receiver of the given signals.
+
+    bulk_create/update never send model signals, but deletes and any stray
+    save() would still fan out into AuditLog/Notification rows (one INSERT per
+    object). Muting them also lets the deletion collector use fast deletes.
+    """
+    saved = []
+    for signal in signals:
+        with signal.lock:
+            saved.append((signal, signal.receivers))
+            signal.receivers = []
+            signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            with signal.lock:
+                signal.receivers = receivers
+                signal.sender_receivers_cache.clear()
+
+
+@contextmanager
+def backdated(model, field_name):
+    """ Lets bulk_create store explicit values in an auto_now_add field (historical dates). """
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Generates high-volume synthetic Orders, OrderServices, Invoices, Payments and '
+            'Deliverables with chunked bulk_create for load testing and capacity planning. '
+            'Existing Services/Prices are reused; totals, statuses, workload counters, SLA statuses and '
+            'the search index are recomputed at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10000, help='Number of orders to generate.')
+        parser.add_argument('--customers', type=int, default=1000, help='Number of load-test customers.')
+        parser.add_argument('--employees', type=int, default=50, help='Number of load-test employees.')
+        parser.add_argument('--providers', type=int, default=20, help='Number of load-test providers.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Orders generated and inserted per chunk.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same seed, same dataset).')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated load-test data first.')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Skip the SLA refresh and search index rebuild (prints the commands to run later).')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(
+                f"The '{connection.vendor}' backend does not return primary keys from bulk_create; "
+                "this generator needs them to link child rows."
+            )
+        if options['chunk_size'] <= 0:
+            raise CommandError("--chunk-size must be positive.")
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        with muted_signals(pre_save, post_save, post_delete):
+            if options['clear']:
+                self.clear()
+
+            services = list(Service.objects.filter(is_active=True).values_list('code', flat=True))
+            if not services:
+                raise CommandError("No active services found. Load the catalog first.")
+            self.prices = self.load_latest_prices()
+            self.services = services
+
+            with transaction.atomic():
+                method, _ = PaymentMethod.objects.get_or_create(name=LOAD_PAYMENT_METHOD_NAME, defaults={'is_active': True})
+                trans_type, _ = TransactionType.objects.get_or_create(name=LOAD_TRANSACTION_TYPE_NAME)
+                self.method_id, self.transaction_type_id = method.pk, trans_type.pk
+                self.customer_ids = self.create_customers(options['customers'])
+                self.employee_ids = self.create_employees(options['employees'])
+                self.provider_ids = self.create_providers(options['providers'])
+
+            if not self.customer_ids:
+                raise CommandError("At least one customer is required.")
+            self.invoice_seq = self.next_invoice_sequence()
+
+            remaining, chunk_no = options['orders'], 0
+            while remaining > 0:
+                size = min(options['chunk_size'], remaining)
+                with transaction.atomic():
+                    counts = self.generate_chunk(size)
+                remaining -= size
+                chunk_no += 1
+                self.stdout.write(
+                    f"  Chunk {chunk_no}: {counts['orders']} orders, {counts['lines']} lines, "
+                    f"{counts['invoices']} invoices, {counts['payments']} payments, {counts['deliverables']} deliverables."
+                )
+
+            with transaction.atomic():
+                self.recompute_totals_and_statuses()
+                self.stdout.write(f"  {rebuild_workload()} workload counters rebuilt.")
+
+            if options['skip_derived']:
+                self.stdout.write(self.style.WARNING(
+                    "SLA statuses and the search index were not refreshed. Run:\n"
+                    "  python manage.py update_sla_status --no-notify\n"
+                    "  python manage.py rebuild_search_index"
+                ))
+            else:
+                self.refresh_derived_data()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Load data generated in {elapsed:.1f}s."))
+
+    # --- Reference data ---------------------------------------------------
+
+    def load_latest_prices(self):
+        """ Latest price per service (EUR preferred) in ONE query instead of get_current_price per line. """
+        eur, any_currency = {}, {}
+        rows = Price.objects.order_by('service_id', 'effective_date', 'id').values_list('service_id', 'currency', 'amount')
+        for code, currency, amount in rows:
+            any_currency[code] = amount  # Ordered ascending: the last one wins
+            if currency == 'EUR':
+                eur[code] = amount
+        return {**any_currency, **eur}
+
+    def next_invoice_sequence(self):
+        """ Pre-assigns invoice numbers so Invoice.save() never has to probe for free numbers. """
+        last = (Invoice.objects.filter(invoice_number__startswith=f"{LOAD_INVOICE_NUMBER_PREFIX}-")
+                .order_by('-invoice_number').values_list('invoice_number', flat=True).first())
+        return int(last.rsplit('-', 1)[-1]) + 1 if last else 1
+
+    def create_users(self, prefix, count, is_staff):
+        start = User.objects.filter(username__startswith=prefix).count()
+        password = make_password('password123')  # Hashed once, not once per user
+        users = [
+            User(username=f"{prefix}{start + i:07d}", email=f"{prefix}{start + i:07d}@loadmail.com",
+                 first_name=f"Load{start + i}", last_name=prefix.rstrip('_'),
+                 password=password, is_staff=is_staff, is_active=True)
+            for i in range(count)
+        ]
+        users = User.objects.bulk_create(users, batch_size=1000)
+        UserProfile.objects.bulk_create([UserProfile(user=u) for u in users], batch_size=1000)
+        return users
+
+    def create_customers(self, count):
+        users = self.create_users(LOAD_CUSTOMER_USERNAME_PREFIX, count, is_staff=False)
+        customers = Customer.objects.bulk_create([
+            Customer(user=u, country=self.rng.choice(['ES', 'MX', 'CO', 'CL', 'US']),
+                     company_name=f"Load Company {u.pk}" if self.rng.random() < 0.5 else None,
+                     preferred_contact_method=self.rng.choice(['email', 'phone', 'whatsapp']))
+            for u in users
+        ], batch_size=1000)
+        existing = list(Customer.objects.filter(user__username__startswith=LOAD_CUSTOMER_USERNAME_PREFIX)
+                        .exclude(pk__in=[c.pk for c in customers]).values_list('pk', flat=True))
+        return [c.pk for c in customers] + existing
+
+    def create_employees(self, count):
+        users = self.create_users(LOAD_EMPLOYEE_USERNAME_PREFIX, count, is_staff=True)
+        Employee.objects.bulk_create([
+            Employee(user=u, salary=Decimal(self.rng.randrange(25000, 70000, 1000))) for u in users
+        ], batch_size=1000)
+        return list(Employee.objects.filter(user__username__startswith=LOAD_EMPLOYEE_USERNAME_PREFIX).values_list('pk', flat=True))
+
+    def create_providers(self, count):
+        start = Provider.objects.filter(name__startswith=LOAD_PROVIDER_NAME_PREFIX).count()
+        Provider.objects.bulk_create([
+            Provider(name=f"{LOAD_PROVIDER_NAME_PREFIX} {start + i + 1}",
+                     rating=Decimal(str(round(self.rng.uniform(3.0, 5.0), 1))), is_active=True)
+            for i in range(count)
+        ])
+        return list(Provider.objects.filter(name__startswith=LOAD_PROVIDER_NAME_PREFIX).values_list('pk', flat=True))
+
+    # --- Operational data -------------------------------------------------
+
+    def generate_chunk(self, size):
+        rng = self.rng
+        order_statuses = [s[0] for s in Order.STATUS_CHOICES]
+        orders = []
+        for _ in range(size):
+            date_rec = self.now - datetime.timedelta(days=rng.randint(0, 540), seconds=rng.randint(0, 86399))
+            date_req = date_rec + datetime.timedelta(days=rng.randint(7, 45))
+            status = rng.choice(order_statuses)
+            completed = None
+            if status == 'DELIVERED':
+                completed = min(self.now, date_rec + datetime.timedelta(days=rng.randint(1, 40)))
+            orders.append(Order(
+                customer_id=rng.choice(self.customer_ids), date_received=date_rec,
+                employee_id=rng.choice(self.employee_ids) if self.employee_ids and rng.random() < 0.75 else None,
+                date_required=date_req, status=status, priority=rng.randint(1, 5),
+                payment_due_date=date_req + datetime.timedelta(days=rng.choice([7, 15, 30])),
+                completed_at=completed,
+            ))
+        with backdated(Order, 'date_received'):
+            orders = Order.objects.bulk_create(orders, batch_size=5000)
+
+        lines, order_totals = [], {}
+        for order in orders:
+            total = Decimal('0.00')
+            for code in rng.sample(self.services, k=min(len(self.services), rng.randint(1, MAX_LINES_PER_ORDER))):
+                price = self.prices.get(code) or Decimal('10.00')
+                quantity = rng.randint(1, 3)
+                lines.append(OrderService(order_id=order.pk, service_id=code, quantity=quantity, price=price))
+                total += price * quantity
+            order_totals[order.pk] = total
+        OrderService.objects.bulk_create(lines, batch_size=5000)
+
+        invoices = []
+        for order in orders:
+            if order.status in ('DRAFT', 'CANCELLED') or rng.random() > INVOICE_RATIO:
+                continue
+            invoice_date = order.date_received.date() + datetime.timedelta(days=rng.randint(0, 5))
+            invoices.append(Invoice(
+                order_id=order.pk, date=invoice_date,
+                due_date=invoice_date + datetime.timedelta(days=rng.choice([15, 30, 45])),
+                invoice_number=f"{LOAD_INVOICE_NUMBER_PREFIX}-{self.invoice_seq:09d}", status='SENT',
+            ))
+            self.invoice_seq += 1
+        invoices = Invoice.objects.bulk_create(invoices, batch_size=5000)
+
+        payments = []
+        for invoice in invoices:
+            if rng.random() > PAYMENT_RATIO:
+                continue
+            total = order_totals[invoice.order_id]
+            amount = total if rng.random() < 0.7 else (total * Decimal(str(round(rng.uniform(0.1, 0.9), 2)))).quantize(Decimal('0.01'))
+            if amount <= 0:
+                continue
+            payments.append(Payment(
+                invoice_id=invoice.pk, method_id=self.method_id, transaction_type_id=self.transaction_type_id,
+                date=datetime.datetime.combine(invoice.date, datetime.time(12, 0), tzinfo=datetime.timezone.utc),
+                amount=amount, currency='EUR',
+                status=rng.choices(['COMPLETED', 'PENDING', 'FAILED'], weights=[90, 6, 4], k=1)[0],
+            ))
+        Payment.objects.bulk_create(payments, batch_size=5000)
+
+        deliverable_statuses = [s[0] for s in Deliverable.STATUS_CHOICES]
+        deliverables = []
+        for order in orders:
+            if order.status in ('DRAFT', 'CANCELLED'):
+                continue
+            for i in range(rng.randint(0, MAX_DELIVERABLES_PER_ORDER)):
+                roll = rng.random()
+                deliverables.append(Deliverable(
+                    order_id=order.pk, description=f"Load deliverable {i + 1} for order {order.pk}",
+                    status=rng.choice(deliverable_statuses),
+                    due_date=(order.date_received + datetime.timedelta(days=rng.randint(5, 40))).date(),
+                    assigned_employee_id=rng.choice(self.employee_ids) if self.employee_ids and roll < 0.6 else None,
+                    assigned_provider_id=rng.choice(self.provider_ids) if self.provider_ids and 0.6 <= roll < 0.8 else None,
+                ))
+        Deliverable.objects.bulk_create(deliverables, batch_size=5000)
+
+        return {'orders': len(orders), 'lines': len(lines), 'invoices': len(invoices),
+                'payments': len(payments), 'deliverables': len(deliverables)}
+
+    def recompute_totals_and_statuses(self):
+        """ One set-based pass: Order.total_amount, Invoice.paid_amount and Invoice.status. """
+        self.stdout.write("Recomputing order totals and invoice statuses (set-based)...")
+        load_orders = Order.objects.filter(customer__user__username__startswith=LOAD_CUSTOMER_USERNAME_PREFIX)
+        line_totals = (OrderService.objects.filter(order=OuterRef('pk')).order_by()
+                       .values('order').annotate(total=Sum(F('price') * F('quantity'))).values('total'))
+        orders_updated = load_orders.update(
+            total_amount=Coalesce(Subquery(line_totals, output_field=MONEY), Value(Decimal('0.00')), output_field=MONEY)
+        )
+
+        load_invoices = Invoice.objects.filter(order__in=load_orders)
+        paid_totals = (Payment.objects.filter(invoice=OuterRef('pk'), status='COMPLETED').order_by()
+                       .values('invoice').annotate(total=Sum('amount')).values('total'))
+        load_invoices.update(
+            paid_amount=Coalesce(Subquery(paid_totals, output_field=MONEY), Value(Decimal('0.00')), output_field=MONEY)
+        )
+        order_total = Subquery(Order.objects.filter(pk=OuterRef('order_id')).values('total_amount')[:1], output_field=MONEY)
+        today = self.now.date()
+        invoices_updated = load_invoices.exclude(status__in=Invoice.FINAL_STATUSES + ['DRAFT']).annotate(
+            order_total=order_total
+        ).update(status=Case(
+            When(Q(order_total__gt=0) & Q(paid_amount__gte=F('order_total')), then=Value('PAID')),
+            When(paid_amount__gt=0, then=Value('PARTIALLY_PAID')),
+            When(due_date__lt=today, then=Value('OVERDUE')),
+            default=Value('SENT'), output_field=CharField(),
+        ))
+        self.stdout.write(f"  {orders_updated} orders and {invoices_updated} invoices recomputed.")
+
+    def refresh_derived_data(self):
+        """ bulk_create skipped the SLA and search signals: reclassify and reindex in bulk, without notifications. """
+        sla = refresh_sla_statuses(notify=False)
+        self.stdout.write(f"  SLA: {sla['deliverables']} deliverables and {sla['orders']} orders reclassified.")
+        counts = rebuild_index()
+        self.stdout.write(f"  Search index rebuilt: {', '.join(f'{k}={v}' for k, v in counts.items())}.")
+
+    def clear(self):
+        self.stdout.write(self.style.WARNING("Clearing previously generated load-test data..."))
+        with transaction.atomic():
+            load_orders = Order.objects.filter(customer__user__username__startswith=LOAD_CUSTOMER_USERNAME_PREFIX)
+            Payment.objects.filter(invoice__order__in=load_orders).delete()
+            Invoice.objects.filter(order__in=load_orders).delete()
+            Deliverable.objects.filter(order__in=load_orders).delete()
+            OrderService.objects.filter(order__in=load_orders).delete()
+            load_orders.delete()
+            Customer.objects.filter(user__username__startswith=LOAD_CUSTOMER_USERNAME_PREFIX).delete()
+            Employee.objects.filter(user__username__startswith=LOAD_EMPLOYEE_USERNAME_PREFIX).delete()
+            User.objects.filter(username__startswith=LOAD_CUSTOMER_USERNAME_PREFIX).delete()
+            User.objects.filter(username__startswith=LOAD_EMPLOYEE_USERNAME_PREFIX).delete()
+            Provider.objects.filter(name__startswith=LOAD_PROVIDER_NAME_PREFIX).delete()
@@ -1,67 +1,34 @@
 # api/management/commands/load_services_from_excel.py
 
-import pandas as pd
+import json
 import os
-import math
-from decimal import Decimal, InvalidOperation
-from datetime import datetime
+import time
+
+import pandas as pd
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from django.utils.timezone import make_aware, timezone
-
-# Importa los modelos relevantes de tu app
-from api.models import ServiceCategory, Campaign, Service, Price, ServiceFeature
-# Si implementas Packages: from api.models import PackageComponent
 
-# --- Funciones auxiliares de limpieza (sin cambios) ---
-def clean_bool(value, true_values=['1', 'enable', 'y', 1, True], false_values=['0', 'disable', 'n', 0, False]):
-    if value in true_values: return True
-    if value in false_values: return False
-    if isinstance(value, str):
-        value = value.strip().lower()
-        if value in true_values: return True
-        if value in false_values: return False
-    if pd.isna(value): return False
-    return False
+from api.catalog_import import CatalogImporter, CatalogImportError, CatalogSync, file_checksum
 
-def clean_decimal(value, default=Decimal('0.00')):
-    if pd.isna(value): return default
-    if isinstance(value, str):
-         value = value.strip()
-         if not value: return default
-    try:
-        if isinstance(value, float): value = str(value)
-        return Decimal(value)
-    except (InvalidOperation, TypeError, ValueError): return default
+TABLE_LABELS = {
+    'categories': 'Categorías',
+    'campaigns': 'Campañas',
+    'services': 'Servicios',
+    'prices': 'Precios',
+    'features': 'Características',
+}
 
-def clean_string(value, default=None):
-     if pd.isna(value): return default
-     val_str = str(value).strip()
-     if val_str.endswith('.0'):
-         try: return str(int(float(val_str)))
-         except ValueError: pass
-     return val_str if val_str.lower() != 'nan' else default
 
-def clean_datetime(value):
-    if pd.isna(value): return None
-    if isinstance(value, datetime):
-        if timezone.is_naive(value): return make_aware(value)
-        return value
-    if isinstance(value, str):
-        value = value.strip()
-        for fmt in ('%Y-%m-%d %H:%M:%S', '%d-%m-%Y %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y'): # Añadir más formatos comunes de Excel
-            try:
-                dt = datetime.strptime(value, fmt)
-                if fmt in ('%Y-%m-%d', '%d-%m-%Y'):
-                     dt = datetime.combine(dt.date(), datetime.min.time())
-                return make_aware(dt)
-            except ValueError: pass
-    return None
+class DryRunRollback(Exception):
+    """ Fuerza el rollback de la transacción en modo --dry-run. """
 
 
 class Command(BaseCommand):
-    help = 'Carga datos de servicios, categorías, precios, etc., desde un archivo Excel.'
+    help = (
+        'Carga datos de servicios, categorías, precios, etc., desde un archivo Excel. '
+        'Importación vectorizada: precarga de claves, bulk_create/bulk_update y reporte de diferencias.'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -73,8 +40,19 @@ class Command(BaseCommand):
         parser.add_argument('--sheet-details', default='serviceDetails', help='Nombre de la hoja para Detalles de Servicio')
         parser.add_argument('--sheet-prices', default='prices', help='Nombre de la hoja para Precios')
         parser.add_argument('--sheet-features', default='servicesFeatures', help='Nombre de la hoja para Características')
+        parser.add_argument('--dry-run', action='store_true', help='Calcula y muestra las diferencias sin guardar cambios.')
+        parser.add_argument('--show-diff', action='store_true', help='Muestra el detalle campo a campo de las filas actualizadas.')
+        parser.add_argument('--report', type=str, help='Ruta opcional donde escribir el reporte de diferencias en JSON.')
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Sincronización incremental: salta el archivo/hojas sin cambios (checksum) y solo procesa filas cuyo hash cambió.'
+        )
+        parser.add_argument('--force', action='store_true', help='Con --incremental, ignora los hashes guardados y reprocesa todo.')
+
+    def log(self, message, level='info'):
+        style = {'error': self.style.ERROR, 'warning': self.style.WARNING}.get(level)
+        self.stdout.write(style(message) if style else message)
 
-    @transaction.atomic
     def handle(self, *args, **options):
         file_path = options['excel_file']
         sheet_names = {
@@ -90,184 +68,66 @@ class Command(BaseCommand):
             raise CommandError(f"Archivo Excel no encontrado en: {file_path}")
 
         self.stdout.write(self.style.SUCCESS(f"Iniciando carga desde: {file_path}"))
+        start = time.perf_counter()
+
+        sync, checksum = None, None
+        if options['incremental']:
+            checksum = file_checksum(file_path)
+            sync = CatalogSync(log=self.log, force=options['force'])
+            if sync.is_up_to_date(checksum):
+                self.stdout.write(self.style.SUCCESS(f"Sin cambios: el archivo ya fue sincronizado (sha256 {checksum[:12]}…)."))
+                return
 
-        dfs = {}
+        # Un único parseo del libro; todas las hojas como texto
         try:
-            for key, sheet_name in sheet_names.items():
-                self.stdout.write(f"  Leyendo hoja: '{sheet_name}'...")
-                dfs[key] = pd.read_excel(file_path, sheet_name=sheet_name, dtype=str)
-                dfs[key] = dfs[key].replace(['nan', 'NaN', 'None', '', pd.NA], None)
-                self.stdout.write(f"    Leídas {len(dfs[key])} filas.")
+            with pd.ExcelFile(file_path) as workbook:
+                dfs = {key: workbook.parse(sheet_name, dtype=str) for key, sheet_name in sheet_names.items()}
         except FileNotFoundError: raise CommandError(f"Archivo Excel no encontrado en: {file_path}")
         except ValueError as e: raise CommandError(f"Error leyendo archivo Excel: {e}. Hoja no encontrada o nombre incorrecto ({', '.join(sheet_names.values())}).")
         except Exception as e: raise CommandError(f"Error inesperado leyendo el archivo Excel: {e}")
+        for key, df in dfs.items():
+            self.stdout.write(f"  Hoja '{sheet_names[key]}': {len(df)} filas.")
 
-        # --- 1. Cargar Categorías ---
-        self.stdout.write("Cargando Categorías (desde hoja 'serv_code')...")
-        created_count, updated_count = 0, 0
+        importer = sync or CatalogImporter(log=self.log)
         try:
-            for index, row in dfs['categories'].iterrows():
-                code = clean_string(row.get('code'))
-                name = clean_string(row.get('nombre'))
-                if not code or not name: continue
-                _, created = ServiceCategory.objects.update_or_create(code=code, defaults={'name': name})
-                # --- CORRECCIÓN AQUÍ ---
-                if created:
-                    created_count += 1
+            with transaction.atomic():
+                if sync:
+                    sync.run(dfs, checksum)
                 else:
-                    updated_count += 1
-                # -----------------------
-            self.stdout.write(self.style.SUCCESS(f"  Categorías creadas: {created_count}, actualizadas: {updated_count}."))
-        except Exception as e:
-             raise CommandError(f"Error cargando categorías: {e}")
-
-        # --- 2. Cargar Campañas ---
-        self.stdout.write("Cargando Campañas (desde hoja 'campaigns')...")
-        created_count, updated_count = 0, 0
-        try:
-            for index, row in dfs['campaigns'].iterrows():
-                code = clean_string(row.get('campaign_code'))
-                name = clean_string(row.get('campaign_name'))
-                if not code or not name: continue
-                start_date = clean_datetime(row.get('start_date'))
-                end_date = clean_datetime(row.get('end_date'))
-                if not start_date: self.stdout.write(self.style.ERROR(f" Campaña Fila {index+2}: Fecha inicio inválida para {code}. Saltando.")); continue
-
-                _, created = Campaign.objects.update_or_create(
-                    campaign_code=code,
-                    defaults={
-                        'campaign_name': name, 'start_date': start_date, 'end_date': end_date,
-                        'description': clean_string(row.get('description')),
-                        'budget': clean_decimal(row.get('budget')),
-                        'is_active': clean_bool(row.get('is_active'), true_values=['1', 'TRUE', 'True', True]),
-                    }
-                )
-                # --- CORRECCIÓN AQUÍ ---
-                if created:
-                    created_count += 1
-                else:
-                    updated_count += 1
-                # -----------------------
-            self.stdout.write(self.style.SUCCESS(f"  Campañas creadas: {created_count}, actualizadas: {updated_count}."))
-        except Exception as e:
-             raise CommandError(f"Error cargando campañas: {e}")
-
-        # --- 3. Cargar Servicios ---
-        self.stdout.write("Cargando Servicios (desde hojas 'service' y 'serviceDetails')...")
-        service_objects = {}
-        created_count, updated_count = 0, 0
-        try:
-            df_details = dfs['details'].drop_duplicates(subset=['code'], keep='first')
-            details_map = df_details.set_index('code').to_dict('index')
-
-            for index, row in dfs['services'].iterrows():
-                code = clean_string(row.get('code'))
-                cat_code = clean_string(row.get('service_'))
-                camp_code = clean_string(row.get('campaign_code'))
-                name = clean_string(row.get('name'))
-
-                if not code or not cat_code or not name: continue
-                try: category = ServiceCategory.objects.get(code=cat_code)
-                except ServiceCategory.DoesNotExist: self.stdout.write(self.style.ERROR(f" Serv Fila {index+2}: Cat '{cat_code}' no encontrada para {code}. Saltando.")); continue
-                campaign = None
-                if camp_code:
-                    try: campaign = Campaign.objects.get(campaign_code=camp_code)
-                    except Campaign.DoesNotExist: self.stdout.write(self.style.WARNING(f" Serv Fila {index+2}: Campaña '{camp_code}' no encontrada para {code}."))
-
-                details_data = details_map.get(code, {})
-                service, created = Service.objects.update_or_create(
-                    code=code,
-                    defaults={
-                        'category': category, 'name': name,
-                        'is_active': clean_bool(row.get('is_active'), true_values=['1']),
-                        'ventulab': clean_bool(row.get('ventulab'), true_values=['enable']),
-                        'campaign': campaign,
-                        'is_package': clean_bool(row.get('is_package'), true_values=['Y', 'y']),
-                        'is_subscription': clean_bool(row.get('is_subscription')),
-                        'audience': clean_string(details_data.get('audience')),
-                        'detailed_description': clean_string(details_data.get('description')),
-                        'problem_solved': clean_string(details_data.get('resuelve')),
-                    }
-                )
-                service_objects[code] = service
-                # --- CORRECCIÓN AQUÍ ---
-                if created:
-                    created_count += 1
+                    importer.run(dfs)
+                if options['dry_run']:
+                    raise DryRunRollback()
+        except DryRunRollback:
+            self.stdout.write(self.style.WARNING("Modo --dry-run: no se guardó ningún cambio."))
+        except CatalogImportError as e:
+            raise CommandError(f"Error cargando catálogo: {e}")
+        report = importer.report
+
+        if sync:
+            self.stdout.write("Changeset (filas de origen):")
+            for sheet, changes in sync.changeset.items():
+                if changes['skipped']:
+                    self.stdout.write(f"  {sheet}: hoja sin cambios, omitida.")
                 else:
-                    updated_count += 1
-                # -----------------------
-            self.stdout.write(self.style.SUCCESS(f"  Servicios creados: {created_count}, actualizados: {updated_count}."))
-        except Exception as e:
-            raise CommandError(f"Error cargando servicios: {e}")
-
-        # --- 4. Cargar Precios ---
-        self.stdout.write("Cargando Precios (desde hoja 'prices')...")
-        created_count, updated_count, skipped_count = 0, 0, 0 # Reiniciar contadores para precios
-        try:
-            default_date = datetime.now().date()
-            service_codes_in_prices = dfs['prices']['dloub_id'].dropna().unique()
-            Price.objects.filter(service__code__in=service_codes_in_prices, effective_date=default_date).delete()
-            self.stdout.write(f"  Precios anteriores borrados para {len(service_codes_in_prices)} servicios en fecha {default_date}.")
-
-            for index, row in dfs['prices'].iterrows():
-                service_code = clean_string(row.get('dloub_id'))
-                if not service_code: skipped_count += 1; continue
-                service = service_objects[service_code] # Usar corchetes, fallará si no existe (más directo)
-
-                currencies = ['USD', 'CLP', 'COP']
-                for currency in currencies:
-                    price_val = clean_decimal(row.get(currency))
-                    if price_val > 0:
-                        price_obj, created = Price.objects.update_or_create( # Usar update_or_create aquí también por si acaso
-                            service=service, currency=currency, effective_date=default_date,
-                            defaults={'amount': price_val}
-                        )
-                        # --- CORRECCIÓN AQUÍ ---
-                        if created:
-                             created_count += 1
-                        else:
-                             updated_count += 1 # Contar actualizaciones también
-                        # -----------------------
-                    else:
-                         skipped_count += 1 # Contar precios cero u omitidos
-
-            self.stdout.write(self.style.SUCCESS(f"  Precios creados: {created_count}, actualizados: {updated_count}, omitidos/cero: {skipped_count}."))
-        except KeyError as e:
-             raise CommandError(f"Error cargando precios: Servicio con código '{e}' no encontrado en la carga anterior. Verifica la hoja 'service'.")
-        except Exception as e:
-             raise CommandError(f"Error cargando precios: {e}")
-
-
-        # --- 5. Cargar Características ---
-        self.stdout.write("Cargando Características (desde hoja 'servicesFeatures')...")
-        created_count, skipped_count = 0, 0
-        try:
-            df_features = dfs['features']
-            service_codes_in_features = df_features['serviceid'].dropna().unique()
-            ServiceFeature.objects.filter(service__code__in=service_codes_in_features).delete()
-            self.stdout.write(f"  Características anteriores borradas para {len(service_codes_in_features)} servicios.")
-
-            for index, row in df_features.iterrows():
-                service_code = clean_string(row.get('serviceid'))
-                feature_type = clean_string(row.get('featuretype'))
-                description = clean_string(row.get('description'))
-
-                if not service_code or not feature_type or not description: skipped_count += 1; continue
-                service = service_objects[service_code] # Usar corchetes
-
-                valid_types = [choice[0] for choice in ServiceFeature.FEATURE_TYPES]
-                if feature_type not in valid_types: self.stdout.write(self.style.WARNING(f" Feat Fila {index+2}: Tipo '{feature_type}' inválido para {service_code}. Saltando.")); skipped_count += 1; continue
-
-                ServiceFeature.objects.create(service=service, feature_type=feature_type, description=description)
-                created_count += 1
-            self.stdout.write(self.style.SUCCESS(f"  Características creadas: {created_count}, omitidas: {skipped_count}."))
-        except KeyError as e:
-             raise CommandError(f"Error cargando características: Servicio con código '{e}' no encontrado en la carga anterior. Verifica la hoja 'service'.")
-        except Exception as e:
-             raise CommandError(f"Error cargando características: {e}")
-
-
-        # --- 6. Cargar Paquetes (Opcional) ---
-        # ...
-
-        self.stdout.write(self.style.SUCCESS(f"¡Carga de datos desde '{file_path}' completada exitosamente!"))
\ No newline at end of file
+                    self.stdout.write(
+                        f"  {sheet}: nuevas {len(changes['new'])}, modificadas {len(changes['changed'])}, "
+                        f"retiradas {len(changes['removed'])}."
+                    )
+
+        for table, label in TABLE_LABELS.items():
+            stats = report.get(table, {})
+            self.stdout.write(self.style.SUCCESS(
+                f"  {label}: creados {len(stats.get('created', []))}, actualizados {len(stats.get('updated', {}))}, "
+                f"eliminados {len(stats.get('deleted', []))}, sin cambios {stats.get('unchanged', 0)}, omitidos {stats.get('skipped', 0)}."
+            ))
+            if options['show_diff']:
+                for key, changes in stats.get('updated', {}).items():
+                    for field, (old, new) in changes.items():
+                        self.stdout.write(f"    {key} · {field}: {old!r} -> {new!r}")
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as fh:
+                json.dump({'report': report, 'changeset': sync.changeset} if sync else report, fh, indent=2, ensure_ascii=False, default=str)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"¡Carga de datos desde '{file_path}' completada en {elapsed:.2f}s!"))
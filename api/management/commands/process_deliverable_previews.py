@@ -0,0 +1,41 @@
+# api/management/commands/process_deliverable_previews.py
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.models import Deliverable, DeliverablePreview
+from api.previews import claimable, process_preview
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera miniaturas, vistas previas y metadatos de entregables pendientes o fallidos '
+        '(y de los que quedaron en proceso por un worker caído). '
+        'Con --backfill crea también las vistas previas de entregables que aún no tienen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true', help='Incluye entregables con archivo y sin vista previa.')
+        parser.add_argument('--retry-failed', action='store_true', help='Reintenta también las vistas previas con error.')
+        parser.add_argument('--limit', type=int, default=None, help='Máximo de entregables a procesar.')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            missing = Deliverable.objects.filter(preview__isnull=True).exclude(Q(file='') | Q(file__isnull=True))
+            created = DeliverablePreview.objects.bulk_create(
+                [DeliverablePreview(deliverable_id=pk, source_name=name) for pk, name in missing.values_list('pk', 'file')],
+                ignore_conflicts=True,
+            )
+            self.stdout.write(f"Vistas previas creadas para {len(created)} entregables.")
+
+        statuses = ['PENDING', 'FAILED'] if options['retry_failed'] else ['PENDING']
+        pending = DeliverablePreview.objects.filter(claimable(statuses)).order_by('updated_at').values_list('pk', flat=True)
+        if options['limit']:
+            pending = pending[:options['limit']]
+
+        results = {}
+        for preview_id in list(pending):
+            status = process_preview(preview_id)
+            if status:
+                results[status] = results.get(status, 0) + 1
+        summary = ', '.join(f"{k}: {v}" for k, v in sorted(results.items())) or 'nada pendiente'
+        self.stdout.write(self.style.SUCCESS(f"Vistas previas procesadas ({summary})."))
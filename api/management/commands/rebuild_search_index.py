@@ -0,0 +1,29 @@
+# api/management/commands/rebuild_search_index.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import SEARCH_SOURCES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye el índice de búsqueda (SearchIndexEntry) para servicios, clientes, pedidos y entregables. '
+        'Necesario tras cargas masivas que no emiten señales (bulk_create, generate_load_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', dest='doc_types', action='append', choices=sorted(SEARCH_SOURCES),
+            help='Tipo a reconstruir (repetible). Por defecto, todos.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Tamaño de lote para lectura e inserción.')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError("--chunk-size debe ser mayor que cero.")
+        start = time.perf_counter()
+        counts = rebuild_index(options['doc_types'], chunk_size=options['chunk_size'])
+        for doc_type, count in counts.items():
+            self.stdout.write(f"  {doc_type}: {count} objetos indexados.")
+        self.stdout.write(self.style.SUCCESS(f"Índice de búsqueda reconstruido en {time.perf_counter() - start:.2f}s."))
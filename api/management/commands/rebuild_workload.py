@@ -0,0 +1,15 @@
+# api/management/commands/rebuild_workload.py
+from django.core.management.base import BaseCommand
+
+from api.workload import rebuild_workload
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los contadores de tareas abiertas por empleado y proveedor. '
+        'Necesario tras cargas masivas que no disparan señales (bulk_create, update()).'
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_workload()
+        self.stdout.write(self.style.SUCCESS(f"Contadores de carga de trabajo reconstruidos: {total}."))
@@ -0,0 +1,79 @@
+# api/management/commands/run_report_worker.py
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.report_jobs import claim_jobs, cleanup_report_jobs, init_pool_process, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de informes en segundo plano: reclama informes en cola (tabla ReportJob) y los ejecuta '
+        'en un pool de procesos. Con --once procesa lo pendiente y termina (útil desde cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Procesos del pool (0 = en línea, sin pool).')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Segundos de espera con la cola vacía.')
+        parser.add_argument('--cleanup-interval', type=float, default=3600.0, help='Segundos entre limpiezas de caducados.')
+        parser.add_argument('--once', action='store_true', help='Procesa la cola hasta vaciarla y termina.')
+        parser.add_argument('--cleanup-only', action='store_true', help='Solo elimina informes caducados y termina.')
+
+    def handle(self, *args, **options):
+        if options['cleanup_only']:
+            result = cleanup_report_jobs()
+            self.stdout.write(self.style.SUCCESS(f"Limpieza: {result['expired']} caducados, {result['timed_out']} por timeout."))
+            return
+        processes = max(options['processes'], 0)
+        totals = {}
+        if processes == 0:
+            self.run_inline(options, totals)
+        else:
+            self.run_pool(processes, options, totals)
+        summary = ', '.join(f"{k}: {v}" for k, v in sorted(totals.items())) or 'nada pendiente'
+        self.stdout.write(self.style.SUCCESS(f"Informes procesados ({summary})."))
+
+    def record(self, totals, status):
+        totals[status] = totals.get(status, 0) + 1
+
+    def run_inline(self, options, totals):
+        last_cleanup = 0.0
+        while True:
+            last_cleanup = self.maybe_cleanup(options, last_cleanup)
+            claimed = claim_jobs(1)
+            if claimed:
+                self.record(totals, run_job(claimed[0]))
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['poll_interval'])
+
+    def run_pool(self, processes, options, totals):
+        connections.close_all()  # Antes de crear procesos: no compartir sockets con los hijos
+        last_cleanup, running = 0.0, set()
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_pool_process) as pool:
+            try:
+                while True:
+                    last_cleanup = self.maybe_cleanup(options, last_cleanup)
+                    for job_id in claim_jobs(processes - len(running)):
+                        running.add(pool.submit(run_job, job_id))
+                    if not running:
+                        if options['once']:
+                            return
+                        time.sleep(options['poll_interval'])
+                        continue
+                    done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.record(totals, future.result() if not future.exception() else 'FAILED')
+            except KeyboardInterrupt:
+                self.stdout.write("Deteniendo worker: se esperan los informes en ejecución...")
+
+    def maybe_cleanup(self, options, last_cleanup):
+        if time.monotonic() - last_cleanup >= options['cleanup_interval']:
+            result = cleanup_report_jobs()
+            if result['expired'] or result['timed_out']:
+                self.stdout.write(f"Limpieza: {result['expired']} caducados, {result['timed_out']} por timeout.")
+            return time.monotonic()
+        return last_cleanup
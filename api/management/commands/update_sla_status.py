@@ -0,0 +1,21 @@
+# api/management/commands/update_sla_status.py
+from django.core.management.base import BaseCommand
+
+from api.sla import refresh_sla_statuses
+
+
+class Command(BaseCommand):
+    help = (
+        'Reclasifica pedidos y entregables (en plazo, vence pronto, en riesgo, vencido) en una '
+        'pasada masiva y notifica las nuevas situaciones de riesgo. Pensado para ejecutarse por cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-notify', action='store_true', help='Actualiza los estados sin crear notificaciones.')
+
+    def handle(self, *args, **options):
+        result = refresh_sla_statuses(notify=not options['no_notify'])
+        self.stdout.write(self.style.SUCCESS(
+            f"SLA actualizado: {result['deliverables']} entregables y {result['orders']} pedidos reclasificados, "
+            f"{result['notifications']} notificaciones."
+        ))
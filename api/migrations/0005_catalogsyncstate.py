@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_seed_services_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sheet', models.CharField(help_text='Clave lógica de la hoja (categories, services, prices...)', max_length=50, unique=True, verbose_name='Hoja')),
+                ('file_checksum', models.CharField(blank=True, max_length=64, verbose_name='Checksum Archivo')),
+                ('sheet_checksum', models.CharField(blank=True, max_length=64, verbose_name='Checksum Hoja')),
+                ('row_hashes', models.JSONField(blank=True, default=dict, help_text='Hash del contenido de origen por clave de fila', verbose_name='Hashes por Fila')),
+                ('synced_at', models.DateTimeField(auto_now=True, verbose_name='Última Sincronización')),
+            ],
+            options={
+                'verbose_name': 'Estado de Sincronización de Catálogo',
+                'verbose_name_plural': 'Estados de Sincronización de Catálogo',
+                'ordering': ['sheet'],
+            },
+        ),
+    ]
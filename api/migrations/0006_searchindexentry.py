@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_catalogsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(help_text='Tipo de objeto indexado (service, customer, order, deliverable)', max_length=20, verbose_name='Tipo')),
+                ('object_id', models.CharField(max_length=64, verbose_name='ID Objeto')),
+                ('term', models.CharField(help_text='Término normalizado (minúsculas, sin acentos)', max_length=64, verbose_name='Término')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Peso')),
+            ],
+            options={
+                'verbose_name': 'Entrada de Índice de Búsqueda',
+                'verbose_name_plural': 'Índice de Búsqueda',
+                'indexes': [models.Index(fields=['term', 'doc_type'], name='api_search_term_idx'), models.Index(fields=['doc_type', 'object_id'], name='api_search_object_idx')],
+                'unique_together': {('doc_type', 'object_id', 'term')},
+            },
+        ),
+    ]
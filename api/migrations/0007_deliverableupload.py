@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:47
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_searchindexentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliverableUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Nombre de Archivo')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Tipo de Contenido')),
+                ('total_size', models.PositiveBigIntegerField(verbose_name='Tamaño Total (bytes)')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Tamaño de Parte (bytes)')),
+                ('received_parts', models.JSONField(blank=True, default=dict, help_text='{número de parte: bytes recibidos}', verbose_name='Partes Recibidas')),
+                ('checksum', models.CharField(blank=True, help_text='Checksum opcional enviado por el cliente', max_length=64, verbose_name='SHA-256 Esperado')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Activa'), ('COMPLETED', 'Completada'), ('ABORTED', 'Cancelada')], db_index=True, default='ACTIVE', max_length=20, verbose_name='Estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deliverable_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Creada por')),
+                ('deliverable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='api.deliverable', verbose_name='Entregable')),
+            ],
+            options={
+                'verbose_name': 'Subida de Entregable',
+                'verbose_name_plural': 'Subidas de Entregables',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:49
+
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_deliverableupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Ruta en Storage')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('original_name', models.CharField(blank=True, max_length=255, verbose_name='Nombre Original')),
+                ('ref_count', models.IntegerField(db_index=True, default=0, verbose_name='Referencias')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Blob Almacenado',
+                'verbose_name_plural': 'Blobs Almacenados',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='brand_guidelines',
+            field=models.FileField(blank=True, null=True, storage=api.storage.get_content_addressed_storage, upload_to='customers/brand_guidelines/', verbose_name='Guías de Marca'),
+        ),
+        migrations.AlterField(
+            model_name='deliverable',
+            name='file',
+            field=models.FileField(blank=True, help_text='Archivo entregable (opcional inicialmente); almacenado por contenido (SHA-256)', null=True, storage=api.storage.get_content_addressed_storage, upload_to='deliverables/%Y/%m/', verbose_name='Archivo'),
+        ),
+        migrations.AlterField(
+            model_name='deliverable',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Se incrementa cuando cambia el contenido del archivo', verbose_name='Versión'),
+        ),
+    ]
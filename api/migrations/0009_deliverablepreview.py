@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliverablePreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(help_text='Nombre del archivo procesado (detecta cambios)', max_length=255, verbose_name='Archivo de Origen')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('READY', 'Lista'), ('UNSUPPORTED', 'Formato sin vista previa'), ('FAILED', 'Error')], db_index=True, default='PENDING', max_length=20, verbose_name='Estado')),
+                ('thumbnail', models.CharField(blank=True, max_length=255, verbose_name='Miniatura')),
+                ('preview', models.CharField(blank=True, max_length=255, verbose_name='Vista Previa')),
+                ('metadata', models.JSONField(blank=True, default=dict, help_text='Dimensiones, duración, páginas, tamaño...', verbose_name='Metadatos')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+                ('deliverable', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='preview', to='api.deliverable', verbose_name='Entregable')),
+            ],
+            options={
+                'verbose_name': 'Vista Previa de Entregable',
+                'verbose_name_plural': 'Vistas Previas de Entregables',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+FINAL_STATUSES = ['COMPLETED', 'REJECTED']
+
+def build_workload_counters(apps, schema_editor):
+    """ Inicializa los contadores con las tareas abiertas existentes. """
+    Deliverable = apps.get_model('api', 'Deliverable')
+    WorkloadCounter = apps.get_model('api', 'WorkloadCounter')
+    open_qs = Deliverable.objects.exclude(status__in=FINAL_STATUSES).order_by()
+    counters = [
+        WorkloadCounter(employee_id=row['assigned_employee'], open_tasks=row['total'])
+        for row in open_qs.filter(assigned_employee__isnull=False).values('assigned_employee').annotate(total=Count('id'))
+    ] + [
+        WorkloadCounter(provider_id=row['assigned_provider'], open_tasks=row['total'])
+        for row in open_qs.filter(assigned_provider__isnull=False).values('assigned_provider').annotate(total=Count('id'))
+    ]
+    WorkloadCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_deliverablepreview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkloadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_tasks', models.IntegerField(db_index=True, default=0, verbose_name='Tareas Abiertas')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Carga de Trabajo',
+                'verbose_name_plural': 'Cargas de Trabajo',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deliverable',
+            index=models.Index(fields=['assigned_employee', 'status', 'due_date'], name='api_deliv_emp_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliverable',
+            index=models.Index(fields=['assigned_provider', 'status', 'due_date'], name='api_deliv_prov_status_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='workloadcounter',
+            name='employee',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='workload', to='api.employee', verbose_name='Empleado'),
+        ),
+        migrations.AddField(
+            model_name='workloadcounter',
+            name='provider',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='workload', to='api.provider', verbose_name='Proveedor'),
+        ),
+        migrations.RunPython(build_workload_counters, migrations.RunPython.noop),
+    ]
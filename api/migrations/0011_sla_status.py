@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:01
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, CharField, Exists, OuterRef, Q, Value, When
+from django.utils import timezone
+
+
+# Reglas de api/sla.py en el momento de esta migración (copiadas: la migración no depende del código actual).
+# Los plazos son configuración del despliegue, como en el motor.
+DUE_SOON_DAYS = getattr(settings, 'SLA_DUE_SOON_DAYS', 2)
+AT_RISK_DAYS = getattr(settings, 'SLA_AT_RISK_DAYS', 5)
+DELIVERABLE_FINAL_STATUSES = ['COMPLETED', 'REJECTED']
+ORDER_FINAL_STATUSES = ['DELIVERED', 'CANCELLED']
+STALLED_DELIVERABLE_STATUSES = ['PENDING', 'REQUIRES_INFO', 'REVISION_REQUESTED']
+RISK_STATUSES = ['OVERDUE', 'AT_RISK']
+
+def backfill_sla_status(apps, schema_editor):
+    """ Clasifica las filas existentes (sin notificaciones). """
+    Deliverable = apps.get_model('api', 'Deliverable')
+    Order = apps.get_model('api', 'Order')
+    today, now = timezone.localdate(), timezone.now()
+
+    # Primero los entregables: el riesgo del pedido depende de ellos
+    Deliverable.objects.update(sla_status=Case(
+        When(status__in=DELIVERABLE_FINAL_STATUSES, then=Value('CLOSED')),
+        When(due_date__isnull=True, then=Value('ON_TRACK')),
+        When(due_date__lt=today, then=Value('OVERDUE')),
+        When(
+            Q(due_date__lte=today + timedelta(days=AT_RISK_DAYS)) & (
+                Q(assigned_employee__isnull=True, assigned_provider__isnull=True)
+                | Q(status__in=STALLED_DELIVERABLE_STATUSES)
+            ),
+            then=Value('AT_RISK'),
+        ),
+        When(due_date__lte=today + timedelta(days=DUE_SOON_DAYS), then=Value('DUE_SOON')),
+        default=Value('ON_TRACK'), output_field=CharField(),
+    ))
+    risky_deliverables = Deliverable.objects.filter(order=OuterRef('pk'), sla_status__in=RISK_STATUSES)
+    Order.objects.update(sla_status=Case(
+        When(status__in=ORDER_FINAL_STATUSES, then=Value('CLOSED')),
+        When(date_required__lt=now, then=Value('OVERDUE')),
+        When(Exists(risky_deliverables), then=Value('AT_RISK')),
+        When(date_required__lte=now + timedelta(days=DUE_SOON_DAYS), then=Value('DUE_SOON')),
+        default=Value('ON_TRACK'), output_field=CharField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_workload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliverable',
+            name='sla_status',
+            field=models.CharField(choices=[('ON_TRACK', 'En Plazo'), ('DUE_SOON', 'Vence Pronto'), ('AT_RISK', 'En Riesgo'), ('OVERDUE', 'Vencido'), ('CLOSED', 'Cerrado')], default='ON_TRACK', editable=False, help_text='Clasificación de plazos calculada por el motor de SLA (api/sla.py)', max_length=12, verbose_name='Estado SLA'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='sla_status',
+            field=models.CharField(choices=[('ON_TRACK', 'En Plazo'), ('DUE_SOON', 'Vence Pronto'), ('AT_RISK', 'En Riesgo'), ('OVERDUE', 'Vencido'), ('CLOSED', 'Cerrado')], default='ON_TRACK', editable=False, help_text='Clasificación de plazos calculada por el motor de SLA (api/sla.py)', max_length=12, verbose_name='Estado SLA'),
+        ),
+        migrations.AddIndex(
+            model_name='deliverable',
+            index=models.Index(fields=['sla_status', 'due_date'], name='api_deliv_sla_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['sla_status', 'date_required'], name='api_order_sla_due_idx'),
+        ),
+        migrations.RunPython(backfill_sla_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_sla_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Tipo de Informe')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('status', models.CharField(choices=[('QUEUED', 'En Cola'), ('RUNNING', 'En Ejecución'), ('SUCCEEDED', 'Completado'), ('FAILED', 'Fallido'), ('CANCELLED', 'Cancelado')], default='QUEUED', max_length=12, verbose_name='Estado')),
+                ('result', models.FileField(blank=True, null=True, upload_to='reports/%Y/%m/', verbose_name='Resultado')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('worker', models.CharField(blank=True, help_text='host:pid del worker que lo reclamó', max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('expires_at', models.DateTimeField(blank=True, help_text='El resultado se elimina después de esta fecha', null=True, verbose_name='Expira')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Informe en Segundo Plano',
+                'verbose_name_plural': 'Informes en Segundo Plano',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='api_reportjob_queue_idx'), models.Index(fields=['user', 'status'], name='api_reportjob_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,128 @@
+# api/model_cache.py
+"""
+Caché read-through de tablas pequeñas, muy leídas y que casi no cambian: roles, puestos,
+categorías de servicio, métodos de pago y tipos de transacción.
+
+- Cada tabla se guarda entera en la caché compartida como {pk: instancia}; la primera
+  lectura tras una invalidación la carga con una sola query.
+- Invalidación por señales: al guardar o borrar una fila se descarta la entrada en el
+  momento (lecturas de la misma transacción) y otra vez al confirmar (lecturas de otras
+  transacciones que la hayan recargado entre medias). Los cambios con update() o
+  bulk_create no disparan señales: los cubre MODEL_CACHE_TIMEOUT.
+- Contadores de aciertos/fallos por modelo en el proceso (`model_cache.stats()`).
+
+`CachedPrimaryKeyRelatedField` (api/serializers/fields.py) valida los ids de estas
+tablas contra la caché en lugar de consultar la base de datos.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+CACHED_MODELS = ('api.UserRole', 'api.ServiceCategory', 'api.PaymentMethod', 'api.TransactionType', 'api.JobPosition')
+MODEL_CACHE_KEY = 'models:{label}:v1'
+MODEL_CACHE_TIMEOUT = getattr(settings, 'MODEL_CACHE_TIMEOUT', 60 * 60)
+
+
+class ModelCache:
+    def __init__(self, labels):
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def is_cached(self, model):
+        return model._meta.label in self.labels
+
+    def _key(self, model):
+        return MODEL_CACHE_KEY.format(label=model._meta.label_lower)
+
+    def _cached_rows(self, model):
+        rows = cache.get(self._key(model))
+        with self._lock:
+            (self.misses if rows is None else self.hits)[model._meta.label] += 1
+        return rows
+
+    def _store(self, model, rows):
+        cache.set(self._key(model), rows, MODEL_CACHE_TIMEOUT)
+        logger.debug(f"[ModelCache] {model._meta.label}: {len(rows)} filas cargadas.")
+        return rows
+
+    @staticmethod
+    def _to_pk(model, pk):
+        try:
+            return model._meta.pk.to_python(pk)
+        except Exception:
+            return None
+
+    def table(self, model):
+        """ {pk: instancia} de toda la tabla, desde la caché o cargada con una query. """
+        rows = self._cached_rows(model)
+        if rows is None:
+            rows = self._store(model, {obj.pk: obj for obj in model._default_manager.all()})
+        return rows
+
+    def get(self, model, pk):
+        """ Instancia con ese pk (convertido al tipo del campo) o None. """
+        pk = self._to_pk(model, pk)
+        return None if pk is None else self.table(model).get(pk)
+
+    # Variantes para vistas asíncronas: la caché se consulta directamente (los backends de
+    # Django no tienen I/O asíncrona propia; aget() solo movería la llamada a un hilo)
+    async def atable(self, model):
+        rows = self._cached_rows(model)
+        if rows is None:
+            rows = self._store(model, {obj.pk: obj async for obj in model._default_manager.all()})
+        return rows
+
+    async def aget(self, model, pk):
+        pk = self._to_pk(model, pk)
+        return None if pk is None else (await self.atable(model)).get(pk)
+
+    def all(self, model, **filters):
+        """ Filas que cumplen igualdades simples sobre atributos (p. ej. is_active=True). """
+        return [
+            obj for obj in self.table(model).values()
+            if all(getattr(obj, field) == value for field, value in filters.items())
+        ]
+
+    def invalidate(self, model):
+        key = self._key(model)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    def clear(self):
+        for label in self.labels:
+            cache.delete(self._key(apps.get_model(label)))
+
+    def stats(self):
+        """ Aciertos y fallos por modelo desde el arranque del proceso. """
+        with self._lock:
+            return {
+                label: {'hits': self.hits[label], 'misses': self.misses[label]}
+                for label in self.labels
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+model_cache = ModelCache(CACHED_MODELS)
+
+
+# --- Señales: cualquier cambio en una tabla cacheada descarta su entrada ---
+def invalidate_model_cache_signal(sender, **kwargs):
+    model_cache.invalidate(sender)
+
+for label in CACHED_MODELS:
+    post_save.connect(invalidate_model_cache_signal, sender=label, dispatch_uid=f'model_cache_save_{label}')
+    post_delete.connect(invalidate_model_cache_signal, sender=label, dispatch_uid=f'model_cache_delete_{label}')
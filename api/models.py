@@ -2,6 +2,7 @@
 
 import datetime
 import logging
+import uuid
 from decimal import Decimal
 
 from django.conf import settings
@@ -35,6 +36,10 @@ except ImportError:
     get_current_user = lambda: None
     print("ADVERTENCIA: django-crum no está instalado. Los AuditLogs no registrarán el usuario.")
 
+from .storage import ContentAddressedFilesMixin, get_content_addressed_storage
+from .tracking import TrackedFieldsMixin
+from .model_cache import model_cache
+
 # Configurar logger para este módulo
 logger = logging.getLogger(__name__)
 
@@ -92,8 +97,9 @@ class UserProfile(models.Model):
         if not self.primary_role_id:
             raise ValidationError({'primary_role': _('A primary role must be assigned.')})
 
-class UserRoleAssignment(models.Model):
+class UserRoleAssignment(TrackedFieldsMixin, models.Model):
     """Vincula un Usuario con un Rol SECUNDARIO (Acceso) específico."""
+    tracked_fields = ('role', 'is_active')
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
         related_name='secondary_role_assignments', verbose_name=_("User")
@@ -191,7 +197,7 @@ class FormResponse(models.Model):
         question_str = str(self.question) if hasattr(self, 'question') else 'N/A'
         return f"{_('Respuesta')} de {customer_str} a {question_str}"
 
-class Customer(models.Model):
+class Customer(ContentAddressedFilesMixin, models.Model):
     """Perfil de un cliente."""
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='customer_profile', verbose_name=_("Usuario")
@@ -212,7 +218,8 @@ class Customer(models.Model):
         null=True, blank=True
     )
     brand_guidelines = models.FileField(
-        _("Guías de Marca"), upload_to='customers/brand_guidelines/', null=True, blank=True
+        _("Guías de Marca"), upload_to='customers/brand_guidelines/', null=True, blank=True,
+        storage=get_content_addressed_storage
     )
 
     class Meta:
@@ -271,7 +278,12 @@ class Employee(models.Model):
         display_name = self.user.get_full_name() or self.user.get_username()
         return f"{display_name} ({position_name}) {status}"
 
-class Order(models.Model):
+SLA_STATUS_CHOICES = [
+    ('ON_TRACK', _('En Plazo')), ('DUE_SOON', _('Vence Pronto')), ('AT_RISK', _('En Riesgo')),
+    ('OVERDUE', _('Vencido')), ('CLOSED', _('Cerrado')),
+]
+
+class Order(TrackedFieldsMixin, models.Model):
     """Modelo principal para los pedidos de los clientes."""
     STATUS_CHOICES = [
         ('DRAFT', _('Borrador')), ('CONFIRMED', _('Confirmado')), ('PLANNING', _('Planificación')),
@@ -280,6 +292,7 @@ class Order(models.Model):
         ('CANCELLED', _('Cancelado')), ('ON_HOLD', _('En Espera')),
     ]
     FINAL_STATUSES = ['DELIVERED', 'CANCELLED']
+    tracked_fields = ('status', 'employee', 'date_required')
 
     customer = models.ForeignKey(
         Customer, on_delete=models.PROTECT, related_name='orders',
@@ -308,11 +321,18 @@ class Order(models.Model):
         _("Monto Total"), max_digits=12, decimal_places=2, default=Decimal('0.00'),
         editable=False, help_text=_("Calculado de OrderService. Actualizado automáticamente.")
     )
+    sla_status = models.CharField(
+        _("Estado SLA"), max_length=12, choices=SLA_STATUS_CHOICES, default='ON_TRACK', editable=False,
+        help_text=_("Clasificación de plazos calculada por el motor de SLA (api/sla.py)")
+    )
 
     class Meta:
         ordering = ['priority', '-date_received']
         verbose_name = _("Pedido")
         verbose_name_plural = _("Pedidos")
+        indexes = [
+            models.Index(fields=['sla_status', 'date_required'], name='api_order_sla_due_idx'),
+        ]
 
     def __str__(self):
         customer_str = str(self.customer) if hasattr(self, 'customer') else 'N/A'
@@ -426,7 +446,12 @@ class Service(models.Model):
 
     def get_current_price(self, currency='EUR'):
         """Obtiene el precio más reciente para una moneda específica."""
-        latest_price = self.price_history.filter(currency=currency).order_by('-effective_date').first()
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('price_history')
+        if prefetched is not None:  # Ya precargados (prefetch_related): sin query
+            prices = [p for p in prefetched if p.currency == currency]
+            latest_price = max(prices, key=lambda p: p.effective_date) if prices else None
+        else:
+            latest_price = self.price_history.filter(currency=currency).order_by('-effective_date').first()
         return latest_price.amount if latest_price else None
 
 class ServiceFeature(models.Model):
@@ -513,7 +538,7 @@ class OrderService(models.Model):
             self.price = base_price if base_price is not None else Decimal('0.00')
         super().save(*args, **kwargs) # Llamar al save original
 
-class Deliverable(models.Model):
+class Deliverable(ContentAddressedFilesMixin, TrackedFieldsMixin, models.Model):
     """Entregable o tarea asociada a un pedido."""
     STATUS_CHOICES = [
         ('PENDING', _('Pendiente')), ('ASSIGNED', _('Asignado')), ('IN_PROGRESS', _('En Progreso')),
@@ -522,22 +547,37 @@ class Deliverable(models.Model):
         ('APPROVED', _('Aprobado')), ('COMPLETED', _('Completado')), ('REJECTED', _('Rechazado')),
     ]
     FINAL_STATUSES = ['COMPLETED', 'REJECTED']
+    tracked_fields = ('status', 'assigned_employee', 'assigned_provider', 'due_date')
 
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='deliverables', verbose_name=_("Pedido"))
-    file = models.FileField(_("Archivo"), upload_to='deliverables/%Y/%m/', null=True, blank=True, help_text=_("Archivo entregable (opcional inicialmente)"))
+    file = models.FileField(_("Archivo"), upload_to='deliverables/%Y/%m/', null=True, blank=True, storage=get_content_addressed_storage, help_text=_("Archivo entregable (opcional inicialmente); almacenado por contenido (SHA-256)"))
     description = models.TextField(_("Descripción"), help_text=_("Descripción clara de la tarea o entregable"))
     created_at = models.DateTimeField(_("Fecha de Creación"), auto_now_add=True)
-    version = models.PositiveIntegerField(_("Versión"), default=1)
+    version = models.PositiveIntegerField(_("Versión"), default=1, help_text=_("Se incrementa cuando cambia el contenido del archivo"))
     status = models.CharField(_("Estado"), max_length=30, choices=STATUS_CHOICES, default='PENDING', db_index=True)
     due_date = models.DateField(_("Fecha Límite"), null=True, blank=True, help_text=_("Fecha límite para este entregable"))
     assigned_employee = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_deliverables', verbose_name=_("Empleado Asignado"))
     assigned_provider = models.ForeignKey('Provider', on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_deliverables', verbose_name=_("Proveedor Asignado"))
     feedback_notes = models.TextField(_("Notas de Feedback"), blank=True, help_text=_("Comentarios o feedback recibido"))
+    sla_status = models.CharField(
+        _("Estado SLA"), max_length=12, choices=SLA_STATUS_CHOICES, default='ON_TRACK', editable=False,
+        help_text=_("Clasificación de plazos calculada por el motor de SLA (api/sla.py)")
+    )
 
     class Meta:
         ordering = ['order', 'due_date', 'created_at']
         verbose_name = _("Entregable/Tarea")
         verbose_name_plural = _("Entregables/Tareas")
+        indexes = [
+            # Carga de trabajo y "mis tareas": filtro por asignado + estado, orden por fecha límite
+            models.Index(fields=['assigned_employee', 'status', 'due_date'], name='api_deliv_emp_status_due_idx'),
+            models.Index(fields=['assigned_provider', 'status', 'due_date'], name='api_deliv_prov_status_due_idx'),
+            models.Index(fields=['sla_status', 'due_date'], name='api_deliv_sla_due_idx'),
+        ]
+
+    @property
+    def is_open(self):
+        return self.status not in self.FINAL_STATUSES
 
     def __str__(self):
         due = f" ({_('Vence')}: {self.due_date})" if self.due_date else ""
@@ -546,6 +586,104 @@ class Deliverable(models.Model):
         desc_short = (self.description[:27] + '...') if len(self.description) > 30 else self.description
         return f"{_('Entregable')} '{desc_short}' ({status_display}){due} - {_('Pedido')} #{order_id}"
 
+class WorkloadCounter(models.Model):
+    """Tareas abiertas por empleado o proveedor, mantenidas por las señales de Deliverable (ver api/workload.py)."""
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, null=True, blank=True, related_name='workload', verbose_name=_("Empleado"))
+    provider = models.OneToOneField('Provider', on_delete=models.CASCADE, null=True, blank=True, related_name='workload', verbose_name=_("Proveedor"))
+    open_tasks = models.IntegerField(_("Tareas Abiertas"), default=0, db_index=True)
+    updated_at = models.DateTimeField(_("Última Actualización"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Carga de Trabajo")
+        verbose_name_plural = _("Cargas de Trabajo")
+
+    def __str__(self):
+        assignee = self.employee or self.provider
+        return f"{assignee}: {self.open_tasks} {_('tareas abiertas')}"
+
+class DeliverableUpload(models.Model):
+    """Sesión de subida por partes (reanudable) del archivo de un entregable."""
+    STATUS_CHOICES = [
+        ('ACTIVE', _('Activa')), ('COMPLETED', _('Completada')), ('ABORTED', _('Cancelada')),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    deliverable = models.ForeignKey(Deliverable, on_delete=models.CASCADE, related_name='uploads', verbose_name=_("Entregable"))
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='deliverable_uploads', verbose_name=_("Creada por")
+    )
+    filename = models.CharField(_("Nombre de Archivo"), max_length=255)
+    content_type = models.CharField(_("Tipo de Contenido"), max_length=100, blank=True)
+    total_size = models.PositiveBigIntegerField(_("Tamaño Total (bytes)"))
+    chunk_size = models.PositiveIntegerField(_("Tamaño de Parte (bytes)"))
+    received_parts = models.JSONField(
+        _("Partes Recibidas"), default=dict, blank=True, help_text=_("{número de parte: bytes recibidos}")
+    )
+    checksum = models.CharField(
+        _("SHA-256 Esperado"), max_length=64, blank=True, help_text=_("Checksum opcional enviado por el cliente")
+    )
+    status = models.CharField(_("Estado"), max_length=20, choices=STATUS_CHOICES, default='ACTIVE', db_index=True)
+    created_at = models.DateTimeField(_("Fecha de Creación"), auto_now_add=True)
+    updated_at = models.DateTimeField(_("Última Actualización"), auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _("Subida de Entregable")
+        verbose_name_plural = _("Subidas de Entregables")
+
+    def __str__(self):
+        return f"{_('Subida')} {self.filename} ({self.get_status_display()}) - {_('Entregable')} #{self.deliverable_id}"
+
+    @property
+    def total_parts(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    @property
+    def missing_parts(self):
+        return [n for n in range(1, self.total_parts + 1) if str(n) not in self.received_parts]
+
+    def part_name(self, part_number):
+        return f"uploads/deliverables/{self.pk}/part-{part_number:05d}"
+
+class StoredBlob(models.Model):
+    """Archivo único en el almacenamiento por contenido, con conteo de referencias."""
+    sha256 = models.CharField(_("SHA-256"), max_length=64, primary_key=True)
+    name = models.CharField(_("Ruta en Storage"), max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(_("Tamaño (bytes)"))
+    original_name = models.CharField(_("Nombre Original"), max_length=255, blank=True)
+    ref_count = models.IntegerField(_("Referencias"), default=0, db_index=True)
+    created_at = models.DateTimeField(_("Fecha de Creación"), auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _("Blob Almacenado")
+        verbose_name_plural = _("Blobs Almacenados")
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes, {self.ref_count} refs)"
+
+class DeliverablePreview(models.Model):
+    """Miniatura, vista previa y metadatos generados en segundo plano para el archivo de un entregable."""
+    STATUS_CHOICES = [
+        ('PENDING', _('Pendiente')), ('PROCESSING', _('Procesando')), ('READY', _('Lista')),
+        ('UNSUPPORTED', _('Formato sin vista previa')), ('FAILED', _('Error')),
+    ]
+    deliverable = models.OneToOneField(Deliverable, on_delete=models.CASCADE, related_name='preview', verbose_name=_("Entregable"))
+    source_name = models.CharField(_("Archivo de Origen"), max_length=255, help_text=_("Nombre del archivo procesado (detecta cambios)"))
+    status = models.CharField(_("Estado"), max_length=20, choices=STATUS_CHOICES, default='PENDING', db_index=True)
+    thumbnail = models.CharField(_("Miniatura"), max_length=255, blank=True)
+    preview = models.CharField(_("Vista Previa"), max_length=255, blank=True)
+    metadata = models.JSONField(_("Metadatos"), default=dict, blank=True, help_text=_("Dimensiones, duración, páginas, tamaño..."))
+    error = models.TextField(_("Error"), blank=True)
+    updated_at = models.DateTimeField(_("Última Actualización"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Vista Previa de Entregable")
+        verbose_name_plural = _("Vistas Previas de Entregables")
+
+    def __str__(self):
+        return f"{_('Vista previa')} {_('Entregable')} #{self.deliverable_id} ({self.get_status_display()})"
+
 class TransactionType(models.Model):
     """Tipos de transacciones financieras."""
     name = models.CharField(
@@ -578,7 +716,7 @@ class PaymentMethod(models.Model):
     def __str__(self):
         return f"{self.name}{'' if self.is_active else _(' (Inactivo)')}"
 
-class Invoice(models.Model):
+class Invoice(TrackedFieldsMixin, models.Model):
     """Facturas emitidas a clientes."""
     STATUS_CHOICES = [
         ('DRAFT', _('Borrador')), ('SENT', _('Enviada')), ('PAID', _('Pagada')),
@@ -586,6 +724,7 @@ class Invoice(models.Model):
         ('CANCELLED', _('Cancelada')), ('VOID', _('Anulada Post-Pago')),
     ]
     FINAL_STATUSES = ['PAID', 'CANCELLED', 'VOID']
+    tracked_fields = ('status', 'due_date', 'paid_amount')
 
     order = models.ForeignKey(
         Order, on_delete=models.PROTECT, related_name='invoices',
@@ -634,6 +773,7 @@ class Invoice(models.Model):
         if (status_changed or paid_amount_changed) and self.pk:
              Invoice.objects.filter(pk=self.pk).update(paid_amount=total_paid, status=new_status)
              self.paid_amount = total_paid; self.status = new_status # Actualizar instancia
+             self.reset_tracking(['paid_amount', 'status']) # Ya guardado con update()
              if trigger_notifications and status_changed and self.status == 'OVERDUE' and hasattr(self, 'order') and self.order.customer:
                  message = f"Recordatorio: La factura {self.invoice_number} para el pedido #{self.order_id} ha vencido."
                  # Llamar a la función global definida más abajo
@@ -759,6 +899,80 @@ class AuditLog(models.Model):
         timestamp_str = self.timestamp.strftime('%Y-%m-%d %H:%M') if self.timestamp else 'N/A'
         return f"{timestamp_str} - {user_str}: {self.action}"
 
+class CatalogSyncState(models.Model):
+    """Huella de la última sincronización incremental del catálogo, una fila por hoja."""
+    sheet = models.CharField(
+        _("Hoja"), max_length=50, unique=True, help_text=_("Clave lógica de la hoja (categories, services, prices...)")
+    )
+    file_checksum = models.CharField(_("Checksum Archivo"), max_length=64, blank=True)
+    sheet_checksum = models.CharField(_("Checksum Hoja"), max_length=64, blank=True)
+    row_hashes = models.JSONField(
+        _("Hashes por Fila"), default=dict, blank=True, help_text=_("Hash del contenido de origen por clave de fila")
+    )
+    synced_at = models.DateTimeField(_("Última Sincronización"), auto_now=True)
+
+    class Meta:
+        ordering = ['sheet']
+        verbose_name = _("Estado de Sincronización de Catálogo")
+        verbose_name_plural = _("Estados de Sincronización de Catálogo")
+
+    def __str__(self):
+        return f"{self.sheet} ({len(self.row_hashes)} filas) @ {self.synced_at:%Y-%m-%d %H:%M}" if self.synced_at else self.sheet
+
+class SearchIndexEntry(models.Model):
+    """Entrada del índice invertido de búsqueda (término -> objeto, con peso)."""
+    doc_type = models.CharField(_("Tipo"), max_length=20, help_text=_("Tipo de objeto indexado (service, customer, order, deliverable)"))
+    object_id = models.CharField(_("ID Objeto"), max_length=64)
+    term = models.CharField(_("Término"), max_length=64, help_text=_("Término normalizado (minúsculas, sin acentos)"))
+    weight = models.PositiveIntegerField(_("Peso"), default=1)
+
+    class Meta:
+        verbose_name = _("Entrada de Índice de Búsqueda")
+        verbose_name_plural = _("Índice de Búsqueda")
+        unique_together = ['doc_type', 'object_id', 'term']
+        indexes = [
+            models.Index(fields=['term', 'doc_type'], name='api_search_term_idx'),
+            models.Index(fields=['doc_type', 'object_id'], name='api_search_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.doc_type}:{self.object_id} ({self.weight})"
+
+class ReportJob(models.Model):
+    """Informe pesado ejecutado en segundo plano por el worker (api/report_jobs.py)."""
+    STATUS_CHOICES = [
+        ('QUEUED', _('En Cola')), ('RUNNING', _('En Ejecución')), ('SUCCEEDED', _('Completado')),
+        ('FAILED', _('Fallido')), ('CANCELLED', _('Cancelado')),
+    ]
+    ACTIVE_STATUSES = ['QUEUED', 'RUNNING']
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='report_jobs', verbose_name=_("Usuario")
+    )
+    kind = models.CharField(_("Tipo de Informe"), max_length=50)
+    params = models.JSONField(_("Parámetros"), default=dict, blank=True)
+    status = models.CharField(_("Estado"), max_length=12, choices=STATUS_CHOICES, default='QUEUED')
+    result = models.FileField(_("Resultado"), upload_to='reports/%Y/%m/', null=True, blank=True)
+    error = models.TextField(_("Error"), blank=True)
+    worker = models.CharField(_("Worker"), max_length=100, blank=True, help_text=_("host:pid del worker que lo reclamó"))
+    created_at = models.DateTimeField(_("Fecha de Creación"), auto_now_add=True)
+    started_at = models.DateTimeField(_("Inicio"), null=True, blank=True)
+    finished_at = models.DateTimeField(_("Fin"), null=True, blank=True)
+    expires_at = models.DateTimeField(_("Expira"), null=True, blank=True, help_text=_("El resultado se elimina después de esta fecha"))
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _("Informe en Segundo Plano")
+        verbose_name_plural = _("Informes en Segundo Plano")
+        indexes = [
+            # Cola del worker y límite de concurrencia por usuario
+            models.Index(fields=['status', 'created_at'], name='api_reportjob_queue_idx'),
+            models.Index(fields=['user', 'status'], name='api_reportjob_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{_('Informe')} #{self.pk} {self.kind} ({self.get_status_display()})"
+
 # ==============================================================================
 # ---------------------- MÉTODOS AÑADIDOS AL MODELO USER ----------------------
 # ==============================================================================
@@ -773,8 +987,11 @@ def primary_role(self):
         role = None
         try:
             profile = getattr(self, 'profile', None)
-            if profile and profile.primary_role and profile.primary_role.is_active:
-                role = profile.primary_role
+            if profile and profile.primary_role_id:
+                # Los roles salen de la caché de tablas pequeñas, sin query por usuario
+                cached = model_cache.get(UserRole, profile.primary_role_id)
+                if cached and cached.is_active:
+                    role = cached
         except Exception: pass # Captura genérica por si profile no es UserProfile
         setattr(self, cache_key, role)
     return getattr(self, cache_key)
@@ -799,7 +1016,24 @@ def get_secondary_active_roles(self):
 
 @property
 def get_secondary_active_role_names(self):
-    return list(self.get_secondary_active_roles.values_list('name', flat=True))
+    cache_key = '_secondary_role_names_cache'
+    if not hasattr(self, cache_key):
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('secondary_role_assignments')
+        if prefetched is None:
+            names = list(self.get_secondary_active_roles.values_list('name', flat=True))
+        else:
+            # Asignaciones precargadas (ver with_user_roles): roles desde la caché de tablas pequeñas, sin queries
+            primary_role_id = None
+            try: primary_role_id = self.profile.primary_role_id
+            except Exception: pass
+            roles = {
+                role.pk: role for role in (
+                    model_cache.get(UserRole, assignment.role_id) for assignment in prefetched if assignment.is_active
+                ) if role and role.is_active and role.pk != primary_role_id
+            }
+            names = [role.name for role in sorted(roles.values(), key=lambda role: role.display_name)]
+        setattr(self, cache_key, names)
+    return getattr(self, cache_key)
 
 @property
 def get_all_active_role_names(self):
@@ -818,6 +1052,18 @@ def is_dragon(self):
     dragon_role_name = getattr(Roles, 'DRAGON', None)
     return self.has_role(dragon_role_name) if dragon_role_name else False
 
+def with_user_roles(queryset, *paths):
+    """
+    Precarga perfil, ficha de empleado (con puesto) y asignaciones de rol de los usuarios
+    en `paths` ('' para el propio queryset de usuarios), para BasicUserSerializer sin N+1.
+    """
+    for path in paths:
+        prefix = f'{path}__' if path else ''
+        queryset = queryset.select_related(f'{prefix}profile', f'{prefix}employee_profile__position').prefetch_related(
+            f'{prefix}secondary_role_assignments'
+        )
+    return queryset
+
 UserModel.add_to_class("primary_role", primary_role)
 UserModel.add_to_class("primary_role_name", primary_role_name)
 UserModel.add_to_class("get_secondary_active_roles", get_secondary_active_roles)
@@ -857,17 +1103,7 @@ def update_order_total_on_service_change_signal(sender, instance, **kwargs):
         except Order.DoesNotExist: logger.warning(f"Order {instance.order_id} no encontrada al actualizar total desde OrderService {instance.id}. Posiblemente eliminada.")
         except Exception as e: logger.error(f"Error inesperado actualizando total de Order {instance.order_id} desde OrderService {instance.id}: {e}")
 
-@receiver(pre_save, sender=Order)
-def set_order_completion_date_signal(sender, instance, **kwargs):
-    original_instance = None
-    if instance.pk:
-        try: original_instance = Order.objects.get(pk=instance.pk)
-        except Order.DoesNotExist: pass
-    if not instance.pk or original_instance:
-        original_status = original_instance.status if original_instance else None
-        if instance.status == 'DELIVERED' and original_status != 'DELIVERED': instance.completed_at = timezone.now()
-        elif instance.status != 'DELIVERED' and (original_status == 'DELIVERED' or (not instance.pk and instance.status != 'DELIVERED')): instance.completed_at = None # Limpiar si ya no está entregado
-        # elif not instance.pk and instance.status == 'DELIVERED': instance.completed_at = timezone.now() # Cubierto por primer if si status es DELIVERED
+# La fecha de finalización del pedido (completed_at) la fija un hook de transición en api/state_machine.py
 
 # --- Señales de Pagos y Facturas ---
 @receiver(post_save, sender=Payment)
@@ -881,31 +1117,51 @@ def update_invoice_status_on_payment_signal(sender, instance, **kwargs):
         except Exception as e: logger.error(f"Error inesperado actualizando estado de Invoice {instance.invoice_id} desde Payment {instance.id}: {e}")
 
 # --- Helper Función Global para Notificaciones ---
-def create_notification(user_recipient, message, link_obj=None):
+def build_notification(user_recipient, message, link_obj=None):
+    """Construye (sin guardar) la Notification; permite Notification.objects.bulk_create en operaciones masivas."""
     UserModelForCheck = get_user_model()
-    if not user_recipient or not isinstance(user_recipient, UserModelForCheck): return
+    if not user_recipient or not isinstance(user_recipient, UserModelForCheck): return None
     link_url = None
     if link_obj and hasattr(link_obj, 'pk') and link_obj.pk:
         try:
             model_name = link_obj.__class__.__name__.lower(); app_label = link_obj._meta.app_label
             link_url = reverse(f'admin:{app_label}_{model_name}_change', args=[link_obj.pk])
         except Exception: pass # Silenciar error si URL no se puede generar
-    try: Notification.objects.create(user=user_recipient, message=message, link=link_url)
+    return Notification(user=user_recipient, message=message, link=link_url)
+
+def create_notification(user_recipient, message, link_obj=None):
+    notification = build_notification(user_recipient, message, link_obj)
+    if notification is None: return
+    try: notification.save()
     except Exception as e: logger.error(f"Error al crear notificación para {user_recipient.username}: {e}")
 
 # --- Señales de Auditoría ---
-def log_action(instance, action_verb, details_dict=None):
-    user = get_current_user(); model_name = instance.__class__.__name__
+def build_audit_log(instance, action_verb, details_dict=None, user=None):
+    """Construye (sin guardar) el AuditLog de una acción; permite AuditLog.objects.bulk_create en cargas masivas."""
+    user = user if user is not None else get_current_user(); model_name = instance.__class__.__name__
     try: instance_str = str(instance)
     except Exception: instance_str = f"ID {instance.pk}" if instance.pk else "objeto no guardado/eliminado"
-    action_str = f"{model_name} {action_verb}: {instance_str}"
+    action_str = f"{model_name} {action_verb}: {instance_str}"[:255]
     log_details = {'model': model_name, 'pk': instance.pk if instance.pk else None, 'representation': instance_str}
     if details_dict: log_details.update(details_dict)
-    try: AuditLog.objects.create(user=user, action=action_str, details=log_details)
+    return AuditLog(user=user, action=action_str, details=log_details)
+
+def log_action(instance, action_verb, details_dict=None):
+    try: build_audit_log(instance, action_verb, details_dict).save()
     except Exception as e: logger.error(f"Error al crear AuditLog: {e}")
 
 AUDITED_MODELS = [Order, Invoice, Deliverable, Customer, Employee, Service, Payment, Provider, Campaign, UserProfile, UserRoleAssignment]
 
+def _json_value(value):
+    return value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+
+def tracked_changes(instance):
+    """{campo: [anterior, nuevo]} de los campos seguidos que cambiaron en este save()."""
+    return {
+        name: [_json_value(previous), _json_value(getattr(instance, instance._meta.get_field(name).attname))]
+        for name, previous in instance.changed_fields().items()
+    }
+
 @receiver(post_save)
 def audit_log_save_signal(sender, instance, created, **kwargs):
     if sender in AUDITED_MODELS:
@@ -913,6 +1169,10 @@ def audit_log_save_signal(sender, instance, created, **kwargs):
         if hasattr(instance, 'status'): status_val = getattr(instance, 'status', None); display_method = getattr(instance, 'get_status_display', None); details['status'] = display_method() if callable(display_method) else status_val
         if isinstance(instance, UserProfile) and instance.primary_role: details['primary_role'] = instance.primary_role.name
         if isinstance(instance, UserRoleAssignment) and instance.role: details['role'] = instance.role.name; details['assignment_active'] = instance.is_active
+        if not created and isinstance(instance, TrackedFieldsMixin):
+            # Valores anteriores desde la instantánea en memoria (sin releer la fila)
+            changes = tracked_changes(instance)
+            if changes: details['changes'] = changes
         log_action(instance, action_verb, details)
 
 @receiver(post_delete)
@@ -922,21 +1182,11 @@ def audit_log_delete_signal(sender, instance, **kwargs):
 # --- Señales de Notificación ---
 @receiver(post_save, sender=Deliverable)
 def notify_deliverable_signal(sender, instance, created, **kwargs):
-    original_instance = None; assigned_employee_changed = False; status_changed = False
+    # Comparación con los valores cargados en memoria (api/tracking.py): la instantánea
+    # se renueva al terminar save(), así que aquí aún refleja el estado anterior.
     current_assigned_employee_id = instance.assigned_employee_id # Cachear ID actual
-
-    if not created and instance.pk:
-        try: original_instance = Deliverable.objects.select_related('assigned_employee').get(pk=instance.pk)
-        except Deliverable.DoesNotExist: pass
-
-    if original_instance:
-         if current_assigned_employee_id != original_instance.assigned_employee_id: assigned_employee_changed = True
-         original_status = original_instance.status
-         if original_status != instance.status: status_changed = True
-    elif created: # Si es nuevo
-        if current_assigned_employee_id: assigned_employee_changed = True # Se asignó al crear
-        status_changed = True # El status siempre cambia de 'nada' a 'PENDING' (o lo que sea)
-    else: original_status = None; status_changed = True # Caso raro: sin pk pero no creado
+    assigned_employee_changed = bool(current_assigned_employee_id) and instance.has_changed('assigned_employee')
+    status_changed = created or instance.has_changed('status')
 
     # Notificar nueva asignación
     if assigned_employee_changed and instance.assigned_employee:
@@ -947,21 +1197,26 @@ def notify_deliverable_signal(sender, instance, created, **kwargs):
 
     # Notificar cambio de estado relevante
     if status_changed:
-        recipient, message = None, None
         try:
-            # Solo notificar cambios de estado específicos, no todos
-            notify_states = ['PENDING_APPROVAL', 'REVISION_REQUESTED', 'REQUIRES_INFO', 'APPROVED', 'COMPLETED'] # Estados que podrían generar notificación
-            if instance.status in notify_states:
-                if instance.status == 'PENDING_APPROVAL' and instance.order.customer:
-                     recipient = instance.order.customer.user
-                     message = f"La tarea '{instance.description[:50]}...' del Pedido #{instance.order_id} está lista para tu aprobación."
-                elif instance.status in ['REVISION_REQUESTED', 'REQUIRES_INFO'] and instance.assigned_employee and hasattr(instance.assigned_employee, 'user'):
-                     recipient = instance.assigned_employee.user
-                     message = f"La tarea '{instance.description[:50]}...' (Pedido #{instance.order_id}) requiere tu atención: {instance.get_status_display()}."
-                elif instance.status == 'APPROVED' and instance.assigned_employee and hasattr(instance.assigned_employee, 'user'):
-                      recipient = instance.assigned_employee.user # Notificar al empleado que se aprobó? O al cliente?
-                      message = f"La tarea '{instance.description[:50]}...' (Pedido #{instance.order_id}) ha sido aprobada."
-                # Añadir más lógica según necesites
+            recipient, message = deliverable_status_notification(instance)
             if recipient and message: create_notification(recipient, message, instance)
         except Order.DoesNotExist: logger.warning(f"Orden {instance.order_id} no encontrada al notificar sobre Deliverable {instance.id}")
-        except Exception as e: logger.error(f"Error procesando notificación para Deliverable {instance.id}: {e}")
\ No newline at end of file
+        except Exception as e: logger.error(f"Error procesando notificación para Deliverable {instance.id}: {e}")
+
+def deliverable_status_notification(instance):
+    """(destinatario, mensaje) para el estado actual del entregable, o (None, None). Compartido con las transiciones masivas."""
+    recipient, message = None, None
+    # Solo notificar cambios de estado específicos, no todos
+    notify_states = ['PENDING_APPROVAL', 'REVISION_REQUESTED', 'REQUIRES_INFO', 'APPROVED', 'COMPLETED'] # Estados que podrían generar notificación
+    if instance.status in notify_states:
+        if instance.status == 'PENDING_APPROVAL' and instance.order.customer:
+             recipient = instance.order.customer.user
+             message = f"La tarea '{instance.description[:50]}...' del Pedido #{instance.order_id} está lista para tu aprobación."
+        elif instance.status in ['REVISION_REQUESTED', 'REQUIRES_INFO'] and instance.assigned_employee and hasattr(instance.assigned_employee, 'user'):
+             recipient = instance.assigned_employee.user
+             message = f"La tarea '{instance.description[:50]}...' (Pedido #{instance.order_id}) requiere tu atención: {instance.get_status_display()}."
+        elif instance.status == 'APPROVED' and instance.assigned_employee and hasattr(instance.assigned_employee, 'user'):
+              recipient = instance.assigned_employee.user # Notificar al empleado que se aprobó? O al cliente?
+              message = f"La tarea '{instance.description[:50]}...' (Pedido #{instance.order_id}) ha sido aprobada."
+        # Añadir más lógica según necesites
+    return recipient, message
\ No newline at end of file
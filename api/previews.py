@@ -0,0 +1,242 @@
+# api/previews.py
+"""
+Pipeline en segundo plano de miniaturas, vistas previas y metadatos de entregables.
+
+Al guardar un entregable con un archivo nuevo se marca su DeliverablePreview como
+PENDING y, al confirmar la transacción, se envía a un pool de hilos. Lo pendiente
+(o fallido) también puede procesarse con `python manage.py process_deliverable_previews`.
+Una vista previa que lleva en PROCESSING más de DELIVERABLE_PREVIEW_PROCESSING_TIMEOUT
+segundos (worker o pool caído a mitad) se vuelve a reclamar.
+
+Extractores (todos opcionales, se degradan a solo metadatos básicos):
+- Imágenes: Pillow -> dimensiones, miniatura y vista previa JPEG.
+- Vídeo/audio: ffprobe/ffmpeg en el PATH -> dimensiones, duración y fotograma.
+- PDF: pypdf si está instalado; si no, conteo de objetos /Type /Page.
+
+Como el almacenamiento es por contenido, las vistas previas se guardan por SHA-256
+(`previews/<sha256>/...`) y se reutilizan entre entregables con el mismo archivo.
+"""
+import io
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Deliverable, DeliverablePreview
+from .storage import sha256_from_name
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+    logger.warning("Pillow no está instalado. Las vistas previas de imágenes no se generarán.")
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+THUMBNAIL_SIZE = (320, 320)
+PREVIEW_SIZE = (1280, 1280)
+PREVIEW_WORKERS = getattr(settings, 'DELIVERABLE_PREVIEW_WORKERS', 2)
+FFPROBE_TIMEOUT = 60
+PROCESSING_TIMEOUT = getattr(settings, 'DELIVERABLE_PREVIEW_PROCESSING_TIMEOUT', 15 * 60)
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix='deliverable-preview')
+    return _executor
+
+
+def preview_prefix(source_name):
+    key = sha256_from_name(source_name) or re.sub(r'[^\w.-]', '_', source_name)
+    return f"previews/{key}"
+
+
+# --- Extractores ---
+
+def save_jpeg(image, name, size):
+    image = image.copy()
+    image.thumbnail(size)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80, optimize=True)
+    default_storage.delete(name)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+def render_image(image, prefix):
+    return save_jpeg(image, f"{prefix}/thumb.jpg", THUMBNAIL_SIZE), save_jpeg(image, f"{prefix}/preview.jpg", PREVIEW_SIZE)
+
+def process_image(path, prefix):
+    with Image.open(path) as image:
+        metadata = {'width': image.width, 'height': image.height, 'format': image.format}
+        if getattr(image, 'n_frames', 1) > 1:
+            metadata['frames'] = image.n_frames
+        thumbnail, preview = render_image(image, prefix)
+    return thumbnail, preview, metadata
+
+def process_video(path, prefix):
+    if not shutil.which('ffprobe'):
+        return '', '', {}
+    probe = subprocess.run(
+        ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        capture_output=True, timeout=FFPROBE_TIMEOUT, check=True,
+    )
+    info = json.loads(probe.stdout or b'{}')
+    metadata = {}
+    if info.get('format', {}).get('duration'):
+        metadata['duration'] = round(float(info['format']['duration']), 2)
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), None)
+    if video:
+        metadata.update({'width': video.get('width'), 'height': video.get('height'), 'codec': video.get('codec_name')})
+
+    thumbnail = preview = ''
+    if video and Image is not None and shutil.which('ffmpeg'):
+        with tempfile.NamedTemporaryFile(suffix='.png') as frame:
+            seek = str(min(1.0, metadata.get('duration', 0) / 2))
+            subprocess.run(
+                ['ffmpeg', '-v', 'error', '-y', '-ss', seek, '-i', path, '-frames:v', '1', frame.name],
+                capture_output=True, timeout=FFPROBE_TIMEOUT, check=True,
+            )
+            with Image.open(frame.name) as image:
+                thumbnail, preview = render_image(image, prefix)
+    return thumbnail, preview, metadata
+
+def process_pdf(path, prefix):
+    if PdfReader is not None:
+        return '', '', {'pages': len(PdfReader(path).pages)}
+    pages = 0
+    with open(path, 'rb') as fh:
+        tail = b''
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            data = tail + block
+            pages += len(PDF_PAGE_RE.findall(data[:-32] if len(data) > 32 else data))
+            tail = data[-32:] if len(data) > 32 else b''
+        pages += len(PDF_PAGE_RE.findall(tail))
+    return '', '', {'pages': pages}
+
+
+def extract(path, filename):
+    """ Devuelve (estado, miniatura, vista previa, metadatos) para el archivo local `path`. """
+    content_type = mimetypes.guess_type(filename)[0] or ''
+    prefix = preview_prefix(filename)
+    metadata = {'size': os.path.getsize(path), 'content_type': content_type}
+
+    if content_type.startswith('image/') and Image is not None:
+        thumbnail, preview, extra = process_image(path, prefix)
+    elif content_type.startswith(('video/', 'audio/')):
+        thumbnail, preview, extra = process_video(path, prefix)
+    elif content_type == 'application/pdf':
+        thumbnail, preview, extra = process_pdf(path, prefix)
+    else:
+        return 'UNSUPPORTED', '', '', metadata
+    metadata.update(extra)
+    has_output = thumbnail or preview or extra
+    return ('READY' if has_output else 'UNSUPPORTED'), thumbnail, preview, metadata
+
+
+# --- Procesamiento ---
+
+def reusable_preview(source_name, exclude_pk):
+    """ Vista previa ya generada para el mismo contenido (mismo blob CAS) en otro entregable. """
+    if not sha256_from_name(source_name):
+        return None
+    return (
+        DeliverablePreview.objects.filter(source_name=source_name, status__in=['READY', 'UNSUPPORTED'])
+        .exclude(pk=exclude_pk).first()
+    )
+
+def claimable(statuses=('PENDING', 'FAILED')):
+    """ Filtro de vistas previas a procesar: `statuses` o PROCESSING abandonadas (más de PROCESSING_TIMEOUT). """
+    stale_before = timezone.now() - timedelta(seconds=PROCESSING_TIMEOUT)
+    return Q(status__in=statuses) | Q(status='PROCESSING', updated_at__lt=stale_before)
+
+def process_preview(preview_id):
+    """ Procesa una DeliverablePreview (idempotente; ignora si el archivo cambió mientras tanto). """
+    # update() no aplica auto_now: updated_at marca explícitamente el inicio del procesamiento
+    claimed = DeliverablePreview.objects.filter(claimable(), pk=preview_id).update(status='PROCESSING', updated_at=timezone.now())
+    if not claimed:
+        return None
+    preview = DeliverablePreview.objects.select_related('deliverable').get(pk=preview_id)
+    source_name = preview.source_name
+    try:
+        existing = reusable_preview(source_name, preview.pk)
+        if existing:
+            result = (existing.status, existing.thumbnail, existing.preview, existing.metadata)
+        else:
+            storage = preview.deliverable.file.storage
+            try:
+                path = storage.path(source_name)
+                result = extract(path, source_name)
+            except NotImplementedError:
+                # Storage remoto: copia temporal local
+                suffix = os.path.splitext(source_name)[1]
+                with tempfile.NamedTemporaryFile(suffix=suffix) as tmp, storage.open(source_name, 'rb') as src:
+                    shutil.copyfileobj(src, tmp)
+                    tmp.flush()
+                    result = extract(tmp.name, source_name)
+        status, thumbnail, preview_name, metadata = result
+        error = ''
+    except Exception as e:
+        logger.warning(f"[Previews] Error procesando entregable {preview.deliverable_id}: {e}", exc_info=True)
+        status, thumbnail, preview_name, metadata, error = 'FAILED', '', '', {}, str(e)[:2000]
+
+    DeliverablePreview.objects.filter(pk=preview_id, source_name=source_name).update(
+        status=status, thumbnail=thumbnail, preview=preview_name, metadata=metadata, error=error, updated_at=timezone.now()
+    )
+    return status
+
+def _run_in_worker(preview_id):
+    close_old_connections()
+    try:
+        process_preview(preview_id)
+    finally:
+        close_old_connections()
+
+def schedule_preview(preview_id):
+    """ En el pool de hilos, o en línea si DELIVERABLE_PREVIEW_ASYNC = False (tests, scripts). """
+    if getattr(settings, 'DELIVERABLE_PREVIEW_ASYNC', True):
+        get_executor().submit(_run_in_worker, preview_id)
+    else:
+        process_preview(preview_id)
+
+
+@receiver(post_save, sender=Deliverable)
+def enqueue_deliverable_preview_signal(sender, instance, raw=False, **kwargs):
+    """ Encola la vista previa cuando el entregable tiene un archivo distinto al ya procesado. """
+    if raw or not instance.file:
+        return
+    source_name = instance.file.name
+    preview, created = DeliverablePreview.objects.get_or_create(
+        deliverable=instance, defaults={'source_name': source_name}
+    )
+    if not created:
+        if preview.source_name == source_name:
+            return
+        DeliverablePreview.objects.filter(pk=preview.pk).update(
+            source_name=source_name, status='PENDING', thumbnail='', preview='', metadata={}, error=''
+        )
+    transaction.on_commit(lambda: schedule_preview(preview.pk))
@@ -0,0 +1,154 @@
+# api/principal.py
+"""
+"Principal" de sesión cacheado: la representación compacta del usuario que devuelven
+/users/me/ y /auth/check/ (campos de BasicUserSerializer: datos básicos, roles y puesto).
+
+- Se construye al emitir el token (login) o en la primera petición que lo necesita y se
+  guarda en la caché compartida bajo 'principal:{user_id}:v{versión de roles}'.
+- Cambios del usuario, de su perfil, de sus asignaciones de rol o de su ficha de empleado
+  descartan su entrada (al momento y otra vez al confirmar, como `model_cache`).
+- Cambios en UserRole o JobPosition afectan a muchos usuarios: suben la versión de roles
+  y todas las entradas anteriores dejan de leerse (caducan con PRINCIPAL_CACHE_TIMEOUT).
+- Un login solo actualiza last_login, que no forma parte del principal: no invalida.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .model_cache import model_cache
+from .models import Employee, JobPosition, Roles, UserProfile, UserRole
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_CACHE_KEY = 'principal:{user_id}:v{version}'
+PRINCIPAL_VERSION_KEY = 'principal:roles-version'
+PRINCIPAL_CACHE_TIMEOUT = getattr(settings, 'PRINCIPAL_CACHE_TIMEOUT', 15 * 60)
+
+
+def principal_payload(user, primary_role, secondary_role_names, position=None):
+    """ Mismos campos que BasicUserSerializer a partir de datos ya cargados (sin queries). """
+    primary_role_name = primary_role.name if primary_role else None
+    all_roles = set(secondary_role_names)
+    if primary_role_name:
+        all_roles.add(primary_role_name)
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'full_name': user.get_full_name() or user.username,
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'primary_role': primary_role_name,
+        'primary_role_display_name': primary_role.display_name if primary_role else None,
+        'secondary_roles': list(secondary_role_names),
+        'all_roles': list(all_roles),
+        'is_dragon_user': getattr(Roles, 'DRAGON', None) in all_roles,
+        'job_position_name': position.name if position else None,
+    }
+
+
+def roles_version():
+    return cache.get(PRINCIPAL_VERSION_KEY) or 1
+
+
+def principal_key(user_id):
+    return PRINCIPAL_CACHE_KEY.format(user_id=user_id, version=roles_version())
+
+
+def _position(user):
+    employee = getattr(user, 'employee_profile', None)  # Sin ficha de empleado: None
+    position_id = getattr(employee, 'position_id', None)
+    return model_cache.get(JobPosition, position_id) if position_id else None
+
+
+def _store(user, principal):
+    cache.set(principal_key(user.pk), principal, PRINCIPAL_CACHE_TIMEOUT)
+    logger.debug(f"[Principal] Usuario {user.pk}: principal construido.")
+    return principal
+
+
+def build_principal(user):
+    """ Construye y guarda el principal del usuario. """
+    return _store(user, principal_payload(user, user.primary_role, user.get_secondary_active_role_names, _position(user)))
+
+
+def get_principal(user):
+    """ Principal desde la caché o, si falta, construido a partir de `user` (el ya autenticado). """
+    principal = cache.get(principal_key(user.pk))
+    if principal is None:
+        principal = build_principal(user)
+    return principal
+
+
+# Variantes para vistas asíncronas (sin accesos perezosos a relaciones)
+async def abuild_principal(user):
+    primary_role_id = await UserProfile.objects.filter(user_id=user.pk).values_list('primary_role_id', flat=True).afirst()
+    primary_role = None
+    if primary_role_id:
+        cached = await model_cache.aget(UserRole, primary_role_id)
+        if cached and cached.is_active:
+            primary_role = cached
+
+    secondary = UserRole.objects.filter(
+        secondary_assignments__user_id=user.pk, secondary_assignments__is_active=True, is_active=True
+    ).distinct()
+    if primary_role_id:
+        secondary = secondary.exclude(id=primary_role_id)
+    secondary_names = [name async for name in secondary.values_list('name', flat=True)]
+
+    position_id = await Employee.objects.filter(user_id=user.pk).values_list('position_id', flat=True).afirst()
+    position = await model_cache.aget(JobPosition, position_id) if position_id else None
+    return _store(user, principal_payload(user, primary_role, secondary_names, position))
+
+
+async def aget_principal(user):
+    principal = cache.get(principal_key(user.pk))
+    if principal is None:
+        principal = await abuild_principal(user)
+    return principal
+
+
+# --- Invalidación ---
+def invalidate_principal(user_id):
+    key = principal_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def bump_roles_version():
+    def bump():
+        cache.add(PRINCIPAL_VERSION_KEY, 1, None)
+        try:
+            cache.incr(PRINCIPAL_VERSION_KEY)
+        except ValueError:  # Expulsada entre add e incr
+            cache.set(PRINCIPAL_VERSION_KEY, 2, None)
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_user_principal_signal(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_principal(instance.pk)
+
+def invalidate_related_principal_signal(sender, instance, **kwargs):
+    invalidate_principal(instance.user_id)
+
+
+def bump_roles_version_signal(sender, **kwargs):
+    bump_roles_version()
+
+
+post_save.connect(invalidate_user_principal_signal, sender=settings.AUTH_USER_MODEL, dispatch_uid='principal_save_user')
+post_delete.connect(invalidate_user_principal_signal, sender=settings.AUTH_USER_MODEL, dispatch_uid='principal_delete_user')
+for label in ('api.UserProfile', 'api.UserRoleAssignment', 'api.Employee'):
+    post_save.connect(invalidate_related_principal_signal, sender=label, dispatch_uid=f'principal_save_{label}')
+    post_delete.connect(invalidate_related_principal_signal, sender=label, dispatch_uid=f'principal_delete_{label}')
+for label in ('api.UserRole', 'api.JobPosition'):
+    post_save.connect(bump_roles_version_signal, sender=label, dispatch_uid=f'principal_roles_save_{label}')
+    post_delete.connect(bump_roles_version_signal, sender=label, dispatch_uid=f'principal_roles_delete_{label}')
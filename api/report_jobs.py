@@ -0,0 +1,288 @@
+# api/report_jobs.py
+"""
+Cola local de informes pesados, sin broker externo: la tabla ReportJob es la cola y
+`python manage.py run_report_worker` la consume con un pool de procesos.
+
+- Los clientes encolan un informe (POST /api/report-jobs/), consultan su estado y
+  descargan el resultado (GET /api/report-jobs/<id>/download/).
+- Límites por usuario: REPORT_JOBS_MAX_ACTIVE_PER_USER informes en cola o en ejecución
+  (al encolar) y REPORT_JOBS_MAX_RUNNING_PER_USER en ejecución a la vez (al reclamar).
+- Un informe se reclama con un UPDATE condicional (QUEUED -> RUNNING), así que varios
+  workers pueden compartir la cola sin ejecutar dos veces el mismo.
+- Retención: los informes terminados o cancelados caducan a los REPORT_JOBS_RETENTION_DAYS
+  días y `cleanup_report_jobs()` los elimina junto con su archivo; los informes en ejecución
+  más de REPORT_JOBS_TIMEOUT segundos (worker caído) se marcan como fallidos.
+
+Cada tipo de informe se registra con `@report(...)` y se ejecuta con una petición DRF
+construida para el usuario que lo encargó, de modo que reutiliza el alcance por
+permisos y los filtros de las vistas existentes.
+"""
+import json
+import logging
+import os
+import socket
+import tempfile
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.request import Request
+
+from .db_router import replica_reads
+from .exports import iter_csv, write_xlsx
+from .models import Customer, ReportJob
+from .permissions import CanAccessDashboard
+from .views.dashboard import DashboardDataView
+from .views.finances import InvoiceViewSet, PaymentViewSet
+from .views.orders import OrderViewSet
+from .views.utilities import AuditLogViewSet
+
+logger = logging.getLogger(__name__)
+
+MAX_ACTIVE_PER_USER = getattr(settings, 'REPORT_JOBS_MAX_ACTIVE_PER_USER', 3)
+MAX_RUNNING_PER_USER = getattr(settings, 'REPORT_JOBS_MAX_RUNNING_PER_USER', 1)
+RETENTION_DAYS = getattr(settings, 'REPORT_JOBS_RETENTION_DAYS', 7)
+JOB_TIMEOUT = getattr(settings, 'REPORT_JOBS_TIMEOUT', 60 * 60)
+
+
+class ReportJobError(Exception):
+    """ Informe no encolable (tipo desconocido, sin permiso, límite alcanzado). """
+
+
+# --- Registro de informes ---
+
+ReportDefinition = namedtuple('ReportDefinition', 'kind label func permission_check')
+REPORTS = {}
+
+def report(kind, label, permission_check=None):
+    """ Registra `func(request) -> (nombre de archivo, File)`; `permission_check(request)` lanza PermissionDenied. """
+    def decorator(func):
+        REPORTS[kind] = ReportDefinition(kind, label, func, permission_check)
+        return func
+    return decorator
+
+
+def build_request(user, params):
+    """ Petición DRF de solo lectura para `user` con `params` como query string. """
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    query = QueryDict(mutable=True)
+    for key, value in (params or {}).items():
+        if isinstance(value, (list, tuple)):
+            query.setlist(key, [str(v) for v in value])
+        else:
+            query[key] = str(value)
+    http_request.GET = query
+    request = Request(http_request)
+    request.user = user
+    return request
+
+
+def require_permissions(*permission_classes):
+    def check(request):
+        for permission in permission_classes:
+            checker = permission()
+            if not checker.has_permission(request, None):
+                raise PermissionDenied(getattr(checker, 'message', None))
+    return check
+
+
+def render_json(name, data):
+    return f"{name}.json", ContentFile(json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+
+
+def render_csv(name, lines):
+    """ Escribe las líneas a un temporal en disco (memoria constante con exportaciones grandes). """
+    fh = tempfile.TemporaryFile()
+    for line in lines:
+        fh.write(line.encode('utf-8'))
+    fh.seek(0)
+    return f"{name}.csv", File(fh)
+
+
+@report('dashboard', _("Dashboard (rango de fechas)"), require_permissions(CanAccessDashboard))
+def dashboard_report(request):
+    """ Mismos datos que /api/dashboard/ (?start_date, ?end_date) sin el límite de tiempo de la petición. """
+    view = DashboardDataView()
+    view.request, view.args, view.kwargs, view.format_kwarg = request, (), {}, None
+    response = view.get(request)
+    if response.status_code != 200:
+        raise RuntimeError(response.data.get('error', response.status_code))
+    return render_json('dashboard', response.data)
+
+
+@report('top_customers', _("Clientes con más pagos del año"), require_permissions(CanAccessDashboard))
+def top_customers_report(request):
+    """ Todos los clientes con pagos completados en ?year (por defecto el actual), de mayor a menor importe. """
+    try:
+        year = int(request.query_params.get('year', timezone.localdate().year))
+    except ValueError:
+        raise ValueError(_("Año inválido."))
+    paid = Q(orders__invoices__payments__status='COMPLETED', orders__invoices__payments__date__year=year)
+    rows = (
+        Customer.objects.annotate(
+            payments=Count('orders__invoices__payments', filter=paid),
+            total_paid=Coalesce(Sum('orders__invoices__payments__amount', filter=paid), Value(0), output_field=DecimalField()),
+        )
+        .filter(payments__gt=0).order_by('-total_paid', 'pk')
+    )
+    columns = (
+        ('ID', 'id'), ('Cliente', 'company_name'), ('Usuario', 'user__username'), ('Email', 'user__email'),
+        ('Pagos', 'payments'), ('Total Pagado', 'total_paid'),
+    )
+    return render_csv(f'top-clientes-{year}', iter_csv(rows, columns))
+
+
+def export_report(viewset_class):
+    """ Exportación de un ViewSet con ExportMixin: mismos filtros (?...) y ?output=csv|xlsx. """
+    def get_view(request):
+        view = viewset_class()
+        view.request, view.args, view.kwargs, view.format_kwarg = request, (), {}, None
+        view.action = 'export'
+        return view
+
+    def check(request):
+        get_view(request).check_permissions(request)
+
+    def run(request):
+        view = get_view(request)
+        queryset = view.filter_queryset(view.get_queryset())
+        if request.query_params.get('output') == 'xlsx':
+            return f"{view.export_basename}.xlsx", File(write_xlsx(queryset, view.export_columns, view.export_basename))
+        return render_csv(view.export_basename, iter_csv(queryset, view.export_columns))
+    return run, check
+
+
+def register_export(kind, label, viewset_class):
+    run, check = export_report(viewset_class)
+    REPORTS[kind] = ReportDefinition(kind, label, run, check)
+
+register_export('orders_export', _("Exportación de pedidos"), OrderViewSet)
+register_export('invoices_export', _("Exportación de facturas"), InvoiceViewSet)
+register_export('payments_export', _("Exportación de pagos"), PaymentViewSet)
+register_export('audit_logs_export', _("Exportación de auditoría"), AuditLogViewSet)
+
+
+# --- Encolar ---
+
+def submit_report_job(user, kind, params=None):
+    definition = REPORTS.get(kind)
+    if definition is None:
+        raise ReportJobError(_("Tipo de informe desconocido: %(kind)s.") % {'kind': kind})
+    if definition.permission_check:
+        definition.permission_check(build_request(user, params))
+    with transaction.atomic():
+        active = ReportJob.objects.select_for_update().filter(user=user, status__in=ReportJob.ACTIVE_STATUSES)
+        if len(active) >= MAX_ACTIVE_PER_USER:
+            raise ReportJobError(
+                _("Ya tienes %(count)s informes en curso; espera a que terminen.") % {'count': MAX_ACTIVE_PER_USER}
+            )
+        return ReportJob.objects.create(user=user, kind=kind, params=params or {})
+
+def cancel_report_job(job_id):
+    """ Cancela un informe aún en cola (UPDATE condicional). Caduca como uno terminado. """
+    now = timezone.now()
+    return bool(ReportJob.objects.filter(pk=job_id, status='QUEUED').update(
+        status='CANCELLED', finished_at=now, expires_at=now + timedelta(days=RETENTION_DAYS),
+    ))
+
+
+# --- Ejecución ---
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+def claim_jobs(limit):
+    """ Reclama hasta `limit` informes en cola respetando MAX_RUNNING_PER_USER. Devuelve sus ids. """
+    if limit <= 0:
+        return []
+    running = Counter(
+        ReportJob.objects.filter(status='RUNNING').values_list('user_id', flat=True)
+    )
+    claimed = []
+    for job_id, user_id in ReportJob.objects.filter(status='QUEUED').order_by('created_at', 'pk').values_list('pk', 'user_id')[:limit * 10]:
+        if running[user_id] >= MAX_RUNNING_PER_USER:
+            continue
+        updated = ReportJob.objects.filter(pk=job_id, status='QUEUED').update(
+            status='RUNNING', started_at=timezone.now(), worker=worker_name(),
+        )
+        if updated:
+            running[user_id] += 1
+            claimed.append(job_id)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+def run_job(job_id):
+    """ Ejecuta un informe ya reclamado (en el proceso del pool o en línea). Devuelve el estado final. """
+    close_old_connections()
+    job = ReportJob.objects.select_related('user').get(pk=job_id)
+    try:
+        definition = REPORTS.get(job.kind)
+        if definition is None:
+            raise ReportJobError(_("Tipo de informe desconocido: %(kind)s.") % {'kind': job.kind})
+        request = build_request(job.user, job.params)
+        if definition.permission_check:
+            definition.permission_check(request)  # Los permisos pueden haber cambiado mientras esperaba
+        with replica_reads():  # Informes de solo lectura: réplica si hay alguna sana
+            filename, content = definition.func(request)
+        try:
+            stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+            job.result.save(get_valid_filename(f"{job.pk}-{stamp}-{filename}"), content, save=False)
+        finally:
+            content.close()
+        job.status, job.error = 'SUCCEEDED', ''
+    except Exception as e:
+        logger.warning(f"[ReportJobs] Informe {job.pk} ({job.kind}) falló: {e}", exc_info=True)
+        job.status, job.error = 'FAILED', str(e)[:2000] or e.__class__.__name__
+    job.finished_at = timezone.now()
+    job.expires_at = job.finished_at + timedelta(days=RETENTION_DAYS)
+    job.save(update_fields=['result', 'status', 'error', 'finished_at', 'expires_at'])
+    close_old_connections()
+    return job.status
+
+
+def cleanup_report_jobs():
+    """ Borra informes caducados (y sus archivos) y falla los que superan JOB_TIMEOUT en ejecución. """
+    now = timezone.now()
+    stale = ReportJob.objects.filter(status='RUNNING', started_at__lt=now - timedelta(seconds=JOB_TIMEOUT)).update(
+        status='FAILED', error=str(_("Tiempo de ejecución agotado.")), finished_at=now,
+        expires_at=now + timedelta(days=RETENTION_DAYS),
+    )
+    # Sin expires_at (cancelados antes de que se fijara al cancelar): caducan por su fecha de fin o de creación
+    expired = list(ReportJob.objects.exclude(status__in=ReportJob.ACTIVE_STATUSES).filter(
+        Q(expires_at__lt=now)
+        | Q(expires_at__isnull=True, finished_at__lt=now - timedelta(days=RETENTION_DAYS))
+        | Q(expires_at__isnull=True, finished_at__isnull=True, created_at__lt=now - timedelta(days=RETENTION_DAYS))
+    ))
+    for job in expired:
+        if job.result:
+            job.result.delete(save=False)
+    ReportJob.objects.filter(pk__in=[job.pk for job in expired]).delete()
+    if stale or expired:
+        logger.info(f"[ReportJobs] Limpieza: {len(expired)} informes caducados eliminados, {stale} marcados por timeout.")
+    return {'expired': len(expired), 'timed_out': stale}
+
+
+# --- Pool de procesos del worker ---
+
+def init_pool_process():
+    """ Inicializador de cada proceso del pool: con 'spawn' (Windows) hay que configurar Django. """
+    import django
+    from django.apps import apps
+    from django.db import connections
+
+    if not apps.ready:
+        django.setup()
+    connections.close_all()  # Con 'fork' no se reutilizan las conexiones heredadas del padre
@@ -0,0 +1,233 @@
+# api/search.py
+"""
+Subsistema de búsqueda: índice invertido (SearchIndexEntry) sobre servicios,
+clientes, pedidos y entregables.
+
+- Tokenización sin acentos ni mayúsculas; cada término guarda un peso según el campo.
+- Las consultas usan `term LIKE 'x%'` sobre el índice de `term` (búsqueda por prefijo
+  con index seek), en lugar de `icontains` con comodín inicial sobre las tablas.
+- El índice se mantiene con señales (al confirmar la transacción) y se reconstruye
+  con `python manage.py rebuild_search_index`. Los textos desnormalizados (nombre de
+  categoría, nombre del usuario) reindexan los documentos que dependen de ellos; las
+  importaciones masivas del catálogo reindexan al final los servicios que tocaron.
+"""
+import logging
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, Q, Sum
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Customer, Deliverable, Order, SearchIndexEntry, Service, ServiceCategory
+
+logger = logging.getLogger(__name__)
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+MAX_OCCURRENCES = 5  # Tope de repeticiones de un término por campo (evita inflar textos largos)
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """ Minúsculas y sin acentos ('Diseño Web' -> 'diseno web'). """
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+def tokenize(text):
+    if text is None or text == '':
+        return []
+    return [t[:MAX_TERM_LENGTH] for t in TOKEN_RE.findall(normalize(text)) if len(t) >= MIN_TERM_LENGTH]
+
+
+class SearchSource:
+    """ Describe cómo indexar y presentar un modelo en la búsqueda. """
+    def __init__(self, model, fields, title, subtitle, select_related=()):
+        self.model = model
+        self.fields = fields  # {'ruta.al.campo': peso}
+        self.title = title
+        self.subtitle = subtitle
+        self.select_related = select_related
+
+    def queryset(self):
+        return self.model.objects.select_related(*self.select_related)
+
+    def resolve(self, obj, path):
+        for attr in path.split('.'):
+            obj = getattr(obj, attr, None)
+            if obj is None:
+                return None
+        return obj
+
+    def term_weights(self, obj):
+        weights = Counter()
+        for path, weight in self.fields.items():
+            for term, count in Counter(tokenize(self.resolve(obj, path))).items():
+                weights[term] += weight * min(count, MAX_OCCURRENCES)
+        return weights
+
+
+SEARCH_SOURCES = {
+    'service': SearchSource(
+        Service,
+        fields={'code': 5, 'name': 4, 'category.name': 2, 'audience': 1, 'detailed_description': 1, 'problem_solved': 1},
+        title=lambda s: s.name, subtitle=lambda s: f"{s.code} · {s.category.name}",
+        select_related=('category',),
+    ),
+    'customer': SearchSource(
+        Customer,
+        fields={'company_name': 4, 'user.first_name': 3, 'user.last_name': 3, 'user.email': 3, 'user.username': 2, 'phone': 1},
+        title=lambda c: c.company_name or c.user.get_full_name() or c.user.username, subtitle=lambda c: c.user.email,
+        select_related=('user',),
+    ),
+    'order': SearchSource(
+        Order,
+        fields={'id': 5, 'customer.company_name': 2, 'customer.user.first_name': 2, 'customer.user.last_name': 2, 'note': 1},
+        title=lambda o: f"Pedido #{o.pk}", subtitle=lambda o: f"{o.get_status_display()} · {o.customer.company_name or o.customer.user.get_full_name()}",
+        select_related=('customer__user',),
+    ),
+    'deliverable': SearchSource(
+        Deliverable,
+        fields={'description': 3, 'order_id': 2, 'feedback_notes': 1},
+        title=lambda d: d.description[:80], subtitle=lambda d: f"Pedido #{d.order_id} · {d.get_status_display()}",
+    ),
+}
+SOURCE_BY_MODEL = {source.model: doc_type for doc_type, source in SEARCH_SOURCES.items()}
+
+
+# --- Mantenimiento del índice ---
+
+def build_entries(doc_type, obj):
+    source = SEARCH_SOURCES[doc_type]
+    return [
+        SearchIndexEntry(doc_type=doc_type, object_id=str(obj.pk), term=term, weight=weight)
+        for term, weight in source.term_weights(obj).items()
+    ]
+
+def index_object(doc_type, pk):
+    """ Reindexa un objeto (lo elimina del índice si ya no existe). """
+    index_objects(doc_type, [pk])
+
+def index_objects(doc_type, pks, chunk_size=1000):
+    """ Reindexa un conjunto de objetos (los que ya no existen quedan fuera del índice). """
+    source = SEARCH_SOURCES[doc_type]
+    pks = list(pks)
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        SearchIndexEntry.objects.filter(doc_type=doc_type, object_id__in=[str(pk) for pk in chunk]).delete()
+        entries = []
+        for obj in source.queryset().filter(pk__in=chunk):
+            entries.extend(build_entries(doc_type, obj))
+        SearchIndexEntry.objects.bulk_create(entries, batch_size=chunk_size)
+
+def reindex_on_commit(doc_type, pks):
+    pks = list(pks)
+    if pks:
+        transaction.on_commit(lambda: index_objects(doc_type, pks))
+
+def remove_object(doc_type, pk):
+    SearchIndexEntry.objects.filter(doc_type=doc_type, object_id=str(pk)).delete()
+
+def rebuild_index(doc_types=None, chunk_size=1000):
+    """ Reconstrucción completa por tipo; devuelve {tipo: objetos indexados}. """
+    counts = {}
+    for doc_type in doc_types or SEARCH_SOURCES:
+        source = SEARCH_SOURCES[doc_type]
+        with transaction.atomic():
+            SearchIndexEntry.objects.filter(doc_type=doc_type).delete()
+            batch, counts[doc_type] = [], 0
+            for obj in source.queryset().order_by('pk').iterator(chunk_size=chunk_size):
+                batch.extend(build_entries(doc_type, obj))
+                counts[doc_type] += 1
+                if len(batch) >= chunk_size:
+                    SearchIndexEntry.objects.bulk_create(batch, batch_size=chunk_size)
+                    batch = []
+            SearchIndexEntry.objects.bulk_create(batch, batch_size=chunk_size)
+    return counts
+
+
+@receiver(post_save)
+def search_index_save_signal(sender, instance, raw=False, **kwargs):
+    doc_type = SOURCE_BY_MODEL.get(sender)
+    if doc_type and not raw:
+        pk = instance.pk
+        transaction.on_commit(lambda: index_object(doc_type, pk))
+
+@receiver(post_delete)
+def search_index_delete_signal(sender, instance, **kwargs):
+    doc_type = SOURCE_BY_MODEL.get(sender)
+    if doc_type:
+        remove_object(doc_type, instance.pk)
+
+# Textos desnormalizados en el índice: sus cambios reindexan los documentos dependientes
+@receiver(post_save, sender=ServiceCategory)
+def search_index_category_signal(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        reindex_on_commit('service', Service.objects.filter(category_id=instance.pk).values_list('pk', flat=True))
+
+@receiver(post_save, sender=Customer)
+def search_index_customer_signal(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:  # El documento del cliente ya lo reindexa search_index_save_signal
+        reindex_on_commit('order', Order.objects.filter(customer=instance).values_list('pk', flat=True))
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def search_index_user_signal(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if created or raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    reindex_on_commit('customer', Customer.objects.filter(user_id=instance.pk).values_list('pk', flat=True))
+    reindex_on_commit('order', Order.objects.filter(customer__user_id=instance.pk).values_list('pk', flat=True))
+
+
+# --- Consulta ---
+
+def query_terms(query):
+    """ Términos únicos de la consulta; descarta los que son prefijo de otro término (ya cubiertos). """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    return [t for t in terms if not any(o != t and o.startswith(t) for o in terms)]
+
+def search(query, scopes, limit=20):
+    """
+    Búsqueda AND por prefijo. `scopes` es {tipo: queryset visible o None (sin restricción)}.
+    Devuelve [(tipo, objeto, score)] ordenado por relevancia.
+    """
+    terms = query_terms(query)
+    if not terms or not scopes:
+        return []
+
+    visibility = Q()
+    for doc_type, scoped_qs in scopes.items():
+        clause = Q(doc_type=doc_type)
+        if scoped_qs is not None:
+            clause &= Q(object_id__in=scoped_qs.annotate(_search_key=Cast('pk', CharField(max_length=64))).values('_search_key'))
+        visibility |= clause
+
+    term_filter = Q()
+    for term in terms:
+        term_filter |= Q(term__startswith=term)
+
+    ranked = (
+        SearchIndexEntry.objects.filter(term_filter, visibility)
+        .values('doc_type', 'object_id')
+        .annotate(
+            score=Sum('weight'),
+            # Todos los términos deben aparecer (AND): un conteo distinto por término de la consulta
+            **{f'_t{i}': Count('pk', filter=Q(term__startswith=t)) for i, t in enumerate(terms)}
+        )
+        .filter(**{f'_t{i}__gt': 0 for i in range(len(terms))})
+        .order_by('-score', 'doc_type', 'object_id')[:limit]
+    )
+    hits = [(row['doc_type'], row['object_id'], row['score']) for row in ranked]
+
+    objects = {}
+    for doc_type in {doc_type for doc_type, _, _ in hits}:
+        ids = [object_id for t, object_id, _ in hits if t == doc_type]
+        objects[doc_type] = {str(pk): obj for pk, obj in SEARCH_SOURCES[doc_type].queryset().in_bulk(ids).items()}
+    return [
+        (doc_type, objects[doc_type][object_id], score)
+        for doc_type, object_id, score in hits if object_id in objects.get(doc_type, {})
+    ]
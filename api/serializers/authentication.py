@@ -3,50 +3,64 @@
 Serializers relacionados con la autenticación y obtención de tokens.
 """
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.models import update_last_login
 from django.utils.translation import gettext_lazy as _
 
-# Importar serializers base necesarios
-from .base import BasicUserSerializer
+from ..principal import build_principal, get_principal
 
 User = get_user_model()
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Emisión de tokens con una sola comprobación de contraseña: el usuario se carga con su
+    perfil y ficha de empleado en una query, la contraseña se verifica una vez (sin el
+    authenticate() de la clase base, que la volvería a hashear) y los claims del token y
+    los datos del usuario salen del mismo principal de sesión (api/principal.py).
+    """
+
     def validate(self, attrs):
-        username = attrs.get("username")
+        username = attrs.get(self.username_field)
         password = attrs.get("password")
 
-        try:
-            # Optimización: Cargar datos necesarios para BasicUserSerializer
-            user = User.objects.select_related(
-                'profile__primary_role',
-                'employee_profile__position'
-            ).prefetch_related(
-                'secondary_role_assignments__role'
-            ).get(username=username)
-        except User.DoesNotExist:
+        user = User.objects.select_related('profile', 'employee_profile').filter(
+            **{User.USERNAME_FIELD: username}
+        ).first()
+        if user is None:
+            # Mismo coste que con un usuario existente (como ModelBackend): no revela qué usuarios existen por tiempo
+            User().set_password(password)
+            self.login_failed(username)
             raise AuthenticationFailed(_("El usuario no existe."), code="user_not_found")
 
         if not user.check_password(password):
+            self.login_failed(username)
             raise AuthenticationFailed(_("Contraseña incorrecta."), code="invalid_credentials")
 
-        if not user.is_active:
+        if not jwt_settings.USER_AUTHENTICATION_RULE(user):
             raise AuthenticationFailed(_("Tu cuenta está inactiva."), code="user_inactive")
 
-        data = super().validate(attrs) # Obtiene access y refresh
+        self.user = user
+        principal = build_principal(user)
+        refresh = self.get_token(user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token), 'user': principal}
 
-        # Añadir datos del usuario usando BasicUserSerializer
-        user_data = BasicUserSerializer(user).data # 'user' ya tiene datos precargados
-        data.update({'user': user_data})
-        return data
+    def login_failed(self, username):
+        user_login_failed.send(
+            sender=__name__, credentials={self.username_field: username}, request=self.context.get('request')
+        )
 
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # Añadir claims personalizados al token JWT
-        token['roles'] = user.get_all_active_role_names
-        token['primary_role'] = user.primary_role_name
+        # Añadir claims personalizados al token JWT (desde el principal ya construido en el login)
+        principal = get_principal(user)
+        token['roles'] = principal['all_roles']
+        token['primary_role'] = principal['primary_role']
         token['username'] = user.username
-        token['is_dragon'] = user.is_dragon()
-        return token
\ No newline at end of file
+        token['is_dragon'] = principal['is_dragon_user']
+        return token
@@ -15,6 +15,7 @@ from ..models import Customer, UserRole, UserProfile
 # Importar serializers relacionados
 from .base import BasicUserSerializer
 from .users import UserCreateSerializer
+from .fields import CachedPrimaryKeyRelatedField
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -36,8 +37,9 @@ class CustomerSerializer(serializers.ModelSerializer):
 class CustomerCreateSerializer(serializers.ModelSerializer):
     """ Serializer para CREAR un nuevo cliente y su usuario asociado. """
     user = UserCreateSerializer(write_only=True) # Serializer anidado para datos del usuario
-    primary_role = serializers.PrimaryKeyRelatedField(
+    primary_role = CachedPrimaryKeyRelatedField(
         queryset=UserRole.objects.filter(is_active=True),
+        cache_filter={'is_active': True},
         write_only=True,
         required=True,
         help_text=_("ID del rol principal obligatorio para este cliente.")
@@ -15,6 +15,7 @@ from ..models import Employee, JobPosition, UserRole, UserProfile
 # Importar serializers relacionados
 from .base import BasicUserSerializer
 from .users import UserCreateSerializer
+from .fields import CachedPrimaryKeyRelatedField
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -31,7 +32,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
     position = JobPositionSerializer(read_only=True) # Info del puesto (lectura)
 
     # Campo para ACTUALIZAR la posición enviando solo el ID
-    position_id = serializers.PrimaryKeyRelatedField(
+    position_id = CachedPrimaryKeyRelatedField(
         queryset=JobPosition.objects.all(),
         source='position', # Mapea al campo 'position' del modelo Employee
         write_only=True,   # Solo para escritura
@@ -51,14 +52,15 @@ class EmployeeSerializer(serializers.ModelSerializer):
 class EmployeeCreateSerializer(serializers.ModelSerializer):
     """ Serializer para CREAR un nuevo empleado y su usuario asociado. """
     user = UserCreateSerializer(write_only=True) # Datos para crear el usuario
-    primary_role = serializers.PrimaryKeyRelatedField(
+    primary_role = CachedPrimaryKeyRelatedField(
         queryset=UserRole.objects.filter(is_active=True),
+        cache_filter={'is_active': True},
         write_only=True,
         required=True,
         help_text=_("ID del rol principal obligatorio para este empleado.")
     )
     # Campo para ASIGNAR la posición al crear (ID)
-    position_id = serializers.PrimaryKeyRelatedField(
+    position_id = CachedPrimaryKeyRelatedField(
         queryset=JobPosition.objects.all(),
         source='position', # Mapea al campo 'position' del modelo
         required=False,    # Puesto opcional al crear
@@ -0,0 +1,143 @@
+# api/serializers/fields.py
+"""
+Campos de serializer reutilizables.
+"""
+import hashlib
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import serializers
+
+from ..model_cache import model_cache
+
+RELATED_CACHE_KEY = 'related:{label}:{query}:{pk}'
+RELATED_FIELD_CACHE_TIMEOUT = getattr(settings, 'RELATED_FIELD_CACHE_TIMEOUT', 30)  # 0/None: sin caché
+MISSING = '__missing__'  # Centinela en caché: id que el queryset no incluye
+
+
+def collect_input_values(data, path):
+    """ Valores de `data` en la ruta de claves `path`; None recorre cada elemento de una lista. """
+    if not path:
+        yield data
+        return
+    key, rest = path[0], path[1:]
+    if key is None:
+        if isinstance(data, (list, tuple)):
+            for item in data:
+                yield from collect_input_values(item, rest)
+    elif isinstance(data, Mapping) and key in data:
+        value = data.getlist(key) if rest and rest[0] is None and hasattr(data, 'getlist') else data[key]
+        yield from collect_input_values(value, rest)
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que resuelve de una vez todos los ids que trae la petición para
+    este campo: al validar el primero recorre `initial_data` del serializer raíz (también
+    listas anidadas many=True y ManyRelatedField) y hace una sola query `pk IN (...)`.
+
+    `cache_timeout` (segundos, opcional) guarda además cada instancia resuelta en la caché
+    compartida, por id y filtro del queryset; usar solo con tablas en las que unos segundos
+    de retraso al desactivar una fila sean aceptables.
+    """
+    def __init__(self, **kwargs):
+        self.cache_timeout = kwargs.pop('cache_timeout', None)
+        super().__init__(**kwargs)
+        self._resolved = None
+
+    def _input_path(self):
+        path, node = [], self
+        while node.parent is not None:
+            if isinstance(node.parent, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                path.append(None)
+            else:
+                path.append(node.field_name)
+            node = node.parent
+        return node, path[::-1]
+
+    def _requested_pks(self):
+        root, path = self._input_path()
+        pk_field = self.get_queryset().model._meta.pk
+        pks = set()
+        for value in collect_input_values(getattr(root, 'initial_data', None), path):
+            if self.pk_field is not None:
+                try:
+                    value = self.pk_field.to_internal_value(value)
+                except Exception:
+                    continue
+            if value is None or isinstance(value, (bool, list, dict)):
+                continue
+            try:
+                pks.add(pk_field.to_python(value))
+            except Exception:
+                continue
+        return pks
+
+    def _cache_keys(self, queryset, pks):
+        query = hashlib.md5(str(queryset.query).encode('utf-8')).hexdigest()
+        label = queryset.model._meta.label_lower
+        return {RELATED_CACHE_KEY.format(label=label, query=query, pk=pk): pk for pk in pks}
+
+    def _resolve(self):
+        """ {pk: instancia o None} de todos los ids de la petición. """
+        queryset = self.get_queryset()
+        pending = self._requested_pks()
+        resolved = {}
+        keys = {}
+        if self.cache_timeout and pending:
+            keys = self._cache_keys(queryset, pending)
+            for key, value in cache.get_many(list(keys)).items():
+                resolved[keys[key]] = None if value == MISSING else value
+            pending -= set(resolved)
+        if pending:
+            found = {obj.pk: obj for obj in queryset.filter(pk__in=pending)}
+            for pk in pending:
+                resolved[pk] = found.get(pk)
+            if self.cache_timeout:
+                cache.set_many(
+                    {key: (resolved[pk] if resolved[pk] is not None else MISSING)
+                     for key, pk in keys.items() if pk in pending},
+                    self.cache_timeout,
+                )
+        return resolved
+
+    def to_internal_value(self, data):
+        if self._resolved is None:
+            self._resolved = self._resolve()
+        value = self.pk_field.to_internal_value(data) if self.pk_field is not None else data
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(value)
+        except Exception:
+            pk = None
+        if pk is None or isinstance(value, bool) or pk not in self._resolved:
+            return super().to_internal_value(data)  # Id que no estaba en initial_data: consulta individual
+        obj = self._resolved[pk]
+        if obj is None:
+            self.fail('does_not_exist', pk_value=value)
+        return obj
+
+
+class CachedPrimaryKeyRelatedField(BatchedPrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que valida contra la caché de tablas pequeñas (api/model_cache.py)
+    en lugar de consultar la base de datos. `cache_filter` debe reproducir el filtro del
+    queryset (p. ej. {'is_active': True}); el queryset se sigue usando para las opciones
+    de la API navegable. Con modelos no cacheados se comporta como el campo por lotes.
+    """
+    def __init__(self, **kwargs):
+        self.cache_filter = kwargs.pop('cache_filter', {})
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        queryset = self.queryset
+        if queryset is None or not model_cache.is_cached(queryset.model):
+            return super().to_internal_value(data)
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = model_cache.get(queryset.model, data)
+        if obj is None or any(getattr(obj, field) != value for field, value in self.cache_filter.items()):
+            self.fail('does_not_exist', pk_value=data)
+        return obj
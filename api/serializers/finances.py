@@ -9,6 +9,7 @@ from django.utils.translation import gettext_lazy as _
 
 # Importar modelos necesarios
 from ..models import PaymentMethod, TransactionType, Invoice, Payment, Order
+from .fields import CachedPrimaryKeyRelatedField
 
 class PaymentMethodSerializer(serializers.ModelSerializer):
     """ Serializer para Métodos de Pago. """
@@ -58,8 +59,8 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
     invoice = serializers.PrimaryKeyRelatedField(
          queryset=Invoice.objects.exclude(status__in=getattr(Invoice, 'FINAL_STATUSES', ['PAID', 'CANCELLED', 'VOID'])) # Excluir facturas finales
     )
-    method = serializers.PrimaryKeyRelatedField(queryset=PaymentMethod.objects.filter(is_active=True))
-    transaction_type = serializers.PrimaryKeyRelatedField(queryset=TransactionType.objects.all())
+    method = CachedPrimaryKeyRelatedField(queryset=PaymentMethod.objects.filter(is_active=True), cache_filter={'is_active': True})
+    transaction_type = CachedPrimaryKeyRelatedField(queryset=TransactionType.objects.all())
 
     class Meta:
         model = Payment
@@ -4,6 +4,7 @@ Serializers relacionados con Formularios, Preguntas y Respuestas.
 """
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from django.db.models import IntegerField, OuterRef, Subquery, Value
 
 # Importar modelos necesarios
 from ..models import Form, FormQuestion, FormResponse
@@ -50,37 +51,60 @@ class FormResponseSerializer(serializers.ModelSerializer):
 
 class FormResponseBulkItemSerializer(serializers.Serializer):
     """ Serializer para un item individual dentro de una creación masiva de respuestas. """
-    question = serializers.PrimaryKeyRelatedField(queryset=FormQuestion.objects.all(), required=True)
+    # ID simple: las preguntas se validan todas juntas contra el formulario (una query)
+    question = serializers.IntegerField(min_value=1, required=True)
     text = serializers.CharField(max_length=5000, allow_blank=True)
 
 class FormResponseBulkCreateSerializer(serializers.Serializer):
-    """ Serializer para la creación masiva de respuestas a un formulario. """
+    """
+    Serializer para la creación masiva de respuestas a un formulario.
+    Con 'customer' en el contexto, las preguntas ya respondidas se actualizan (re-envío)
+    y las requeridas pueden omitirse si ya tienen respuesta.
+    """
     form = serializers.PrimaryKeyRelatedField(queryset=Form.objects.all(), required=True)
     responses = FormResponseBulkItemSerializer(many=True, required=True, min_length=1) # Debe haber al menos una respuesta
 
     def validate(self, data):
-        """ Valida que todas las preguntas pertenezcan al formulario especificado. """
+        """ Valida pertenencia al formulario, duplicados y preguntas requeridas con una sola query. """
         form = data['form']
         responses_data = data['responses']
-        form_question_ids = set(form.questions.values_list('id', flat=True))
-        submitted_question_ids = set()
+        customer = self.context.get('customer')
+
+        questions = FormQuestion.objects.filter(form=form).order_by()
+        if customer is not None:
+            existing = FormResponse.objects.filter(customer=customer, form=form, question=OuterRef('pk'))
+            questions = questions.annotate(response_id=Subquery(existing.values('pk')[:1]))
+        else:
+            questions = questions.annotate(response_id=Value(None, output_field=IntegerField()))
+        form_questions = {row['id']: row for row in questions.values('id', 'required', 'response_id')}
 
+        submitted_question_ids = set()
         for idx, response_item in enumerate(responses_data):
-            question = response_item['question']
+            question_id = response_item['question']
             # Verificar pertenencia al formulario
-            if question.id not in form_question_ids:
+            if question_id not in form_questions:
                 raise ValidationError({
-                    f"responses[{idx}].question": f"La pregunta ID {question.id} no pertenece al formulario '{form.name}'."
+                    f"responses[{idx}].question": f"La pregunta ID {question_id} no pertenece al formulario '{form.name}'."
                 })
             # Verificar preguntas duplicadas en el mismo envío
-            if question.id in submitted_question_ids:
+            if question_id in submitted_question_ids:
                  raise ValidationError({
-                    f"responses[{idx}].question": f"La pregunta ID {question.id} se ha enviado más de una vez en esta solicitud."
+                    f"responses[{idx}].question": f"La pregunta ID {question_id} se ha enviado más de una vez en esta solicitud."
                  })
-            submitted_question_ids.add(question.id)
+            submitted_question_ids.add(question_id)
+            if form_questions[question_id]['required'] and not response_item.get('text', '').strip():
+                raise ValidationError({f"responses[{idx}].text": "Esta pregunta es requerida y no puede estar vacía."})
 
-            # Opcional: Validar requeridos aquí si no se hace en otro lugar
-            # if question.required and not response_item.get('text', '').strip():
-            #    raise ValidationError({f"responses[{idx}].text": "Esta pregunta es requerida y no puede estar vacía."})
+        missing = sorted(
+            question_id for question_id, row in form_questions.items()
+            if row['required'] and question_id not in submitted_question_ids and row['response_id'] is None
+        )
+        if missing:
+            raise ValidationError({"responses": f"Faltan respuestas a preguntas requeridas: {missing}."})
 
-        return data
\ No newline at end of file
+        # Respuestas existentes por pregunta: el servicio las actualiza en lugar de crearlas
+        data['existing_responses'] = {
+            question_id: form_questions[question_id]['response_id'] for question_id in submitted_question_ids
+            if form_questions[question_id]['response_id'] is not None
+        }
+        return data
@@ -8,12 +8,17 @@ from rest_framework import serializers
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from django.urls import reverse
+from django.core.files.storage import default_storage
 
 # Importar modelos necesarios
-from ..models import Order, OrderService, Deliverable, Service, Employee, Provider, Customer
+from ..models import Order, OrderService, Deliverable, DeliverablePreview, DeliverableUpload, Price, Service, Employee, Provider, Customer
+
+from ..state_machine import TransitionError, check_transition
 
 # Importar serializers relacionados/base
 from .base import EmployeeBasicSerializer, ProviderBasicSerializer
+from .fields import RELATED_FIELD_CACHE_TIMEOUT, BatchedPrimaryKeyRelatedField
 from .customers import CustomerSerializer # Para OrderReadSerializer
 from .services_catalog import ServiceSerializer # Para OrderServiceReadSerializer
 
@@ -23,9 +28,10 @@ logger = logging.getLogger(__name__)
 class OrderServiceCreateSerializer(serializers.ModelSerializer):
     """ Serializer para AÑADIR/ACTUALIZAR servicios en una orden. """
     # Usar PrimaryKeyRelatedField para escribir el ID del servicio
-    service = serializers.PrimaryKeyRelatedField(
+    # Todos los servicios de la lista se validan con una sola query (y caché de pocos segundos)
+    service = BatchedPrimaryKeyRelatedField(
         queryset=Service.objects.filter(is_active=True),
-        required=True
+        required=True, cache_timeout=RELATED_FIELD_CACHE_TIMEOUT
     )
     # Precio opcional, se puede calcular o tomar del servicio
     price = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, allow_null=True)
@@ -66,7 +72,10 @@ class DeliverableSerializer(serializers.ModelSerializer):
     assigned_provider_info = ProviderBasicSerializer(source='assigned_provider', read_only=True)
     order_id = serializers.IntegerField(source='order.id', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    sla_status_display = serializers.CharField(source='get_sla_status_display', read_only=True)
     file_url = serializers.SerializerMethodField(read_only=True) # URL del archivo
+    download_url = serializers.SerializerMethodField(read_only=True) # Descarga en streaming (soporta Range)
+    preview = serializers.SerializerMethodField(read_only=True) # Miniatura / vista previa / metadatos
 
     # Campos para escribir (asignar por ID)
     assigned_employee = serializers.PrimaryKeyRelatedField(
@@ -86,17 +95,28 @@ class DeliverableSerializer(serializers.ModelSerializer):
             'id', 'order_id', 'description', 'version',
             'file', # Para escribir (subir)
             'file_url', # Para leer (URL)
-            'status', 'status_display', 'due_date',
+            'download_url', 'preview',
+            'status', 'status_display', 'sla_status', 'sla_status_display', 'due_date',
             'assigned_employee', 'assigned_employee_info', # write / read
             'assigned_provider', 'assigned_provider_info', # write / read
             'feedback_notes', 'created_at'
         ]
         read_only_fields = [
-            'id', 'order_id', 'version', 'created_at', 'status_display', 'file_url',
+            'id', 'order_id', 'version', 'created_at', 'status_display', 'sla_status', 'sla_status_display',
+            'file_url', 'download_url', 'preview',
             'assigned_employee_info', 'assigned_provider_info'
         ]
         # 'file' es write_only por definición de FileField aquí
 
+    def validate_status(self, value):
+        """ Solo transiciones permitidas por la máquina de estados (api/state_machine.py). """
+        if self.instance is not None:
+            try:
+                check_transition(Deliverable, self.instance.status, value)
+            except TransitionError as e:
+                raise ValidationError(str(e))
+        return value
+
     def get_file_url(self, obj):
         request = self.context.get('request')
         if obj.file and request:
@@ -105,6 +125,64 @@ class DeliverableSerializer(serializers.ModelSerializer):
             return obj.file.url # Fallback si no hay request
         return None
 
+    def get_download_url(self, obj):
+        if not obj.file:
+            return None
+        url = reverse('order-deliverables-download', kwargs={'order_pk': obj.order_id, 'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_preview(self, obj):
+        # Generada en segundo plano (api/previews.py); None si el entregable no tiene archivo
+        try:
+            preview = obj.preview
+        except DeliverablePreview.DoesNotExist:
+            return None
+        if not obj.file or preview.source_name != obj.file.name:
+            return None
+        request = self.context.get('request')
+        def media_url(name):
+            if not name:
+                return None
+            url = default_storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+        return {
+            'status': preview.status,
+            'thumbnail_url': media_url(preview.thumbnail),
+            'preview_url': media_url(preview.preview),
+            'metadata': preview.metadata,
+        }
+
+
+class DeliverableUploadSerializer(serializers.ModelSerializer):
+    """ Estado de una subida por partes (para iniciar y reanudar). """
+    total_parts = serializers.IntegerField(read_only=True)
+    missing_parts = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = DeliverableUpload
+        fields = [
+            'id', 'deliverable', 'filename', 'content_type', 'total_size', 'chunk_size',
+            'total_parts', 'received_parts', 'missing_parts', 'checksum',
+            'status', 'status_display', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class DeliverableUploadCreateSerializer(serializers.Serializer):
+    """ Datos para iniciar una subida por partes. """
+    filename = serializers.CharField(max_length=255)
+    total_size = serializers.IntegerField(min_value=1)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    chunk_size = serializers.IntegerField(min_value=1, required=False)
+    checksum = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+
+class BulkTransitionSerializer(serializers.Serializer):
+    """ Entrada de una transición masiva de estado (pedidos o entregables). """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=1000)
+    status = serializers.CharField(max_length=30)
+
 class OrderReadSerializer(serializers.ModelSerializer):
     """ Serializer para LEER detalles completos de una orden. """
     customer = CustomerSerializer(read_only=True)
@@ -112,12 +190,13 @@ class OrderReadSerializer(serializers.ModelSerializer):
     services = OrderServiceReadSerializer(many=True, read_only=True)
     deliverables = DeliverableSerializer(many=True, read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    sla_status_display = serializers.CharField(source='get_sla_status_display', read_only=True)
     total_amount = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True) # Calculado en modelo/señal
 
     class Meta:
         model = Order
         fields = [
-            'id', 'customer', 'employee', 'status', 'status_display',
+            'id', 'customer', 'employee', 'status', 'status_display', 'sla_status', 'sla_status_display',
             'date_received', 'date_required', 'payment_due_date', 'note',
             'priority', 'completed_at', 'total_amount', 'services', 'deliverables'
         ]
@@ -143,63 +222,76 @@ class OrderCreateUpdateSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id']
 
+    def validate_status(self, value):
+        """ Solo transiciones permitidas por la máquina de estados (api/state_machine.py). """
+        if self.instance is not None:
+            try:
+                check_transition(Order, self.instance.status, value)
+            except TransitionError as e:
+                raise ValidationError(str(e))
+        return value
+
+    def _current_prices(self, services_data, currency='EUR'):
+        """ Último precio de cada servicio sin precio explícito, en una sola query. """
+        service_ids = {item['service'].pk for item in services_data if item.get('price') is None and item.get('service')}
+        prices = {}
+        if service_ids:
+            for service_id, amount in (
+                Price.objects.filter(service_id__in=service_ids, currency=currency)
+                .order_by('service_id', '-effective_date').values_list('service_id', 'amount')
+            ):
+                prices.setdefault(service_id, amount)
+        return prices
+
     def _create_or_update_services(self, order, services_data):
-        """ Helper para crear/actualizar servicios anidados. """
+        """ Helper para crear/actualizar servicios anidados (número de queries constante). """
         # Mapear IDs existentes vs nuevos
         current_service_mapping = {s.id: s for s in order.services.all()}
         incoming_service_mapping = {item.get('id'): item for item in services_data if item.get('id')}
         ids_to_update = set(current_service_mapping.keys()) & set(incoming_service_mapping.keys())
         ids_to_delete = set(current_service_mapping.keys()) - ids_to_update
         data_to_create = [item for item in services_data if not item.get('id')]
+        current_prices = self._current_prices(services_data)
+
+        def price_for(service_data):
+            price = service_data.get('price')
+            if price is None and service_data.get('service'):
+                price = current_prices.get(service_data['service'].pk, Decimal('0.00'))
+            return price
 
         # Eliminar los que ya no están
         if ids_to_delete:
             OrderService.objects.filter(order=order, id__in=ids_to_delete).delete()
 
         # Actualizar los existentes
+        services_to_update = []
         for service_id in ids_to_update:
             instance = current_service_mapping[service_id]
             service_data = incoming_service_mapping[service_id]
-            service_obj = service_data.get('service') # PKRelatedField ya validó
-
-            # Obtener precio si no se especificó
-            price = service_data.get('price')
-            if price is None and service_obj:
-                current_price_obj = service_obj.get_current_price(currency='EUR') # Asume EUR o ajusta
-                price = current_price_obj.amount if current_price_obj else Decimal('0.00')
-
-            # Actualizar instancia
-            instance.service = service_obj
+            instance.service = service_data.get('service') # BatchedPrimaryKeyRelatedField ya validó
             instance.quantity = service_data.get('quantity', instance.quantity)
-            instance.price = price
+            instance.price = price_for(service_data)
             instance.note = service_data.get('note', instance.note)
-            # No guardar aquí, hacerlo en bulk_update si es posible
-            # instance.save() # Alternativa si no hay bulk_update
+            services_to_update.append(instance)
+        if services_to_update:
+            OrderService.objects.bulk_update(services_to_update, ['service', 'quantity', 'price', 'note'])
 
         # Crear los nuevos
-        services_to_create_bulk = []
-        for service_data in data_to_create:
-            service_obj = service_data.get('service')
-            price = service_data.get('price')
-            if price is None and service_obj:
-                 current_price_obj = service_obj.get_current_price(currency='EUR')
-                 price = current_price_obj.amount if current_price_obj else Decimal('0.00')
-
-            services_to_create_bulk.append(OrderService(
+        services_to_create_bulk = [
+            OrderService(
                 order=order,
-                service=service_obj,
+                service=service_data.get('service'),
                 quantity=service_data.get('quantity', 1),
-                price=price,
+                price=price_for(service_data),
                 note=service_data.get('note', '')
-            ))
-
+            )
+            for service_data in data_to_create
+        ]
         if services_to_create_bulk:
             OrderService.objects.bulk_create(services_to_create_bulk)
 
-        # Actualizar (si hay cambios y Django >= 4)
-        # services_to_update = [current_service_mapping[sid] for sid in ids_to_update]
-        # if services_to_update:
-        #     OrderService.objects.bulk_update(services_to_update, ['service', 'quantity', 'price', 'note'])
+        # bulk_create/bulk_update no disparan las señales de OrderService: recalcular el total una vez
+        order.update_total_amount()
 
 
     @transaction.atomic
@@ -207,7 +299,6 @@ class OrderCreateUpdateSerializer(serializers.ModelSerializer):
         services_data = validated_data.pop('services', [])
         order = Order.objects.create(**validated_data)
         self._create_or_update_services(order, services_data)
-        # La señal post_save/delete de OrderService debería recalcular total_amount
         order.refresh_from_db()
         return order
 
@@ -220,6 +311,5 @@ class OrderCreateUpdateSerializer(serializers.ModelSerializer):
         if services_data is not None: # Si se envió el campo 'services' (incluso vacío)
             self._create_or_update_services(instance, services_data)
 
-        # Señal debería recalcular total_amount
         instance.refresh_from_db()
         return instance
\ No newline at end of file
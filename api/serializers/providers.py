@@ -9,13 +9,14 @@ from ..models import Provider, Service
 
 # Importar serializers relacionados
 from .services_catalog import ServiceSerializer # Para mostrar detalles de servicios
+from .fields import BatchedPrimaryKeyRelatedField
 
 class ProviderSerializer(serializers.ModelSerializer):
     """ Serializer para leer/escribir información de Proveedores. """
     # Mostrar detalles de servicios (lectura)
     services_provided_details = ServiceSerializer(source='services_provided', many=True, read_only=True)
     # Campo para escribir (asignar servicios por ID)
-    services_provided = serializers.PrimaryKeyRelatedField(
+    services_provided = BatchedPrimaryKeyRelatedField(
         queryset=Service.objects.all(), many=True, write_only=True, required=False
     )
 
@@ -0,0 +1,39 @@
+# api/serializers/reports.py
+"""
+Serializers de los informes en segundo plano (ReportJob).
+"""
+from django.urls import reverse
+from rest_framework import serializers
+
+from ..models import ReportJob
+from ..report_jobs import REPORTS
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """ Estado de un informe; al crear solo se envían 'kind' y 'params' (filtros de la vista original). """
+    kind = serializers.ChoiceField(choices=[(kind, definition.label) for kind, definition in REPORTS.items()])
+    kind_display = serializers.SerializerMethodField()
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    params = serializers.DictField(required=False, default=dict)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'kind', 'kind_display', 'params', 'status', 'status_display', 'error',
+            'created_at', 'started_at', 'finished_at', 'expires_at', 'download_url',
+        ]
+        read_only_fields = [
+            'id', 'status', 'status_display', 'error', 'created_at', 'started_at', 'finished_at', 'expires_at',
+        ]
+
+    def get_kind_display(self, obj):
+        definition = REPORTS.get(obj.kind)
+        return str(definition.label) if definition else obj.kind
+
+    def get_download_url(self, obj):
+        if obj.status != 'SUCCEEDED' or not obj.result:
+            return None
+        url = reverse('reportjob-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -8,6 +8,7 @@ from rest_framework import serializers
 from ..models import (
     ServiceCategory, Price, ServiceFeature, Service, Campaign, CampaignService
 )
+from .fields import CachedPrimaryKeyRelatedField
 
 class ServiceCategorySerializer(serializers.ModelSerializer):
     """ Serializer para Categorías de Servicio. """
@@ -41,7 +42,7 @@ class ServiceSerializer(serializers.ModelSerializer):
     current_eur_price = serializers.SerializerMethodField()
 
     # Campos para escribir (FKs)
-    category = serializers.PrimaryKeyRelatedField(queryset=ServiceCategory.objects.all(), write_only=True)
+    category = CachedPrimaryKeyRelatedField(queryset=ServiceCategory.objects.all(), write_only=True)
     campaign = serializers.PrimaryKeyRelatedField(queryset=Campaign.objects.all(), write_only=True, required=False, allow_null=True)
 
     class Meta:
@@ -64,8 +65,7 @@ class ServiceSerializer(serializers.ModelSerializer):
 
     def get_current_eur_price(self, obj):
         """ Devuelve el monto del precio actual en EUR. """
-        price = obj.get_current_price(currency='EUR')
-        return price.amount if price else None
+        return obj.get_current_price(currency='EUR')  # Ya es el monto (Decimal) o None
 
 class CampaignServiceSerializer(serializers.ModelSerializer):
     """ Serializer para la relación entre Campaña y Servicio. """
@@ -87,7 +87,7 @@ class CampaignServiceSerializer(serializers.ModelSerializer):
 class CampaignSerializer(serializers.ModelSerializer):
     """ Serializer para Campañas, incluyendo servicios asociados. """
     # Mostrar servicios incluidos (lectura)
-    included_services = CampaignServiceSerializer(many=True, read_only=True, source='campaignservice_set') # Ajustar source si related_name es diferente
+    included_services = CampaignServiceSerializer(many=True, read_only=True)
 
     class Meta:
         model = Campaign
@@ -13,6 +13,7 @@ from ..models import UserRole, UserRoleAssignment
 
 # Importar serializers base/relacionados
 from .base import BasicUserSerializer
+from .fields import CachedPrimaryKeyRelatedField
 
 User = get_user_model()
 
@@ -69,7 +70,7 @@ class UserRoleAssignmentSerializer(serializers.ModelSerializer):
     role_info = UserRoleSerializer(source='role', read_only=True)
     # Campos para crear/actualizar (escritura)
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True)
-    role = serializers.PrimaryKeyRelatedField(queryset=UserRole.objects.filter(is_active=True), write_only=True)
+    role = CachedPrimaryKeyRelatedField(queryset=UserRole.objects.filter(is_active=True), cache_filter={'is_active': True}, write_only=True)
 
     class Meta:
         model = UserRoleAssignment
@@ -29,7 +29,6 @@ class AuditLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = AuditLog
         fields = [
-            'id', 'user', 'action', 'timestamp', 'target_model', 'target_id', # Añadido target
-            'ip_address', 'details' # Añadido IP
+            'id', 'user', 'action', 'timestamp', 'details'
             ]
         read_only_fields = fields # Solo lectura
\ No newline at end of file
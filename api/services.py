@@ -1,7 +1,27 @@
 # api/services.py
+import hashlib
+import heapq
 import logging
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Trim
+from django.utils import timezone
+from django.utils.text import get_valid_filename
 from django.utils.translation import gettext_lazy as _
-from .models import FormResponse, Customer, Form, FormQuestion # Asegúrate que los modelos existan y se importen
+from .models import (  # Asegúrate que los modelos existan y se importen
+    FormResponse, Customer, Form, FormQuestion, Deliverable, DeliverableUpload, StoredBlob,
+    Order, OrderService, Provider, UserRoleAssignment,
+)
+from .form_analytics import invalidate_form_analytics
+from .permissions import CanCreateDeliverables
+from .roles import Roles
+from .storage import collect_blob, sha256_from_name
+from .workload import employee_ranking, provider_ranking
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +32,10 @@ class FormResponseService:
     @staticmethod
     def bulk_create_responses(validated_data, customer: Customer):
         """
-        Crea múltiples respuestas de formulario para un cliente dado.
-        Espera 'validated_data' de FormResponseBulkCreateSerializer.
+        Crea o actualiza (re-envío) las respuestas de formulario de un cliente en una sola escritura.
+        Espera 'validated_data' de FormResponseBulkCreateSerializer (validado con el mismo cliente
+        en el contexto): las preguntas ya están comprobadas contra el formulario, sin releerlas aquí.
+        Devuelve (respuestas, creadas, actualizadas).
         """
         if not isinstance(customer, Customer):
              logger.error(f"[FormResponseService] Se esperaba una instancia de Customer, se recibió {type(customer)}")
@@ -21,47 +43,380 @@ class FormResponseService:
 
         form = validated_data.get('form')
         responses_data = validated_data.get('responses', [])
+        existing = validated_data.get('existing_responses', {})
 
         if not form or not responses_data:
             logger.warning(f"[FormResponseService] Datos insuficientes para bulk_create. Form: {form}, Responses Count: {len(responses_data)}")
-            return [] # O lanzar ValidationError si es mandatorio
-
-        responses_to_create = []
-        # Validar que las preguntas pertenezcan al formulario podría ser una buena adición aquí
-        form_question_ids = set(FormQuestion.objects.filter(form=form).values_list('id', flat=True))
-
-        for item in responses_data:
-            question = item.get('question')
-            text = item.get('text', '') # Asegurar que text siempre tenga un valor
-
-            if not question:
-                 logger.warning(f"[FormResponseService] Item sin pregunta en bulk_create para cliente {customer.id}")
-                 continue # O lanzar error si la pregunta es obligatoria
-
-            if question.id not in form_question_ids:
-                logger.error(f"[FormResponseService] Intento de respuesta a pregunta ({question.id}) que no pertenece al formulario ({form.id}) por cliente {customer.id}")
-                raise ValueError(_("La pregunta proporcionada no pertenece al formulario especificado.")) # O simplemente omitir
-
-            responses_to_create.append(
-                FormResponse(
-                    customer=customer,
-                    form=form,
-                    question=question,
-                    text=text
-                )
+            return [], 0, 0
+
+        responses = [
+            FormResponse(
+                pk=existing.get(item['question']), customer=customer, form=form,
+                question_id=item['question'], text=item.get('text', ''),
             )
+            for item in responses_data
+        ]
+        updated = sum(1 for response in responses if response.pk)
+
+        try:
+            with transaction.atomic():
+                if connection.features.supports_update_conflicts_with_target:
+                    # Upsert sobre la clave única (customer, form, question): cubre también envíos simultáneos
+                    for response in responses:
+                        response.pk = None
+                    FormResponse.objects.bulk_create(
+                        responses, batch_size=500, update_conflicts=True,
+                        unique_fields=['customer', 'form', 'question'], update_fields=['text'],
+                    )
+                else:
+                    # Backends sin ON CONFLICT con destino (p. ej. SQL Server): INSERT de las nuevas + UPDATE por lotes
+                    FormResponse.objects.bulk_create([r for r in responses if not r.pk], batch_size=500)
+                    FormResponse.objects.bulk_update([r for r in responses if r.pk], ['text'], batch_size=500)
+                invalidate_form_analytics(form.id)  # bulk_create/bulk_update no disparan señales
+        except Exception as e:
+            logger.error(f"[FormResponseService] Error durante bulk_create para cliente {customer.id}: {e}", exc_info=True)
+            raise # Relanza la excepción original para que la vista la maneje
+
+        logger.info(f"[FormResponseService] {len(responses) - updated} respuestas creadas y {updated} actualizadas para cliente {customer.id}, formulario {form.id}.")
+        return responses, len(responses) - updated, updated
+
+
+class UploadError(Exception):
+    """ Error de validación de una subida por partes (la vista lo traduce a 400). """
+
+
+class StreamFile(File):
+    """
+    Adapta un stream (request.stream, partes en storage...) a File sin cargarlo en memoria:
+    `chunks()` lee bloques, cuenta bytes, calcula SHA-256 y corta si se supera `max_size`.
+    """
+    block_size = 64 * 1024
+
+    def __init__(self, streams, name, max_size=None):
+        super().__init__(None, name=name)
+        self.streams = streams
+        self.max_size = max_size
+        self.bytes_read = 0
+        self.sha256 = hashlib.sha256()
+
+    def chunks(self, chunk_size=None):
+        for stream in self.streams:
+            while True:
+                block = stream.read(chunk_size or self.block_size)
+                if not block:
+                    break
+                self.bytes_read += len(block)
+                if self.max_size is not None and self.bytes_read > self.max_size:
+                    raise UploadError(_("La parte supera el tamaño máximo permitido (%(size)s bytes).") % {'size': self.max_size})
+                self.sha256.update(block)
+                yield block
+
+    def __iter__(self):
+        return self.chunks()
+
+
+class DeliverableUploadService:
+    """
+    Subidas por partes y reanudables del archivo de un entregable:
+    iniciar -> subir partes (PUT, en cualquier orden, reintentos idempotentes) -> completar.
+    Cada parte se escribe directamente al storage desde el stream de la petición.
+    """
+    DEFAULT_CHUNK_SIZE = getattr(settings, 'DELIVERABLE_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+    MAX_FILE_SIZE = getattr(settings, 'DELIVERABLE_UPLOAD_MAX_SIZE', 20 * 1024 ** 3)
+    MIN_CHUNK_SIZE = 256 * 1024
+
+    @staticmethod
+    def initiate(deliverable: Deliverable, user, filename, total_size, content_type='', chunk_size=None, checksum=''):
+        service = DeliverableUploadService
+        chunk_size = chunk_size or service.DEFAULT_CHUNK_SIZE
+        if total_size <= 0 or total_size > service.MAX_FILE_SIZE:
+            raise UploadError(_("Tamaño de archivo no válido (máximo %(max)s bytes).") % {'max': service.MAX_FILE_SIZE})
+        if not service.MIN_CHUNK_SIZE <= chunk_size <= service.DEFAULT_CHUNK_SIZE * 8:
+            raise UploadError(_("Tamaño de parte no válido."))
+        upload = DeliverableUpload.objects.create(
+            deliverable=deliverable, created_by=user if user and user.is_authenticated else None,
+            filename=get_valid_filename(os.path.basename(filename)) or 'archivo',
+            content_type=content_type or '', total_size=total_size, chunk_size=chunk_size,
+            checksum=(checksum or '').lower(),
+        )
+
+        # Deduplicación: si el contenido declarado ya está almacenado y el mismo cliente ya lo
+        # tiene (otro entregable suyo o su guía de marca), no hace falta subir nada. Con cualquier
+        # otro blob se exige la subida completa: conocer el hash y el tamaño no da acceso al archivo.
+        blob = StoredBlob.objects.filter(sha256=upload.checksum, size=total_size).first() if upload.checksum else None
+        if blob is not None and not DeliverableUploadService.customer_has_blob(deliverable, blob):
+            blob = None
+        if blob is not None:
+            with transaction.atomic():
+                DeliverableUploadService.attach_file(deliverable, blob.name)
+                upload.status = 'COMPLETED'
+                upload.save(update_fields=['status', 'updated_at'])
+            logger.info(f"[DeliverableUploadService] Subida {upload.pk} resuelta por deduplicación (blob {blob.sha256[:12]}).")
+            return upload
+        logger.info(f"[DeliverableUploadService] Subida {upload.pk} iniciada para entregable {deliverable.pk} ({total_size} bytes, {upload.total_parts} partes).")
+        return upload
+
+    @staticmethod
+    def expected_part_size(upload: DeliverableUpload, part_number):
+        if part_number < upload.total_parts:
+            return upload.chunk_size
+        return upload.total_size - upload.chunk_size * (upload.total_parts - 1)
+
+    @staticmethod
+    def store_part(upload: DeliverableUpload, part_number, stream):
+        """ Escribe la parte en storage (sobrescribe si se reintenta) y la registra. """
+        if upload.status != 'ACTIVE':
+            raise UploadError(_("La subida no está activa."))
+        if not 1 <= part_number <= upload.total_parts:
+            raise UploadError(_("Número de parte fuera de rango (1-%(n)s).") % {'n': upload.total_parts})
+
+        expected = DeliverableUploadService.expected_part_size(upload, part_number)
+        name = upload.part_name(part_number)
+        content = StreamFile([stream], name=name, max_size=expected)
+        default_storage.delete(name)
+        try:
+            saved_name = default_storage.save(name, content)
+        except UploadError:
+            default_storage.delete(name)
+            raise
+        if content.bytes_read != expected:
+            default_storage.delete(saved_name)
+            raise UploadError(_("La parte %(n)s debe tener %(expected)s bytes (recibidos %(got)s).") % {
+                'n': part_number, 'expected': expected, 'got': content.bytes_read})
+
+        # Bloqueo de la fila: las partes pueden llegar en paralelo
+        with transaction.atomic():
+            locked = DeliverableUpload.objects.select_for_update().get(pk=upload.pk)
+            locked.received_parts[str(part_number)] = content.bytes_read
+            locked.save(update_fields=['received_parts', 'updated_at'])
+        return locked
+
+    @staticmethod
+    def complete(upload: DeliverableUpload):
+        """ Ensambla las partes en el archivo final del entregable (en streaming) y limpia las partes. """
+        if upload.status != 'ACTIVE':
+            raise UploadError(_("La subida no está activa."))
+        missing = upload.missing_parts
+        if missing:
+            raise UploadError(_("Faltan partes: %(parts)s") % {'parts': ', '.join(map(str, missing[:20]))})
+
+        def part_streams():
+            for part_number in range(1, upload.total_parts + 1):
+                with default_storage.open(upload.part_name(part_number), 'rb') as fh:
+                    yield fh
+
+        deliverable = upload.deliverable
+        upload_to = timezone.now().strftime(Deliverable._meta.get_field('file').upload_to)
+        assembled = StreamFile(part_streams(), name=upload.filename)
+        storage = deliverable.file.storage
+        final_name = storage.save(os.path.join(upload_to, upload.filename), assembled)
+
+        if assembled.bytes_read != upload.total_size or (upload.checksum and assembled.sha256.hexdigest() != upload.checksum):
+            sha256 = sha256_from_name(final_name)
+            if sha256:
+                collect_blob(sha256)  # Solo se borra si nadie más lo referencia
+            else:
+                storage.delete(final_name)
+            raise UploadError(_("El archivo ensamblado no coincide con el tamaño o checksum declarado."))
+
+        with transaction.atomic():
+            DeliverableUploadService.attach_file(deliverable, final_name)
+            upload.status = 'COMPLETED'
+            upload.save(update_fields=['status', 'updated_at'])
+        DeliverableUploadService.discard_parts(upload)
+        logger.info(f"[DeliverableUploadService] Subida {upload.pk} completada: {final_name}.")
+        return deliverable
+
+    @staticmethod
+    def customer_has_blob(deliverable: Deliverable, blob: StoredBlob):
+        """ True si el cliente del pedido ya referencia el blob (entregables o guía de marca). """
+        customer_id = Order.objects.filter(pk=deliverable.order_id).values_list('customer_id', flat=True).first()
+        if customer_id is None:
+            return False
+        return (
+            Deliverable.objects.filter(order__customer_id=customer_id, file=blob.name).exists()
+            or Customer.objects.filter(pk=customer_id, brand_guidelines=blob.name).exists()
+        )
+
+    @staticmethod
+    def attach_file(deliverable: Deliverable, name):
+        """ Asigna el archivo; la versión sube si el contenido cambió (ver api.storage). """
+        deliverable.file.name = name
+        deliverable.save(update_fields=['file', 'version'])
+
+    @staticmethod
+    def abort(upload: DeliverableUpload):
+        upload.status = 'ABORTED'
+        upload.save(update_fields=['status', 'updated_at'])
+        DeliverableUploadService.discard_parts(upload)
+
+    @staticmethod
+    def discard_parts(upload: DeliverableUpload):
+        for part_number in upload.received_parts:
+            default_storage.delete(upload.part_name(int(part_number)))
+
+class DeliverableAssignmentService:
+    """
+    Asignación automática de entregables abiertos sin asignar.
+
+    Carga en pocas queries los entregables pendientes, los servicios de sus pedidos,
+    los empleados elegibles (roles de CanCreateDeliverables) y los proveedores activos,
+    todos con su carga actual (WorkloadCounter). Luego recorre una cola de prioridad
+    (fecha límite, prioridad del pedido, antigüedad) y, de forma voraz, elige para cada
+    entregable el candidato con menos carga y capacidad disponible:
+
+      1. Empleado especialista (su rol cubre una categoría de los servicios del pedido).
+      2. Proveedor que ofrece alguno de los servicios del pedido (desempata la calificación).
+      3. Empleado generalista (rol sin categoría, p. ej. Operaciones).
+
+    Con `dry_run=True` devuelve el plan sin guardar nada.
+    """
+    MAX_OPEN_TASKS = getattr(settings, 'DELIVERABLE_MAX_OPEN_TASKS', 10)
+    # Categorías de servicio que cubre cada rol; los roles sin entrada son generalistas
+    ROLE_SERVICE_CATEGORIES = {
+        Roles.DEVELOPMENT: {'DEV'},
+        Roles.DESIGN: {'DSGN', 'BRND', 'PRNT'},
+        Roles.AUDIOVISUAL: {'AVP'},
+    }
+    # Roles que pueden trabajar entregables, salvo Admin/Dragón (supervisan; no reciben tareas automáticamente)
+    ASSIGNABLE_ROLES = set(CanCreateDeliverables.required_roles) - {Roles.ADMIN, Roles.DRAGON}
+    SKIPPED_ORDER_STATUSES = Order.FINAL_STATUSES + ['DRAFT', 'ON_HOLD']
+
+    def __init__(self, max_open_tasks=None, limit=None, order_id=None):
+        self.max_open_tasks = max_open_tasks or self.MAX_OPEN_TASKS
+        self.limit = limit
+        self.order_id = order_id
+
+    def run(self, dry_run=False):
+        with transaction.atomic():
+            deliverables = self.load_deliverables(lock=not dry_run)
+            plan = self.plan(deliverables)
+            if not dry_run:
+                self.apply(plan, deliverables)
+        logger.info(
+            f"[DeliverableAssignmentService] {'Simulación: ' if dry_run else ''}"
+            f"{len(plan['assigned'])} asignados, {len(plan['unassigned'])} sin asignar."
+        )
+        return {'dry_run': dry_run, **plan}
+
+    # --- Carga (pocas queries, todo en memoria) ---
+
+    def load_deliverables(self, lock=False):
+        queryset = Deliverable.objects.filter(
+            assigned_employee__isnull=True, assigned_provider__isnull=True
+        ).exclude(status__in=Deliverable.FINAL_STATUSES).exclude(order__status__in=self.SKIPPED_ORDER_STATUSES)
+        if self.order_id:
+            queryset = queryset.filter(order_id=self.order_id)
+        if lock:
+            queryset = queryset.select_for_update()
+        return {d.pk: d for d in queryset.order_by()}
+
+    def load_orders(self, order_ids):
+        orders = {
+            pk: {'priority': priority, 'date_required': date_required, 'services': set(), 'categories': set()}
+            for pk, priority, date_required in Order.objects.filter(pk__in=order_ids).values_list('id', 'priority', 'date_required')
+        }
+        lines = OrderService.objects.filter(order_id__in=order_ids).values_list('order_id', 'service_id', 'service__category_id')
+        for order_id, service_id, category_id in lines:
+            orders[order_id]['services'].add(service_id)
+            orders[order_id]['categories'].add(category_id)
+        return orders
+
+    def load_employees(self):
+        employees = {
+            row['id']: {
+                'id': row['id'], 'name': row['full_name'] or row['user__username'],
+                'open_tasks': row['open_tasks'],
+                'roles': {row['user__profile__primary_role__name']} - {None},
+            }
+            for row in employee_ranking().annotate(
+                full_name=Trim(Concat('user__first_name', Value(' '), 'user__last_name'))
+            ).values('id', 'user__username', 'full_name', 'user__profile__primary_role__name', 'open_tasks')
+        }
+        secondary = UserRoleAssignment.objects.filter(
+            is_active=True, role__is_active=True, user__employee_profile__in=list(employees)
+        ).values_list('user__employee_profile', 'role__name')
+        for employee_id, role in secondary:
+            employees[employee_id]['roles'].add(role)
+
+        eligible = []
+        for employee in employees.values():
+            roles = employee['roles'] & self.ASSIGNABLE_ROLES
+            if not roles:
+                continue
+            categories = set().union(*(self.ROLE_SERVICE_CATEGORIES.get(role, set()) for role in roles))
+            employee['categories'] = categories
+            employee['generalist'] = any(role not in self.ROLE_SERVICE_CATEGORIES for role in roles)
+            eligible.append(employee)
+        return eligible
+
+    def load_providers(self):
+        providers = {
+            row['id']: {**row, 'services': set()}
+            for row in provider_ranking().values('id', 'name', 'rating', 'open_tasks')
+        }
+        offered = Provider.services_provided.through.objects.filter(provider_id__in=list(providers)).values_list('provider_id', 'service_id')
+        for provider_id, service_id in offered:
+            providers[provider_id]['services'].add(service_id)
+        return [p for p in providers.values() if p['services']]
+
+    # --- Planificación voraz ---
+
+    def plan(self, deliverables):
+        orders = self.load_orders({d.order_id for d in deliverables.values()})
+        employees, providers = self.load_employees(), self.load_providers()
+
+        queue = []
+        for d in deliverables.values():
+            order = orders[d.order_id]
+            due = d.due_date or order['date_required'].date()
+            heapq.heappush(queue, (due, order['priority'], d.created_at, d.pk))
+
+        assigned, unassigned = [], []
+        while queue and (self.limit is None or len(assigned) < self.limit):
+            due, _priority, _created, pk = heapq.heappop(queue)
+            order = orders[deliverables[pk].order_id]
+            choice = self.choose(order, employees, providers)
+            item = {'deliverable_id': pk, 'order_id': deliverables[pk].order_id, 'due_date': due}
+            if choice is None:
+                unassigned.append({**item, 'reason': str(_("Sin candidatos con capacidad disponible"))})
+                continue
+            kind, candidate, reason = choice
+            candidate['open_tasks'] += 1
+            assigned.append({
+                **item, 'assignee_type': kind, 'assignee_id': candidate['id'],
+                'assignee_name': candidate['name'], 'assignee_open_tasks': candidate['open_tasks'], 'reason': reason,
+            })
+        return {'assigned': assigned, 'unassigned': unassigned}
+
+    def choose(self, order, employees, providers):
+        def available(candidates):
+            return [c for c in candidates if c['open_tasks'] < self.max_open_tasks]
+
+        categories = order['categories']
+        specialists = available(e for e in employees if not categories or e['categories'] & categories)
+        if specialists:
+            return 'employee', min(specialists, key=lambda e: (e['open_tasks'], e['id'])), 'especialista'
+        matching = available(p for p in providers if p['services'] & order['services'])
+        if matching:
+            return 'provider', min(matching, key=lambda p: (p['open_tasks'], -p['rating'], p['id'])), 'proveedor'
+        generalists = available(e for e in employees if e['generalist'])
+        if generalists:
+            return 'employee', min(generalists, key=lambda e: (e['open_tasks'], e['id'])), 'generalista'
+        return None
+
+    # --- Aplicación ---
+
+    def apply(self, plan, deliverables):
+        """ Guarda cada asignación con save() para disparar notificaciones, auditoría y contadores. """
+        for item in plan['assigned']:
+            deliverable = deliverables[item['deliverable_id']]
+            setattr(deliverable, f"assigned_{item['assignee_type']}_id", item['assignee_id'])
+            update_fields = [f"assigned_{item['assignee_type']}"]
+            if deliverable.status == 'PENDING':
+                deliverable.status = 'ASSIGNED'
+                update_fields.append('status')
+            deliverable.save(update_fields=update_fields)
 
-        if responses_to_create:
-            try:
-                created_responses = FormResponse.objects.bulk_create(responses_to_create)
-                logger.info(f"[FormResponseService] {len(created_responses)} respuestas creadas masivamente para cliente {customer.id}, formulario {form.id}.")
-                return created_responses
-            except Exception as e:
-                logger.error(f"[FormResponseService] Error durante bulk_create para cliente {customer.id}: {e}", exc_info=True)
-                # Podrías relanzar una excepción personalizada o manejarla
-                raise # Relanza la excepción original para que la vista la maneje
-        else:
-            logger.info(f"[FormResponseService] No se crearon respuestas (lista vacía) para cliente {customer.id}, formulario {form.id}.")
-            return []
 
 # Puedes añadir más clases de servicio aquí para otras áreas (OrderService, InvoiceService, etc.)
\ No newline at end of file
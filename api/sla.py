@@ -0,0 +1,218 @@
+# api/sla.py
+"""
+Motor de SLA: clasifica pedidos y entregables en En Plazo / Vence Pronto / En Riesgo /
+Vencido / Cerrado y guarda el resultado en `sla_status` (indexado), de modo que vistas
+y dashboard filtran por el flag en lugar de comparar fechas sobre toda la tabla.
+
+- `refresh_sla_statuses()` recalcula todo en una pasada por modelo: un UPDATE con
+  CASE sobre las filas cuya clasificación cambió (lo ejecuta periódicamente
+  `python manage.py update_sla_status`, p. ej. desde cron cada hora).
+- Al guardar un pedido o entregable se reclasifica en memoria (sin queries extra).
+- Las transiciones a Vencido o En Riesgo generan notificaciones en bloque
+  (bulk_create) para el responsable.
+
+Reglas (SLA_DUE_SOON_DAYS y SLA_AT_RISK_DAYS configurables en settings):
+- Entregable: vencido si due_date < hoy; en riesgo si vence dentro de SLA_AT_RISK_DAYS
+  y está sin asignar o detenido (pendiente, requiere info, revisión); vence pronto si
+  vence dentro de SLA_DUE_SOON_DAYS.
+- Pedido: vencido si date_required ya pasó; en riesgo si tiene entregables abiertos
+  vencidos o en riesgo; vence pronto si date_required cae dentro de SLA_DUE_SOON_DAYS.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, Exists, F, OuterRef, Q, Value, When
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Deliverable, Notification, Order
+
+logger = logging.getLogger(__name__)
+
+DUE_SOON_DAYS = getattr(settings, 'SLA_DUE_SOON_DAYS', 2)
+AT_RISK_DAYS = getattr(settings, 'SLA_AT_RISK_DAYS', 5)
+STALLED_DELIVERABLE_STATUSES = ['PENDING', 'REQUIRES_INFO', 'REVISION_REQUESTED']
+RISK_STATUSES = ['OVERDUE', 'AT_RISK']  # También son las transiciones que se notifican
+
+
+# --- Reglas como expresiones SQL (pasada masiva) ---
+
+def status_in(statuses, status=None):
+    """
+    Condición "estado en `statuses`". Con `status` (transición masiva) se evalúa sobre el
+    estado destino y no sobre la columna, que en el mismo UPDATE aún tiene el valor anterior.
+    """
+    if status is None:
+        return Q(status__in=statuses)
+    return Q(pk__isnull=status not in statuses)  # Constante: siempre verdadera o siempre falsa
+
+def deliverable_sla_expression(today, status=None):
+    return Case(
+        When(status_in(Deliverable.FINAL_STATUSES, status), then=Value('CLOSED')),
+        When(due_date__isnull=True, then=Value('ON_TRACK')),
+        When(due_date__lt=today, then=Value('OVERDUE')),
+        When(
+            Q(due_date__lte=today + timedelta(days=AT_RISK_DAYS)) & (
+                Q(assigned_employee__isnull=True, assigned_provider__isnull=True)
+                | status_in(STALLED_DELIVERABLE_STATUSES, status)
+            ),
+            then=Value('AT_RISK'),
+        ),
+        When(due_date__lte=today + timedelta(days=DUE_SOON_DAYS), then=Value('DUE_SOON')),
+        default=Value('ON_TRACK'), output_field=CharField(),
+    )
+
+def order_sla_expression(now, status=None):
+    risky_deliverables = Deliverable.objects.filter(order=OuterRef('pk'), sla_status__in=RISK_STATUSES)
+    return Case(
+        When(status_in(Order.FINAL_STATUSES, status), then=Value('CLOSED')),
+        When(date_required__lt=now, then=Value('OVERDUE')),
+        When(Exists(risky_deliverables), then=Value('AT_RISK')),
+        When(date_required__lte=now + timedelta(days=DUE_SOON_DAYS), then=Value('DUE_SOON')),
+        default=Value('ON_TRACK'), output_field=CharField(),
+    )
+
+
+# --- Las mismas reglas en memoria (al guardar una instancia) ---
+
+def as_date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+def as_aware_datetime(value):
+    value = parse_datetime(value) if isinstance(value, str) else value
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+def classify_deliverable(deliverable, today):
+    if deliverable.status in Deliverable.FINAL_STATUSES:
+        return 'CLOSED'
+    due = as_date(deliverable.due_date)
+    if due is None:
+        return 'ON_TRACK'
+    if due < today:
+        return 'OVERDUE'
+    unassigned = not deliverable.assigned_employee_id and not deliverable.assigned_provider_id
+    if due <= today + timedelta(days=AT_RISK_DAYS) and (unassigned or deliverable.status in STALLED_DELIVERABLE_STATUSES):
+        return 'AT_RISK'
+    if due <= today + timedelta(days=DUE_SOON_DAYS):
+        return 'DUE_SOON'
+    return 'ON_TRACK'
+
+def classify_order(order, now):
+    """ El riesgo por entregables requiere una query: se conserva el valor guardado hasta la siguiente pasada. """
+    if order.status in Order.FINAL_STATUSES:
+        return 'CLOSED'
+    required = as_aware_datetime(order.date_required)
+    if required is None:
+        return 'ON_TRACK'
+    if required < now:
+        return 'OVERDUE'
+    if order.pk and order.sla_status == 'AT_RISK':
+        return 'AT_RISK'
+    if required <= now + timedelta(days=DUE_SOON_DAYS):
+        return 'DUE_SOON'
+    return 'ON_TRACK'
+
+
+# --- Notificaciones ---
+
+def admin_link(model, pk):
+    try:
+        return reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_change', args=[pk])
+    except Exception:
+        return None
+
+def deliverable_notification(row, sla_status):
+    """ `row` con pk, description, order_id y los user_id del asignado y del responsable del pedido. """
+    user_id = row.get('assigned_employee__user_id') or row.get('order__employee__user_id')
+    if not user_id:
+        return None
+    label = "está vencida" if sla_status == 'OVERDUE' else "está en riesgo de no cumplir su fecha límite"
+    return Notification(
+        user_id=user_id, link=admin_link(Deliverable, row['pk']),
+        message=f"La tarea '{row['description'][:50]}...' del Pedido #{row['order_id']} {label}.",
+    )
+
+def order_notification(row, sla_status):
+    if not row.get('employee__user_id'):
+        return None
+    label = "ha superado su fecha requerida" if sla_status == 'OVERDUE' else "tiene entregables vencidos o en riesgo"
+    return Notification(
+        user_id=row['employee__user_id'], link=admin_link(Order, row['pk']),
+        message=f"El Pedido #{row['pk']} {label}.",
+    )
+
+
+# --- Pasada masiva ---
+
+def refresh_model_sla(queryset, expression, notification_fields, build_notification):
+    """ Un UPDATE con CASE sobre las filas cuya clasificación cambió; devuelve (actualizadas, notificaciones). """
+    # Las filas cerradas con estado final no pueden cambiar: se excluyen (índice sla_status)
+    queryset = queryset.exclude(Q(sla_status='CLOSED') & Q(status__in=queryset.model.FINAL_STATUSES))
+    changed = queryset.annotate(new_sla=expression).exclude(sla_status=F('new_sla'))
+    notifications = []
+    for row in changed.filter(new_sla__in=RISK_STATUSES).values('pk', 'new_sla', *notification_fields):
+        notification = build_notification(row, row['new_sla'])
+        if notification:
+            notifications.append(notification)
+    updated = queryset.filter(~Q(sla_status=expression)).update(sla_status=expression)
+    return updated, notifications
+
+def refresh_sla_statuses(notify=True):
+    today, now = timezone.localdate(), timezone.now()
+    with transaction.atomic():
+        deliverables, deliverable_notes = refresh_model_sla(
+            Deliverable.objects.order_by(), deliverable_sla_expression(today),
+            ['description', 'order_id', 'assigned_employee__user_id', 'order__employee__user_id'],
+            deliverable_notification,
+        )
+        # Después de los entregables: el riesgo del pedido depende de ellos
+        orders, order_notes = refresh_model_sla(
+            Order.objects.order_by(), order_sla_expression(now), ['employee__user_id'], order_notification,
+        )
+        notifications = deliverable_notes + order_notes if notify else []
+        Notification.objects.bulk_create(notifications, batch_size=500)
+    logger.info(f"[SLA] {deliverables} entregables y {orders} pedidos reclasificados; {len(notifications)} notificaciones.")
+    return {'deliverables': deliverables, 'orders': orders, 'notifications': len(notifications)}
+
+
+# --- Reclasificación al guardar ---
+
+@receiver(pre_save, sender=Deliverable)
+@receiver(pre_save, sender=Order)
+def sla_classify_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._sla_previous = instance.sla_status
+    if sender is Deliverable:
+        instance.sla_status = classify_deliverable(instance, timezone.localdate())
+    else:
+        instance.sla_status = classify_order(instance, timezone.now())
+
+@receiver(post_save, sender=Deliverable)
+@receiver(post_save, sender=Order)
+def sla_persist_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    previous = getattr(instance, '_sla_previous', None)
+    if raw or previous is None or (previous == instance.sla_status and not created):
+        return
+    if update_fields is not None and 'sla_status' not in update_fields:
+        sender.objects.filter(pk=instance.pk).update(sla_status=instance.sla_status)
+    if instance.sla_status in RISK_STATUSES and instance.sla_status != previous:
+        if sender is Deliverable:
+            row = {
+                'pk': instance.pk, 'description': instance.description, 'order_id': instance.order_id,
+                'assigned_employee__user_id': instance.assigned_employee.user_id if instance.assigned_employee_id else None,
+            }
+            if not row['assigned_employee__user_id']:
+                row['order__employee__user_id'] = Order.objects.filter(pk=instance.order_id).values_list('employee__user_id', flat=True).first()
+            notification = deliverable_notification(row, instance.sla_status)
+        else:
+            notification = order_notification({'pk': instance.pk, 'employee__user_id': instance.employee.user_id if instance.employee_id else None}, instance.sla_status)
+        if notification:
+            notification.save()
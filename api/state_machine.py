@@ -0,0 +1,203 @@
+# api/state_machine.py
+"""
+Máquina de estados de pedidos y entregables.
+
+- `TRANSITIONS`: transiciones permitidas por estado. Los serializers y las
+  transiciones masivas las validan (`check_transition`).
+- Hooks de transición (`@transition_hook`): se ejecutan en pre_save con el estado
+  anterior de la instantánea en memoria (api/tracking.py), sin releer la fila.
+- `bulk_transition()`: mueve muchos pedidos o entregables en un solo UPDATE y emite
+  en bloque los mismos efectos que un save() individual: AuditLog, notificaciones,
+  contadores de carga de trabajo y clasificación SLA.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from .models import (
+    AuditLog, Deliverable, Notification, Order, build_audit_log, build_notification,
+    deliverable_status_notification,
+)
+from .sla import deliverable_sla_expression, order_sla_expression
+from .workload import apply_workload_delta
+
+logger = logging.getLogger(__name__)
+
+ORDER_TRANSITIONS = {
+    'DRAFT': {'CONFIRMED', 'CANCELLED'},
+    'CONFIRMED': {'PLANNING', 'IN_PROGRESS', 'ON_HOLD', 'CANCELLED'},
+    'PLANNING': {'IN_PROGRESS', 'ON_HOLD', 'CANCELLED'},
+    'IN_PROGRESS': {'QUALITY_CHECK', 'PENDING_DELIVERY', 'ON_HOLD', 'CANCELLED'},
+    'QUALITY_CHECK': {'IN_PROGRESS', 'PENDING_DELIVERY', 'ON_HOLD', 'CANCELLED'},
+    'PENDING_DELIVERY': {'DELIVERED', 'QUALITY_CHECK', 'ON_HOLD', 'CANCELLED'},
+    'ON_HOLD': {'CONFIRMED', 'PLANNING', 'IN_PROGRESS', 'CANCELLED'},
+    'DELIVERED': {'IN_PROGRESS'},  # Reapertura (p. ej. garantía)
+    'CANCELLED': {'DRAFT'},
+}
+
+DELIVERABLE_TRANSITIONS = {
+    'PENDING': {'ASSIGNED', 'IN_PROGRESS', 'REJECTED'},
+    'ASSIGNED': {'PENDING', 'IN_PROGRESS', 'REQUIRES_INFO', 'REJECTED'},
+    'IN_PROGRESS': {'PENDING_INTERNAL_APPROVAL', 'PENDING_APPROVAL', 'REQUIRES_INFO', 'COMPLETED', 'REJECTED'},
+    'PENDING_INTERNAL_APPROVAL': {'PENDING_APPROVAL', 'REVISION_REQUESTED', 'APPROVED', 'IN_PROGRESS'},
+    'PENDING_APPROVAL': {'APPROVED', 'REVISION_REQUESTED', 'REJECTED'},
+    'REQUIRES_INFO': {'ASSIGNED', 'IN_PROGRESS', 'REJECTED'},
+    'REVISION_REQUESTED': {'IN_PROGRESS', 'PENDING_INTERNAL_APPROVAL', 'PENDING_APPROVAL'},
+    'APPROVED': {'COMPLETED', 'REVISION_REQUESTED'},
+    'COMPLETED': {'REVISION_REQUESTED'},  # Reapertura
+    'REJECTED': {'PENDING'},
+}
+
+TRANSITIONS = {Order: ORDER_TRANSITIONS, Deliverable: DELIVERABLE_TRANSITIONS}
+
+
+class TransitionError(Exception):
+    """ Transición de estado no permitida (las vistas la traducen a 400). """
+
+
+def allowed_transitions(model, status):
+    return sorted(TRANSITIONS[model].get(status, ()))
+
+def can_transition(model, old_status, new_status):
+    return old_status == new_status or new_status in TRANSITIONS[model].get(old_status, ())
+
+def check_transition(model, old_status, new_status):
+    if new_status not in dict(model.STATUS_CHOICES):
+        raise TransitionError(_("Estado desconocido: %(status)s.") % {'status': new_status})
+    if not can_transition(model, old_status, new_status):
+        raise TransitionError(
+            _("No se puede pasar de %(old)s a %(new)s.") % {'old': old_status, 'new': new_status}
+        )
+
+
+# --- Hooks de transición ---
+
+_hooks = defaultdict(list)
+
+def transition_hook(model, to=None, from_=None):
+    """ Registra `func(instance, previous, new)`; `to`/`from_` filtran por estado (None = cualquiera). """
+    def decorator(func):
+        _hooks[model].append((to, from_, func))
+        return func
+    return decorator
+
+def run_transition_hooks(instance, previous, new):
+    for to, from_, func in _hooks[type(instance)]:
+        if (to is None or to == new) and (from_ is None or from_ == previous):
+            func(instance, previous, new)
+
+
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=Deliverable)
+def run_hooks_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = instance.tracked_initial('status')
+    if not instance.tracked_known('status') and not instance._state.adding:
+        # Estado diferido al cargar: se consulta solo en este caso
+        previous = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    if previous != instance.status:
+        run_transition_hooks(instance, previous, instance.status)
+
+
+@transition_hook(Order)
+def set_order_completion_date(order, previous, new):
+    """ completed_at se fija al pasar a DELIVERED y se limpia al salir de ese estado. """
+    if new == 'DELIVERED':
+        order.completed_at = timezone.now()
+    elif previous == 'DELIVERED' or previous is None:
+        order.completed_at = None
+
+
+# --- Transiciones masivas ---
+
+BULK_SELECT_RELATED = {
+    Order: ('customer__user', 'employee__user'),
+    Deliverable: ('order__customer__user', 'assigned_employee__user'),
+}
+
+def bulk_transition(model, ids, new_status, user=None, queryset=None):
+    """
+    Mueve los `ids` a `new_status` con un solo UPDATE. Los que no admiten la transición
+    (o no existen / no son visibles en `queryset`) se devuelven en `skipped`.
+    """
+    if model not in TRANSITIONS:
+        raise TransitionError(_("Modelo sin máquina de estados."))
+    check_transition(model, new_status, new_status)  # Valida que el estado exista
+    queryset = queryset if queryset is not None else model.objects.all()
+    ids = list(dict.fromkeys(ids))
+
+    with transaction.atomic():
+        locked = queryset.filter(pk__in=ids).select_related(*BULK_SELECT_RELATED[model])
+        if connection.features.has_select_for_update_of:
+            locked = locked.select_for_update(of=('self',))
+        instances = {obj.pk: obj for obj in locked}
+        moved, skipped = [], []
+        for pk in ids:
+            obj = instances.get(pk)
+            if obj is None:
+                skipped.append({'id': pk, 'status': None, 'reason': str(_("No encontrado"))})
+            elif obj.status == new_status:
+                skipped.append({'id': pk, 'status': obj.status, 'reason': str(_("Ya está en ese estado"))})
+            elif not can_transition(model, obj.status, new_status):
+                skipped.append({'id': pk, 'status': obj.status, 'reason': str(_("Transición no permitida"))})
+            else:
+                moved.append(obj)
+
+        if moved:
+            _apply_bulk_update(model, moved, new_status)
+            _emit_bulk_events(model, moved, new_status, user)
+
+    logger.info(f"[StateMachine] {model.__name__}: {len(moved)} movidos a {new_status}, {len(skipped)} omitidos.")
+    return {'status': new_status, 'updated': [obj.pk for obj in moved], 'skipped': skipped}
+
+def _apply_bulk_update(model, moved, new_status):
+    pks = [obj.pk for obj in moved]
+    # Un solo UPDATE: el CASE del SLA se evalúa con el estado destino, no con la columna
+    if model is Order:
+        fields = {
+            'sla_status': order_sla_expression(timezone.now(), status=new_status),
+            'completed_at': timezone.now() if new_status == 'DELIVERED' else None,
+        }
+    else:
+        fields = {'sla_status': deliverable_sla_expression(timezone.localdate(), status=new_status)}
+    model.objects.filter(pk__in=pks).update(status=new_status, **fields)
+
+    if model is Deliverable:
+        # Contadores de carga: solo cambian al cruzar entre estado abierto y final
+        deltas = Counter()
+        now_open = new_status not in Deliverable.FINAL_STATUSES
+        for obj in moved:
+            was_open = obj.status not in Deliverable.FINAL_STATUSES
+            if was_open != now_open:
+                delta = 1 if now_open else -1
+                deltas[('employee', obj.assigned_employee_id)] += delta
+                deltas[('provider', obj.assigned_provider_id)] += delta
+        for (kind, pk), delta in deltas.items():
+            apply_workload_delta(kind, pk, delta)
+
+def _emit_bulk_events(model, moved, new_status, user):
+    audit_logs, notifications = [], []
+    for obj in moved:
+        previous = obj.status
+        obj.status = new_status
+        audit_logs.append(build_audit_log(obj, "Actualizado", {
+            'status': obj.get_status_display(), 'previous_status': previous, 'bulk_transition': True,
+        }, user=user))
+        if model is Deliverable:
+            try:
+                recipient, message = deliverable_status_notification(obj)
+            except Exception as e:
+                logger.error(f"[StateMachine] Error preparando notificación para Deliverable {obj.pk}: {e}")
+                recipient, message = None, None
+            notification = build_notification(recipient, message, obj) if recipient and message else None
+            if notification:
+                notifications.append(notification)
+        obj.reset_tracking(['status'])
+    AuditLog.objects.bulk_create(audit_logs, batch_size=500)
+    Notification.objects.bulk_create(notifications, batch_size=500)
@@ -0,0 +1,210 @@
+# api/storage.py
+"""
+Almacenamiento direccionado por contenido (CAS) para archivos de entregables y
+guías de marca.
+
+Cada archivo se guarda una sola vez en `cas/<aa>/<bb>/<sha256><ext>`: si el mismo
+contenido se vuelve a subir, no se escribe nada nuevo y se reutiliza el blob.
+`StoredBlob` lleva el conteo de referencias (campos que apuntan al blob); cuando
+llega a cero, el archivo se elimina al confirmar la transacción.
+
+- Los modelos con campos CAS heredan `ContentAddressedFilesMixin`: el guardado es
+  atómico y la nueva referencia se suma antes de escribir el enlace, en la misma
+  transacción, así que nunca hay un enlace confirmado con el conteo a cero.
+- `collect_blob` vuelve a comprobar el conteo con la fila bloqueada y no toca blobs
+  escritos hace menos de CAS_COLLECT_GRACE_SECONDS (entre `_save` y el enlace).
+
+Los archivos anteriores (rutas `deliverables/%Y/%m/...`) siguen siendo legibles:
+el storage es un FileSystemStorage sobre el mismo MEDIA_ROOT.
+"""
+import functools
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import router, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+CAS_PREFIX = 'cas/'
+CAS_NAME_RE = re.compile(r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?:\.[\w.-]*)?$')
+CAS_MODELS = ('api.Deliverable', 'api.Customer')
+
+
+def blob_name(sha256, original_name=''):
+    ext = os.path.splitext(original_name)[1].lower()[:16]
+    return f"{CAS_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+def sha256_from_name(name):
+    match = CAS_NAME_RE.match(name or '')
+    return match.group('sha256') if match else None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage que nombra los archivos por su SHA-256. El contenido se
+    escribe en streaming a un temporal mientras se calcula el hash; si el blob ya
+    existe, el temporal se descarta (deduplicación).
+    """
+    def get_available_name(self, name, max_length=None):
+        return name  # Los nombres finales son deterministas; _save decide el destino
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        digest, size = hashlib.sha256(), 0
+        temp_name = f"{CAS_PREFIX}tmp/{uuid.uuid4().hex}"
+        temp_path = self.path(temp_name)
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+        try:
+            with open(temp_path, 'wb') as fh:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fh.write(chunk)
+            sha256 = digest.hexdigest()
+            final_name = blob_name(sha256, name)
+            final_path = self.path(final_name)
+            if os.path.exists(final_path):
+                os.remove(temp_path)
+                os.utime(final_path)  # Recién escrito: collect_blob lo respeta hasta que se enlace
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(temp_path, final_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(final_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        StoredBlob.objects.get_or_create(
+            sha256=sha256, defaults={'name': final_name, 'size': size, 'original_name': os.path.basename(name)[:255]}
+        )
+        return final_name
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+def get_content_addressed_storage():
+    """ Callable para FileField(storage=...): evita serializar la instancia en migraciones. """
+    return content_addressed_storage
+
+
+# --- Conteo de referencias ---
+
+DEFERRED = object()
+
+@functools.lru_cache(maxsize=None)
+def cas_fields(model):
+    return tuple(f.name for f in model._meta.concrete_fields if getattr(f, 'storage', None) is content_addressed_storage)
+
+def adjust_references(sha256, delta):
+    from .models import StoredBlob
+
+    if not sha256:
+        return
+    StoredBlob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + delta)
+    if delta < 0:
+        transaction.on_commit(lambda: collect_blob(sha256))
+
+def recently_written(name):
+    grace = getattr(settings, 'CAS_COLLECT_GRACE_SECONDS', 60)
+    try:
+        return time.time() - os.path.getmtime(content_addressed_storage.path(name)) < grace
+    except OSError:  # Sin archivo: nada que proteger
+        return False
+
+def collect_blob(sha256):
+    """ Borra el blob (archivo y fila) si ya no tiene referencias y no se acaba de escribir. """
+    from .models import StoredBlob
+
+    with transaction.atomic():
+        blob = StoredBlob.objects.select_for_update().filter(sha256=sha256, ref_count__lte=0).first()
+        if blob is None or recently_written(blob.name):
+            return
+        name = blob.name
+        blob.delete()
+        transaction.on_commit(lambda: content_addressed_storage.delete(name))
+    logger.info(f"[CAS] Blob {sha256[:12]} eliminado (sin referencias).")
+
+
+class ContentAddressedFilesMixin:
+    """ Mixin para modelos con campos CAS: save() atómico, para que enlace y conteo se confirmen juntos. """
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+def cas_changed_fields(sender, instance, update_fields=None):
+    for field in cas_fields(sender):
+        if update_fields is not None and field not in update_fields:
+            continue
+        old_name, new_name = instance._cas_initial.get(field), getattr(instance, field).name
+        if old_name is not DEFERRED and old_name != new_name:
+            yield field, old_name, new_name
+
+
+def cas_track_initial_state(sender, instance, **kwargs):
+    """ Guarda en memoria los nombres de archivo (y la versión) tal como se cargaron. """
+    fields = cas_fields(sender)
+    deferred = instance.get_deferred_fields()
+    instance._cas_initial = {
+        field: DEFERRED if field in deferred else getattr(instance, field).name for field in fields
+    }
+    if 'version' not in deferred:
+        instance._cas_initial_version = getattr(instance, 'version', None)
+
+def cas_bump_version(sender, instance, **kwargs):
+    """ Un entregable sube de versión solo cuando cambia el contenido de su archivo. """
+    if not instance.pk or 'file' not in cas_fields(sender) or not hasattr(instance, 'version'):
+        return
+    old_name = instance._cas_initial.get('file')
+    if old_name is DEFERRED or getattr(instance, '_cas_initial_version', None) is None:
+        return
+    old = sha256_from_name(old_name) or old_name
+    new = sha256_from_name(instance.file.name) or instance.file.name
+    if old and new and old != new and instance.version == instance._cas_initial_version:
+        instance.version += 1
+
+def cas_add_references(sender, instance, update_fields=None, **kwargs):
+    """ Suma la referencia nueva antes de escribir el enlace (misma transacción, ver el mixin). """
+    if instance._state.adding:  # Lo asignado en el constructor aún no cuenta como referencia
+        instance._cas_initial = {field: '' for field in cas_fields(sender)}
+    for field in cas_fields(sender):
+        file = getattr(instance, field)
+        if (update_fields is None or field in update_fields) and file and not file._committed:  # Lo que haría FileField.pre_save, antes, para conocer el nombre CAS
+            file.save(file.name, file.file, save=False)
+    for field, old_name, new_name in cas_changed_fields(sender, instance, update_fields):
+        adjust_references(sha256_from_name(new_name), +1)
+
+def cas_release_replaced_references(sender, instance, update_fields=None, **kwargs):
+    for field, old_name, new_name in list(cas_changed_fields(sender, instance, update_fields)):
+        adjust_references(sha256_from_name(old_name), -1)
+        instance._cas_initial[field] = new_name
+    if hasattr(instance, 'version'):
+        instance._cas_initial_version = instance.version
+
+def cas_release_references(sender, instance, **kwargs):
+    for field in cas_fields(sender):
+        if instance._cas_initial.get(field) is not DEFERRED:
+            adjust_references(sha256_from_name(getattr(instance, field).name), -1)
+
+
+for label in CAS_MODELS:
+    post_init.connect(cas_track_initial_state, sender=label, dispatch_uid=f'cas_track_{label}')
+    pre_save.connect(cas_bump_version, sender=label, dispatch_uid=f'cas_version_{label}')
+    pre_save.connect(cas_add_references, sender=label, dispatch_uid=f'cas_add_refs_{label}')
+    post_save.connect(cas_release_replaced_references, sender=label, dispatch_uid=f'cas_release_replaced_{label}')
+    post_delete.connect(cas_release_references, sender=label, dispatch_uid=f'cas_release_{label}')
@@ -0,0 +1,112 @@
+# api/tests_async_reads.py
+"""
+Tests de las variantes asíncronas de los endpoints de lectura (api/views/async_reads.py):
+mismas respuestas que sus equivalentes DRF y mismos permisos.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_async_reads
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Notification, Roles, UserProfile, UserRole, UserRoleAssignment
+
+User = get_user_model()
+
+
+class AsyncReadViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='async_staff', password='x', first_name='Ana', is_staff=True)
+        primary, _ = UserRole.objects.get_or_create(name=Roles.MARKETING, defaults={'display_name': 'Marketing'})
+        secondary, _ = UserRole.objects.get_or_create(name=Roles.SALES, defaults={'display_name': 'Ventas'})
+        UserProfile.objects.update_or_create(user=cls.staff, defaults={'primary_role': primary})
+        UserRoleAssignment.objects.create(user=cls.staff, role=secondary)
+        cls.customer = User.objects.create_user(username='async_cliente', password='x')
+        Notification.objects.bulk_create(
+            Notification(user=cls.staff, message=f'Aviso {i}', read=i % 3 == 0) for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def token(self, user):
+        return str(RefreshToken.for_user(user).access_token)
+
+    async def sync_get(self, user, url):
+        """ Misma petición a la vista DRF síncrona. """
+        client = APIClient()
+        if user:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token(user)}')
+        return await sync_to_async(client.get)(url)
+
+    async def async_get(self, user, url, **headers):
+        if user:
+            headers['Authorization'] = f'Bearer {self.token(user)}'
+        return await AsyncClient().get(url, headers=headers)
+
+    @staticmethod
+    def normalize_user(data):
+        data['all_roles'] = sorted(data['all_roles'])  # Conjunto: el orden no importa
+        return data
+
+    async def test_user_me_and_auth_check_match_sync(self):
+        response = await self.async_get(self.staff, reverse('async-user-me'))
+        self.assertEqual(response.status_code, 200)
+        expected = self.normalize_user((await self.sync_get(self.staff, reverse('user-me'))).json())
+        self.assertEqual(self.normalize_user(response.json()), expected)
+        self.assertEqual(expected['primary_role'], Roles.MARKETING)
+        self.assertEqual(expected['secondary_roles'], [Roles.SALES])
+
+        response = await self.async_get(self.staff, reverse('async-auth-check'))
+        data = response.json()
+        self.assertTrue(data['isAuthenticated'])
+        self.assertEqual(self.normalize_user(data['user']), expected)
+
+    async def test_notifications_match_sync(self):
+        for page in ('', '?page=2'):
+            response = await self.async_get(self.staff, reverse('async-notification-list') + page)
+            expected = (await self.sync_get(self.staff, reverse('notification-list') + page)).json()
+            data = response.json()
+            self.assertEqual((data['count'], len(data['results'])), (expected['count'], len(expected['results'])))
+            self.assertEqual(
+                [r['id'] for r in data['results']], [r['id'] for r in expected['results']]
+            )
+            self.assertEqual(
+                {k: v for k, v in data['results'][0].items() if k != 'user'},
+                {k: v for k, v in expected['results'][0].items() if k != 'user'},
+            )
+            self.assertEqual(bool(data['next']), bool(expected['next']))
+            self.assertEqual(bool(data['previous']), bool(expected['previous']))
+        response = await self.async_get(self.staff, reverse('async-notification-list') + '?page=9')
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_get(self.staff, reverse('async-notification-unread-count'))
+        self.assertEqual(response.json(), (await self.sync_get(self.staff, reverse('notification-unread-count'))).json())
+
+    async def test_dashboard_matches_sync_and_checks_roles(self):
+        response = await self.async_get(self.staff, reverse('async-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), (await self.sync_get(self.staff, reverse('dashboard_data'))).json())
+
+        self.assertEqual((await self.async_get(self.customer, reverse('async-dashboard'))).status_code, 403)
+        response = await self.async_get(None, reverse('async-dashboard'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response.headers['WWW-Authenticate'])
+        response = await AsyncClient().get(reverse('async-dashboard'), headers={'Authorization': 'Bearer no-es-un-token'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_catalog_matches_sync_with_etag(self):
+        response = await self.async_get(None, reverse('async-public-catalog'))
+        expected = await self.sync_get(None, reverse('public_catalog'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.headers['ETag'], expected.headers['ETag'])
+
+        response = await self.async_get(None, reverse('async-public-catalog'), **{'If-None-Match': expected.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,83 @@
+# api/tests_catalog.py
+"""
+Tests del catálogo público publicado (snapshot cacheado con ETag/Last-Modified).
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_catalog
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .catalog_snapshot import CATALOG_SNAPSHOT_CACHE_KEY, build_catalog_snapshot
+from .models import Price, Service
+
+
+class PublicCatalogSnapshotTest(TestCase):
+    """ El catálogo base lo siembra la migración 0004_seed_services_catalog. """
+
+    def setUp(self):
+        cache.delete(CATALOG_SNAPSHOT_CACHE_KEY)
+        self.client = APIClient()
+        self.url = reverse('public_catalog')
+
+    def test_snapshot_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        self.assertIn('public', first['Cache-Control'])
+        codes = {s['code'] for c in first.json()['categories'] for s in c['services']}
+        self.assertEqual(codes, set(Service.objects.filter(is_active=True).values_list('code', flat=True)))
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(self.url)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(second.content, first.content)
+
+    def test_conditional_get_returns_304(self):
+        first = self.client.get(self.url)
+        by_etag = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag['ETag'], first['ETag'])
+        by_date = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_catalog_change_invalidates_snapshot(self):
+        first = self.client.get(self.url)
+        service = Service.objects.filter(is_active=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Price.objects.update_or_create(
+                service=service, currency='EUR', effective_date=timezone.localdate(),
+                defaults={'amount': Decimal('1234.50')}
+            )
+        self.assertIsNone(cache.get(CATALOG_SNAPSHOT_CACHE_KEY))
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        entry = next(s for c in second.json()['categories'] for s in c['services'] if s['code'] == service.code)
+        self.assertEqual(entry['current_prices']['EUR']['amount'], '1234.50')
+
+    def test_snapshot_expires_at_next_midnight_for_future_prices(self):
+        service = Service.objects.filter(is_active=True).first()
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        Price.objects.create(service=service, currency='USD', effective_date=tomorrow, amount=Decimal('99.00'))
+
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.client.get(self.url)
+        timeout = cache_set.call_args.args[2]
+        self.assertTrue(0 < timeout <= 24 * 3600)  # Caduca como tarde a medianoche
+
+        def prices(snapshot):
+            entry = next(s for c in snapshot['categories'] for s in c['services'] if s['code'] == service.code)
+            return entry['current_prices']
+        self.assertNotEqual(prices(build_catalog_snapshot()).get('USD', {}).get('amount'), Decimal('99.00'))
+        self.assertEqual(prices(build_catalog_snapshot(tomorrow))['USD']['amount'], Decimal('99.00'))
@@ -0,0 +1,106 @@
+# api/tests_catalog_import.py
+"""
+Tests de la importación masiva del catálogo (CatalogImporter) y de la
+sincronización incremental (CatalogSync).
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_catalog_import
+"""
+from decimal import Decimal
+
+import pandas as pd
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .catalog_import import CatalogImporter, CatalogSync
+from .models import Price, SearchIndexEntry, Service, ServiceFeature
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def workbook(prices=None, features=None):
+    """ Libro mínimo con dos servicios en una categoría propia. """
+    return {
+        'categories': pd.DataFrame({'code': ['TST'], 'nombre': ['Pruebas de Importación']}),
+        'campaigns': pd.DataFrame(columns=['campaign_code', 'campaign_name', 'start_date', 'end_date', 'description', 'budget', 'is_active']),
+        'services': pd.DataFrame({
+            'code': ['TS001', 'TS002'], 'service_': ['TST', 'TST'], 'campaign_code': ['', ''],
+            'name': ['Auditoría Cuántica', 'Mentoría Express'], 'is_active': ['1', '1'],
+            'ventulab': ['', ''], 'is_package': ['', ''], 'is_subscription': ['', ''],
+        }),
+        'details': pd.DataFrame({
+            'code': ['TS001', 'TS002'], 'audience': ['Pymes', 'Startups'],
+            'description': ['Revisión completa', 'Sesiones cortas'], 'resuelve': ['Riesgos', 'Dudas'],
+        }),
+        'prices': pd.DataFrame(prices or {'dloub_id': ['TS001', 'TS002'], 'USD': ['100', '50'], 'CLP': ['90000', '45000'], 'COP': ['0', '0']}),
+        'features': pd.DataFrame(features or {
+            'serviceid': ['TS001', 'TS001', 'TS002'], 'featuretype': ['benefit', 'process', 'benefit'],
+            'description': ['Menos riesgos', 'Informe final', 'Respuesta rápida'],
+        }),
+    }
+
+
+class CatalogImportTest(TestCase):
+
+    def todays_prices(self, code):
+        return dict(Price.objects.filter(service_id=code, effective_date=timezone.localdate()).values_list('currency', 'amount'))
+
+    def writes(self, queries):
+        return [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].lstrip().upper().startswith(WRITE_PREFIXES) and 'catalogsyncstate' not in q['sql'].lower()
+        ]
+
+    def test_full_import(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report = CatalogImporter().run(workbook())
+        self.assertEqual(sorted(report['services']['created']), ['TS001', 'TS002'])
+        self.assertEqual(Service.objects.get(code='TS001').detailed_description, 'Revisión completa')
+        self.assertEqual(self.todays_prices('TS001'), {'USD': Decimal('100'), 'CLP': Decimal('90000')})
+        self.assertEqual(ServiceFeature.objects.filter(service_id='TS001').count(), 2)
+        # bulk_create no emite señales: el importador reindexa al confirmar
+        self.assertTrue(SearchIndexEntry.objects.filter(doc_type='service', object_id='TS001', term='cuantica').exists())
+
+        report = CatalogImporter().run(workbook())
+        self.assertEqual(report['services']['unchanged'], 2)
+        self.assertEqual(report['prices']['unchanged'], 4)
+
+    def test_unchanged_rerun_writes_nothing(self):
+        CatalogSync().run(workbook(), 'archivo-v1')
+        sync = CatalogSync()
+        self.assertTrue(sync.is_up_to_date('archivo-v1'))
+        with CaptureQueriesContext(connection) as queries:
+            changeset = sync.run(workbook(), 'archivo-v1')
+        self.assertTrue(all(changes['skipped'] for changes in changeset.values()))
+        self.assertEqual(self.writes(queries), [])
+
+    def test_changed_row_is_the_only_one_applied(self):
+        CatalogSync().run(workbook(), 'archivo-v1')
+        changed = workbook(prices={'dloub_id': ['TS001', 'TS002'], 'USD': ['120', '50'], 'CLP': ['90000', '45000'], 'COP': ['0', '0']})
+        with CaptureQueriesContext(connection) as queries:
+            changeset = CatalogSync().run(changed, 'archivo-v2')
+        self.assertEqual(changeset['prices']['changed'], ['TS001'])
+        self.assertTrue(changeset['services']['skipped'])
+        self.assertEqual(self.todays_prices('TS001')['USD'], Decimal('120'))
+        self.assertEqual(self.todays_prices('TS002')['USD'], Decimal('50'))
+        self.assertFalse(any('api_service"' in sql for sql in self.writes(queries)))
+
+    def test_removed_rows_are_deleted(self):
+        CatalogSync().run(workbook(), 'archivo-v1')
+        data = workbook(
+            prices={'dloub_id': ['TS001'], 'USD': ['100'], 'CLP': ['90000'], 'COP': ['0']},
+            features={'serviceid': ['TS001', 'TS001'], 'featuretype': ['benefit', 'process'], 'description': ['Menos riesgos', 'Informe final']},
+        )
+        data['details'] = data['details'][data['details']['code'] == 'TS001']
+        sync = CatalogSync()
+        changeset = sync.run(data, 'archivo-v2')
+
+        self.assertEqual((changeset['prices']['removed'], changeset['features']['removed']), (['TS002'], ['TS002']))
+        self.assertEqual(self.todays_prices('TS002'), {})
+        self.assertFalse(ServiceFeature.objects.filter(service_id='TS002').exists())
+        self.assertEqual(len(sync.report['prices']['deleted']), 2)
+        self.assertIsNone(Service.objects.get(code='TS002').detailed_description)
+        # Lo que sigue en la hoja no se toca
+        self.assertEqual(self.todays_prices('TS001')['USD'], Decimal('100'))
+        self.assertEqual(ServiceFeature.objects.filter(service_id='TS001').count(), 2)
@@ -0,0 +1,63 @@
+# api/tests_db_pool.py
+"""
+Tests de la configuración de conexiones y de sus métricas (api/db_pool.py).
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_db_pool
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .db_pool import PoolMetricsMixin, pool_metrics
+
+User = get_user_model()
+
+
+class DatabasePoolTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='pool_admin', password='x', is_staff=True)
+        cls.customer = User.objects.create_user(username='pool_cliente', password='x')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_profile_shares_connection_settings(self):
+        self.assertIsInstance(connections['default'], PoolMetricsMixin)
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], settings.DB_CONN_MAX_AGE)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_new_connection_is_measured(self):
+        pool_metrics.reset()
+        extra = connections.create_connection('default')
+        try:
+            extra.ensure_connection()
+            snapshot = pool_metrics.snapshot()
+            self.assertEqual((snapshot['opened_total'], snapshot['open'], snapshot['idle']), (1, 1, 1))
+            self.assertEqual(snapshot['wait']['count'], 1)
+            self.assertGreaterEqual(snapshot['wait']['max_ms'], 0)
+        finally:
+            extra._close()  # SQLite en memoria: close() no llega a cerrar la conexión
+        self.assertEqual((pool_metrics.snapshot()['closed_total'], pool_metrics.snapshot()['open']), (1, 0))
+
+    def test_metrics_endpoint(self):
+        connection.ensure_connection()
+        pool_metrics.reset()
+        pool_metrics.connection_opened(connections['default'], 0.004)  # La conexión del test ya estaba abierta
+        response = self.client_for(self.admin).get(reverse('db-pool-metrics'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # Durante la petición la conexión persistente se reutiliza y cuenta como activa
+        self.assertEqual((data['open'], data['active'], data['idle']), (1, 1, 0))
+        self.assertEqual(data['reused_total'], 1)
+        self.assertEqual(data['wait']['avg_ms'], 4.0)
+        self.assertEqual(pool_metrics.snapshot()['active'], 0)  # request_finished la libera
+
+        self.assertEqual(self.client_for(self.customer).get(reverse('db-pool-metrics')).status_code, 403)
@@ -0,0 +1,129 @@
+# api/tests_db_router.py
+"""
+Tests del enrutado de lecturas a réplicas (api/db_router.py) con dos conexiones SQLite
+adicionales a la base de datos de test haciendo de réplicas.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_db_router
+"""
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .db_router import LAG_QUERIES, ReplicaPinMiddleware, is_pinned, pin_to_primary, replica_health, replica_reads
+from .models import Notification, Order
+
+User = get_user_model()
+REPLICAS = ['replica_test_1', 'replica_test_2']
+
+# Dos alias SQLite más, espejos de la base de datos de test (conexiones independientes)
+for _alias in REPLICAS:
+    connections.settings.setdefault(_alias, {
+        **connections['default'].settings_dict,
+        'TEST': {**connections['default'].settings_dict['TEST'], 'MIRROR': 'default'},
+    })
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS, REPLICA_HEALTH_INTERVAL=3600)
+class ReplicaRoutingTest(TestCase):
+    databases = {'default', *REPLICAS}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for alias in REPLICAS:
+            # Caché compartida de SQLite en memoria: la réplica ve los datos aún sin confirmar del test
+            with connections[alias].cursor() as cursor:
+                cursor.execute('PRAGMA read_uncommitted = 1')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='replica_staff', password='x', is_staff=True)
+        customer = User.objects.create_user(username='replica_cliente', password='x').customer_profile
+        Order.objects.create(customer=customer, date_required=timezone.now() + timedelta(days=3))
+
+    def setUp(self):
+        cache.clear()
+        replica_health.reset()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def get_with_capture(self, client, url):
+        """ GET (consumiendo el streaming) y número de queries sobre api_order por alias. """
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in ['default', *REPLICAS]
+            }
+            response = client.get(url)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+        queries = {
+            alias: len([q for q in ctx.captured_queries if 'FROM "api_order"' in q['sql']]) for alias, ctx in captured.items()
+        }
+        return response, content, queries
+
+    def test_list_and_export_read_from_one_replica(self):
+        client = self.client_for(self.staff)
+        response, _, queries = self.get_with_capture(client, reverse('order-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries['default'], 0)
+        used = [alias for alias in REPLICAS if queries[alias]]
+        self.assertEqual(len(used), 1)  # Cuenta y página de la misma réplica
+        self.assertEqual(queries[used[0]], 2)
+
+        # El CSV se genera tras finalize_response y sigue leyendo de la réplica elegida
+        response, content, queries = self.get_with_capture(client, reverse('order-export'))
+        self.assertIn(b'replica_cliente', content)
+        self.assertEqual(queries['default'], 0)
+        self.assertEqual(sum(queries[alias] for alias in REPLICAS), 1)
+
+    def test_pinned_user_and_lagging_replicas_read_primary(self):
+        client = self.client_for(self.staff)
+        request = RequestFactory().post('/api/orders/')
+        request.user = self.staff
+        ReplicaPinMiddleware(lambda request: HttpResponse(status=201))(request)
+        self.assertTrue(is_pinned(self.staff))
+        _, _, queries = self.get_with_capture(client, reverse('order-list'))
+        self.assertEqual(queries['default'], 2)
+
+        cache.clear()
+        for alias in REPLICAS:
+            replica_health.record(alias, 60)  # Más retraso que REPLICA_MAX_LAG_SECONDS
+        _, _, queries = self.get_with_capture(client, reverse('order-list'))
+        self.assertEqual(queries['default'], 2)
+
+        replica_health.record(REPLICAS[1], 0)
+        _, _, queries = self.get_with_capture(client, reverse('order-list'))
+        self.assertEqual((queries['default'], queries[REPLICAS[0]], queries[REPLICAS[1]]), (0, 0, 2))
+
+    def test_unknown_lag_is_unhealthy(self):
+        alias = REPLICAS[0]
+        with mock.patch.dict(LAG_QUERIES, {'sqlite': 'SELECT NULL'}), self.assertLogs('api.db_router', 'WARNING'):
+            self.assertFalse(replica_health.healthy(alias))
+        replica_health.reset()
+        with mock.patch.dict(LAG_QUERIES, {'sqlite': 'SELECT 3'}):
+            self.assertEqual(replica_health.lag(alias), 3.0)
+            self.assertTrue(replica_health.healthy(alias))
+
+    def test_write_in_block_pins_following_reads(self):
+        with replica_reads():
+            with CaptureQueriesContext(connections['default']) as primary:
+                Order.objects.count()
+                self.assertEqual(len(primary), 0)
+                Notification.objects.create(user=self.staff, message='Hola')
+                Order.objects.count()
+            self.assertEqual(len([q for q in primary.captured_queries if 'FROM "api_order"' in q['sql']]), 1)
+        pin_to_primary(self.staff)
+        self.assertTrue(is_pinned(self.staff))
@@ -0,0 +1,225 @@
+# api/tests_deliverable_files.py
+"""
+Tests de subidas por partes (reanudables), descargas con Range, deduplicación por
+contenido y vistas previas generadas en segundo plano.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_deliverable_files
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Deliverable, DeliverablePreview, Order, StoredBlob, UserProfile, UserRole
+from .roles import Roles
+from .previews import process_preview
+from .services import DeliverableUploadService
+from .storage import collect_blob
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp(prefix='dloub-media-')
+CHUNK = DeliverableUploadService.MIN_CHUNK_SIZE
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DeliverableChunkedUploadTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='av_dragon', password='x', is_staff=True)
+        profile = UserProfile.objects.get(user=cls.user)
+        profile.primary_role = UserRole.objects.get(name=Roles.DRAGON)
+        profile.save(update_fields=['primary_role'])
+        customer_user = User.objects.create_user(username='cliente_video', password='x')
+        cls.order = Order.objects.create(customer=customer_user.customer_profile, date_required=timezone.now() + timedelta(days=5))
+        cls.deliverable = Deliverable.objects.create(order=cls.order, description='Video institucional 4K')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.kwargs = {'order_pk': self.order.pk, 'pk': self.deliverable.pk}
+        self.payload = os.urandom(CHUNK * 2 + 1000)
+
+    def put_part(self, upload_id, number, data):
+        url = reverse('order-deliverables-upload-part', kwargs={**self.kwargs, 'upload_id': upload_id, 'part_number': number})
+        return self.client.put(url, data=data, content_type='application/octet-stream')
+
+    def part(self, number):
+        return self.payload[(number - 1) * CHUNK:number * CHUNK]
+
+    def test_resumable_upload_and_ranged_download(self):
+        response = self.client.post(reverse('order-deliverables-start-upload', kwargs=self.kwargs), {
+            'filename': 'video final.mp4', 'total_size': len(self.payload), 'chunk_size': CHUNK,
+            'checksum': hashlib.sha256(self.payload).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        upload_id = response.json()['id']
+        self.assertEqual(response.json()['total_parts'], 3)
+
+        # Partes fuera de orden, una de tamaño incorrecto y un reintento idempotente
+        self.assertEqual(self.put_part(upload_id, 3, self.part(3)).status_code, 200)
+        self.assertEqual(self.put_part(upload_id, 1, self.part(1)[:-1]).status_code, 400)
+        self.assertEqual(self.put_part(upload_id, 1, self.part(1)).status_code, 200)
+        self.assertEqual(self.put_part(upload_id, 1, self.part(1)).status_code, 200)
+
+        status_url = reverse('order-deliverables-upload-status', kwargs={**self.kwargs, 'upload_id': upload_id})
+        self.assertEqual(self.client.get(status_url).json()['missing_parts'], [2])
+        complete_url = reverse('order-deliverables-complete-upload', kwargs={**self.kwargs, 'upload_id': upload_id})
+        self.assertEqual(self.client.post(complete_url).status_code, 400)
+
+        self.assertEqual(self.put_part(upload_id, 2, self.part(2)).status_code, 200)
+        response = self.client.post(complete_url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()['download_url'])
+        self.deliverable.refresh_from_db()
+        self.assertTrue(self.deliverable.file.name.endswith('.mp4'))
+
+        download_url = reverse('order-deliverables-download', kwargs=self.kwargs)
+        full = self.client.get(download_url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(full.streaming_content), self.payload)
+
+        partial = self.client.get(download_url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(b''.join(partial.streaming_content), self.payload[100:200])
+
+        suffix = self.client.get(download_url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(suffix.streaming_content), self.payload[-10:])
+        self.assertEqual(self.client.get(download_url, HTTP_RANGE=f'bytes={len(self.payload)}-').status_code, 416)
+
+    def test_checksum_mismatch_is_rejected(self):
+        response = self.client.post(reverse('order-deliverables-start-upload', kwargs=self.kwargs), {
+            'filename': 'a.bin', 'total_size': 10, 'chunk_size': CHUNK, 'checksum': '0' * 64,
+        }, format='json')
+        upload_id = response.json()['id']
+        self.put_part(upload_id, 1, b'0123456789')
+        complete_url = reverse('order-deliverables-complete-upload', kwargs={**self.kwargs, 'upload_id': upload_id})
+        self.assertEqual(self.client.post(complete_url).status_code, 400)
+        self.deliverable.refresh_from_db()
+        self.assertFalse(self.deliverable.file)
+
+    def upload_whole(self, deliverable, payload):
+        kwargs = {'order_pk': self.order.pk, 'pk': deliverable.pk}
+        response = self.client.post(reverse('order-deliverables-start-upload', kwargs=kwargs), {
+            'filename': 'brief.pdf', 'total_size': len(payload), 'chunk_size': CHUNK,
+            'checksum': hashlib.sha256(payload).hexdigest(),
+        }, format='json')
+        upload = response.json()
+        if upload['status'] == 'ACTIVE':
+            url = reverse('order-deliverables-upload-part', kwargs={**kwargs, 'upload_id': upload['id'], 'part_number': 1})
+            self.client.put(url, data=payload, content_type='application/octet-stream')
+            self.client.post(reverse('order-deliverables-complete-upload', kwargs={**kwargs, 'upload_id': upload['id']}))
+        deliverable.refresh_from_db()
+        return upload
+
+    @override_settings(CAS_COLLECT_GRACE_SECONDS=0)
+    def test_identical_content_is_stored_once(self):
+        payload = b'%PDF-1.7 brief'
+        other = Deliverable.objects.create(order=self.order, description='Copia del brief')
+        first = self.upload_whole(self.deliverable, payload)
+        second = self.upload_whole(other, payload)
+
+        self.assertEqual(first['status'], 'ACTIVE')
+        self.assertEqual(second['status'], 'COMPLETED')  # Resuelta sin subir partes
+        self.assertEqual(self.deliverable.file.name, other.file.name)
+        blob = StoredBlob.objects.get(sha256=hashlib.sha256(payload).hexdigest())
+        self.assertEqual(blob.ref_count, 2)
+
+        # Nuevo contenido: nueva versión; el blob anterior conserva una referencia
+        self.assertEqual(self.deliverable.version, 1)
+        self.upload_whole(self.deliverable, b'%PDF-1.7 brief v2')
+        self.assertEqual(self.deliverable.version, 2)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertFalse(StoredBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, blob.name)))
+
+    def test_declared_checksum_of_another_customer_requires_upload(self):
+        payload = b'%PDF-1.7 contrato confidencial'
+        self.upload_whole(self.deliverable, payload)
+        other_customer = User.objects.create_user(username='cliente_ajeno', password='x').customer_profile
+        other_order = Order.objects.create(customer=other_customer, date_required=timezone.now() + timedelta(days=5))
+        foreign = Deliverable.objects.create(order=other_order, description='Intento con hash conocido')
+
+        upload = DeliverableUploadService.initiate(foreign, self.user, 'robado.pdf', len(payload), checksum=hashlib.sha256(payload).hexdigest())
+        self.assertEqual(upload.status, 'ACTIVE')  # Hay que subir los bytes
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.file)
+
+    def test_unreferenced_blob_is_kept_while_fresh(self):
+        name = Deliverable._meta.get_field('file').storage.save('nuevo.pdf', ContentFile(b'recien escrito'))
+        blob = StoredBlob.objects.get(name=name)
+        self.assertEqual(blob.ref_count, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            collect_blob(blob.sha256)  # Aún no enlazado: dentro del margen de gracia
+        self.assertTrue(StoredBlob.objects.filter(pk=blob.pk).exists())
+
+        self.deliverable.file.name = name
+        self.deliverable.save(update_fields=['file', 'version'])
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+        with self.captureOnCommitCallbacks(execute=True), override_settings(CAS_COLLECT_GRACE_SECONDS=0):
+            collect_blob(blob.sha256)
+        self.assertTrue(os.path.exists(os.path.join(MEDIA_ROOT, name)))
+
+    @override_settings(DELIVERABLE_PREVIEW_ASYNC=False)
+    def test_preview_metadata_is_generated_and_reused(self):
+        pdf = b'%PDF-1.4\n1 0 obj << /Type /Pages /Kids [2 0 R 3 0 R] >>\n2 0 obj << /Type /Page >>\n3 0 obj << /Type/Page >>\n%%EOF'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.deliverable.file.save('propuesta.pdf', ContentFile(pdf))
+        preview = DeliverablePreview.objects.get(deliverable=self.deliverable)
+        self.assertEqual(preview.status, 'READY')
+        self.assertEqual(preview.metadata['pages'], 2)
+        self.assertEqual(preview.metadata['size'], len(pdf))
+
+        data = self.client.get(reverse('order-deliverables-detail', kwargs=self.kwargs)).json()
+        self.assertEqual(data['preview']['status'], 'READY')
+        self.assertEqual(data['preview']['metadata']['pages'], 2)
+
+        # Mismo contenido en otro entregable: se reutiliza sin volver a procesar
+        other = Deliverable.objects.create(order=self.order, description='Copia')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.file = self.deliverable.file.name
+            other.save()
+        self.assertEqual(DeliverablePreview.objects.get(deliverable=other).metadata, preview.metadata)
+
+        # Formatos sin extractor quedan como UNSUPPORTED
+        with self.captureOnCommitCallbacks(execute=True):
+            self.deliverable.file.save('fuentes.zip', ContentFile(b'PK\x03\x04'))
+        preview.refresh_from_db()
+        self.assertEqual(preview.status, 'UNSUPPORTED')
+
+    @override_settings(DELIVERABLE_PREVIEW_ASYNC=False)
+    def test_abandoned_processing_preview_is_reclaimed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.deliverable.file.save('notas.txt', ContentFile(b'texto plano'))
+        preview = DeliverablePreview.objects.get(deliverable=self.deliverable)
+
+        # Un worker lo reclamó hace un momento: no se vuelve a tomar
+        DeliverablePreview.objects.filter(pk=preview.pk).update(status='PROCESSING', updated_at=timezone.now())
+        self.assertIsNone(process_preview(preview.pk))
+
+        # El worker murió hace tiempo: se reclama y se procesa
+        DeliverablePreview.objects.filter(pk=preview.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertIsNotNone(process_preview(preview.pk))
+        preview.refresh_from_db()
+        self.assertNotEqual(preview.status, 'PROCESSING')
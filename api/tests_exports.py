@@ -0,0 +1,82 @@
+# api/tests_exports.py
+"""
+Tests de la exportación en streaming (CSV / XLSX) de los listados.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_exports
+"""
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import AuditLog, Invoice, Order, Payment, PaymentMethod, TransactionType
+
+User = get_user_model()
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+
+
+class ExportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='finanzas_exp', password='x', is_staff=True)
+        cls.customer_user = User.objects.create_user(username='cliente_exp', password='x')
+        other_customer = User.objects.create_user(username='otro_exp', password='x').customer_profile
+        cls.order = Order.objects.create(customer=cls.customer_user.customer_profile, date_required=timezone.now() + timedelta(days=5))
+        Order.objects.create(customer=other_customer, date_required=timezone.now() + timedelta(days=5))
+        cls.invoice = Invoice.objects.create(order=cls.order, due_date=timezone.localdate() + timedelta(days=30))
+        method = PaymentMethod.objects.create(name='Transferencia')
+        kind = TransactionType.objects.create(name='Pago')
+        Payment.objects.bulk_create([
+            Payment(invoice=cls.invoice, method=method, transaction_type=kind, amount=Decimal('10.00') + i,
+                    status='COMPLETED' if i % 2 else 'PENDING')
+            for i in range(40)
+        ])
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_payments_csv_is_filtered_and_constant_queries(self):
+        client = self.client_for(self.staff)
+        url = reverse('payment-export')
+        with CaptureQueriesContext(connection) as ctx:
+            rows = read_csv(client.get(url, {'status': 'COMPLETED'}))
+        self.assertEqual(rows[0][:4], ['ID', 'Fecha', 'Factura', 'Pedido'])
+        self.assertEqual(len(rows), 21)
+        self.assertEqual({row[9] for row in rows[1:]}, {'COMPLETED'})
+        payment_queries = [q for q in ctx.captured_queries if 'FROM "api_payment"' in q['sql']]
+        self.assertEqual(len(payment_queries), 1)  # Una sola lectura con JOINs, sin N+1
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        response = self.client_for(self.staff).get(reverse('invoice-export'), {'output': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][1], 'Número')
+        self.assertEqual(rows[1][1], self.invoice.invoice_number)
+        self.assertEqual(self.client_for(self.staff).get(reverse('invoice-export'), {'output': 'pdf'}).status_code, 400)
+
+    def test_exports_respect_viewset_scoping(self):
+        rows = read_csv(self.client_for(self.customer_user).get(reverse('order-export')))
+        self.assertEqual([int(row[0]) for row in rows[1:]], [self.order.pk])
+        self.assertEqual(self.client_for(self.customer_user).get(reverse('auditlog-export')).status_code, 403)
+
+        AuditLog.objects.create(action='Prueba', details={'clave': 'valor'})
+        rows = read_csv(self.client_for(User.objects.get(username='dorantejds')).get(reverse('auditlog-export'), {'action': 'Prueba'}))
+        self.assertEqual(rows[1][4], '{"clave": "valor"}')
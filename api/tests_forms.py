@@ -0,0 +1,129 @@
+# api/tests_forms.py
+"""
+Tests del envío masivo de respuestas de formulario (validación en una query y upsert).
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_forms
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .form_analytics import FORM_ANALYTICS_CACHE_KEY
+from .models import Form, FormQuestion, FormResponse
+
+User = get_user_model()
+
+
+class FormBulkSubmissionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cliente_form', password='x')
+        cls.form = Form.objects.create(name='Onboarding')
+        cls.questions = FormQuestion.objects.bulk_create([
+            FormQuestion(form=cls.form, question_text=f'Pregunta {i}', order=i, required=(i < 3))
+            for i in range(60)
+        ])
+        cls.other_question = FormQuestion.objects.create(form=Form.objects.create(name='Otro'), question_text='Ajena')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.url = reverse('formresponse-bulk-create')
+
+    def submit(self, answers):
+        payload = {'form': self.form.pk, 'responses': [{'question': q.pk, 'text': text} for q, text in answers]}
+        return self.client.post(self.url, payload, format='json')
+
+    def test_query_count_is_constant(self):
+        counts = []
+        for size in (5, 60):
+            FormResponse.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.submit([(q, f'Respuesta {q.order}') for q in self.questions[:size]])
+            self.assertEqual(response.status_code, 201, response.content)
+            self.assertEqual(response.json()['created'], size)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_resubmission_upserts(self):
+        self.submit([(q, 'v1') for q in self.questions[:5]])
+        response = self.submit([(self.questions[1], 'v2'), (self.questions[10], 'nueva')])  # Requeridas ya respondidas
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.json()['created'], response.json()['updated']), (1, 1))
+        customer = self.user.customer_profile
+        self.assertEqual(FormResponse.objects.filter(customer=customer).count(), 6)
+        self.assertEqual(FormResponse.objects.get(customer=customer, question=self.questions[1]).text, 'v2')
+
+    def test_validation_errors(self):
+        self.assertEqual(self.submit([(self.questions[5], 'x')]).status_code, 400)  # Faltan requeridas
+        self.assertEqual(self.submit([(q, '') for q in self.questions[:3]]).status_code, 400)  # Requerida vacía
+        response = self.submit([(q, 'x') for q in self.questions[:3]] + [(self.other_question, 'x')])
+        self.assertEqual(response.status_code, 400)
+        response = self.submit([(q, 'x') for q in self.questions[:3]] + [(self.questions[0], 'y')])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FormResponse.objects.exists())
+
+
+class FormAnalyticsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='ventas_form', password='x', is_staff=True)
+        cls.form = Form.objects.create(name='Briefing')
+        cls.q1 = FormQuestion.objects.create(form=cls.form, question_text='¿Sector?', order=1)
+        cls.q2 = FormQuestion.objects.create(form=cls.form, question_text='¿Presupuesto?', order=2, required=False)
+        cls.customers = []
+        for i, (sector, budget) in enumerate([('Retail', '1000'), ('retail ', ''), ('Salud', '5000')]):
+            customer = User.objects.create_user(username=f'cliente_a{i}', password='x').customer_profile
+            FormResponse.objects.create(customer=customer, form=cls.form, question=cls.q1, text=sector)
+            FormResponse.objects.create(customer=customer, form=cls.form, question=cls.q2, text=budget)
+            cls.customers.append(customer)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.staff).access_token}')
+
+    def test_summary_aggregates_and_cache_invalidation(self):
+        url = reverse('form-analytics', kwargs={'form_pk': self.form.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            data = self.client.get(url).json()
+        self.assertEqual(data['respondents'], 3)
+        sector = data['questions'][0]
+        self.assertEqual(sector['top_answers'][0], {'answer': 'retail', 'count': 2})
+        self.assertEqual(data['questions'][1]['blank'], 1)
+
+        with CaptureQueriesContext(connection) as ctx:  # Servido desde caché
+            self.client.get(url)
+        self.assertFalse([q for q in ctx.captured_queries if 'api_formresponse' in q['sql']])
+
+        customer = User.objects.create_user(username='cliente_a9', password='x').customer_profile
+        with self.captureOnCommitCallbacks(execute=True):
+            FormResponse.objects.create(customer=customer, form=self.form, question=self.q1, text='Salud')
+        self.assertEqual(self.client.get(url).json()['respondents'], 4)
+
+    def test_matrix_csv_and_json(self):
+        url = reverse('form-analytics-matrix', kwargs={'form_pk': self.form.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'customer_id,customer,¿Sector?,¿Presupuesto?')
+        self.assertEqual(len(lines), 4)
+
+        data = json.loads(b''.join(self.client.get(url, {'output': 'json'}).streaming_content))
+        self.assertEqual(data['rows'][2], [self.customers[2].pk, 'cliente_a2', 'Salud', '5000'])
+        # La matriz no se guarda en caché: solo resumen y columnas
+        self.assertNotIn('rows', cache.get(FORM_ANALYTICS_CACHE_KEY.format(form_id=self.form.pk)))
+        self.assertEqual(self.client.get(url, {'output': 'xml'}).status_code, 400)
+
+    def test_customers_cannot_read_analytics(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.customers[0].user).access_token}')
+        self.assertEqual(client.get(reverse('form-analytics', kwargs={'form_pk': self.form.pk})).status_code, 403)
@@ -0,0 +1,62 @@
+# api/tests_load_data.py
+"""
+Tests del generador de datos de carga (generate_load_data): volúmenes pequeños,
+restauración de receptores de señales y auto_now_add (también si algo falla) y
+datos derivados (SLA e índice de búsqueda) al terminar.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_load_data
+"""
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.test import TestCase
+from django.utils import timezone
+
+from .management.commands.generate_load_data import LOAD_CUSTOMER_USERNAME_PREFIX
+from .models import Order, SearchIndexEntry
+
+SIGNALS = (pre_save, post_save, post_delete)
+
+
+class GenerateLoadDataTest(TestCase):
+
+    def run_command(self, **options):
+        call_command('generate_load_data', orders=5, customers=2, employees=1, providers=1, chunk_size=3, stdout=StringIO(), **options)
+
+    def load_orders(self):
+        return Order.objects.filter(customer__user__username__startswith=LOAD_CUSTOMER_USERNAME_PREFIX)
+
+    def assert_restored(self, receivers):
+        self.assertEqual([list(signal.receivers) for signal in SIGNALS], receivers)
+        self.assertTrue(Order._meta.get_field('date_received').auto_now_add)
+
+    def test_generates_data_and_restores_state(self):
+        receivers = [list(signal.receivers) for signal in SIGNALS]
+        self.run_command()
+        self.assert_restored(receivers)
+        orders = self.load_orders()
+        self.assertEqual(orders.count(), 5)
+        self.assertTrue(orders.filter(services__isnull=False).exists())
+
+    def test_overdue_orders_are_classified_and_indexed(self):
+        self.run_command()
+        overdue = self.load_orders().filter(date_required__lt=timezone.now()).exclude(status__in=Order.FINAL_STATUSES)
+        self.assertTrue(overdue.exists())
+        self.assertEqual(set(overdue.values_list('sla_status', flat=True)), {'OVERDUE'})
+        self.assertFalse(self.load_orders().filter(status__in=Order.FINAL_STATUSES).exclude(sla_status='CLOSED').exists())
+        order_ids = {str(pk) for pk in self.load_orders().values_list('pk', flat=True)}
+        indexed = set(SearchIndexEntry.objects.filter(doc_type='order').values_list('object_id', flat=True))
+        self.assertTrue(order_ids <= indexed)
+
+    def test_skip_derived_leaves_sla_untouched(self):
+        self.run_command(skip_derived=True)
+        self.assertFalse(self.load_orders().filter(sla_status='OVERDUE').exists())
+
+    def test_state_is_restored_on_error(self):
+        receivers = [list(signal.receivers) for signal in SIGNALS]
+        with mock.patch.object(Order.objects, 'bulk_create', side_effect=RuntimeError('fallo simulado')):
+            with self.assertRaises(RuntimeError):
+                self.run_command()
+        self.assert_restored(receivers)
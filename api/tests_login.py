@@ -0,0 +1,62 @@
+# api/tests_login.py
+"""
+Tests de la emisión de tokens (CustomTokenObtainPairSerializer): una sola comprobación de
+contraseña y claims/datos del usuario desde el principal de sesión.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_login
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .management.commands.bench_login import counted_hashes
+from .model_cache import model_cache
+from .models import JobPosition, Roles, UserProfile, UserRole
+
+User = get_user_model()
+
+
+class TokenObtainTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='login_staff', password='clave-login', is_staff=True)
+        role, _ = UserRole.objects.get_or_create(name=Roles.DRAGON, defaults={'display_name': 'Dragón'})
+        UserProfile.objects.update_or_create(user=cls.user, defaults={'primary_role': role})
+        User.objects.create_user(username='login_inactivo', password='clave-login', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        model_cache.table(UserRole)
+        model_cache.table(JobPosition)
+
+    def login(self, username, password):
+        return APIClient().post(reverse('token_obtain_pair'), {'username': username, 'password': password})
+
+    def test_single_hash_and_principal_claims(self):
+        with counted_hashes() as counter, self.assertNumQueries(2):  # Usuario + perfil + ficha; roles secundarios
+            response = self.login('login_staff', 'clave-login')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counter['hashes'], 1)
+
+        data = response.json()
+        self.assertEqual(data['user']['primary_role'], Roles.DRAGON)
+        self.assertTrue(data['user']['is_dragon_user'])
+        claims = AccessToken(data['access'])
+        self.assertEqual((claims['username'], claims['primary_role'], claims['is_dragon']), ('login_staff', Roles.DRAGON, True))
+        self.assertEqual(claims['roles'], [Roles.DRAGON])
+        self.assertTrue(data['refresh'])
+
+    def test_rejections(self):
+        with counted_hashes() as counter:
+            response = self.login('no_existe', 'clave-login')
+        self.assertEqual((response.status_code, response.json()['detail']), (401, 'El usuario no existe.'))
+        self.assertEqual(counter['hashes'], 1)  # Mismo coste que un usuario existente
+
+        response = self.login('login_staff', 'otra-clave')
+        self.assertEqual((response.status_code, response.json()['detail']), (401, 'Contraseña incorrecta.'))
+        response = self.login('login_inactivo', 'clave-login')
+        self.assertEqual((response.status_code, response.json()['detail']), (401, 'Tu cuenta está inactiva.'))
@@ -0,0 +1,83 @@
+# api/tests_model_cache.py
+"""
+Tests de la caché de tablas pequeñas (api/model_cache.py) y de los campos de serializer
+que validan contra ella.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_model_cache
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .model_cache import model_cache
+from .models import PaymentMethod, ServiceCategory, UserRole
+from .serializers.finances import PaymentCreateSerializer
+from .serializers.services_catalog import ServiceSerializer
+
+User = get_user_model()
+
+
+class ModelCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.active = PaymentMethod.objects.create(name='Transferencia')
+        cls.inactive = PaymentMethod.objects.create(name='Cheque', is_active=False)
+        cls.category = ServiceCategory.objects.create(code='CACHE', name='Categoría Caché')
+
+    def setUp(self):
+        cache.clear()
+        model_cache.reset_stats()
+
+    def test_read_through_and_counters(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(model_cache.get(PaymentMethod, self.active.pk).name, 'Transferencia')
+        with self.assertNumQueries(0):
+            self.assertEqual(model_cache.get(PaymentMethod, str(self.inactive.pk)).name, 'Cheque')
+            self.assertIsNone(model_cache.get(PaymentMethod, 'no-es-un-id'))
+            active_names = [m.name for m in model_cache.all(PaymentMethod, is_active=True)]
+        self.assertIn('Transferencia', active_names)
+        self.assertNotIn('Cheque', active_names)
+        self.assertIsNone(model_cache.get(ServiceCategory, 'XXX'))  # Carga la otra tabla: un fallo
+        self.assertEqual(model_cache.stats()['api.PaymentMethod'], {'hits': 2, 'misses': 1})
+        self.assertEqual(model_cache.stats()['api.ServiceCategory'], {'hits': 0, 'misses': 1})
+
+    def test_signals_invalidate(self):
+        model_cache.get(PaymentMethod, self.active.pk)
+        self.active.name = 'Domiciliación'
+        self.active.save()
+        self.assertEqual(model_cache.get(PaymentMethod, self.active.pk).name, 'Domiciliación')
+
+        self.inactive.delete()
+        self.assertIsNone(model_cache.get(PaymentMethod, self.inactive.pk))
+        added = PaymentMethod.objects.create(name='Bizum')
+        self.assertEqual(model_cache.get(PaymentMethod, added.pk).name, 'Bizum')
+
+    def test_cached_related_field_validates_without_queries(self):
+        model_cache.get(PaymentMethod, self.active.pk)
+        model_cache.get(ServiceCategory, self.category.pk)
+        method_field = PaymentCreateSerializer().fields['method']
+        category_field = ServiceSerializer().fields['category']
+        with self.assertNumQueries(0):
+            self.assertEqual(method_field.run_validation(self.active.pk), self.active)
+            self.assertEqual(category_field.run_validation('CACHE'), self.category)
+        with self.assertNumQueries(0), self.assertRaisesMessage(Exception, 'does not exist'):
+            method_field.run_validation(self.inactive.pk)  # Filtrado por is_active como el queryset
+
+    def test_primary_role_uses_cache(self):
+        role = UserRole.objects.create(name='cache_role', display_name='Rol Caché')
+        user = User.objects.create_user(username='cache_user', password='x')
+        user.profile.primary_role = role
+        user.profile.save()
+
+        model_cache.get(UserRole, role.pk)
+        fresh = User.objects.select_related('profile').get(pk=user.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(fresh.primary_role_name, 'cache_role')
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'api_userrole' in q['sql']])
+
+        role.is_active = False
+        role.save()
+        self.assertIsNone(User.objects.select_related('profile').get(pk=user.pk).primary_role)
@@ -0,0 +1,194 @@
+# api/tests_performance.py
+"""
+Suite de regresión de rendimiento para la API.
+
+Siembra datos operacionales realistas con `seed_operational_data` (semilla fija),
+recorre cada endpoint registrado en el router más el dashboard y las vistas de
+usuario, y compara el número de queries con la línea base versionada en
+`api/perf_baseline.json`. Cualquier N+1 nuevo supera `max_queries` y hace fallar
+la suite. Cada endpoint recibe antes una petición de calentamiento sin medir.
+
+Las latencias (p50/p95) dependen de la máquina: se miden e informan siempre, pero
+solo se comparan con la línea base si se pide con DLOUB_PERF_CHECK_LATENCY=1.
+
+Ejecución local (SQLite):
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_performance
+
+Variables opcionales:
+    DLOUB_PERF_ITERATIONS=N          Repeticiones por endpoint (defecto 5).
+    DLOUB_PERF_CHECK_LATENCY=1       Falla también si el p95 supera el presupuesto de latencia.
+    DLOUB_PERF_LATENCY_FACTOR=F      Tolerancia sobre el p95 de la línea base (defecto 3.0).
+    DLOUB_PERF_REPORT=ruta.json      Escribe el informe medido en esa ruta.
+    DLOUB_PERF_UPDATE_BASELINE=1     Reescribe la línea base con los valores medidos.
+"""
+import io
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from faker import Faker
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Customer, Order, Service, UserProfile, UserRole
+from .roles import Roles
+from .urls import router
+
+User = get_user_model()
+
+PERF_SEED = 2025
+BASELINE_PATH = Path(__file__).resolve().parent / 'perf_baseline.json'
+ITERATIONS = int(os.environ.get('DLOUB_PERF_ITERATIONS', '5'))
+LATENCY_FACTOR = float(os.environ.get('DLOUB_PERF_LATENCY_FACTOR', '3.0'))
+CHECK_LATENCY = os.environ.get('DLOUB_PERF_CHECK_LATENCY') == '1'
+LATENCY_FLOOR_MS = 50.0  # Margen absoluto para endpoints muy rápidos (ruido del runner)
+
+# (clave, nombre de URL, función que devuelve los kwargs de la URL)
+ENDPOINTS = [
+    ('customer-list', 'customer-list', None),
+    ('customer-detail', 'customer-detail', lambda: {'pk': Customer.objects.order_by('pk').values_list('pk', flat=True).first()}),
+    ('employee-list', 'employee-list', None),
+    ('employee-workload', 'employee-workload', None),
+    ('jobposition-list', 'jobposition-list', None),
+    ('order-list', 'order-list', None),
+    ('order-detail', 'order-detail', lambda: {'pk': Order.objects.order_by('pk').values_list('pk', flat=True).first()}),
+    ('order-deliverables-list', 'order-deliverables-list', lambda: {'order_pk': Order.objects.filter(deliverables__isnull=False).order_by('pk').values_list('pk', flat=True).first()}),
+    ('service-list', 'service-list', None),
+    ('service-detail', 'service-detail', lambda: {'pk': Service.objects.order_by('pk').values_list('pk', flat=True).first()}),
+    ('servicecategory-list', 'servicecategory-list', None),
+    ('campaign-list', 'campaign-list', None),
+    ('public-catalog', 'public_catalog', None),
+    ('invoice-list', 'invoice-list', None),
+    ('payment-list', 'payment-list', None),
+    ('formresponse-list', 'formresponse-list', None),
+    ('notification-list', 'notification-list', None),
+    ('auditlog-list', 'auditlog-list', None),
+    ('reportjob-list', 'reportjob-list', None),
+    ('dashboard', 'dashboard_data', None),
+    ('user-me', 'user-me', None),
+    ('auth-check', 'auth_check', None),
+]
+
+
+def percentile(values, pct):
+    """ Percentil por interpolación lineal (sin dependencias externas). """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * (pct / 100.0)
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {'endpoints': {}}
+    with open(BASELINE_PATH, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+class PerformanceRegressionTest(TestCase):
+    """ Presupuestos de queries y latencia por endpoint frente a la línea base. """
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        random.seed(PERF_SEED)
+        Faker.seed(PERF_SEED)
+        call_command('seed_operational_data', stdout=io.StringIO(), stderr=io.StringIO())
+
+        cls.user = User.objects.create_user(
+            username='perf_dragon', email='perf_dragon@example.com',
+            password='perf-password', is_staff=True
+        )
+        profile = UserProfile.objects.get(user=cls.user)
+        profile.primary_role = UserRole.objects.get(name=Roles.DRAGON)
+        profile.save(update_fields=['primary_role'])
+
+    def setUp(self):
+        # Token JWT real: cada request carga el usuario como en producción
+        self.client = APIClient()
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def measure(self, url):
+        """ Calienta la URL y la ejecuta ITERATIONS veces; devuelve status, queries máximas y latencias. """
+        self.client.get(url)  # Calentamiento: cachés, compilación de plantillas y consultas
+        timings, max_queries, status_code = [], 0, None
+        for _ in range(max(ITERATIONS, 1)):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = self.client.get(url)
+                timings.append((time.perf_counter() - start) * 1000.0)
+            status_code = response.status_code
+            max_queries = max(max_queries, len(ctx.captured_queries))
+        return {
+            'status': status_code,
+            'max_queries': max_queries,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+        }
+
+    def test_router_endpoints_are_covered(self):
+        """ Todo ViewSet registrado en el router debe tener presupuesto en la suite. """
+        covered = {key.rsplit('-', 1)[0] for key, _, _ in ENDPOINTS}
+        for prefix, viewset, basename in router.registry:
+            self.assertIn(basename, covered, f"El endpoint '{prefix}' no está cubierto por la suite de rendimiento.")
+
+    def test_endpoints_within_budget(self):
+        baseline = load_baseline().get('endpoints', {})
+        update_baseline = os.environ.get('DLOUB_PERF_UPDATE_BASELINE') == '1'
+
+        for key, url_name, kwargs_fn in ENDPOINTS:
+            url = reverse(url_name, kwargs=kwargs_fn() if kwargs_fn else None)
+            measured = self.measure(url)
+            type(self).results[key] = measured
+
+            with self.subTest(endpoint=key):
+                self.assertEqual(measured['status'], 200, f"{url} respondió {measured['status']}")
+                if update_baseline:
+                    continue
+                budget = baseline.get(key)
+                self.assertIsNotNone(budget, f"Sin línea base para '{key}'. Ejecuta con DLOUB_PERF_UPDATE_BASELINE=1.")
+                self.assertLessEqual(
+                    measured['max_queries'], budget['max_queries'],
+                    f"{key}: {measured['max_queries']} queries > presupuesto {budget['max_queries']} (¿N+1?)"
+                )
+                if not CHECK_LATENCY:
+                    continue
+                latency_budget = budget['p95_ms'] * LATENCY_FACTOR + LATENCY_FLOOR_MS
+                self.assertLessEqual(
+                    measured['p95_ms'], latency_budget,
+                    f"{key}: p95 {measured['p95_ms']}ms > presupuesto {latency_budget:.1f}ms"
+                )
+
+    @classmethod
+    def tearDownClass(cls):
+        report = {
+            'meta': {
+                'seed': PERF_SEED,
+                'iterations': ITERATIONS,
+                'engine': connection.vendor,
+            },
+            'endpoints': dict(sorted(cls.results.items())),
+        }
+        report_path = os.environ.get('DLOUB_PERF_REPORT')
+        if report_path and cls.results:
+            with open(report_path, 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2, ensure_ascii=False)
+        if os.environ.get('DLOUB_PERF_UPDATE_BASELINE') == '1' and cls.results:
+            for entry in report['endpoints'].values():
+                entry.pop('status', None)
+            with open(BASELINE_PATH, 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2, ensure_ascii=False)
+                fh.write('\n')
+        super().tearDownClass()
@@ -0,0 +1,80 @@
+# api/tests_principal.py
+"""
+Tests del principal de sesión cacheado (api/principal.py) que sirven /users/me/ y /auth/check/.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_principal
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import JobPosition, Roles, UserProfile, UserRole, UserRoleAssignment
+from .serializers.base import BasicUserSerializer
+
+User = get_user_model()
+
+
+class SessionPrincipalTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='principal_staff', password='clave-segura', first_name='Eva', is_staff=True)
+        cls.primary, _ = UserRole.objects.get_or_create(name=Roles.FINANCE, defaults={'display_name': 'Finanzas'})
+        cls.secondary, _ = UserRole.objects.get_or_create(name=Roles.SUPPORT, defaults={'display_name': 'Soporte'})
+        UserProfile.objects.update_or_create(user=cls.user, defaults={'primary_role': cls.primary})
+        cls.position = JobPosition.objects.create(name='Analista de Cuentas')
+        employee = cls.user.employee_profile
+        employee.position = cls.position
+        employee.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def fresh_serializer_data(self):
+        data = dict(BasicUserSerializer(User.objects.get(pk=self.user.pk)).data)
+        data['all_roles'] = sorted(data['all_roles'])
+        return data
+
+    def get_user(self, url_name='user-me'):
+        data = self.client.get(reverse(url_name)).json()
+        data = data['user'] if url_name == 'auth_check' else data
+        data['all_roles'] = sorted(data['all_roles'])
+        return data
+
+    def test_served_from_cache_with_serializer_fields(self):
+        self.assertEqual(self.get_user(), self.fresh_serializer_data())
+        self.assertEqual(self.get_user()['job_position_name'], 'Analista de Cuentas')
+        with self.assertNumQueries(1):  # Solo la carga del usuario del JWT
+            data = self.get_user('auth_check')
+        self.assertEqual(data, self.fresh_serializer_data())
+
+    def test_role_changes_invalidate(self):
+        self.get_user()
+        UserRoleAssignment.objects.create(user=self.user, role=self.secondary)
+        self.assertEqual(self.get_user()['secondary_roles'], [Roles.SUPPORT])
+
+        self.primary.display_name = 'Finanzas y Contabilidad'
+        self.primary.save()  # Afecta a todos los usuarios: sube la versión
+        self.assertEqual(self.get_user()['primary_role_display_name'], 'Finanzas y Contabilidad')
+
+        self.position.name = 'Jefa de Cuentas'
+        self.position.save()
+        self.assertEqual(self.get_user()['job_position_name'], 'Jefa de Cuentas')
+
+        self.get_user()
+        update_last_login(None, User.objects.get(pk=self.user.pk))  # Solo last_login: se conserva
+        with self.assertNumQueries(1):
+            self.get_user()
+
+    def test_login_builds_principal(self):
+        response = APIClient().post(reverse('token_obtain_pair'), {'username': 'principal_staff', 'password': 'clave-segura'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['primary_role'], Roles.FINANCE)
+        with self.assertNumQueries(1):
+            self.get_user('auth_check')
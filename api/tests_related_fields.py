@@ -0,0 +1,101 @@
+# api/tests_related_fields.py
+"""
+Tests de la resolución por lotes de ids en los serializers de escritura
+(api/serializers/fields.py) y de la escritura anidada de servicios de un pedido.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_related_fields
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import Price, Provider, Service
+from .serializers.orders import OrderCreateUpdateSerializer
+from .serializers.providers import ProviderSerializer
+
+User = get_user_model()
+
+
+class BatchedRelatedFieldTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='lote_cliente', password='x').customer_profile
+        cls.services = [
+            Service.objects.create(code=f'LOTE{i}', category_id='DEV', name=f'Servicio lote {i}')
+            for i in range(6)
+        ]
+        cls.inactive = Service.objects.create(code='LOTEOFF', category_id='DEV', name='Inactivo', is_active=False)
+        for service in cls.services:
+            Price.objects.create(service=service, currency='EUR', amount=Decimal('10.00'), effective_date=date(2024, 1, 1))
+            Price.objects.create(service=service, currency='EUR', amount=Decimal('25.00'), effective_date=date(2025, 1, 1))
+
+    def setUp(self):
+        cache.clear()
+
+    def order_payload(self, services):
+        return {
+            'customer': self.customer.pk,
+            'date_required': (timezone.now() + timedelta(days=7)).isoformat(),
+            'services': [{'service': service.code, 'quantity': 2} for service in services],
+        }
+
+    def validation_queries(self, payload):
+        serializer = OrderCreateUpdateSerializer(data=payload)
+        with CaptureQueriesContext(connection) as ctx:
+            valid = serializer.is_valid()
+        return serializer, valid, len(ctx.captured_queries)
+
+    def test_nested_services_validated_in_one_query(self):
+        _, valid_two, queries_two = self.validation_queries(self.order_payload(self.services[:2]))
+        cache.clear()
+        _, valid_six, queries_six = self.validation_queries(self.order_payload(self.services))
+        self.assertTrue(valid_two and valid_six)
+        self.assertEqual(queries_two, queries_six)
+
+        # Con la caché de ids caliente los servicios ya no se consultan
+        with CaptureQueriesContext(connection) as ctx:
+            OrderCreateUpdateSerializer(data=self.order_payload(self.services)).is_valid()
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'api_service' in q['sql']])
+
+    def test_invalid_ids_reported_per_item(self):
+        payload = self.order_payload(self.services[:2])
+        payload['services'].append({'service': self.inactive.code, 'quantity': 1})
+        payload['services'].append({'service': 'NOEXISTE', 'quantity': 1})
+        serializer, valid, _ = self.validation_queries(payload)
+        self.assertFalse(valid)
+        errors = serializer.errors['services']
+        self.assertEqual(sorted(errors), [2, 3])  # Errores indexados por elemento de la lista
+        self.assertIn('LOTEOFF', str(errors[2]['service']))
+
+    def test_create_uses_latest_price_and_updates_total(self):
+        serializer = OrderCreateUpdateSerializer(data=self.order_payload(self.services[:3]))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        order = serializer.save()
+        self.assertEqual(sorted(order.services.values_list('price', flat=True)), [Decimal('25.00')] * 3)
+        self.assertEqual(order.total_amount, Decimal('150.00'))
+
+        line = order.services.first()
+        update = OrderCreateUpdateSerializer(order, data={
+            'services': [{'id': line.pk, 'service': line.service_id, 'quantity': 1, 'price': '5.00'}],
+        }, partial=True)
+        self.assertTrue(update.is_valid(), update.errors)
+        order = update.save()
+        self.assertEqual(list(order.services.values_list('quantity', 'price')), [(1, Decimal('5.00'))])
+        self.assertEqual(order.total_amount, Decimal('5.00'))
+
+    def test_many_related_field_batched(self):
+        provider = Provider.objects.create(name='Proveedor Lote')
+        codes = [service.code for service in self.services]
+        serializer = ProviderSerializer(provider, data={'services_provided': codes}, partial=True)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'api_service' in q['sql']]), 1)
+        serializer.save()
+        self.assertEqual(provider.services_provided.count(), 6)
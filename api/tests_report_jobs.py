@@ -0,0 +1,123 @@
+# api/tests_report_jobs.py
+"""
+Tests de la cola de informes en segundo plano (api/report_jobs.py).
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_report_jobs
+"""
+import io
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Invoice, Order, Payment, PaymentMethod, ReportJob, TransactionType
+from .report_jobs import claim_jobs, cleanup_report_jobs, run_job
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp(prefix='dloub-reports-')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ReportJobTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='finanzas_rep', password='x', is_staff=True)
+        cls.customer_user = User.objects.create_user(username='cliente_rep', password='x')
+        order = Order.objects.create(customer=cls.customer_user.customer_profile, date_required=timezone.now() + timedelta(days=5))
+        invoice = Invoice.objects.create(order=order, due_date=timezone.localdate() + timedelta(days=30))
+        Payment.objects.create(
+            invoice=invoice, method=PaymentMethod.objects.create(name='Tarjeta'),
+            transaction_type=TransactionType.objects.create(name='Pago'), amount=Decimal('99.00'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_submit_run_and_download(self):
+        client = self.client_for(self.staff)
+        response = client.post(reverse('reportjob-list'), {'kind': 'payments_export', 'params': {'status': 'COMPLETED'}}, format='json')
+        self.assertEqual(response.status_code, 202, response.content)
+        job_id = response.json()['id']
+        self.assertEqual(response.json()['status'], 'QUEUED')
+
+        call_command('run_report_worker', processes=0, once=True, stdout=io.StringIO())
+        data = client.get(reverse('reportjob-detail', kwargs={'pk': job_id})).json()
+        self.assertEqual(data['status'], 'SUCCEEDED', data['error'])
+        self.assertIsNotNone(data['expires_at'])
+
+        response = client.get(reverse('reportjob-download', kwargs={'pk': job_id}))
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertIn('99.00', content)
+
+    def test_dashboard_and_top_customers_reports(self):
+        jobs = [
+            ReportJob.objects.create(user=self.staff, kind='dashboard', params={'start_date': '2020-01-01'}),
+            ReportJob.objects.create(user=self.staff, kind='top_customers'),
+        ]
+        for job in jobs:
+            self.assertEqual(run_job(job.pk), 'SUCCEEDED', ReportJob.objects.get(pk=job.pk).error)
+        with ReportJob.objects.get(pk=jobs[0].pk).result.open('rb') as fh:
+            self.assertIn('task_summary', json.loads(fh.read()))
+        with ReportJob.objects.get(pk=jobs[1].pk).result.open('rb') as fh:
+            self.assertIn('cliente_rep', fh.read().decode('utf-8-sig'))
+
+    def test_permissions_and_limits(self):
+        customer_client = self.client_for(self.customer_user)
+        self.assertEqual(customer_client.post(reverse('reportjob-list'), {'kind': 'payments_export'}, format='json').status_code, 403)
+        self.assertEqual(customer_client.post(reverse('reportjob-list'), {'kind': 'nope'}, format='json').status_code, 400)
+        for _ in range(3):
+            self.assertEqual(customer_client.post(reverse('reportjob-list'), {'kind': 'orders_export'}, format='json').status_code, 202)
+        self.assertEqual(customer_client.post(reverse('reportjob-list'), {'kind': 'orders_export'}, format='json').status_code, 429)
+
+        # Solo uno en ejecución por usuario
+        self.assertEqual(len(claim_jobs(5)), 1)
+        self.assertEqual(len(self.client_for(self.staff).get(reverse('reportjob-list')).json()['results']), 0)
+
+        queued = ReportJob.objects.filter(status='QUEUED').first()
+        self.assertEqual(customer_client.delete(reverse('reportjob-detail', kwargs={'pk': queued.pk})).status_code, 204)
+        cancelled = ReportJob.objects.get(pk=queued.pk)
+        self.assertEqual(cancelled.status, 'CANCELLED')
+        self.assertIsNotNone(cancelled.expires_at)
+
+    def test_cleanup_removes_expired_results(self):
+        job = ReportJob.objects.create(user=self.staff, kind='top_customers')
+        run_job(job.pk)
+        job.refresh_from_db()
+        storage, name = job.result.storage, job.result.name
+        self.assertTrue(storage.exists(name))
+        ReportJob.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        stuck = ReportJob.objects.create(user=self.staff, kind='dashboard', status='RUNNING', started_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(cleanup_report_jobs(), {'expired': 1, 'timed_out': 1})
+        self.assertFalse(ReportJob.objects.filter(pk=job.pk).exists())
+        self.assertFalse(storage.exists(name))
+        self.assertEqual(ReportJob.objects.get(pk=stuck.pk).status, 'FAILED')
+
+    def test_cleanup_removes_old_cancelled_jobs_without_expiry(self):
+        old = timezone.now() - timedelta(days=30)
+        legacy = ReportJob.objects.create(user=self.staff, kind='dashboard', status='CANCELLED')
+        ReportJob.objects.filter(pk=legacy.pk).update(created_at=old)
+        failed = ReportJob.objects.create(user=self.staff, kind='dashboard', status='FAILED', finished_at=old)
+        recent = ReportJob.objects.create(user=self.staff, kind='dashboard', status='CANCELLED')
+        queued = ReportJob.objects.create(user=self.staff, kind='dashboard')
+        ReportJob.objects.filter(pk=queued.pk).update(created_at=old)
+
+        self.assertEqual(cleanup_report_jobs(), {'expired': 2, 'timed_out': 0})
+        self.assertEqual(set(ReportJob.objects.values_list('pk', flat=True)), {recent.pk, queued.pk})
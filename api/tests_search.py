@@ -0,0 +1,101 @@
+# api/tests_search.py
+"""
+Tests del índice invertido de búsqueda y del endpoint /api/search/.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_search
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Order, SearchIndexEntry, Service, ServiceCategory
+from .search import rebuild_index, tokenize
+
+User = get_user_model()
+
+
+class SearchIndexTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer_user = User.objects.create_user(username='cliente_busqueda', password='x', email='cb@example.com')
+        cls.customer = cls.customer_user.customer_profile  # Creado por la señal de usuario
+        cls.customer.company_name = 'Panadería Núñez'
+        cls.customer.save()
+        other_user = User.objects.create_user(username='otro_cliente', password='x', email='oc@example.com')
+        cls.other_customer = other_user.customer_profile
+        cls.other_customer.company_name = 'Panadería Rival'
+        cls.other_customer.save()
+        due = timezone.now() + timedelta(days=7)
+        cls.order = Order.objects.create(customer=cls.customer, date_required=due, note='Rediseño de la tienda')
+        cls.other_order = Order.objects.create(customer=cls.other_customer, date_required=due, note='Rediseño general')
+        rebuild_index()
+
+    def auth_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_tokenize_normalizes_accents_and_case(self):
+        self.assertEqual(tokenize('Panadería NÚÑEZ, a'), ['panaderia', 'nunez'])
+
+    def test_signals_keep_index_in_sync(self):
+        service = Service.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            service.name = 'Holograma Interactivo'
+            service.save()
+        terms = set(SearchIndexEntry.objects.filter(doc_type='service', object_id=service.pk).values_list('term', flat=True))
+        self.assertIn('holograma', terms)
+
+        service_pk = service.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.filter(pk=self.other_order.pk).delete()
+        self.assertFalse(SearchIndexEntry.objects.filter(doc_type='order', object_id=str(self.other_order.pk)).exists())
+        self.assertTrue(SearchIndexEntry.objects.filter(doc_type='service', object_id=service_pk).exists())
+
+    def indexed_terms(self, doc_type, pk):
+        return set(SearchIndexEntry.objects.filter(doc_type=doc_type, object_id=str(pk)).values_list('term', flat=True))
+
+    def test_denormalized_renames_reindex_dependents(self):
+        category = ServiceCategory.objects.get(code='DEV')
+        service = Service.objects.filter(category=category).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            category.name = 'Ingeniería Cuántica'
+            category.save()
+        self.assertIn('cuantica', self.indexed_terms('service', service.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer_user.last_name = 'Zubizarreta'
+            self.customer_user.save()
+        self.assertIn('zubizarreta', self.indexed_terms('customer', self.customer.pk))
+        self.assertIn('zubizarreta', self.indexed_terms('order', self.order.pk))
+
+    def test_customer_rename_reindexes_orders(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.company_name = 'Pastelería Quimera'
+            self.customer.save()
+        client = self.auth_client(self.customer_user)
+        results = client.get(reverse('search'), {'q': 'quimera'}).json()['results']
+        self.assertEqual({(r['type'], r['id']) for r in results}, {('customer', self.customer.pk), ('order', self.order.pk)})
+        self.assertEqual(client.get(reverse('search'), {'q': 'nunez', 'types': 'order'}).json()['results'], [])
+
+    def test_search_is_ranked_prefix_and_scoped(self):
+        response = self.auth_client(self.customer_user).get(reverse('search'), {'q': 'panad nunez'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        # El perfil (peso mayor) antes que su pedido; nada del otro cliente
+        self.assertEqual([(r['type'], r['id']) for r in results], [('customer', self.customer.pk), ('order', self.order.pk)])
+
+        # Un cliente no ve los pedidos de otros clientes
+        response = self.auth_client(self.customer_user).get(reverse('search'), {'q': 'rediseno', 'types': 'order'})
+        self.assertEqual([r['id'] for r in response.json()['results']], [self.order.pk])
+
+    def test_search_validates_params(self):
+        client = self.auth_client(self.customer_user)
+        self.assertEqual(client.get(reverse('search'), {'q': 'a'}).status_code, 400)
+        self.assertEqual(client.get(reverse('search'), {'q': 'web', 'types': 'factura'}).status_code, 400)
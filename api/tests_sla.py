@@ -0,0 +1,87 @@
+# api/tests_sla.py
+"""
+Tests del motor de SLA (clasificación, pasada masiva, notificaciones y filtros).
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_sla
+"""
+from datetime import timedelta
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Deliverable, Notification, Order, UserProfile, UserRole
+from .roles import Roles
+from .sla import refresh_sla_statuses
+
+User = get_user_model()
+
+
+class SlaEngineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='sla_dragon', password='x', is_staff=True)
+        profile = UserProfile.objects.get(user=cls.manager)
+        profile.primary_role = UserRole.objects.get(name=Roles.DRAGON)
+        profile.save(update_fields=['primary_role'])
+        cls.employee = User.objects.create_user(username='sla_emp', password='x', is_staff=True).employee_profile
+        customer = User.objects.create_user(username='cliente_sla', password='x').customer_profile
+        cls.order = Order.objects.create(
+            customer=customer, employee=cls.employee, status='CONFIRMED', date_required=timezone.now() + timedelta(days=20)
+        )
+        cls.today = timezone.localdate()
+
+    def create(self, days, **kwargs):
+        return Deliverable.objects.create(order=self.order, description='Pieza', due_date=self.today + timedelta(days=days), **kwargs)
+
+    def test_classification_on_save(self):
+        self.assertEqual(self.create(10, assigned_employee=self.employee, status='IN_PROGRESS').sla_status, 'ON_TRACK')
+        self.assertEqual(self.create(1, assigned_employee=self.employee, status='IN_PROGRESS').sla_status, 'DUE_SOON')
+        self.assertEqual(self.create(4).sla_status, 'AT_RISK')  # Sin asignar
+        late = self.create(-1, assigned_employee=self.employee, status='IN_PROGRESS')
+        self.assertEqual(late.sla_status, 'OVERDUE')
+        self.assertTrue(Notification.objects.filter(user=self.employee.user, message__contains='vencida').exists())
+
+        late.status = 'COMPLETED'
+        late.save(update_fields=['status'])  # El flag se persiste aunque no esté en update_fields
+        self.assertEqual(Deliverable.objects.get(pk=late.pk).sla_status, 'CLOSED')
+
+    def test_set_based_refresh_and_filters(self):
+        task = self.create(10, assigned_employee=self.employee, status='IN_PROGRESS')
+        # El tiempo pasa: la fecha límite queda atrás sin que nadie guarde el entregable
+        Deliverable.objects.filter(pk=task.pk).update(due_date=self.today - timedelta(days=2))
+        Notification.objects.all().delete()
+
+        result = refresh_sla_statuses()
+        self.assertEqual(result['deliverables'], 1)
+        self.assertEqual(result['orders'], 1)  # Pedido en riesgo por su entregable vencido
+        self.assertEqual(Order.objects.get(pk=self.order.pk).sla_status, 'AT_RISK')
+        self.assertEqual(Notification.objects.filter(user=self.employee.user).count(), 2)
+
+        # Sin cambios: no se reescribe nada ni se vuelve a notificar
+        self.assertEqual(refresh_sla_statuses(), {'deliverables': 0, 'orders': 0, 'notifications': 0})
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.manager).access_token}')
+        response = client.get(reverse('order-deliverables-list', kwargs={'order_pk': self.order.pk}), {'sla_status': 'OVERDUE'})
+        self.assertEqual([d['id'] for d in response.json()['results']], [task.pk])
+        response = client.get(reverse('order-list'), {'sla_status': 'AT_RISK'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_migration_backfill_without_notifications(self):
+        task = self.create(-3, assigned_employee=self.employee, status='IN_PROGRESS')
+        # Filas previas a la migración: todas con el valor por defecto
+        Deliverable.objects.update(sla_status='ON_TRACK')
+        Order.objects.update(sla_status='ON_TRACK')
+        Notification.objects.all().delete()
+
+        import_module('api.migrations.0011_sla_status').backfill_sla_status(apps, None)
+        self.assertEqual(Deliverable.objects.get(pk=task.pk).sla_status, 'OVERDUE')
+        self.assertEqual(Order.objects.get(pk=self.order.pk).sla_status, 'AT_RISK')
+        self.assertFalse(Notification.objects.exists())
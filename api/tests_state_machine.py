@@ -0,0 +1,109 @@
+# api/tests_state_machine.py
+"""
+Tests de la máquina de estados de pedidos/entregables y de las transiciones masivas.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_state_machine
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import AuditLog, Deliverable, Notification, Order, UserProfile, UserRole, WorkloadCounter
+from .roles import Roles
+
+User = get_user_model()
+
+
+class StateMachineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='sm_dragon', password='x', is_staff=True)
+        profile = UserProfile.objects.get(user=cls.manager)
+        profile.primary_role = UserRole.objects.get(name=Roles.DRAGON)
+        profile.save(update_fields=['primary_role'])
+        cls.employee = User.objects.create_user(username='sm_emp', password='x', is_staff=True).employee_profile
+        cls.customer_user = User.objects.create_user(username='cliente_sm', password='x')
+        cls.order = Order.objects.create(
+            customer=cls.customer_user.customer_profile, status='PENDING_DELIVERY',
+            date_required=timezone.now() + timedelta(days=10),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.manager).access_token}')
+
+    def test_completion_hook_uses_in_memory_previous_status(self):
+        order = Order.objects.get(pk=self.order.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            order.status = 'DELIVERED'
+            order.save()
+        self.assertIsNotNone(order.completed_at)
+        order_selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and 'FROM "api_order"' in q['sql']]
+        self.assertEqual(order_selects, [])  # Sin releer la fila
+
+        order.status = 'IN_PROGRESS'
+        order.save()
+        self.assertIsNone(Order.objects.get(pk=order.pk).completed_at)
+
+    def test_serializer_rejects_invalid_transition(self):
+        url = reverse('order-detail', kwargs={'pk': self.order.pk})
+        response = self.client.patch(url, {'status': 'DRAFT'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json())
+        self.assertEqual(self.client.patch(url, {'status': 'DELIVERED'}, format='json').status_code, 200)
+
+    def test_bulk_deliverable_transition(self):
+        working = [
+            Deliverable.objects.create(order=self.order, description=f'Pieza {i}', status='IN_PROGRESS', assigned_employee=self.employee)
+            for i in range(3)
+        ]
+        pending = Deliverable.objects.create(order=self.order, description='Sin empezar')
+        self.assertEqual(WorkloadCounter.objects.get(employee=self.employee).open_tasks, 3)
+        AuditLog.objects.all().delete()
+
+        ids = [d.pk for d in working] + [pending.pk, 999999]
+        response = self.client.post(reverse('deliverable-bulk-transition'), {'ids': ids, 'status': 'PENDING_APPROVAL'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['updated'], [d.pk for d in working])
+        self.assertEqual([s['id'] for s in response.json()['skipped']], [pending.pk, 999999])
+        self.assertEqual(Deliverable.objects.filter(status='PENDING_APPROVAL').count(), 3)
+        self.assertEqual(AuditLog.objects.filter(details__bulk_transition=True).count(), 3)
+        self.assertEqual(Notification.objects.filter(user=self.customer_user, message__contains='aprobación').count(), 3)
+
+        Deliverable.objects.filter(pk__in=[d.pk for d in working]).update(status='APPROVED')
+        response = self.client.post(reverse('deliverable-bulk-transition'), {'ids': [d.pk for d in working], 'status': 'COMPLETED'}, format='json')
+        self.assertEqual(len(response.json()['updated']), 3)
+        self.assertEqual(set(Deliverable.objects.filter(pk__in=[d.pk for d in working]).values_list('sla_status', flat=True)), {'CLOSED'})
+        self.assertEqual(WorkloadCounter.objects.get(employee=self.employee).open_tasks, 0)
+
+        # Reapertura: estado y SLA en un solo UPDATE, clasificado con el estado destino (estancado)
+        Deliverable.objects.filter(pk__in=[d.pk for d in working]).update(due_date=timezone.localdate() + timedelta(days=3))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('deliverable-bulk-transition'), {'ids': [d.pk for d in working], 'status': 'REVISION_REQUESTED'}, format='json')
+        self.assertEqual(len(response.json()['updated']), 3)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "api_deliverable"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(Deliverable.objects.filter(pk__in=[d.pk for d in working]).values_list('sla_status', flat=True)), {'AT_RISK'})
+
+        self.assertEqual(self.client.post(reverse('deliverable-bulk-transition'), {'ids': [pending.pk], 'status': 'NOPE'}, format='json').status_code, 400)
+
+    def test_bulk_order_transition(self):
+        other = Order.objects.create(customer=self.customer_user.customer_profile, status='DRAFT', date_required=timezone.now() + timedelta(days=3))
+        response = self.client.post(reverse('order-bulk-transition'), {'ids': [self.order.pk, other.pk], 'status': 'DELIVERED'}, format='json')
+        self.assertEqual(response.json()['updated'], [self.order.pk])
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.sla_status), ('DELIVERED', 'CLOSED'))
+        self.assertIsNotNone(self.order.completed_at)
+
+        customer_client = APIClient()
+        customer_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.customer_user).access_token}')
+        response = customer_client.post(reverse('order-bulk-transition'), {'ids': [other.pk], 'status': 'CONFIRMED'}, format='json')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,81 @@
+# api/tests_tracking.py
+"""
+Tests del seguimiento de cambios en memoria (api/tracking.py) y de las señales que
+lo usan en lugar de releer la fila.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_tracking
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import AuditLog, Deliverable, Notification, Order, UserRole, UserRoleAssignment
+from .roles import Roles
+
+User = get_user_model()
+
+
+class FieldTrackingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username='track_emp', password='x', is_staff=True).employee_profile
+        cls.customer_user = User.objects.create_user(username='track_cliente', password='x')
+        cls.order = Order.objects.create(
+            customer=cls.customer_user.customer_profile, status='IN_PROGRESS',
+            date_required=timezone.now() + timedelta(days=10),
+        )
+        cls.deliverable = Deliverable.objects.create(order=cls.order, description='Logo')
+
+    def test_snapshot_semantics(self):
+        new = Deliverable(order=self.order, description='Nuevo')
+        self.assertTrue(new.has_changed('status'))
+        self.assertIsNone(new.tracked_initial('status'))
+
+        loaded = Deliverable.objects.get(pk=self.deliverable.pk)
+        self.assertEqual(loaded.changed_fields(), {})
+        loaded.status = 'ASSIGNED'
+        self.assertEqual(loaded.changed_fields(), {'status': 'PENDING'})
+        loaded.save()
+        self.assertFalse(loaded.has_changed('status'))
+        self.assertEqual(loaded.tracked_initial('status'), 'ASSIGNED')
+
+        deferred = Deliverable.objects.only('id', 'order').get(pk=self.deliverable.pk)
+        self.assertFalse(deferred.tracked_known('status'))
+        self.assertTrue(deferred.has_changed('status'))
+
+    def test_deliverable_save_does_not_refetch_row(self):
+        deliverable = Deliverable.objects.select_related('order__customer__user').get(pk=self.deliverable.pk)
+        AuditLog.objects.all().delete()
+        with CaptureQueriesContext(connection) as ctx:
+            deliverable.assigned_employee = self.employee
+            deliverable.status = 'PENDING_APPROVAL'
+            deliverable.save()
+        # (El único SELECT permitido sobre la tabla es el conteo que inicializa el contador de carga)
+        refetches = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT') and not q['sql'].startswith('SELECT COUNT') and 'FROM "api_deliverable"' in q['sql']
+        ]
+        self.assertEqual(refetches, [])
+
+        self.assertTrue(Notification.objects.filter(user=self.employee.user, message__startswith='Te han asignado').exists())
+        self.assertTrue(Notification.objects.filter(user=self.customer_user, message__contains='aprobación').exists())
+        changes = AuditLog.objects.get(details__model='Deliverable').details['changes']
+        self.assertEqual(changes['status'], ['PENDING', 'PENDING_APPROVAL'])
+        self.assertEqual(changes['assigned_employee'], [None, self.employee.pk])
+
+        # Guardar sin cambios no vuelve a notificar
+        count = Notification.objects.count()
+        deliverable.save()
+        self.assertEqual(Notification.objects.count(), count)
+
+    def test_role_assignment_audit_changes(self):
+        assignment = UserRoleAssignment.objects.create(user=self.employee.user, role=UserRole.objects.get(name=Roles.DESIGN))
+        assignment.is_active = False
+        assignment.save()
+        log = AuditLog.objects.filter(details__model='UserRoleAssignment').order_by('-id').first()
+        self.assertEqual(log.details['changes'], {'is_active': [True, False]})
@@ -0,0 +1,131 @@
+# api/tests_workload.py
+"""
+Tests de los contadores de carga de trabajo, del ranking /api/employees/workload/ y de la
+asignación automática de entregables.
+
+    DLOUB_DB_PROFILE=sqlite python manage.py test api.tests_workload
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Deliverable, Order, OrderService, Provider, Service, UserProfile, UserRole, WorkloadCounter
+from .roles import Roles
+from .services import DeliverableAssignmentService
+from .workload import rebuild_workload
+
+User = get_user_model()
+
+
+class WorkloadCounterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='wl_dragon', password='x', is_staff=True)
+        profile = UserProfile.objects.get(user=cls.manager)
+        profile.primary_role = UserRole.objects.get(name=Roles.DRAGON)
+        profile.save(update_fields=['primary_role'])
+        cls.ana = User.objects.create_user(username='ana', password='x', is_staff=True, first_name='Ana').employee_profile
+        cls.beto = User.objects.create_user(username='beto', password='x', is_staff=True, first_name='Beto').employee_profile
+        cls.provider = Provider.objects.create(name='Estudio Externo')
+        customer = User.objects.create_user(username='cliente_wl', password='x').customer_profile
+        cls.order = Order.objects.create(customer=customer, date_required=timezone.now() + timedelta(days=5))
+
+    def open_tasks(self, employee=None, provider=None):
+        counter = WorkloadCounter.objects.filter(employee=employee, provider=provider).first()
+        return counter.open_tasks if counter else 0
+
+    def test_signals_keep_counters_in_sync(self):
+        first = Deliverable.objects.create(order=self.order, description='Logo', assigned_employee=self.ana)
+        Deliverable.objects.create(order=self.order, description='Banner', assigned_employee=self.ana, assigned_provider=self.provider)
+        Deliverable.objects.create(order=self.order, description='Hecho', assigned_employee=self.beto, status='COMPLETED')
+        self.assertEqual((self.open_tasks(self.ana), self.open_tasks(self.beto), self.open_tasks(provider=self.provider)), (2, 0, 1))
+
+        # Reasignación y paso a estado final (instancia recargada: estado inicial en memoria)
+        first = Deliverable.objects.get(pk=first.pk)
+        first.assigned_employee = self.beto
+        first.save()
+        self.assertEqual((self.open_tasks(self.ana), self.open_tasks(self.beto)), (1, 1))
+        first.status = 'COMPLETED'
+        first.save()
+        self.assertEqual(self.open_tasks(self.beto), 0)
+
+        self.order.delete()
+        self.assertEqual((self.open_tasks(self.ana), self.open_tasks(provider=self.provider)), (0, 0))
+
+    def test_ranking_endpoint_and_rebuild(self):
+        Deliverable.objects.bulk_create([  # Sin señales: requiere reconstrucción
+            Deliverable(order=self.order, description=f'Tarea {i}', assigned_employee=self.ana) for i in range(3)
+        ])
+        Deliverable.objects.create(order=self.order, description='Copy', assigned_employee=self.beto)
+        rebuild_workload()
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.manager).access_token}')
+        response = client.get(reverse('employee-workload'), {'include_providers': 'true'})
+        self.assertEqual(response.status_code, 200)
+        ranking = [(row['username'], row['open_tasks']) for row in response.json()['employees'] if row['username'] in ('ana', 'beto')]
+        self.assertEqual(ranking, [('beto', 1), ('ana', 3)])
+        self.assertEqual(response.json()['providers'][0]['open_tasks'], 0)
+
+
+class DeliverableAssignmentTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='asig_dragon', password='x', is_staff=True)
+        cls.set_role(cls.manager, Roles.DRAGON)
+        cls.dev = User.objects.create_user(username='dev_1', password='x', is_staff=True).employee_profile
+        cls.set_role(cls.dev.user, Roles.DEVELOPMENT)
+        cls.designer = User.objects.create_user(username='dsgn_1', password='x', is_staff=True).employee_profile
+        cls.set_role(cls.designer.user, Roles.DESIGN)
+        cls.dev_service = Service.objects.filter(category_id='DEV').first()
+        cls.provider = Provider.objects.create(name='Agencia Dev Externa', rating=Decimal('4.5'))
+        cls.provider.services_provided.add(cls.dev_service)
+
+        customer = User.objects.create_user(username='cliente_asig', password='x').customer_profile
+        cls.order = Order.objects.create(customer=customer, status='CONFIRMED', date_required=timezone.now() + timedelta(days=10))
+        OrderService.objects.create(order=cls.order, service=cls.dev_service, price=Decimal('100.00'))
+        today = timezone.now().date()
+        cls.tasks = [
+            Deliverable.objects.create(order=cls.order, description=f'API {i}', due_date=today + timedelta(days=3 - i))
+            for i in range(3)
+        ]
+
+    @staticmethod
+    def set_role(user, role):
+        profile = UserProfile.objects.get(user=user)
+        profile.primary_role = UserRole.objects.get(name=role)
+        profile.save(update_fields=['primary_role'])
+
+    def test_dry_run_preview_then_apply(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.manager).access_token}')
+        url = reverse('deliverable-auto-assign')
+
+        preview = client.get(url, {'max_open_tasks': 2, 'order': self.order.pk})
+        self.assertEqual(preview.status_code, 200)
+        plan = preview.json()['assigned']
+        # Más urgente primero; el especialista hasta su capacidad y luego el proveedor del servicio
+        self.assertEqual([p['deliverable_id'] for p in plan], [t.pk for t in reversed(self.tasks)])
+        self.assertEqual([(p['assignee_type'], p['assignee_id']) for p in plan],
+                         [('employee', self.dev.pk), ('employee', self.dev.pk), ('provider', self.provider.pk)])
+        self.assertFalse(Deliverable.objects.filter(assigned_employee=self.dev).exists())
+
+        self.assertEqual(client.post(url, {'max_open_tasks': 2, 'order': self.order.pk}, format='json').status_code, 200)
+        self.assertEqual(Deliverable.objects.filter(assigned_employee=self.dev, status='ASSIGNED').count(), 2)
+        self.assertEqual(WorkloadCounter.objects.get(provider=self.provider).open_tasks, 1)
+        self.assertEqual(client.get(url, {'order': 'x'}).status_code, 400)
+
+    def test_no_capacity_leaves_deliverables_unassigned(self):
+        self.provider.is_active = False
+        self.provider.save()
+        result = DeliverableAssignmentService(max_open_tasks=1, order_id=self.order.pk).run(dry_run=True)
+        self.assertEqual(len(result['assigned']), 1)
+        self.assertEqual(len(result['unassigned']), 2)
@@ -0,0 +1,80 @@
+# api/tracking.py
+"""
+Seguimiento en memoria de cambios por campo (dirty tracking).
+
+Los modelos que heredan `TrackedFieldsMixin` y declaran `tracked_fields` guardan los
+valores tal como se cargaron de la base de datos (`from_db`, el hook que documenta
+Django para esto). Las señales pre_save/post_save comparan valor anterior y nuevo
+sin volver a leer la fila:
+
+    if instance.has_changed('status'):
+        previous = instance.tracked_initial('status')
+
+- Instancias nuevas: no hay valores cargados; todos los campos cuentan como cambiados.
+- Campos diferidos (`only()`/`defer()`): el valor anterior es desconocido
+  (`tracked_known()` devuelve False) y `has_changed()` responde True.
+- `save()` renueva la instantánea al terminar, después de todas las señales post_save;
+  con `update_fields` solo se renuevan esos campos.
+- Quien modifique filas con `update()` sobre una instancia en memoria debe llamar a
+  `reset_tracking(fields)` para no reportar un cambio que ya está guardado.
+"""
+
+_MISSING = object()
+
+
+class TrackedFieldsMixin:
+    """ Mixin para modelos: `tracked_fields` es una tupla de nombres de campo (las FK por nombre, no `_id`). """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_loaded = instance._tracked_snapshot()
+        return instance
+
+    def _tracked_snapshot(self, fields=None):
+        deferred = self.get_deferred_fields()
+        snapshot = {}
+        for name in fields if fields is not None else self.tracked_fields:
+            attname = self._meta.get_field(name).attname
+            if attname not in deferred:
+                snapshot[name] = getattr(self, attname)
+        return snapshot
+
+    def reset_tracking(self, fields=None):
+        """ Toma los valores actuales como los guardados (todos o solo `fields`). """
+        fields = [name for name in (fields if fields is not None else self.tracked_fields) if name in self.tracked_fields]
+        loaded = getattr(self, '_tracked_loaded', None)
+        if loaded is None:
+            # Instancia nueva guardada parcialmente: solo se conoce lo que se acaba de escribir
+            loaded = self._tracked_loaded = {}
+        loaded.update(self._tracked_snapshot(fields))
+
+    def tracked_known(self, field):
+        return field in (getattr(self, '_tracked_loaded', None) or {})
+
+    def tracked_initial(self, field, default=None):
+        """ Valor cargado (o último guardado) del campo; `default` si la instancia es nueva o estaba diferido. """
+        value = (getattr(self, '_tracked_loaded', None) or {}).get(field, _MISSING)
+        return default if value is _MISSING else value
+
+    def has_changed(self, field):
+        loaded = getattr(self, '_tracked_loaded', None)
+        if loaded is None or field not in loaded:
+            return True
+        return loaded[field] != getattr(self, self._meta.get_field(field).attname)
+
+    def changed_fields(self):
+        """ {campo: valor anterior} de los campos seguidos que cambiaron (None como anterior en instancias nuevas). """
+        return {
+            name: self.tracked_initial(name) for name in self.tracked_fields
+            if self.has_changed(name) and (self.tracked_known(name) or getattr(self, '_tracked_loaded', None) is None)
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.reset_tracking(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.reset_tracking(fields)
@@ -19,6 +19,9 @@ from .views import (
     finances,
     forms,
     utilities,
+    search,
+    reports,
+    async_reads,
 )
 # Nota: Ya no importas las clases individuales directamente aquí (excepto TokenRefreshView)
 
@@ -41,6 +44,7 @@ router.register(r'payments', finances.PaymentViewSet, basename='payment')
 router.register(r'form-responses', forms.FormResponseViewSet, basename='formresponse')
 router.register(r'notifications', utilities.NotificationViewSet, basename='notification') # Añadido si existe
 router.register(r'audit-logs', utilities.AuditLogViewSet, basename='auditlog') # Añadido si existe
+router.register(r'report-jobs', reports.ReportJobViewSet, basename='reportjob')
 
 # --- Rutas Anidadas para Entregables (Usando drf-nested-routers) ---
 # Asegúrate que el lookup ('order') coincida con cómo DeliverableViewSet espera el ID.
@@ -69,9 +73,36 @@ urlpatterns = [
     # --- Ruta del Dashboard (APIView) ---
     path('dashboard/', dashboard.DashboardDataView.as_view(), name='dashboard_data'),
 
+    # --- Catálogo público publicado (snapshot cacheado con ETag) ---
+    path('catalog/', services_catalog.PublicCatalogView.as_view(), name='public_catalog'),
+
+    # --- Asignación automática de entregables (GET = vista previa, POST = aplicar) ---
+    path('deliverables/auto-assign/', orders.DeliverableAutoAssignView.as_view(), name='deliverable-auto-assign'),
+
+    # --- Transición masiva de estado de entregables (pedidos: /orders/bulk-transition/) ---
+    path('deliverables/bulk-transition/', orders.DeliverableBulkTransitionView.as_view(), name='deliverable-bulk-transition'),
+
+    # --- Búsqueda unificada (índice invertido) ---
+    path('search/', search.SearchView.as_view(), name='search'),
+
+    # --- Analítica de formularios (resumen y matriz cliente × pregunta en streaming) ---
+    path('forms/<int:form_pk>/analytics/', forms.FormAnalyticsView.as_view(), name='form-analytics'),
+    path('forms/<int:form_pk>/analytics/matrix/', forms.FormResponseMatrixView.as_view(), name='form-analytics-matrix'),
+
+    # --- Métricas de conexiones a la base de datos (por proceso) ---
+    path('system/db-pool/', utilities.DatabasePoolMetricsView.as_view(), name='db-pool-metrics'),
+
     # --- Ruta de Usuario (APIView) ---
     path('users/me/', users.UserMeView.as_view(), name='user-me'), # Usa 'user-me' como tenías
 
+    # --- Lecturas asíncronas (ASGI): mismas respuestas que sus equivalentes DRF ---
+    path('async/users/me/', async_reads.AsyncUserMeView.as_view(), name='async-user-me'),
+    path('async/auth/check/', async_reads.AsyncCheckAuthView.as_view(), name='async-auth-check'),
+    path('async/notifications/', async_reads.AsyncNotificationListView.as_view(), name='async-notification-list'),
+    path('async/notifications/unread-count/', async_reads.AsyncNotificationUnreadCountView.as_view(), name='async-notification-unread-count'),
+    path('async/dashboard/', async_reads.AsyncDashboardDataView.as_view(), name='async-dashboard'),
+    path('async/catalog/', async_reads.AsyncPublicCatalogView.as_view(), name='async-public-catalog'),
+
     # --- Rutas Anidadas Manuales (Alternativa si NO usas drf-nested-routers) ---
     # Mantenlas comentadas si usas drf-nested-routers
     # path('orders/<int:order_pk>/deliverables/', orders.DeliverableViewSet.as_view({'get': 'list', 'post': 'create'}), name='order-deliverables-list-manual'),
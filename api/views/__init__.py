@@ -16,4 +16,7 @@
 #api/views/finances.py (Vistas InvoiceViewSet, PaymentViewSet)
 #api/views/forms.py (Vista FormResponseViewSet)
 #api/views/utilities.py (Vistas NotificationViewSet, AuditLogViewSet)
+#api/views/search.py (Vista SearchView, búsqueda unificada)
+#api/views/reports.py (Vista ReportJobViewSet, informes en segundo plano)
+#api/views/async_reads.py (Variantes asíncronas de usuario, notificaciones, dashboard y catálogo)
 #En total, son 13 archivos (11 archivos de código + 1 __init__.py + 1 services.py). Adicionalmente, deberás modificar tu api/urls.py existente #para importar desde estos nuevos módulos.
\ No newline at end of file
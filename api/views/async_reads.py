@@ -0,0 +1,211 @@
+# api/views/async_reads.py
+"""
+Variantes asíncronas (ASGI) de los endpoints de lectura más usados, bajo /api/async/.
+
+DRF no tiene vistas asíncronas: son vistas de Django (`View` con `async def get`) que usan
+el ORM asíncrono (aget, acount, aaggregate, async for) y devuelven el mismo JSON que su
+versión DRF. Bajo uvicorn/daphne no ocupan un hilo del pool mientras esperan a la base de
+datos; bajo WSGI funcionan igual, envueltas por Django en async_to_sync.
+
+- Autenticación: el mismo JWT (Authorization: Bearer) validado por simplejwt.
+- Permisos: `required_roles` equivale a HasRolePermission (staff o alguno de los roles).
+- Datos y roles del usuario: el principal de sesión cacheado (api/principal.py).
+
+Comparativa de rendimiento frente a la ruta WSGI: `python manage.py bench_async_reads`.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from rest_framework import serializers
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from ..catalog_snapshot import CATALOG_SNAPSHOT_CACHE_KEY, get_catalog_snapshot
+from ..db_router import is_pinned, replica_reads
+from ..models import Notification
+from ..permissions import CanAccessDashboard
+from ..principal import aget_principal
+from .dashboard import aevaluate_dashboard_queries, build_dashboard_data, dashboard_date_range, dashboard_queries
+from .services_catalog import PublicCatalogView, catalog_snapshot_response
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+NOTIFICATIONS_PAGE_SIZE = 20
+_datetime_field = serializers.DateTimeField()
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """ JWTAuthentication con la búsqueda del usuario en el ORM asíncrono. """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        return await self.aget_user(self.get_validated_token(raw_token))
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = await User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+def json_response(data, status=200):
+    # Mismo encoder que el JSONRenderer de DRF (decimales, fechas y duraciones igual que la API síncrona)
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+class AsyncReadView(View):
+    """
+    Base de las vistas: autentica con JWT, comprueba roles y llama a `aget`.
+    `request.user` queda con el usuario autenticado y `self.principal` con su principal de sesión.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication_required = True
+    required_roles = ()
+    permission_message = _("No tienes permiso para realizar esta acción debido a tu rol.")
+    authenticator = AsyncJWTAuthentication()
+
+    async def get(self, request, *args, **kwargs):
+        if self.authentication_required:
+            try:
+                user = await self.authenticator.aauthenticate(request)
+            except (InvalidToken, AuthenticationFailed) as e:
+                return self.unauthorized(request, e.detail)
+            if user is None:
+                return self.unauthorized(request, NotAuthenticated.default_detail)
+            request.user = user
+            self.principal = await aget_principal(user)
+            if self.required_roles and not user.is_staff:
+                if not set(self.principal['all_roles']).intersection(self.required_roles):
+                    return json_response({'detail': self.permission_message}, status=403)
+        return await self.aget(request, *args, **kwargs)
+
+    def unauthorized(self, request, detail):
+        response = json_response(detail if isinstance(detail, dict) else {'detail': detail}, status=401)
+        response.headers['WWW-Authenticate'] = self.authenticator.authenticate_header(request)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncUserMeView(AsyncReadView):
+    """ Versión asíncrona de UserMeView. """
+
+    async def aget(self, request, *args, **kwargs):
+        return json_response(self.principal)
+
+
+class AsyncCheckAuthView(AsyncReadView):
+    """ Versión asíncrona de CheckAuthView. """
+
+    async def aget(self, request, *args, **kwargs):
+        return json_response({"isAuthenticated": True, "user": self.principal})
+
+
+class AsyncNotificationListView(AsyncReadView):
+    """ Listado paginado de las notificaciones del usuario (como GET /notifications/). """
+    page_size = NOTIFICATIONS_PAGE_SIZE
+
+    async def aget(self, request, *args, **kwargs):
+        queryset = Notification.objects.filter(user=request.user).order_by('-created_at')
+        count = await queryset.acount()
+        last_page = max(1, -(-count // self.page_size))
+        page_param = PageNumberPagination.page_query_param
+        page = request.GET.get(page_param, 1)
+        try:
+            page = last_page if page in PageNumberPagination.last_page_strings else int(page)
+            if not 1 <= page <= last_page:
+                raise ValueError
+        except (TypeError, ValueError):
+            return json_response({'detail': PageNumberPagination.invalid_page_message.format(page_number=page, message='')}, status=404)
+
+        offset = (page - 1) * self.page_size
+        results = [
+            {
+                'id': notification.id,
+                'user': self.principal,  # Todas son del usuario de la petición
+                'message': notification.message,
+                'read': notification.read,
+                'created_at': _datetime_field.to_representation(notification.created_at),
+                'link': notification.link,
+            }
+            async for notification in queryset[offset:offset + self.page_size]
+        ]
+
+        url = request.build_absolute_uri()
+        return json_response({
+            'count': count,
+            'next': replace_query_param(url, page_param, page + 1) if page < last_page else None,
+            'previous': (
+                None if page == 1
+                else remove_query_param(url, page_param) if page == 2
+                else replace_query_param(url, page_param, page - 1)
+            ),
+            'results': results,
+        })
+
+
+class AsyncNotificationUnreadCountView(AsyncReadView):
+    """ Versión asíncrona de GET /notifications/unread-count/. """
+
+    async def aget(self, request, *args, **kwargs):
+        count = await Notification.objects.filter(user=request.user, read=False).acount()
+        return json_response({'unread_count': count})
+
+
+class AsyncDashboardDataView(AsyncReadView):
+    """ Versión asíncrona de DashboardDataView (mismas consultas, evaluadas con el ORM asíncrono). """
+    required_roles = CanAccessDashboard.required_roles
+    permission_message = CanAccessDashboard.message
+
+    async def aget(self, request, *args, **kwargs):
+        logger.info(f"[AsyncDashboardView] GET solicitado por {request.user.username}")
+        try:
+            start_date, end_date = dashboard_date_range(request.GET)
+            queries = dashboard_queries(start_date, end_date)
+            if is_pinned(request.user):
+                results = await aevaluate_dashboard_queries(queries)
+            else:
+                with replica_reads():
+                    results = await aevaluate_dashboard_queries(queries)
+            return json_response(build_dashboard_data(results, start_date, end_date))
+        except Exception as e:
+            logger.error(f"[AsyncDashboardView] Error 500 inesperado para usuario {request.user.username}: {e}", exc_info=True)
+            return json_response({"detail": _("Ocurrió un error interno procesando los datos del dashboard.")}, status=500)
+
+
+class AsyncPublicCatalogView(AsyncReadView):
+    """ Versión asíncrona de PublicCatalogView: el snapshot solo se construye (en un hilo) si falta. """
+    authentication_required = False
+
+    async def aget(self, request, *args, **kwargs):
+        snapshot = cache.get(CATALOG_SNAPSHOT_CACHE_KEY)
+        if snapshot is None:
+            snapshot = await sync_to_async(get_catalog_snapshot)()
+        return catalog_snapshot_response(request, snapshot, PublicCatalogView.max_age)
@@ -9,7 +9,7 @@ from django.contrib.auth import get_user_model
 # --- Importaciones de Serializers Corregidas ---
 # Importar desde los nuevos módulos específicos
 from ..serializers.authentication import CustomTokenObtainPairSerializer
-from ..serializers.base import BasicUserSerializer
+from ..principal import get_principal
 # ----------------------------------------------
 
 User = get_user_model()
@@ -29,20 +29,7 @@ class CheckAuthView(APIView):
 
     def get(self, request):
         """
-        Devuelve el estado de autenticación y los datos del usuario.
+        Devuelve el estado de autenticación y el principal de sesión cacheado del usuario.
         """
-        try:
-            user = User.objects.select_related(
-                'profile__primary_role',
-                'employee_profile__position'
-            ).get(pk=request.user.pk)
-        except User.DoesNotExist:
-             return Response({"isAuthenticated": False, "user": None}, status=status.HTTP_401_UNAUTHORIZED)
-        except AttributeError as e:
-             print(f"Advertencia: Error al acceder a relaciones en CheckAuthView para usuario {request.user.pk}: {e}")
-             user = request.user
-
-        # Usa el BasicUserSerializer importado correctamente
-        serializer = BasicUserSerializer(user, context={'request': request})
-        data = {"isAuthenticated": True, "user": serializer.data}
+        data = {"isAuthenticated": True, "user": get_principal(request.user)}
         return Response(data)
\ No newline at end of file
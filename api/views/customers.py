@@ -5,8 +5,9 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
 
 # Importaciones relativas
-from ..models import Customer
+from ..models import Customer, with_user_roles
 from ..permissions import IsCustomerOwnerOrAdminOrSupport
+from ..db_router import ReplicaReadMixin
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.customers import CustomerSerializer, CustomerCreateSerializer
@@ -14,14 +15,11 @@ from ..serializers.customers import CustomerSerializer, CustomerCreateSerializer
 
 User = get_user_model()
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Clientes (Customers).
     """
-    queryset = Customer.objects.select_related(
-        'user',
-        'user__profile__primary_role'
-    ).all()
+    queryset = with_user_roles(Customer.objects.select_related('user'), 'user').all()
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['user__email', 'preferred_contact_method', 'country', 'company_name']
 
@@ -1,11 +1,15 @@
 # api/views/employees.py
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
 
 # Importaciones relativas
 from ..models import Employee, JobPosition
 from ..permissions import CanManageEmployees, CanManageJobPositions, IsAdminOrDragon
+from ..workload import employee_ranking, provider_ranking
+from ..db_router import ReplicaReadMixin
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.employees import (
@@ -15,7 +19,7 @@ from ..serializers.employees import (
 
 User = get_user_model()
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Empleados (Employees).
     """
@@ -24,7 +28,7 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         'user__profile__primary_role',
         'position'
     ).prefetch_related(
-        'user__secondary_role_assignments__role'
+        'user__secondary_role_assignments'  # Los roles salen de model_cache (ver with_user_roles)
     ).filter(user__is_active=True)
     permission_classes = [CanManageEmployees]
     filter_backends = [DjangoFilterBackend]
@@ -51,6 +55,31 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
+    @action(detail=False, methods=['get'], url_path='workload')
+    def workload(self, request):
+        """
+        Ranking de empleados por tareas abiertas (menor carga primero), leído de los
+        contadores mantenidos por señales. `?order=desc` invierte el orden y
+        `?include_providers=true` añade el ranking de proveedores.
+        """
+        employees = employee_ranking().values(
+            'id', 'user__username', 'user__first_name', 'user__last_name', 'position__name', 'open_tasks'
+        )
+        data = {'employees': [
+            {
+                'id': row['id'], 'username': row['user__username'],
+                'full_name': f"{row['user__first_name']} {row['user__last_name']}".strip() or row['user__username'],
+                'position': row['position__name'], 'open_tasks': row['open_tasks'],
+            }
+            for row in employees
+        ]}
+        if request.query_params.get('include_providers', '').lower() in ('1', 'true', 'yes'):
+            data['providers'] = list(provider_ranking().values('id', 'name', 'rating', 'open_tasks'))
+        if request.query_params.get('order') == 'desc':
+            for ranking in data.values():
+                ranking.reverse()
+        return Response(data)
+
 
 class JobPositionViewSet(viewsets.ModelViewSet):
     """
@@ -9,6 +9,8 @@ from django.contrib.auth import get_user_model
 # Importaciones relativas
 from ..models import Invoice, Payment, Order, Customer # Añadir Method/Type si hay ViewSet
 from ..permissions import IsAuthenticated, CanManageFinances, IsCustomerOwnerOrAdminOrSupport
+from ..exports import ExportMixin
+from ..db_router import ReplicaReadMixin
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.finances import (
@@ -22,9 +24,9 @@ from ..serializers.finances import (
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ReplicaReadMixin, ExportMixin, viewsets.ModelViewSet):
     """
-    ViewSet para gestionar Facturas (Invoices).
+    ViewSet para gestionar Facturas (Invoices). Exportación: GET invoices/export/?output=csv|xlsx
     """
     queryset = Invoice.objects.all()
     permission_classes = [IsAuthenticated]
@@ -34,11 +36,18 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         'order__customer__user__username': ['exact', 'icontains'],
         'order__customer__company_name': ['icontains'],
         'order__id': ['exact'],
-        'date': ['date', 'date__gte', 'date__lte', 'year', 'month'],
-        'due_date': ['date', 'date__gte', 'date__lte', 'isnull'],
+        'date': ['exact', 'gte', 'lte', 'year', 'month'],
+        'due_date': ['exact', 'gte', 'lte', 'isnull'],
         'invoice_number': ['exact', 'icontains'],
-        'total_amount': ['exact', 'gte', 'lte'],
+        'order__total_amount': ['exact', 'gte', 'lte'],
     }
+    export_basename = 'facturas'
+    export_columns = (
+        ('ID', 'id'), ('Número', 'invoice_number'), ('Pedido', 'order_id'),
+        ('Cliente', 'order__customer__company_name'), ('Usuario Cliente', 'order__customer__user__username'),
+        ('Emisión', 'date'), ('Vencimiento', 'due_date'), ('Estado', 'status'),
+        ('Total', 'order__total_amount'), ('Pagado', 'paid_amount'),
+    )
 
     def get_serializer_class(self):
         """ Usa un serializer básico para la lista, completo para otros. """
@@ -92,9 +101,9 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         instance.delete()
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ReplicaReadMixin, ExportMixin, viewsets.ModelViewSet):
     """
-    ViewSet para gestionar Pagos (Payments).
+    ViewSet para gestionar Pagos (Payments). Exportación: GET payments/export/?output=csv|xlsx
     """
     queryset = Payment.objects.select_related(
         'invoice', 'invoice__order', 'invoice__order__customer',
@@ -113,6 +122,13 @@ class PaymentViewSet(viewsets.ModelViewSet):
         'date': ['date', 'date__gte', 'date__lte', 'year', 'month'],
         'amount': ['exact', 'gte', 'lte'],
     }
+    export_basename = 'pagos'
+    export_columns = (
+        ('ID', 'id'), ('Fecha', 'date'), ('Factura', 'invoice__invoice_number'), ('Pedido', 'invoice__order_id'),
+        ('Usuario Cliente', 'invoice__order__customer__user__username'), ('Método', 'method__name'),
+        ('Tipo', 'transaction_type__name'), ('Monto', 'amount'), ('Moneda', 'currency'),
+        ('Estado', 'status'), ('ID Transacción', 'transaction_id'),
+    )
 
     def get_serializer_class(self):
         """ Serializer de lectura para list/retrieve, de creación/edición para otros. """
@@ -1,9 +1,15 @@
 # api/views/forms.py
+import csv
+import json
 import logging
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
@@ -12,6 +18,8 @@ from django.contrib.auth import get_user_model
 from ..models import FormResponse, Form, FormQuestion, Customer
 from ..permissions import IsAuthenticated, CanViewFormResponses, IsAdminOrDragon
 from ..services import FormResponseService
+from ..exports import Echo
+from ..form_analytics import get_form_analytics, iter_form_matrix
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.forms import (
@@ -35,8 +43,8 @@ class FormResponseViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = {
-        'form': ['exact'], 'form__title': ['icontains'],
-        'question': ['exact'], 'question__text': ['icontains'],
+        'form': ['exact'], 'form__name': ['icontains'],
+        'question': ['exact'], 'question__question_text': ['icontains'],
         'customer__user__username': ['exact', 'icontains'],
         'customer__company_name': ['icontains'],
         'created_at': ['date', 'date__gte', 'date__lte'],
@@ -95,16 +103,19 @@ class FormResponseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        serializer = self.get_serializer(data=request.data)
+        # Con el cliente en el contexto, el serializer detecta re-envíos y requeridas ya respondidas
+        context = {**self.get_serializer_context(), 'customer': user.customer_profile}
+        serializer = FormResponseBulkCreateSerializer(data=request.data, context=context)
         serializer.is_valid(raise_exception=True)
 
         try:
-            created_responses = FormResponseService.bulk_create_responses(
+            responses, created, updated = FormResponseService.bulk_create_responses(
                 serializer.validated_data,
                 user.customer_profile
             )
             return Response(
-                {"message": _("Respuestas creadas exitosamente."), "count": len(created_responses)},
+                {"message": _("Respuestas guardadas exitosamente."), "count": len(responses),
+                 "created": created, "updated": updated},
                 status=status.HTTP_201_CREATED
             )
         except ValueError as ve:
@@ -115,4 +126,59 @@ class FormResponseViewSet(viewsets.ModelViewSet):
             return Response(
                 {"detail": _("Ocurrió un error interno procesando las respuestas.")},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+# --- Analítica de formularios ---
+
+class FormAnalyticsView(APIView):
+    """
+    Resumen agregado de un formulario: respuestas, vacías y respuestas más frecuentes por
+    pregunta. Se sirve desde la caché por formulario (ver api/form_analytics.py).
+    """
+    permission_classes = [IsAuthenticated, CanViewFormResponses]
+
+    def get(self, request, form_pk=None):
+        form = get_object_or_404(Form, pk=form_pk)
+        return Response(get_form_analytics(form)['summary'])
+
+
+class FormResponseMatrixView(APIView):
+    """
+    Matriz pivotada cliente × pregunta de un formulario, en streaming directo desde la
+    base de datos (las columnas vienen de la caché). ?output=csv (por defecto) o ?output=json. ('format' lo reserva DRF para la negociación.)
+    """
+    permission_classes = [IsAuthenticated, CanViewFormResponses]
+    OUTPUTS = ('csv', 'json')
+
+    def get(self, request, form_pk=None):
+        output = request.query_params.get('output', 'csv')
+        if output not in self.OUTPUTS:
+            raise ValidationError({'output': _("Formato no soportado. Opciones: csv, json.")})
+        form = get_object_or_404(Form, pk=form_pk)
+        analytics = get_form_analytics(form)
+        rows = iter_form_matrix(form, analytics['question_ids'])
+        if output == 'json':
+            response = StreamingHttpResponse(self._iter_json(analytics, rows), content_type='application/json; charset=utf-8')
+        else:
+            response = StreamingHttpResponse(self._iter_csv(analytics, rows), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="formulario-{form.pk}-respuestas.csv"'
+        return response
+
+    @staticmethod
+    def _iter_csv(analytics, rows):
+        writer = csv.writer(Echo())
+        yield '\ufeff'  # BOM: Excel detecta UTF-8
+        yield writer.writerow(analytics['columns'])
+        for row in rows:
+            yield writer.writerow(row)
+
+    @staticmethod
+    def _iter_json(analytics, rows):
+        yield '{"form": %s, "columns": %s, "rows": [' % (
+            json.dumps(analytics['summary']['form'], ensure_ascii=False),
+            json.dumps(analytics['columns'], ensure_ascii=False),
+        )
+        for index, row in enumerate(rows):
+            yield (',' if index else '') + json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+        yield ']}'
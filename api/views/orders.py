@@ -1,24 +1,38 @@
 # api/views/orders.py
+import io
 import logging
+import mimetypes
+import os
+import re
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.views import APIView
+from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.translation import gettext_lazy as _
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 
 # Importaciones relativas
-from ..models import Order, Deliverable, Customer, Employee
+from ..models import Order, Deliverable, Customer, Employee, OrderService, with_user_roles
+from ..services import DeliverableAssignmentService, DeliverableUploadService, UploadError
 from ..permissions import (
-    IsAuthenticated, CanViewAllOrders, CanCreateOrders,
+    IsAuthenticated, IsAdminOrDragon, CanViewAllOrders, CanCreateOrders,
     CanViewAllDeliverables, CanCreateDeliverables, IsOwnerOrReadOnly,
     IsCustomerOwnerOrAdminOrSupport
 )
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.orders import (
-    OrderReadSerializer, OrderCreateUpdateSerializer, DeliverableSerializer
+    OrderReadSerializer, OrderCreateUpdateSerializer, DeliverableSerializer,
+    DeliverableUploadSerializer, DeliverableUploadCreateSerializer, BulkTransitionSerializer
 )
+from ..exports import ExportMixin
+from ..state_machine import TransitionError, bulk_transition
+from ..db_router import ReplicaReadMixin
 # Nota: OrderService serializers son usados internamente por Order serializers,
 # no necesitan importarse aquí a menos que los uses directamente en la vista.
 # ----------------------------------------------
@@ -26,15 +40,67 @@ from ..serializers.orders import (
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
-class OrderViewSet(viewsets.ModelViewSet):
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def _iter_file_range(fh, length):
+    """ Lee `length` bytes del archivo en bloques y lo cierra al terminar. """
+    try:
+        while length > 0:
+            block = fh.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        fh.close()
+
+
+def ranged_file_response(request, field_file):
+    """
+    Respuesta en streaming para un FileField con soporte de `Range: bytes=inicio-fin`
+    (un único rango; 206 Partial Content / 416). Sin Range, FileResponse completo.
     """
-    ViewSet para gestionar Pedidos (Orders).
+    storage, name = field_file.storage, field_file.name
+    if not name or not storage.exists(name):
+        raise Http404(_("El entregable no tiene archivo."))
+    size = storage.size(name)
+    filename = os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    if match and (match.group(1) or match.group(2)):
+        if match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        else:
+            start, end = max(size - int(match.group(2)), 0), size - 1
+        if start >= size or start > end:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        fh = storage.open(name, 'rb')
+        fh.seek(start)
+        response = StreamingHttpResponse(_iter_file_range(fh, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(storage.open(name, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+class OrderViewSet(ReplicaReadMixin, ExportMixin, viewsets.ModelViewSet):
+    """
+    ViewSet para gestionar Pedidos (Orders). Exportación: GET orders/export/?output=csv|xlsx
     """
     queryset = Order.objects.all()
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = {
         'status': ['exact', 'in'],
+        'sla_status': ['exact', 'in'], # Flag precalculado por el motor de SLA (api/sla.py)
         'customer__user__username': ['exact', 'icontains'],
         'customer__company_name': ['icontains'],
         'priority': ['exact', 'in'],
@@ -43,6 +109,13 @@ class OrderViewSet(viewsets.ModelViewSet):
         'date_required': ['date', 'date__gte', 'date__lte', 'isnull'],
         'id': ['exact']
     }
+    export_basename = 'pedidos'
+    export_columns = (
+        ('ID', 'id'), ('Estado', 'status'), ('Estado SLA', 'sla_status'), ('Prioridad', 'priority'),
+        ('Cliente', 'customer__company_name'), ('Usuario Cliente', 'customer__user__username'),
+        ('Empleado', 'employee__user__username'), ('Recibido', 'date_received'),
+        ('Requerido', 'date_required'), ('Completado', 'completed_at'), ('Total', 'total_amount'),
+    )
 
     def get_serializer_class(self):
         """ Usa serializer de lectura para list/retrieve, y de escritura para otros. """
@@ -54,9 +127,17 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # ... (lógica sin cambios) ...
         user = self.request.user
-        base_qs = Order.objects.select_related(
-            'customer', 'customer__user', 'employee', 'employee__user'
-        ).prefetch_related('services__service', 'deliverables')
+        base_qs = with_user_roles(
+            Order.objects.select_related('customer', 'customer__user', 'employee', 'employee__user'),
+            'customer__user', 'employee__user',
+        ).prefetch_related(
+            Prefetch('services', queryset=OrderService.objects.select_related('service__category', 'service__campaign')),
+            'services__service__features', 'services__service__price_history',
+            Prefetch('deliverables', queryset=with_user_roles(
+                Deliverable.objects.select_related('preview', 'assigned_employee__user', 'assigned_provider'),
+                'assigned_employee__user',
+            )),
+        )
 
         if hasattr(user, 'customer_profile') and user.customer_profile:
             return base_qs.filter(customer=user.customer_profile)
@@ -92,6 +173,16 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     # perform_update usa OrderCreateUpdateSerializer.update por defecto
 
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """
+        Cambia el estado de muchos pedidos en un solo UPDATE: {"ids": [...], "status": "..."}.
+        Solo empleados; cada pedido debe ser visible y admitir la transición (si no, va en 'skipped').
+        """
+        if not (hasattr(request.user, 'employee_profile') and request.user.employee_profile):
+            raise PermissionDenied(_("Solo los empleados pueden cambiar estados en bloque."))
+        return run_bulk_transition(request, Order, self.get_queryset())
+
 
 class DeliverableViewSet(viewsets.ModelViewSet):
     """
@@ -103,9 +194,10 @@ class DeliverableViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = {
         'status': ['exact', 'in'],
+        'sla_status': ['exact', 'in'], # Flag precalculado por el motor de SLA (api/sla.py)
         'assigned_employee': ['exact', 'isnull'],
         'assigned_provider': ['exact', 'isnull'],
-        'due_date': ['date', 'date__gte', 'date__lte', 'isnull'],
+        'due_date': ['exact', 'gte', 'lte', 'isnull'],
         'order': ['exact'],
         'order__customer__user__username': ['exact', 'icontains'],
         'assigned_employee__user__username': ['exact', 'icontains'],
@@ -119,7 +211,7 @@ class DeliverableViewSet(viewsets.ModelViewSet):
         base_qs = Deliverable.objects.select_related(
             'order', 'order__customer', 'order__customer__user',
             'order__employee', 'order__employee__user',
-            'assigned_employee', 'assigned_employee__user', 'assigned_provider'
+            'assigned_employee', 'assigned_employee__user', 'assigned_provider', 'preview'
         )
 
         if order_pk:
@@ -163,4 +255,132 @@ class DeliverableViewSet(viewsets.ModelViewSet):
              raise PermissionDenied(creator_checker.message)
 
         # El serializer se encarga de guardar el archivo si se envió
-        serializer.save(order=order)
\ No newline at end of file
+        serializer.save(order=order)
+
+    # --- Descarga en streaming y subidas por partes (reanudables) ---
+    UPLOAD_ID = r'(?P<upload_id>[0-9a-f-]{36})'
+
+    def check_can_upload(self):
+        checker = CanCreateDeliverables()
+        if not checker.has_permission(request=self.request, view=self):
+            raise PermissionDenied(checker.message)
+
+    def get_upload(self, deliverable, upload_id):
+        return get_object_or_404(deliverable.uploads.all(), pk=upload_id)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, *args, **kwargs):
+        """ Descarga el archivo en streaming; admite `Range` para reanudar descargas grandes. """
+        return ranged_file_response(request, self.get_object().file)
+
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_upload(self, request, *args, **kwargs):
+        """ Inicia una subida por partes: {filename, total_size, [content_type, chunk_size, checksum]}. """
+        deliverable = self.get_object()
+        self.check_can_upload()
+        serializer = DeliverableUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = DeliverableUploadService.initiate(deliverable, request.user, **serializer.validated_data)
+        except UploadError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(DeliverableUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get', 'delete'], url_path=f'uploads/{UPLOAD_ID}')
+    def upload_status(self, request, upload_id=None, *args, **kwargs):
+        """ GET: estado y partes pendientes (para reanudar). DELETE: cancela y borra las partes. """
+        upload = self.get_upload(self.get_object(), upload_id)
+        if request.method == 'DELETE':
+            self.check_can_upload()
+            DeliverableUploadService.abort(upload)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(DeliverableUploadSerializer(upload).data)
+
+    @action(detail=True, methods=['put'], url_path=f'uploads/{UPLOAD_ID}/parts/(?P<part_number>[0-9]+)')
+    def upload_part(self, request, upload_id=None, part_number=None, *args, **kwargs):
+        """ Cuerpo binario crudo (application/octet-stream); se escribe directo al storage sin buffer. """
+        upload = self.get_upload(self.get_object(), upload_id)
+        self.check_can_upload()
+        try:
+            upload = DeliverableUploadService.store_part(upload, int(part_number), request.stream or io.BytesIO())
+        except UploadError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(DeliverableUploadSerializer(upload).data)
+
+    @action(detail=True, methods=['post'], url_path=f'uploads/{UPLOAD_ID}/complete')
+    def complete_upload(self, request, upload_id=None, *args, **kwargs):
+        """ Ensambla las partes y asigna el archivo al entregable. """
+        upload = self.get_upload(self.get_object(), upload_id)
+        self.check_can_upload()
+        try:
+            deliverable = DeliverableUploadService.complete(upload)
+        except UploadError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(DeliverableSerializer(deliverable, context=self.get_serializer_context()).data)
+
+
+class DeliverableAutoAssignView(APIView):
+    """
+    Asignación automática de entregables sin asignar (ver DeliverableAssignmentService).
+    GET: vista previa del plan (dry-run). POST: aplica el plan.
+    Parámetros (query o cuerpo): limit, max_open_tasks, order.
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrDragon]
+
+    def get_int_param(self, data, name):
+        value = data.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError({name: _("Debe ser un número entero.")})
+        if value <= 0:
+            raise ValidationError({name: _("Debe ser mayor que cero.")})
+        return value
+
+    def run(self, data, dry_run):
+        service = DeliverableAssignmentService(
+            max_open_tasks=self.get_int_param(data, 'max_open_tasks'),
+            limit=self.get_int_param(data, 'limit'),
+            order_id=self.get_int_param(data, 'order'),
+        )
+        return Response(service.run(dry_run=dry_run))
+
+    def get(self, request, *args, **kwargs):
+        return self.run(request.query_params, dry_run=True)
+
+    def post(self, request, *args, **kwargs):
+        return self.run(request.data, dry_run=False)
+
+
+def run_bulk_transition(request, model, queryset):
+    serializer = BulkTransitionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        result = bulk_transition(
+            model, serializer.validated_data['ids'], serializer.validated_data['status'],
+            user=request.user, queryset=queryset,
+        )
+    except TransitionError as e:
+        raise ValidationError({'status': str(e)})
+    return Response(result)
+
+
+class DeliverableBulkTransitionView(APIView):
+    """
+    POST /api/deliverables/bulk-transition/ {"ids": [...], "status": "..."}
+    Mueve muchos entregables de estado en un solo UPDATE (ver api/state_machine.py).
+    Sin permiso global sobre entregables, solo los asignados al propio empleado.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        user = request.user
+        if CanViewAllDeliverables().has_permission(request, self):
+            queryset = Deliverable.objects.all()
+        elif hasattr(user, 'employee_profile') and user.employee_profile:
+            queryset = Deliverable.objects.filter(assigned_employee=user.employee_profile)
+        else:
+            raise PermissionDenied(_("Solo los empleados pueden cambiar estados en bloque."))
+        return run_bulk_transition(request, Deliverable, queryset)
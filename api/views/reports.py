@@ -0,0 +1,67 @@
+# api/views/reports.py
+import logging
+import os
+
+from django.http import FileResponse
+from django.utils.translation import gettext_lazy as _
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from ..models import ReportJob
+from ..permissions import IsAuthenticated
+from ..report_jobs import ReportJobError, cancel_report_job, submit_report_job
+from ..serializers.reports import ReportJobSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class ReportJobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                       mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Informes pesados en segundo plano (ver api/report_jobs.py).
+    POST encola, GET consulta el estado, GET <id>/download/ descarga el resultado y
+    DELETE cancela un informe en cola o borra uno terminado.
+    """
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {'status': ['exact', 'in'], 'kind': ['exact']}
+
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            job = submit_report_job(request.user, serializer.validated_data['kind'], serializer.validated_data.get('params'))
+        except ReportJobError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        logger.info(f"[ReportJobs] {request.user.username} encoló el informe {job.pk} ({job.kind}).")
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    def destroy(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status == 'RUNNING':
+            return Response({'detail': _("El informe se está ejecutando; no se puede cancelar.")}, status=status.HTTP_409_CONFLICT)
+        if job.status == 'QUEUED':
+            # Condicional: el worker puede haberlo reclamado entre tanto
+            if cancel_report_job(job.pk):
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response({'detail': _("El informe ya comenzó a ejecutarse.")}, status=status.HTTP_409_CONFLICT)
+        if job.result:
+            job.result.delete(save=False)
+        job.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != 'SUCCEEDED' or not job.result:
+            return Response(
+                {'detail': _("El informe no tiene resultado disponible."), 'status': job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return FileResponse(job.result.open('rb'), as_attachment=True, filename=os.path.basename(job.result.name))
@@ -0,0 +1,82 @@
+# api/views/search.py
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+
+# Importaciones relativas
+from ..models import Customer, Deliverable, Order
+from ..permissions import CanViewAllDeliverables, CanViewAllOrders
+from ..roles import Roles
+from ..search import SEARCH_SOURCES, search
+
+MAX_LIMIT = 50
+
+
+class SearchView(APIView):
+    """
+    Búsqueda unificada sobre servicios, clientes, pedidos y entregables.
+    GET /api/search/?q=texto[&types=service,order][&limit=20]
+    Los resultados respetan la misma visibilidad que los ViewSets de cada recurso.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_scopes(self, request, doc_types):
+        """ {tipo: queryset visible (None = sin restricción)} para el usuario actual. """
+        user = request.user
+        customer = getattr(user, 'customer_profile', None)
+        employee = getattr(user, 'employee_profile', None)
+        scopes = {'service': None}
+
+        if customer:
+            scopes['customer'] = Customer.objects.filter(pk=customer.pk)
+            scopes['order'] = Order.objects.filter(customer=customer)
+            scopes['deliverable'] = Deliverable.objects.filter(order__customer=customer)
+        elif employee:
+            can_view_customers = user.is_staff or any(
+                user.has_role(role) for role in (Roles.ADMIN, Roles.DRAGON, Roles.SUPPORT, Roles.SALES)
+            )
+            if can_view_customers:
+                scopes['customer'] = None
+            scopes['order'] = None if CanViewAllOrders().has_permission(request, self) else Order.objects.filter(employee=employee)
+            scopes['deliverable'] = (
+                None if CanViewAllDeliverables().has_permission(request, self)
+                else Deliverable.objects.filter(assigned_employee=employee)
+            )
+        return {doc_type: scope for doc_type, scope in scopes.items() if doc_type in doc_types}
+
+    def get_url(self, doc_type, obj):
+        if doc_type == 'deliverable':
+            return reverse('order-deliverables-detail', kwargs={'order_pk': obj.order_id, 'pk': obj.pk})
+        return reverse(f'{doc_type}-detail', kwargs={'pk': obj.pk})
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            raise ValidationError({'q': _("La búsqueda requiere al menos 2 caracteres.")})
+
+        doc_types = set(SEARCH_SOURCES)
+        if request.query_params.get('types'):
+            doc_types = {t.strip() for t in request.query_params['types'].split(',') if t.strip()}
+            unknown = doc_types - set(SEARCH_SOURCES)
+            if unknown:
+                raise ValidationError({'types': _("Tipos no válidos: %(types)s") % {'types': ', '.join(sorted(unknown))}})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': _("Debe ser un número entero.")})
+
+        results = [
+            {
+                'type': doc_type,
+                'id': obj.pk,
+                'title': SEARCH_SOURCES[doc_type].title(obj),
+                'subtitle': SEARCH_SOURCES[doc_type].subtitle(obj),
+                'score': score,
+                'url': self.get_url(doc_type, obj),
+            }
+            for doc_type, obj, score in search(query, self.get_scopes(request, doc_types), limit=limit)
+        ]
+        return Response({'query': query, 'count': len(results), 'results': results})
@@ -1,10 +1,16 @@
 # api/views/services_catalog.py
 from rest_framework import viewsets, permissions
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 # Importaciones relativas
 from ..models import ServiceCategory, Service, Campaign # Quitar Feature/Price si no hay ViewSet para ellos
 from ..permissions import AllowAny, CanManageServices, CanManageCampaigns, IsAdminOrDragon
+from ..catalog_snapshot import get_catalog_snapshot
+from ..db_router import ReplicaReadMixin
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.services_catalog import (
@@ -25,7 +31,7 @@ class ServiceCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
 
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Servicios.
     """
@@ -55,12 +61,12 @@ class ServiceViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Campañas de marketing/promocionales.
     """
     queryset = Campaign.objects.prefetch_related(
-        'campaignservice_set__service' # Ajustar related_name si es diferente
+        'included_services__service'
     ).all()
     # Usa el serializer importado correctamente
     serializer_class = CampaignSerializer
@@ -70,5 +76,32 @@ class CampaignViewSet(viewsets.ModelViewSet):
         'is_active': ['exact'],
         'start_date': ['date', 'date__gte', 'date__lte'],
         'end_date': ['date', 'date__gte', 'date__lte', 'isnull'],
-        'name': ['icontains'],
-    }
\ No newline at end of file
+        'campaign_name': ['icontains'],
+    }
+
+
+class PublicCatalogView(APIView):
+    """
+    Catálogo público publicado (categorías, servicios, características y precios vigentes).
+    Sirve el snapshot precalculado desde la caché compartida con ETag/Last-Modified;
+    las peticiones condicionales reciben 304 sin tocar la base de datos.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []  # Público: evita validar tokens en cada hit
+    max_age = 300
+
+    def get(self, request, *args, **kwargs):
+        return catalog_snapshot_response(request, get_catalog_snapshot(), self.max_age)
+
+
+def catalog_snapshot_response(request, snapshot, max_age):
+    """ 200 con el snapshot o 304 si la petición condicional coincide (también para la vista asíncrona). """
+    etag, last_modified = snapshot['etag'], int(snapshot['last_modified'])
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(snapshot['body'], content_type='application/json; charset=utf-8')
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
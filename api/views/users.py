@@ -5,9 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.contrib.auth import get_user_model
 
-# --- Importaciones de Serializers Corregidas ---
-from ..serializers.base import BasicUserSerializer # Importar desde base.py
-# ----------------------------------------------
+from ..principal import get_principal
 
 User = get_user_model()
 
@@ -19,22 +17,10 @@ class UserMeView(APIView):
 
     def get(self, request):
         """
-        Obtiene y serializa los datos del usuario logueado.
+        Devuelve el principal de sesión cacheado (mismos campos que BasicUserSerializer);
+        request.user ya viene cargado por la autenticación JWT.
         """
-        try:
-            user = User.objects.select_related(
-                'profile__primary_role',
-                'employee_profile__position'
-            ).get(pk=request.user.pk)
-        except User.DoesNotExist:
-             return Response({"detail": "Usuario no encontrado."}, status=status.HTTP_404_NOT_FOUND)
-        except AttributeError as e:
-             print(f"Advertencia: Error al acceder a relaciones en UserMeView para usuario {request.user.pk}: {e}")
-             user = request.user
-
-        # Usa el BasicUserSerializer importado correctamente
-        serializer = BasicUserSerializer(user, context={'request': request})
-        return Response(serializer.data)
+        return Response(get_principal(request.user))
 
 # Si añades UserViewSet u otras vistas aquí que usen UserCreateSerializer, UserRoleSerializer, etc.
 # deberás importarlos desde ..serializers.users
@@ -3,12 +3,16 @@ import logging
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
 
 # Importaciones relativas
 from ..models import Notification, AuditLog
 from ..permissions import IsAuthenticated, CanViewAuditLogs, IsAdminOrDragon
+from ..exports import ExportMixin, as_json
+from ..db_pool import pool_metrics
+from ..db_router import ReplicaReadMixin
 
 # --- Importaciones de Serializers Corregidas ---
 from ..serializers.utilities import NotificationSerializer, AuditLogSerializer
@@ -69,9 +73,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return Response({'unread_count': count})
 
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(ReplicaReadMixin, ExportMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet de solo lectura para ver los Registros de Auditoría (Audit Logs).
+    Exportación: GET audit-logs/export/?output=csv|xlsx
     """
     queryset = AuditLog.objects.select_related('user').all().order_by('-timestamp')
     # Usa el serializer importado correctamente
@@ -82,7 +87,20 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         'user__username': ['exact', 'icontains'],
         'action': ['exact', 'icontains'],
         'timestamp': ['date', 'date__gte', 'date__lte', 'year', 'month', 'time__gte', 'time__lte'],
-        'target_model': ['exact', 'icontains'],
-        'target_id': ['exact'],
-        'ip_address': ['exact'],
-    }
\ No newline at end of file
+    }
+    export_basename = 'auditoria'
+    export_columns = (
+        ('ID', 'id'), ('Fecha', 'timestamp'), ('Usuario', 'user__username'),
+        ('Acción', 'action'), ('Detalles', 'details', as_json),
+    )
+
+
+class DatabasePoolMetricsView(APIView):
+    """
+    Métricas de conexiones a la base de datos del proceso que atiende la petición:
+    abiertas, activas, ociosas, reutilizadas y tiempo de espera (ver api/db_pool.py).
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrDragon]
+
+    def get(self, request):
+        return Response(pool_metrics.snapshot())
@@ -0,0 +1,134 @@
+# api/workload.py
+"""
+Carga de trabajo por asignado: contadores de tareas abiertas (WorkloadCounter) por
+empleado y por proveedor.
+
+- Las señales de Deliverable aplican deltas (+1/-1) con `F()` al crear, reasignar,
+  cambiar entre estado abierto/final o borrar un entregable. El estado anterior sale
+  de la instantánea en memoria (api/tracking.py), sin volver a leer la fila.
+- Si falta el contador de un asignado, se crea contando sus tareas abiertas (usa el
+  índice compuesto assigned_*/status/due_date).
+- Las operaciones masivas que no disparan señales (`update()`, `bulk_create`) deben
+  terminar con `rebuild_workload()` o `python manage.py rebuild_workload`.
+
+El ranking (`employee_ranking`, `provider_ranking`) es una sola query sobre los
+asignados, sin recorrer sus entregables.
+"""
+import logging
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Deliverable, Employee, Provider, WorkloadCounter
+
+logger = logging.getLogger(__name__)
+
+ASSIGNEE_FIELDS = ('employee', 'provider')
+
+
+def open_deliverables():
+    return Deliverable.objects.exclude(status__in=Deliverable.FINAL_STATUSES)
+
+def count_open_tasks(kind, pk):
+    return open_deliverables().filter(**{f'assigned_{kind}_id': pk}).count()
+
+def apply_workload_delta(kind, pk, delta):
+    """ Suma `delta` al contador del asignado; si no existe, lo crea con el conteo real. """
+    if not pk or not delta:
+        return
+    lookup = {f'{kind}_id': pk}
+    if WorkloadCounter.objects.filter(**lookup).update(open_tasks=F('open_tasks') + delta):
+        return
+    try:
+        with transaction.atomic():
+            WorkloadCounter.objects.get_or_create(**lookup, defaults={'open_tasks': count_open_tasks(kind, pk)})
+    except IntegrityError:
+        # El asignado fue eliminado en esta misma transacción
+        logger.debug(f"[Workload] No se pudo crear el contador de {kind} {pk}.")
+
+
+WORKLOAD_FIELDS = ('assigned_employee', 'assigned_provider', 'status')
+
+def workload_state(instance):
+    """ (empleado, proveedor, abierta) actual del entregable; None si algún campo está diferido. """
+    if {'assigned_employee_id', 'assigned_provider_id', 'status'} & instance.get_deferred_fields():
+        return None
+    return (instance.assigned_employee_id, instance.assigned_provider_id, instance.is_open)
+
+def initial_workload_state(instance):
+    """ El mismo estado según los valores cargados; None si alguno se desconoce (diferido). """
+    if not all(instance.tracked_known(name) for name in WORKLOAD_FIELDS):
+        return None
+    employee_id, provider_id, status = (instance.tracked_initial(name) for name in WORKLOAD_FIELDS)
+    return (employee_id, provider_id, status not in Deliverable.FINAL_STATUSES)
+
+def workload_deltas(old, new):
+    deltas = Counter()
+    for state, sign in ((old, -1), (new, +1)):
+        employee_id, provider_id, is_open = state
+        if is_open:
+            deltas[('employee', employee_id)] += sign
+            deltas[('provider', provider_id)] += sign
+    return {key: delta for key, delta in deltas.items() if key[1] and delta}
+
+
+@receiver(post_save, sender=Deliverable)
+def workload_update_signal(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = (None, None, False) if created else initial_workload_state(instance)
+    new = workload_state(instance)
+    if old is None or new is None:
+        # Instancia cargada con campos diferidos: se recuentan los asignados actuales
+        for kind, pk in zip(ASSIGNEE_FIELDS, (instance.assigned_employee_id, instance.assigned_provider_id)):
+            if pk:
+                WorkloadCounter.objects.update_or_create(**{f'{kind}_id': pk}, defaults={'open_tasks': count_open_tasks(kind, pk)})
+        return
+    for (kind, pk), delta in workload_deltas(old, new).items():
+        apply_workload_delta(kind, pk, delta)
+
+@receiver(post_delete, sender=Deliverable)
+def workload_delete_signal(sender, instance, **kwargs):
+    old = initial_workload_state(instance) or workload_state(instance)
+    if old is None:
+        return
+    for (kind, pk), delta in workload_deltas(old, (None, None, False)).items():
+        apply_workload_delta(kind, pk, delta)
+
+
+def rebuild_workload():
+    """ Recalcula todos los contadores con dos agregaciones. Devuelve el número de contadores. """
+    open_qs = open_deliverables().order_by()
+    counters = [
+        WorkloadCounter(employee_id=row['assigned_employee'], open_tasks=row['total'])
+        for row in open_qs.filter(assigned_employee__isnull=False).values('assigned_employee').annotate(total=Count('id'))
+    ] + [
+        WorkloadCounter(provider_id=row['assigned_provider'], open_tasks=row['total'])
+        for row in open_qs.filter(assigned_provider__isnull=False).values('assigned_provider').annotate(total=Count('id'))
+    ]
+    with transaction.atomic():
+        WorkloadCounter.objects.all().delete()
+        WorkloadCounter.objects.bulk_create(counters, batch_size=1000)
+    logger.info(f"[Workload] Contadores reconstruidos: {len(counters)}.")
+    return len(counters)
+
+
+# --- Ranking ---
+
+def employee_ranking(queryset=None):
+    """ Empleados activos anotados con `open_tasks`, de menor a mayor carga. """
+    if queryset is None:
+        queryset = Employee.objects.filter(user__is_active=True)
+    return queryset.annotate(open_tasks=Coalesce('workload__open_tasks', Value(0))).order_by(
+        'open_tasks', 'user__first_name', 'user__last_name', 'pk'
+    )
+
+def provider_ranking(queryset=None):
+    """ Proveedores activos anotados con `open_tasks`, de menor a mayor carga. """
+    if queryset is None:
+        queryset = Provider.objects.filter(is_active=True)
+    return queryset.annotate(open_tasks=Coalesce('workload__open_tasks', Value(0))).order_by('open_tasks', 'name', 'pk')